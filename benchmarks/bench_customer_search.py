@@ -0,0 +1,97 @@
+"""
+Поиск клиентов: полный проход LIKE '%...%' против индекса customers_fts.
+
+Для каждого размера создается БД по миграциям (включая онлайн-миграцию
+с FTS5-индексом), заполняется синтетическими клиентами, после чего оба
+варианта поиска CustomerManager выполняются на одних и тех же запросах.
+
+Запуск из корня проекта:
+    python benchmarks/bench_customer_search.py [--sizes 10000,100000,1000000] [--rounds 20]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import get_pool, sqlite_connection
+from migrations import run_migrations, run_online_migrations
+from rep_customer.customer_manager_class import CustomerManager, SEARCH_LIMIT
+
+FIRST_NAMES = ['Анна', 'Мария', 'Иван', 'Петр', 'Ольга', 'Елена', 'Сергей', 'Дмитрий', 'Наталья', 'Алексей']
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Кузнецов', 'Смирнов', 'Попов', 'Соколов', 'Лебедев', 'Новиков', 'Морозов']
+
+QUERIES = {
+    'имя (много совпадений)': 'Иван',
+    'username (одно совпадение)': 'user_4242',
+    'хвост телефона': '4242',
+    'телефон целиком': '+7 (913) 000-42-42',
+    'номер карты': '00004242',
+}
+
+
+def fill_customers(count: int, seed: int = 1) -> float:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        rows.append((
+            f"user_{i}", first, last,
+            f"+7913{i:07d}", f"{i:08d}",
+        ))
+
+    started = time.perf_counter()
+    with sqlite_connection() as conn:
+        conn.executemany('''
+            INSERT INTO customers (username, first_name, last_name, phone_number, card_number)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    return time.perf_counter() - started
+
+
+def measure(search, query: str, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        search(query)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def run_size(count: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, f'search_{count}.db')
+        run_migrations()
+        run_online_migrations()
+
+        insert_time = fill_customers(count)
+        manager = CustomerManager()
+        indexed = CustomerManager.find_customers_by_search_query.__wrapped__
+
+        print(f"\nКлиентов: {count:,} (вставка с триггером индекса: {insert_time:.1f} с)")
+        print(f"{'запрос':<28}{'LIKE, мс':>12}{'FTS5, мс':>12}{'ускорение':>12}")
+        for title, query in QUERIES.items():
+            like_ms = measure(lambda q: manager._find_customers_by_like(q, SEARCH_LIMIT), query, rounds)
+            fts_ms = measure(lambda q: indexed(manager, q), query, rounds)
+            print(f"{title:<28}{like_ms:>12.2f}{fts_ms:>12.2f}{like_ms / fts_ms:>11.1f}x")
+
+        get_pool().close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        run_size(size, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Сравнение пропускной способности: соединение на каждый запрос
+против пула долгоживущих соединений.
+
+Запуск из корня проекта:
+    python benchmarks/bench_db_pool.py [--ops 5000]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ConnectionPool
+
+
+@contextmanager
+def legacy_connection(db_path):
+    """Прежняя схема: новое соединение и PRAGMA на каждый запрос"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def prepare_db(db_path, rows=2000):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE customers (
+            customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_number TEXT UNIQUE,
+            total_purchases REAL DEFAULT 0
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO customers (card_number) VALUES (?)",
+        [(f"{i:06d}",) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(connect, ops, rows):
+    start = time.perf_counter()
+    for i in range(ops):
+        with connect() as conn:
+            cursor = conn.cursor()
+            if i % 5 == 0:
+                cursor.execute(
+                    "UPDATE customers SET total_purchases = total_purchases + 1 WHERE customer_id = ?",
+                    (i % rows + 1,)
+                )
+            else:
+                cursor.execute(
+                    "SELECT * FROM customers WHERE card_number = ?",
+                    (f"{i % rows:06d}",)
+                )
+                cursor.fetchone()
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ops', type=int, default=5000)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        pooled_path = os.path.join(tmp, 'pooled.db')
+        prepare_db(legacy_path, args.rows)
+        prepare_db(pooled_path, args.rows)
+
+        legacy = run(lambda: legacy_connection(legacy_path), args.ops, args.rows)
+
+        pool = ConnectionPool(pooled_path)
+        pooled = run(pool.connection, args.ops, args.rows)
+        pool.close_all()
+
+    print(f"Операций: {args.ops} (каждая 5-я - запись)")
+    print(f"Соединение на запрос: {legacy:10.0f} оп/с")
+    print(f"Пул соединений:       {pooled:10.0f} оп/с")
+    print(f"Ускорение:            {pooled / legacy:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Проверка очереди исходящих сообщений на поддельном Bot.
+
+Сценарии:
+- рассылка напоминаний во много чатов одновременно (общий лимит);
+- серия удалений и отправок в одном чате (лимит чата);
+- быстрые правки одного сообщения (слияние правок);
+- RetryAfter и TimedOut от Telegram (повторы).
+
+Поддельный Bot записывает время каждого вызова; по записям проверяется, что
+лимиты не превышены и каждая операция доставлена.
+
+Запуск из корня проекта:
+    python benchmarks/bench_outbound.py [--chats 200] [--rate 50]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import RetryAfter, TimedOut
+
+from utils.outbound import OutboundQueue
+
+
+class FakeBot:
+    """Bot без сети: фиксирует вызовы, по заказу отвечает ошибками"""
+
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.calls = []
+        self.failures = []  # исключения, которые вернут следующие вызовы
+
+    async def _call(self, method: str, chat_id: int, **kwargs):
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.calls.append((time.monotonic(), method, chat_id, kwargs))
+        return kwargs.get('text', True)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return await self._call('send_message', chat_id, text=text, **kwargs)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        return await self._call('edit_message_text', chat_id, message_id=message_id, text=text, **kwargs)
+
+    async def delete_message(self, chat_id, message_id):
+        return await self._call('delete_message', chat_id, message_id=message_id)
+
+
+def max_in_window(times, window):
+    """Максимум вызовов в любом окне длиной window секунд"""
+    best, left = 0, 0
+    for right in range(len(times)):
+        while times[right] - times[left] >= window:
+            left += 1
+        best = max(best, right - left + 1)
+    return best
+
+
+async def fan_out(chats: int, rate: float) -> None:
+    bot = FakeBot()
+    queue = OutboundQueue(global_rate=rate, chat_rate=1, chat_burst=3, backoff=0.05)
+
+    started = time.monotonic()
+    await asyncio.gather(*(queue.send_message(bot, chat_id, "Напоминание") for chat_id in range(chats)))
+    elapsed = time.monotonic() - started
+
+    times = sorted(call[0] for call in bot.calls)
+    print(f"Рассылка: {chats} чатов за {elapsed:.2f} с, "
+          f"{chats / elapsed:.1f}/с при лимите {rate:.0f}/с, "
+          f"пик за секунду {max_in_window(times, 1.0)}")
+    assert len(bot.calls) == chats
+    assert max_in_window(times, 1.0) <= rate + 1
+
+
+async def single_chat() -> None:
+    bot = FakeBot()
+    queue = OutboundQueue(global_rate=30, chat_rate=1, chat_burst=3, backoff=0.05)
+
+    started = time.monotonic()
+    await asyncio.gather(
+        *(queue.delete_message(bot, 1, message_id) for message_id in range(12)),
+        *(queue.send_message(bot, 1, f"Сообщение {i}") for i in range(3)),
+    )
+    elapsed = time.monotonic() - started
+
+    order = [call[1] for call in bot.calls]
+    print(f"Один чат: 12 удалений и 3 отправки за {elapsed:.2f} с, "
+          f"порядок сохранен: {order == ['delete_message'] * 12 + ['send_message'] * 3}")
+    assert order == ['delete_message'] * 12 + ['send_message'] * 3
+
+
+async def coalescing() -> None:
+    bot = FakeBot()
+    queue = OutboundQueue(global_rate=30, chat_rate=1, chat_burst=1, backoff=0.05)
+
+    # Первое сообщение забирает токен чата, правки ждут и сливаются
+    await queue.send_message(bot, 1, "Меню")
+    results = await asyncio.gather(
+        *(queue.edit_message_text(bot, 1, 100, f"Страница {page}") for page in range(10))
+    )
+
+    edits = [call for call in bot.calls if call[1] == 'edit_message_text']
+    stats = queue.get_stats()
+    print(f"Правки: 10 запрошено, отправлено {len(edits)}, слито {stats['coalesced']}, "
+          f"итоговый текст: {edits[-1][3]['text']!r}")
+    assert edits[-1][3]['text'] == "Страница 9"
+    assert len(edits) < 10
+    assert len(results) == 10
+
+
+async def retries() -> None:
+    bot = FakeBot()
+    bot.failures = [RetryAfter(1), TimedOut(), TimedOut()]
+    queue = OutboundQueue(global_rate=30, chat_rate=10, chat_burst=10, backoff=0.05)
+
+    started = time.monotonic()
+    await queue.send_message(bot, 1, "После повторов")
+    elapsed = time.monotonic() - started
+
+    stats = queue.get_stats()
+    print(f"Повторы: доставлено за {elapsed:.2f} с, повторов {stats['retries']}, "
+          f"из них RetryAfter {stats['retry_after']}")
+    assert stats['delivered'] == 1 and stats['retries'] == 3
+
+
+async def main_async(args) -> None:
+    await fan_out(args.chats, args.rate)
+    await single_chat()
+    await coalescing()
+    await retries()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Микробенчмарк проверки доступа: все маршруты × все роли.
+
+Сравнивает прежнюю интерпретацию MenuConfig (поиск по восьми меню, разбор типа
+конфигурации, поиск разрешения в списке) со скомпилированными масками ролей.
+Заодно проверяет, что оба способа дают одинаковый результат.
+
+Запуск из корня проекта:
+    python benchmarks/bench_permissions.py [--rounds 200]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import router
+from config.permission_menus import MenuConfig
+from handlers.admin_roles_class import role_manager, Permission, UserRole
+
+MENUS = [
+    MenuConfig.MAIN_MENU,
+    MenuConfig.INVENTORY_SUBMENU,
+    MenuConfig.REMINDERS_SUBMENU,
+    MenuConfig.CUSTOMERS_SUBMENU,
+    MenuConfig.BONUS_SUBMENU,
+    MenuConfig.ADMIN_SUBMENU,
+    MenuConfig.CHAT_SUBMENU,
+    MenuConfig.BACK_BUTTONS
+]
+
+
+def legacy_is_allowed(role, button_text):
+    """Прежний алгоритм Router.check_permission при известной роли"""
+    config = None
+    for menu in MENUS:
+        if button_text in menu:
+            config = menu[button_text]
+            break
+
+    if config is None:
+        return True
+    if isinstance(config, Permission):
+        return config in role_manager.ROLE_PERMISSIONS.get(role, [])
+    if isinstance(config, UserRole):
+        return role == config
+    if isinstance(config, dict):
+        if 'role' in config:
+            if config.get('invert', False):
+                return role != config['role']
+            return role == config['role']
+        if 'permission' in config:
+            return config['permission'] in role_manager.ROLE_PERMISSIONS.get(role, [])
+    return False
+
+
+def run(check, pairs, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for role, button_text in pairs:
+            check(role, button_text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(pairs)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    pairs = [(role, button_text) for button_text in router.routes for role in UserRole]
+
+    mismatches = [
+        (role.value, button_text) for role, button_text in pairs
+        if legacy_is_allowed(role, button_text) != router.is_allowed(role, button_text)
+    ]
+    if mismatches:
+        print(f"❌ Расхождения с прежним алгоритмом: {mismatches}")
+        sys.exit(1)
+
+    legacy = run(legacy_is_allowed, pairs, args.rounds)
+    compiled = run(router.is_allowed, pairs, args.rounds)
+
+    print(f"Маршрутов: {len(router.routes)}, ролей: {len(UserRole)}, проверок за проход: {len(pairs)}")
+    print(f"Интерпретация MenuConfig: {legacy:8.0f} нс/проверка")
+    print(f"Битовые маски:            {compiled:8.0f} нс/проверка")
+    print(f"Ускорение:                {legacy / compiled:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
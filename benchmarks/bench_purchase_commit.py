@@ -0,0 +1,159 @@
+"""
+Задержка шага подтверждения покупки.
+
+Сравниваются:
+- прежняя схема: поиск клиента по карте, расчет процента и запись покупки
+  отдельными обращениями к БД, затем чтение итогов клиента;
+- CustomerPurchase.commit_purchase: одна транзакция BEGIN IMMEDIATE.
+
+Дополнительно проверяется, что повторное подтверждение с тем же ключом
+идемпотентности не создает вторую покупку.
+
+Запуск из корня проекта:
+    python benchmarks/bench_purchase_commit.py [--customers 10000] [--rounds 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import decimal
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import handlers  # noqa: F401 - пакет обработчиков первым, как в main.py (циклический импорт клавиатур)
+import database
+from database import get_pool, sqlite_connection, sqlite_read_connection
+from migrations import run_migrations, run_online_migrations
+from rep_customer.customer_purchase_class import CustomerPurchase
+from rep_bonus.bonus_level_resolver import bonus_level_resolver
+
+OPERATOR_TELEGRAM_ID = 1000
+
+
+def fill(customers: int) -> None:
+    with sqlite_connection() as conn:
+        conn.execute('''
+            INSERT INTO users (telegram_id, username, is_active) VALUES (?, 'operator', 1)
+        ''', (OPERATOR_TELEGRAM_ID,))
+        conn.execute('''
+            INSERT INTO bonus_programs (program_name, base_percent, is_active) VALUES ('Программа', 3, 1)
+        ''')
+        conn.executemany('''
+            INSERT INTO bonus_levels (program_id, level_name, min_total_purchases, bonus_percent)
+            VALUES (1, ?, ?, ?)
+        ''', [('Базовый', 0, 3), ('Серебро', 1000000, 5), ('Золото', 5000000, 7)])  # пороги в копейках
+        conn.executemany('''
+            INSERT INTO customers (username, phone_number, card_number, bonus_program_id)
+            VALUES (?, ?, ?, 1)
+        ''', [(f"user_{i}", f"+7913{i:07d}", f"{i:08d}") for i in range(customers)])
+        conn.commit()
+
+
+def legacy_confirm(card_number: str, amount: decimal.Decimal) -> int:
+    """Прежний путь: каждый шаг - отдельное обращение к БД"""
+    with sqlite_read_connection() as conn:
+        customer = dict(conn.execute('''
+            SELECT customer_id, total_purchases, bonus_program_id
+            FROM customers WHERE card_number = ? AND is_active = 1
+        ''', (card_number,)).fetchone())
+
+    with sqlite_read_connection() as conn:
+        levels = conn.execute('''
+            SELECT bonus_percent, min_total_purchases FROM bonus_levels
+            WHERE program_id = ? ORDER BY min_total_purchases DESC
+        ''', (customer['bonus_program_id'],)).fetchall()
+    percent = next((decimal.Decimal(str(level['bonus_percent'])) for level in levels
+                    if customer['total_purchases'] >= level['min_total_purchases']), decimal.Decimal('3.0'))
+    bonus = float(amount * percent / 100)
+
+    with sqlite_connection() as conn:
+        operator = conn.execute('''
+            SELECT user_id FROM users WHERE telegram_id = ? AND is_active = 1
+        ''', (OPERATOR_TELEGRAM_ID,)).fetchone()
+        cursor = conn.execute('''
+            INSERT INTO customer_purchases (customer_id, amount, bonus_earned, operator_id)
+            VALUES (?, ?, ?, ?)
+        ''', (customer['customer_id'], float(amount), bonus, operator['user_id']))
+        purchase_id = cursor.lastrowid
+        conn.execute('''
+            UPDATE customers SET total_purchases = total_purchases + ?,
+                total_bonuses = total_bonuses + ?, available_bonuses = available_bonuses + ?
+            WHERE customer_id = ?
+        ''', (float(amount), bonus, bonus, customer['customer_id']))
+        conn.execute('''
+            INSERT INTO bonus_transactions (customer_id, purchase_id, bonus_amount, transaction_type)
+            VALUES (?, ?, ?, 'earned')
+        ''', (customer['customer_id'], purchase_id, bonus))
+        conn.commit()
+
+    with sqlite_read_connection() as conn:
+        conn.execute('''
+            SELECT total_purchases, available_bonuses FROM customers WHERE customer_id = ?
+        ''', (customer['customer_id'],)).fetchone()
+    return purchase_id
+
+
+def percentiles(samples) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return f"медиана {statistics.median(samples):.3f} мс, p95 {p95:.3f} мс"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'purchases.db')
+        run_migrations()
+        run_online_migrations()
+        fill(args.customers)
+
+        purchase = CustomerPurchase()
+        commit = CustomerPurchase.commit_purchase.__wrapped__
+        rng = random.Random(1)
+
+        legacy, pipeline = [], []
+        for i in range(args.rounds):
+            customer_id = rng.randrange(args.customers) + 1
+            amount = decimal.Decimal(rng.randrange(100, 5000))
+
+            started = time.perf_counter()
+            legacy_confirm(f"{customer_id - 1:08d}", amount)
+            legacy.append((time.perf_counter() - started) * 1000)
+
+            data = {'customer': {'customer_id': customer_id}, 'amount': str(amount)}
+            started = time.perf_counter()
+            commit(purchase, data, OPERATOR_TELEGRAM_ID, f"bench:{i}")
+            pipeline.append((time.perf_counter() - started) * 1000)
+
+        print(f"Клиентов: {args.customers:,}, подтверждений: {args.rounds:,}")
+        print(f"Прежняя схема:  {percentiles(legacy)}")
+        print(f"commit_purchase: {percentiles(pipeline)}")
+
+        # Повторное подтверждение с тем же ключом
+        data = {'customer': {'customer_id': 1}, 'amount': '500'}
+        first = commit(purchase, data, OPERATOR_TELEGRAM_ID, "bench:duplicate")
+        started = time.perf_counter()
+        second = commit(purchase, data, OPERATOR_TELEGRAM_ID, "bench:duplicate")
+        elapsed = (time.perf_counter() - started) * 1000
+        with sqlite_read_connection() as conn:
+            stored = conn.execute('''
+                SELECT COUNT(*) FROM customer_purchases WHERE idempotency_key = 'bench:duplicate'
+            ''').fetchone()[0]
+        print(f"Повтор: отклонен за {elapsed:.3f} мс, та же операция: "
+              f"{first['purchase_id'] == second['purchase_id']}, записей с ключом: {stored}")
+        assert second['duplicate'] and stored == 1
+
+        print(f"Кэш уровней: {bonus_level_resolver.get_cache_stats()['hit_rate'] * 100:.1f}% попаданий")
+        get_pool().close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Параллельные покупки с одним ограниченным промокодом.
+
+Несколько потоков (у каждого свое соединение) одновременно проводят покупки
+разных клиентов с кодом, у которого max_uses меньше числа покупок.
+Проверяется, что код применен ровно max_uses раз: счетчик, журнал
+применений и покупки с бонусом по коду совпадают, остальные покупки
+отклонены с PromoCodeError и не записаны.
+
+Заодно измеряется пакетная генерация кодов одной транзакцией.
+
+Запуск из корня проекта:
+    python benchmarks/stress_promo.py [--threads 8] [--purchases 50] [--max-uses 100] [--generate 10000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import handlers  # noqa: F401 - пакет обработчиков первым, как в main.py (циклический импорт клавиатур)
+import database
+from database import get_pool, sqlite_connection, sqlite_read_connection
+from migrations import run_migrations
+from rep_bonus.bonus_promo_class import PromoCodeManager, PromoCodeError, PROMO_FIXED
+from rep_customer.customer_purchase_class import CustomerPurchase
+from utils.money import Money
+
+OPERATOR_TELEGRAM_ID = 1
+PROMO_CODE = 'STRESS'
+
+
+def fill(customers: int) -> None:
+    with sqlite_connection() as conn:
+        conn.execute('''
+            INSERT INTO users (telegram_id, username, is_active) VALUES (?, 'operator', 1)
+        ''', (OPERATOR_TELEGRAM_ID,))
+        conn.executemany('''
+            INSERT INTO customers (username, phone_number, card_number) VALUES (?, ?, ?)
+        ''', [(f"c{i}", f"+7913{i:07d}", f"card{i}") for i in range(customers)])
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--purchases', type=int, default=50, help="покупок на поток")
+    parser.add_argument('--max-uses', type=int, default=100)
+    parser.add_argument('--generate', type=int, default=10000, help="кодов в пакете")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'promo.db')
+        run_migrations()
+        fill(args.threads * args.purchases)
+
+        promo = PromoCodeManager()
+        PromoCodeManager.create_code.__wrapped__(promo, PROMO_CODE, PROMO_FIXED, Money.parse('100'),
+                                                 max_uses=args.max_uses)
+
+        purchases = CustomerPurchase()
+        commit = CustomerPurchase.commit_purchase.__wrapped__
+        barrier = threading.Barrier(args.threads)
+        lock = threading.Lock()
+        counters = {'ok': 0, 'rejected': 0, 'errors': 0}
+
+        def worker(n: int):
+            barrier.wait()
+            for i in range(args.purchases):
+                customer_id = n * args.purchases + i + 1
+                data = {'customer': {'customer_id': customer_id}, 'amount': '1000', 'promo_code': PROMO_CODE}
+                try:
+                    commit(purchases, data, OPERATOR_TELEGRAM_ID, f"stress:{customer_id}")
+                    result = 'ok'
+                except PromoCodeError:
+                    result = 'rejected'
+                except Exception:
+                    result = 'errors'
+                with lock:
+                    counters[result] += 1
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with sqlite_read_connection() as conn:
+            used = conn.execute("SELECT used_count FROM promo_codes WHERE code = ?", (PROMO_CODE,)).fetchone()[0]
+            redemptions = conn.execute("SELECT COUNT(*) FROM promo_redemptions").fetchone()[0]
+            saved = conn.execute("SELECT COUNT(*) FROM customer_purchases").fetchone()[0]
+
+        expected = min(args.max_uses, args.threads * args.purchases)
+        print(f"Потоков: {args.threads}, покупок: {args.threads * args.purchases}, max_uses: {args.max_uses}")
+        print(f"Покупки с кодом: {elapsed:.2f} сек, применено {counters['ok']}, "
+              f"отклонено {counters['rejected']}, ошибок {counters['errors']}")
+        print(f"  счетчик {used}, применений в журнале {redemptions}, покупок записано {saved} - "
+              f"{'OK' if used == redemptions == saved == counters['ok'] == expected else 'РАСХОЖДЕНИЕ'}")
+        assert counters['errors'] == 0 and used == redemptions == saved == counters['ok'] == expected
+
+        started = time.perf_counter()
+        batch = PromoCodeManager.generate_codes.__wrapped__(promo, args.generate, PROMO_FIXED, Money.parse('50'))
+        elapsed = time.perf_counter() - started
+        print(f"Генерация {len(batch['codes'])} кодов одной транзакцией: {elapsed:.2f} сек")
+        assert len(set(batch['codes'])) == args.generate
+
+        get_pool().close_all()
+
+
+if __name__ == '__main__':
+    main()
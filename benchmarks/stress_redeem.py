@@ -0,0 +1,172 @@
+"""
+Параллельные списания бонусов по одной карте.
+
+Несколько потоков (у каждого свое соединение, как у бота и консольных
+утилит, работающих с одной БД) одновременно списывают бонусы одного клиента.
+Сравниваются:
+- чтение баланса, проверка в коде и запись нового значения - гонка,
+  баланс уходит в минус или списания теряются;
+- BonusRedemption.redeem: условный UPDATE ... WHERE available_bonuses >= ?
+  и запись в журнал одной транзакцией.
+
+После прогона проверяется, что баланс не отрицательный и совпадает
+с журналом: начислено - сумма успешных списаний.
+
+Запуск из корня проекта:
+    python benchmarks/stress_redeem.py [--threads 8] [--attempts 200] [--balance 5000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import handlers  # noqa: F401 - пакет обработчиков первым, как в main.py (циклический импорт клавиатур)
+import database
+from database import get_pool, sqlite_connection, sqlite_read_connection
+from migrations import run_migrations
+from rep_customer.customer_redeem_class import BonusRedemption
+from utils.money import Money
+
+REDEEM_AMOUNT = Money.parse('10')
+CHECK_AMOUNT = Money.parse('100')
+
+
+def fill(balance: Money) -> None:
+    with sqlite_connection() as conn:
+        for card in ('race', 'atomic'):
+            cursor = conn.execute('''
+                INSERT INTO customers (username, phone_number, card_number, total_bonuses, available_bonuses)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (card, f"+7913{len(card):07d}", card, balance, balance))
+            conn.execute('''
+                INSERT INTO bonus_transactions (customer_id, bonus_amount, transaction_type)
+                VALUES (?, ?, 'earned')
+            ''', (cursor.lastrowid, balance))
+        conn.commit()
+
+
+def customer_id(card: str) -> int:
+    with sqlite_read_connection() as conn:
+        return conn.execute("SELECT customer_id FROM customers WHERE card_number = ?", (card,)).fetchone()[0]
+
+
+def racy_redeem(cid: int, amount: Money) -> bool:
+    """Чтение - проверка в коде - запись: между шагами баланс меняют другие"""
+    with sqlite_read_connection() as conn:
+        available = Money.from_db(conn.execute(
+            "SELECT available_bonuses FROM customers WHERE customer_id = ?", (cid,)
+        ).fetchone()[0])
+    if available < amount:
+        return False
+
+    time.sleep(0)  # отдаем GIL, как это делает цикл событий между await
+    with sqlite_connection() as conn:
+        conn.execute('''
+            INSERT INTO bonus_transactions (customer_id, bonus_amount, transaction_type)
+            VALUES (?, ?, 'spent')
+        ''', (cid, amount))
+        conn.execute("UPDATE customers SET available_bonuses = ? WHERE customer_id = ?",
+                     (available - amount, cid))
+        conn.commit()
+    return True
+
+
+def run(threads: int, attempts: int, redeem_one) -> tuple:
+    """Запускает потоки одновременно, возвращает (успешных списаний, ошибок, сек)"""
+    barrier = threading.Barrier(threads)
+    lock = threading.Lock()
+    counters = {'ok': 0, 'errors': 0}
+
+    def worker(n: int):
+        barrier.wait()
+        for i in range(attempts):
+            try:
+                ok = redeem_one(n, i)
+            except Exception:
+                ok = None
+            with lock:
+                if ok:
+                    counters['ok'] += 1
+                elif ok is None:
+                    counters['errors'] += 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counters['ok'], counters['errors'], time.perf_counter() - started
+
+
+def check(cid: int, balance: Money, redeemed: int) -> str:
+    with sqlite_read_connection() as conn:
+        available = Money.from_db(conn.execute(
+            "SELECT available_bonuses FROM customers WHERE customer_id = ?", (cid,)
+        ).fetchone()[0])
+        spent = Money.from_db(conn.execute('''
+            SELECT COALESCE(SUM(bonus_amount), 0) FROM bonus_transactions
+            WHERE customer_id = ? AND transaction_type = 'spent'
+        ''', (cid,)).fetchone()[0])
+
+    consistent = available == balance - spent and available >= Money()
+    return (f"успешных списаний {redeemed}, списано по журналу {spent} руб., "
+            f"баланс {available} руб. (ожидалось {balance - spent}) - "
+            f"{'OK' if consistent else 'РАСХОЖДЕНИЕ'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=200)
+    parser.add_argument('--balance', default='5000', help="начальный баланс, руб.")
+    args = parser.parse_args()
+
+    balance = Money.parse(args.balance)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'redeem.db')
+        run_migrations()
+        fill(balance)
+
+        race_id, atomic_id = customer_id('race'), customer_id('atomic')
+        print(f"Потоков: {args.threads}, попыток на поток: {args.attempts}, "
+              f"баланс: {balance} руб., списание: {REDEEM_AMOUNT} руб.")
+
+        ok, errors, elapsed = run(args.threads, args.attempts,
+                                  lambda n, i: racy_redeem(race_id, REDEEM_AMOUNT))
+        print(f"Чтение-проверка-запись: {elapsed:.2f} сек, ошибок {errors}")
+        print(f"  {check(race_id, balance, ok)}")
+
+        redemption = BonusRedemption()
+        redeem = BonusRedemption.redeem.__wrapped__
+
+        redeemed_keys = []
+
+        def atomic_redeem(n: int, i: int) -> bool:
+            key = f"stress:{n}:{i}"
+            result = redeem(redemption, atomic_id, REDEEM_AMOUNT, CHECK_AMOUNT, key)
+            if result['status'] == 'ok':
+                redeemed_keys.append(key)
+            return result['status'] == 'ok'
+
+        ok, errors, elapsed = run(args.threads, args.attempts, atomic_redeem)
+        print(f"BonusRedemption.redeem: {elapsed:.2f} сек, ошибок {errors}")
+        print(f"  {check(atomic_id, balance, ok)}")
+        assert errors == 0 and ok == min(args.threads * args.attempts, balance.kopecks // REDEEM_AMOUNT.kopecks)
+
+        # Повтор того же подтверждения не списывает второй раз
+        repeat = redeem(redemption, atomic_id, REDEEM_AMOUNT, CHECK_AMOUNT, redeemed_keys[0])
+        print(f"Повтор подтверждения: {repeat['status']}")
+        assert repeat['status'] == 'duplicate'
+
+        get_pool().close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -80,6 +80,8 @@ class Buttons:
     ACTIVATE_PROGRAM = "✅ Активация программы"
     DEACIVATE_PROGRAM = "❌ Деактивация программы"
     ANALITIC_PROGRAM = "📊 Статистика программы"
+    SIMULATE_PROGRAM = "🧪 Симуляция программы"
+    ASSIGN_PROGRAM = "🎯 Назначить программу"
 
     LIST_LEVELS = "📋 Список уровней"
     ADD_LEVELS = "➕ Создать уровень"
@@ -148,6 +150,7 @@ class Buttons:
     # Поиск клиента
     SEARCH_BY_CARD = "💳 Поиск по карте"
     SEARCH_BY_PHONE = "📱 Поиск по телефону"
+    SEARCH_BY_PHONE_SUFFIX = "🔢 Последние цифры телефона"
     SEARCH_BY_NAME = "👤 Поиск по имени"
     SEARCH_BY_ID = "🆔 Поиск по ID"
     PURCHASE_HISTORY = "📊 История покупок"
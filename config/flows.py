@@ -0,0 +1,74 @@
+"""
+Имена пошаговых процессов (flow) и их состояний.
+Процесс запускается через flow_engine.start(context, Flows.X, FlowStates.Y),
+обработчики состояний регистрируются в handlers/message_handler.py
+"""
+
+class Flows:
+    """Пошаговые процессы"""
+
+    # Клиенты
+    SELF_REGISTER = "self_register"
+    CUSTOMER_REGISTER = "customer_register"
+    CUSTOMER_PURCHASE = "customer_purchase"
+    CUSTOMER_REDEEM = "customer_redeem"
+    CUSTOMER_SEARCH = "customer_search"
+
+    # Бонусная система
+    BONUS_PROGRAM = "bonus_program"
+    BONUS_SIMULATOR = "bonus_simulator"
+    BONUS_ASSIGN = "bonus_assign"
+    PROMO_CODE = "promo_code"
+    PROMO_TOGGLE = "promo_toggle"
+
+    # Напоминания
+    REMINDERS = "reminders"
+
+    # Инвентаризация и справочник
+    INVENTORY_ITEM = "inventory_item"
+    CATALOG_ADD = "catalog_add"
+    CATALOG_EDIT = "catalog_edit"
+    CATALOG_CATEGORY = "catalog_category"
+    CATALOG_DELETE = "catalog_delete"
+
+    # Администрирование
+    CLEANUP = "cleanup"
+    EDIT_USER = "edit_user"
+
+    # Отчеты
+    REPORT = "report"
+
+
+class FlowStates:
+    """Состояния процессов"""
+
+    # Общее состояние для процессов с собственным шагом в user_data
+    INPUT = "input"
+
+    # Регистрация клиента
+    PHONE = "phone"
+    BIRTHDAY = "birthday"
+
+    # Напоминания
+    REMINDER_TYPE = "reminder_type"
+    CUSTOM_REMINDER = "custom_reminder"
+    SCHEDULE_DAY = "schedule_day"
+    SCHEDULE_TIME = "schedule_time"
+
+    # Инвентаризация
+    ITEM_METHOD = "item_method"
+
+    # Очистка чата
+    MESSAGE_COUNT = "message_count"
+    CLEANUP_CONFIRM = "cleanup_confirm"
+
+    # Редактирование пользователя
+    SELECT_USER = "select_user"
+    SELECT_FIELD = "select_field"
+    ENTER_VALUE = "enter_value"
+
+    # Отчет о смене
+    CASH_MORNING = "cash_morning"
+    EXPENSE = "expense"
+    CASH_IN = "cash_in"
+    CASH_ONLINE = "cash_online"
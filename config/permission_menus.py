@@ -100,8 +100,14 @@ class MenuConfig:
         Buttons.LEVELS_SETTINGS: Permission.MANAGE_BONUSES,
         Buttons.PROGRAMS_MANAGEMENT: Permission.MANAGE_BONUSES,
         Buttons.ADD_CUSTOMER_BONUS: Permission.MANAGE_BONUSES,
-        Buttons.DEL_CUSTOMER_BONUS: Permission.MANAGE_BONUSES,
+        Buttons.DEL_CUSTOMER_BONUS: Permission.MANAGE_CUSTOMERS,  # Списание - как и начисление покупок
         Buttons.PROMOCODES: Permission.MANAGE_BONUSES,
+        Buttons.PROMO_LIST: Permission.MANAGE_BONUSES,
+        Buttons.PROMO_ADD: Permission.MANAGE_BONUSES,
+        Buttons.PROMO_ACTIVATE: Permission.MANAGE_BONUSES,
+        Buttons.PROMO_STAT: Permission.MANAGE_BONUSES,
+        Buttons.SIMULATE_PROGRAM: Permission.MANAGE_BONUSES,
+        Buttons.ASSIGN_PROGRAM: UserRole.ADMIN,
         Buttons.BACK_TO_MAIN: None
     }
     
@@ -1,257 +1,397 @@
+import os
+import time
+import atexit
+import asyncio
 import sqlite3
+import functools
+import contextvars
 import logging
+import threading
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
 
 logger = logging.getLogger(__name__)
 
+# Путь к файлу БД (можно переопределить переменной окружения DB_PATH)
+DB_PATH = os.getenv('DB_PATH', 'D:\\Documents\\Labirint_bot\\labirint.db')
+
+# Профиль PRAGMA для долгоживущих соединений
+PRAGMA_PROFILE = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",      # в режиме WAL безопасно и заметно быстрее FULL
+    "PRAGMA cache_size = -16000",       # ~16 МБ страничного кэша на соединение
+    "PRAGMA mmap_size = 134217728",     # 128 МБ memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",       # ждем освобождения блокировки записи до 5 сек
+)
+
 def init_db():
-    """Инициализация базы данных"""
+    """Инициализация базы данных (применение миграций схемы)"""
+    from migrations import run_migrations
+
     try:
-        with sqlite_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Таблица пользователей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    telegram_id INTEGER UNIQUE,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    phone_numb TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    language_code TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    reminders_enabled BOOLEAN DEFAULT 0,
-                    reminder_chat_id INTEGER,
-                    reminder_days TEXT,
-                    reminder_time TIME DEFAULT '10:00'
-                )
-            ''')
-            # Таблица клиентов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customers (
-                    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER UNIQUE,
-                    username TEXT NOT NULL,
-                    phone_number TEXT NOT NULL UNIQUE,
-                    email TEXT,
-                    birthday DATE,
-                    first_name TEXT,
-                    last_name TEXT,
-                    card_number TEXT UNIQUE,
-                    registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1,
-                    bonus_program_id INTEGER,
-                    total_purchases DECIMAL(10, 2) DEFAULT 0,
-                    total_bonuses DECIMAL(10, 2) DEFAULT 0,
-                    available_bonuses DECIMAL(10, 2) DEFAULT 0,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (bonus_program_id) REFERENCES bonus_programs(program_id)
-                )
-            ''')
-            
-            # Таблица бонусных программ
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bonus_programs (
-                    program_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    program_name TEXT NOT NULL UNIQUE,
-                    description TEXT,
-                    base_percent DECIMAL(5, 2) NOT NULL,
-                    min_purchase_amount DECIMAL(10, 2) DEFAULT 0,
-                    max_purchase_amount DECIMAL(10, 2),
-                    is_active BOOLEAN DEFAULT 1,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица уровней бонусной программы
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bonus_levels (
-                    level_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    program_id INTEGER NOT NULL,
-                    level_name TEXT NOT NULL,
-                    min_total_purchases DECIMAL(10, 2) NOT NULL,
-                    bonus_percent DECIMAL(5, 2) NOT NULL,
-                    description TEXT,
-                    FOREIGN KEY (program_id) REFERENCES bonus_programs(program_id)
-                )
-            ''')
-            
-            # Таблица транзакций (покупок)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customer_purchases (
-                    purchase_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer_id INTEGER NOT NULL,
-                    amount DECIMAL(10, 2) NOT NULL,
-                    bonus_earned DECIMAL(10, 2) NOT NULL,
-                    purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    description TEXT,
-                    operator_id INTEGER,
-                    purchase_count INTEGER,
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-                    FOREIGN KEY (operator_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица использования бонусов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bonus_transactions (
-                    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer_id INTEGER NOT NULL,
-                    purchase_id INTEGER,
-                    bonus_amount DECIMAL(10, 2) NOT NULL,
-                    transaction_type TEXT CHECK(transaction_type IN ('earned', 'spent', 'expired')) NOT NULL,
-                    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    description TEXT,
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-                    FOREIGN KEY (purchase_id) REFERENCES customer_purchases(purchase_id)
-                )
-            ''')
-            # Таблица пользователей и их ролей
-            cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_roles (
-                        user_id INTEGER PRIMARY KEY,
-                        role TEXT NOT NULL DEFAULT 'barista',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-            ''')
-            # Создаем таблицу reminders
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reminders (
-                    reminder_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER UNIQUE,  -- UNIQUE чтобы у каждого пользователя была только одна запись
-                    chat_id INTEGER,
-                    is_active BOOLEAN DEFAULT 0,
-                    reminder_time TIME DEFAULT '10:00:00',
-                    days_of_week TEXT DEFAULT '1,3',
-                    reminder_type TEXT DEFAULT 'check_stock',
-                    reminder_custom_text TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            # Таблица списков инвентаризации
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory_lists (
-                    list_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER REFERENCES users(user_id),
-                    list_name TEXT DEFAULT 'Основной список',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    inventory_date DATE,  -- Специальная дата проведения инвентаризации
-                    status TEXT DEFAULT 'active',  -- active, completed, cancelled
-                    completed_at TIMESTAMP,
-                    completed_by INTEGER REFERENCES users(user_id),
-                    is_active BOOLEAN DEFAULT 1,
-                    UNIQUE(user_id, list_name)
-                )
-            ''')
-            # Добавим триггер для автоматической установки inventory_date
-            cursor.execute('''
-                CREATE TRIGGER IF NOT EXISTS set_inventory_date 
-                AFTER INSERT ON inventory_lists
-                BEGIN
-                    UPDATE inventory_lists 
-                    SET inventory_date = DATE(created_at)
-                    WHERE list_id = NEW.list_id;
-                END;
-            ''')
-            
-            # Таблица товаров
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory_items (
-                    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    list_id INTEGER REFERENCES inventory_lists(list_id),
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    expected_quantity REAL DEFAULT 1,
-                    unit TEXT DEFAULT 'шт',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(list_id, name)
-                )
-            ''')
-
-            #каталог товаров
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS product_catalog (
-                    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    category TEXT NOT NULL,
-                    name TEXT NOT NULL UNIQUE,
-                    unit TEXT DEFAULT 'шт',
-                    default_quantity REAL DEFAULT 1,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
-
-            # отчет основной по закрытию смены
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS report_watchend (
-                    report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    phone_number TEXT NOT NULL,
-                    username TEXT NOT NULL,
-                    cash_morning INTEGER NOT NULL,
-                    cash_wasted INTEGER DEFAULT 0,
-                    cash_online INTEGER DEFAULT 0,
-                    cash_in INTEGER DEFAULT 0,
-                    cash_rest INTEGER NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-
-            # Вспомогательная таблица для нескольких записей расхода
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS report_expenses (
-                    expense_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    report_id INTEGER NOT NULL,
-                    cash_rested INTEGER NOT NULL,
-                    description TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (report_id) REFERENCES report_watchend(report_id) ON DELETE CASCADE
-                )
-            ''')
-
-            # Создаем индекс для быстрого поиска активных отчетов пользователя
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_report_user_active 
-                ON report_watchend(user_id, is_active)
-            ''')
-
-            conn.commit()
-            logger.info("База данных инициализирована")
-            
+        applied = run_migrations()
+        if applied:
+            logger.info(f"База данных инициализирована, применено миграций: {applied}")
+        else:
+            logger.info("База данных инициализирована, схема актуальна")
+
     except sqlite3.Error as e:
         logger.error(f"Ошибка инициализации БД: {e}")
 
-@contextmanager
-def sqlite_connection(db_path='D:\\Documents\\Labirint_bot\\labirint.db'):
-    """Контекстный менеджер для соединения c SQLite"""
-    conn = None
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
+
+class ConnectionPool:
+    """
+    Пул долгоживущих соединений SQLite.
+
+    Каждый поток получает собственное соединение для записи и отдельное
+    соединение только для чтения. Соединения открываются один раз и
+    переиспользуются, поэтому PRAGMA и открытие файла не повторяются
+    на каждый запрос.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._monitor = None
+        self._wal_ready = False
+        self.stats = {'opened': 0, 'reused': 0, 'readonly_opened': 0, 'readonly_reused': 0}
+
+    # ========== ОТКРЫТИЕ СОЕДИНЕНИЙ ==========
+
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        """Открывает новое соединение и применяет профиль PRAGMA"""
+        if readonly:
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._ensure_wal(conn)
+
         conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
+        for pragma in PRAGMA_PROFILE:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _ensure_wal(self, conn: sqlite3.Connection) -> None:
+        """Переводит БД в режим WAL (настройка сохраняется в файле БД)"""
+        if self._wal_ready or self.db_path == ':memory:':
+            return
+        mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if mode.lower() != 'wal':
+            logger.warning(f"Не удалось включить WAL, текущий режим: {mode}")
+        self._wal_ready = True
+
+    def _supports_readonly(self) -> bool:
+        """Отдельные read-only соединения возможны только для файла на диске"""
+        return self.db_path != ':memory:' and os.path.exists(self.db_path)
+
+    # ========== ПОЛУЧЕНИЕ СОЕДИНЕНИЙ ПОТОКА ==========
+
+    def writer(self) -> sqlite3.Connection:
+        """Соединение для чтения и записи текущего потока"""
+        conn = getattr(self._local, 'writer', None)
+        if conn is None:
+            conn = self._open()
+            self._local.writer = conn
+            self._local.depth = 0
+            self.stats['opened'] += 1
+        else:
+            self.stats['reused'] += 1
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Соединение только для чтения текущего потока"""
+        if not self._supports_readonly():
+            return self.writer()
+
+        conn = getattr(self._local, 'reader', None)
+        if conn is None:
+            conn = self._open(readonly=True)
+            self._local.reader = conn
+            self.stats['readonly_opened'] += 1
+        else:
+            self.stats['readonly_reused'] += 1
+        return conn
+
+    def data_version(self) -> int:
+        """
+        PRAGMA data_version отдельного соединения пула.
+
+        Значение меняется, когда данные закоммитило любое другое соединение,
+        в том числе из другого процесса. Соединение одно на пул - значения
+        сравнимы между вызовами из любых потоков.
+        """
+        with self._lock:
+            if self._monitor is None:
+                self._monitor = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._connections.append(self._monitor)
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def discard(self) -> None:
+        """Сбрасывает соединения текущего потока (например, после сбоя)"""
+        for attr in ('writer', 'reader'):
+            conn = getattr(self._local, attr, None)
+            if conn is not None:
+                self._close(conn)
+                setattr(self._local, attr, None)
+        self._local.depth = 0
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self) -> None:
+        """Закрывает все соединения пула (при остановке бота)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._monitor = None
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    # ========== КОНТЕКСТНЫЕ МЕНЕДЖЕРЫ ==========
+
+    @contextmanager
+    def connection(self):
+        """Транзакционное использование соединения записи (с поддержкой вложенности)"""
+        conn = self.writer()
+        self._local.depth += 1
+        if self._local.depth == 1:
+            self._local.changes = conn.total_changes
+        try:
+            yield conn
+            if self._local.depth == 1:
+                conn.commit()
+
+        except sqlite3.ProgrammingError as e:
+            # Соединение закрыто или повреждено - пересоздадим при следующем запросе
+            logger.error(f"Ошибка подключения к БД: {e}")
+            self._local.depth = 1
+            self.discard()
+            raise
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка подключения к БД: {e}")
+            if self._local.depth == 1:
+                conn.rollback()  # Откатываем изменения при ошибке
+            raise
+        except BaseException:
+            # Раньше незакоммиченные изменения терялись при закрытии соединения,
+            # теперь соединение живет дальше - откатываем явно
+            if self._local.depth == 1:
+                conn.rollback()
+            raise
+        finally:
+            if self._local.depth == 1 and conn.total_changes != getattr(self._local, 'changes', 0):
+                _notify_write()
+            self._local.depth = max(self._local.depth - 1, 0)
+
+    @contextmanager
+    def read_connection(self):
+        """Соединение только для чтения"""
+        conn = self.reader()
+        try:
+            yield conn
+        except sqlite3.ProgrammingError as e:
+            logger.error(f"Ошибка подключения к БД: {e}")
+            self.discard()
+            raise
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_write_listeners = []
+
+
+def add_write_listener(listener) -> None:
+    """Регистрирует функцию, вызываемую после транзакции, изменившей данные"""
+    _write_listeners.append(listener)
+
+
+def _notify_write() -> None:
+    for listener in _write_listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.error(f"Ошибка обработчика изменения данных: {e}")
+
+
+def get_pool(db_path: str = None) -> ConnectionPool:
+    """Возвращает пул соединений для указанного файла БД"""
+    db_path = db_path or DB_PATH
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_path, ConnectionPool(db_path))
+    return pool
+
+
+def close_all_connections() -> None:
+    """Закрывает соединения всех пулов"""
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+
+atexit.register(close_all_connections)
+
+
+@contextmanager
+def sqlite_connection(db_path=None):
+    """Контекстный менеджер для соединения c SQLite (соединение берется из пула)"""
+    with get_pool(db_path).connection() as conn:
         yield conn
-        conn.commit()
 
-    except sqlite3.Error as e:
-        logger.error(f"Ошибка подключения к БД: {e}")
-        if conn:
-            conn.rollback()  # Откатываем изменения при ошибке
-        raise
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+
+@contextmanager
+def sqlite_read_connection(db_path=None):
+    """Контекстный менеджер для соединения c SQLite только для чтения"""
+    with get_pool(db_path).read_connection() as conn:
+        yield conn
+
+
+# ========== АСИНХРОННЫЙ ШЛЮЗ К БД ==========
+
+# Количество потоков для чтения (запись всегда выполняется одним потоком)
+DB_READ_WORKERS = int(os.getenv('DB_READ_WORKERS', '4'))
+# Порог ожидания в очереди, после которого пишем предупреждение в лог (сек)
+DB_SLOW_WAIT = float(os.getenv('DB_SLOW_WAIT', '0.5'))
+
+
+class DBExecutor:
+    """
+    Выполняет синхронные запросы sqlite3 вне цикла событий бота.
+
+    Запись идет через единственный поток (очередь запросов на запись),
+    чтение - через ограниченный пул потоков с read-only соединениями.
+    Для каждой очереди собираются метрики: глубина очереди и время ожидания.
+    """
+
+    LANES = ('write', 'read')
+
+    def __init__(self, read_workers: int = DB_READ_WORKERS):
+        self.read_workers = max(1, read_workers)
+        self._executors = {}
+        self._lock = threading.Lock()
+        self._metrics = {lane: self._empty_metrics() for lane in self.LANES}
+
+    @staticmethod
+    def _empty_metrics() -> dict:
+        return {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'queue_depth': 0,
+            'max_queue_depth': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'exec_total': 0.0,
+        }
+
+    def _executor(self, lane: str) -> ThreadPoolExecutor:
+        """Лениво создает пул потоков для очереди"""
+        executor = self._executors.get(lane)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(lane)
+                if executor is None:
+                    workers = 1 if lane == 'write' else self.read_workers
+                    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"db-{lane}")
+                    self._executors[lane] = executor
+        return executor
+
+    def _call(self, lane: str, enqueued_at: float, func, args, kwargs):
+        """Выполняется в потоке БД: фиксирует ожидание и время выполнения"""
+        started = time.perf_counter()
+        wait = started - enqueued_at
+        metrics = self._metrics[lane]
+
+        with self._lock:
+            metrics['queue_depth'] -= 1
+            metrics['wait_total'] += wait
+            metrics['wait_max'] = max(metrics['wait_max'], wait)
+
+        if wait > DB_SLOW_WAIT:
+            logger.warning(f"Запрос {func.__qualname__} ждал в очереди БД ({lane}) {wait:.3f} сек")
+
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                metrics['exec_total'] += time.perf_counter() - started
+                metrics['completed'] += 1
+                if failed:
+                    metrics['failed'] += 1
+
+    async def run(self, func, *args, readonly: bool = False, **kwargs):
+        """Выполняет func(*args, **kwargs) в потоке БД и возвращает результат"""
+        lane = 'read' if readonly else 'write'
+        metrics = self._metrics[lane]
+
+        with self._lock:
+            metrics['submitted'] += 1
+            metrics['queue_depth'] += 1
+            metrics['max_queue_depth'] = max(metrics['max_queue_depth'], metrics['queue_depth'])
+
+        # Передаем в поток БД contextvars вызывающей задачи (контекст обновления и т.п.)
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor(lane),
+            context.run, self._call, lane, time.perf_counter(), func, args, kwargs
+        )
+
+    def get_metrics(self) -> dict:
+        """Снимок метрик по очередям записи и чтения"""
+        with self._lock:
+            snapshot = {lane: dict(values) for lane, values in self._metrics.items()}
+
+        for values in snapshot.values():
+            done = values['completed']
+            values['wait_avg'] = values['wait_total'] / done if done else 0.0
+            values['exec_avg'] = values['exec_total'] / done if done else 0.0
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает потоки БД и закрывает их соединения"""
+        with self._lock:
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=wait)
+
+
+db_executor = DBExecutor()
+
+
+def _db_task(readonly: bool):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await db_executor.run(func, *args, readonly=readonly, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Декораторы для методов репозиториев: синхронное тело метода выполняется
+# в потоке БД, а вызывающий код получает корутину и делает await
+db_read = _db_task(readonly=True)
+db_write = _db_task(readonly=False)
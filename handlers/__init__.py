@@ -46,6 +46,9 @@ from handlers.handlers_customer import (
 from rep_customer.customer_purchase import (
     add_purchase, process_purchase, save_purchase
 )
+from rep_customer.customer_redeem import (
+    redeem_bonuses, process_redeem
+)
 from rep_customer.customer_register import (
     register_customer,
     process_customer_registration,
@@ -65,7 +68,8 @@ __all__ = [
     'show_cleanup_options', 'cleanup_all_messages', 
     'handle_cleanup_confirmation', 'manage_customers',
     'register_customer', 'add_purchase', 'process_customer_registration',
-    'process_purchase', 'save_purchase', 'list_all_customers',
+    'process_purchase', 'save_purchase', 'redeem_bonuses', 'process_redeem',
+    'list_all_customers',
     'check_customer_status', 'search_customer', hand_cust_manager,
     'process_customer_search', 'handle_customer_selection', show_customer_details, show_my_bonuses,
     'show_customer_list', 'bonus_system', 'create_bonus_program',
@@ -5,6 +5,15 @@ from telegram.ext import CallbackContext
 from typing import Dict
 from handlers.admin_roles_class import role_manager, UserRole, Permission
 from handlers.admin_users_class import users_manager
+from database import db_executor
+from utils.request_context import get_request_stats
+from utils.flow_engine import flow_engine
+from utils.update_processor import update_processor
+from utils.outbound import outbound
+from rep_bonus.bonus_level_resolver import bonus_level_resolver
+from rep_bonus.bonus_level_stats_class import level_statistics
+from rep_customer.customer_history_class import purchase_history_manager
+from rep_catalog.catalog_cache_class import catalog_cache
 from handlers.admin_edit_user_flow import edit_user_conversation_handler
 
 from keyboards.global_keyb import get_main_keyboard
@@ -535,6 +544,82 @@ async def system_stats(update: Update, context: CallbackContext) -> None:
             if count > 0:
                 role_name = role_manager.get_role_name(role)
                 message += f"• {role_name}: {count}\n"
+
+        # Кэш ролей
+        cache = role_manager.get_cache_stats()
+        message += (
+            f"\n*Кэш ролей:* {cache['size']} записей, "
+            f"попаданий {cache['hits']}, промахов {cache['misses']} "
+            f"({cache['hit_rate'] * 100:.1f}%)\n"
+        )
+        levels_cache = bonus_level_resolver.get_cache_stats()
+        message += (
+            f"*Кэш уровней:* {levels_cache['size']} программ, "
+            f"попаданий {levels_cache['hits']}, промахов {levels_cache['misses']} "
+            f"({levels_cache['hit_rate'] * 100:.1f}%)\n"
+        )
+        stats_cache = level_statistics.get_cache_stats()
+        message += (
+            f"*Кэш статистики уровней:* {stats_cache['size']} программ, "
+            f"попаданий {stats_cache['hits']}, промахов {stats_cache['misses']} "
+            f"({stats_cache['hit_rate'] * 100:.1f}%)\n"
+        )
+        history_cache = purchase_history_manager.get_cache_stats()
+        message += (
+            f"*Кэш истории покупок:* {history_cache['size']} клиентов, "
+            f"попаданий {history_cache['hits']}, промахов {history_cache['misses']} "
+            f"({history_cache['hit_rate'] * 100:.1f}%)\n"
+        )
+        catalog_stats = catalog_cache.get_cache_stats()
+        message += (
+            f"*Кэш справочника товаров:* {catalog_stats['size']} товаров, версия {catalog_stats['version']}, "
+            f"попаданий {catalog_stats['hits']}, промахов {catalog_stats['misses']} "
+            f"({catalog_stats['hit_rate'] * 100:.1f}%), "
+            f"перезагрузок по изменениям других процессов {catalog_stats['external_reloads']}\n"
+        )
+
+        # Контекст обновлений
+        request_stats = get_request_stats()
+        message += (
+            f"*Контекст обновлений:* сэкономлено запросов {request_stats['queries_saved']} "
+            f"({request_stats['saved_per_update']:.2f} на обновление)\n"
+        )
+
+        # Пошаговые процессы
+        flows = flow_engine.get_stats()
+        message += (
+            f"*Процессы:* обработано шагов {flows['dispatched']}, "
+            f"завершено {flows['finished']}, по таймауту {flows['expired']}, "
+            f"устаревших {flows['stale']}\n"
+        )
+
+        # Параллельная обработка обновлений
+        updates = update_processor.get_metrics()
+        message += (
+            f"*Обновления:* одновременно {updates['active']} из {updates['limit']} "
+            f"(макс. {updates['max_active']}), ждут {updates['waiting']}, "
+            f"очередь пользователя {updates['user_queue_now']} "
+            f"(макс. {updates['max_user_queue']})\n"
+        )
+
+        sending = outbound.get_stats()
+        message += (
+            f"*Отправка:* {sending['throughput_recent']:.1f}/с за минуту, "
+            f"в очереди {sending['backlog']} (макс. {sending['max_backlog']}), "
+            f"правок слито {sending['coalesced']}, повторов {sending['retries']}, "
+            f"ошибок {sending['failed']}\n"
+        )
+
+        # Нагрузка на базу данных
+        message += "\n*Очереди БД:*\n"
+        for lane, metrics in db_executor.get_metrics().items():
+            message += (
+                f"• {lane}: в очереди {metrics['queue_depth']} "
+                f"(макс. {metrics['max_queue_depth']}), "
+                f"ожидание {metrics['wait_avg'] * 1000:.1f} мс "
+                f"(макс. {metrics['wait_max'] * 1000:.1f} мс), "
+                f"выполнено {metrics['completed']}\n"
+            )
         
         await update.message.reply_text(
             message[:4000],
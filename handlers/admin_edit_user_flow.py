@@ -6,6 +6,8 @@ from handlers.admin_roles_class import role_manager, Permission
 from handlers.admin_users_class import users_manager
 from keyboards.admin_keyb import get_user_management_keyboard, EditUserStep
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,7 @@ async def start_edit_user_flow(update: Update, context: CallbackContext) -> int:
         
         # Устанавливаем состояние в контексте для message_handler
         context.user_data['edit_user_state'] = EDIT_SELECT_USER
+        flow_engine.start(context, Flows.EDIT_USER, FlowStates.SELECT_USER)
         
         # Спрашиваем ID пользователя
         await update.message.reply_text(
@@ -47,7 +50,7 @@ async def select_user_for_edit(update: Update, context: CallbackContext) -> int:
             await update.callback_query.answer()
             await update.callback_query.edit_message_text("❌ Редактирование отменено.")
              # Очищаем состояние
-            context.user_data.pop('edit_user_state', None)
+            flow_engine.finish(context, Flows.EDIT_USER)
             return ConversationHandler.END
         
         # Получаем ID пользователя из сообщения
@@ -63,12 +66,13 @@ async def select_user_for_edit(update: Update, context: CallbackContext) -> int:
                         reply_markup=get_user_management_keyboard()
                     )
                     # Очищаем состояние
-                    context.user_data.pop('edit_user_state', None)
+                    flow_engine.finish(context, Flows.EDIT_USER)
                     return ConversationHandler.END
                 
                 # Сохраняем ID пользователя в контексте
                 context.user_data['edit_user_state'] = EDIT_SELECT_FIELD
                 context.user_data['edit_target_id'] = target_user_id
+                flow_engine.set_state(context, FlowStates.SELECT_FIELD)
                 
                 # Получаем текущую информацию о пользователе
                 users = await users_manager.get_all_users()
@@ -150,6 +154,7 @@ async def select_field_for_edit(update: Update, context: CallbackContext) -> int
                 context.user_data['edit_field'] = field
                 context.user_data['edit_target_id'] = target_user_id
                 context.user_data['edit_user_state'] = EDIT_ENTER_VALUE
+                flow_engine.set_state(context, FlowStates.ENTER_VALUE)
                 
                 # Определяем русское название поля
                 field_names = {
@@ -359,6 +364,7 @@ async def cancel_edit(update: Update, context: CallbackContext) -> int:
     # Очищаем данные
     if 'edit_flow' in context.user_data:
         del context.user_data['edit_flow']
+    flow_engine.finish(context, Flows.EDIT_USER)
     
     return ConversationHandler.END
 
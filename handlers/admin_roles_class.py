@@ -1,8 +1,10 @@
 # handlers/roles.py
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from enum import Enum
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.ttl_cache import TTLCache
+from utils.request_context import current_request
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +52,12 @@ class Permission(Enum):
     # === Профиль пользователя ===
     VIEW_PROFILE = "view_profile"             # Просмотр своего профиля (есть у всех)
 
+
+# Битовые маски: у каждого разрешения и каждой роли свой бит
+PERMISSION_BITS = {permission: 1 << index for index, permission in enumerate(Permission)}
+ROLE_BITS = {role: 1 << index for index, role in enumerate(UserRole)}
+ALL_ROLES_MASK = sum(ROLE_BITS.values())
+
 class RoleManager:
     """Менеджер ролей и разрешений"""
     # ====================================================================
@@ -139,6 +147,12 @@ class RoleManager:
         ],
     }
     
+    # Маски разрешений ролей: проверка разрешения - одна битовая операция
+    ROLE_PERMISSION_MASKS = {
+        role: sum(PERMISSION_BITS[permission] for permission in set(permissions))
+        for role, permissions in ROLE_PERMISSIONS.items()
+    }
+    
     # Отображение русских названий ролей
     ROLE_NAMES = {
         UserRole.ADMIN: "Администратор",
@@ -148,41 +162,68 @@ class RoleManager:
         UserRole.GUEST: "Гость",
     }
 
+    # Кэш ролей: роль меняется редко, а проверяется на каждое нажатие кнопки
+    ROLE_CACHE_TTL = 300  # сек
+    ROLE_CACHE_SIZE = 10000
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._role_cache = TTLCache(ttl=self.ROLE_CACHE_TTL, maxsize=self.ROLE_CACHE_SIZE, name="roles")
+        # Счетчик изменений ролей: не кладем в кэш значение, прочитанное до записи
+        self._role_writes = 0
     
     async def get_user_role(self, user_id: int) -> UserRole:
         """Получает роль пользователя"""
-        conn = None
-        try:
-            with sqlite_connection() as conn: 
-                cursor = conn.cursor()
+        # Роль уже загружена вместе с контекстом текущего обновления
+        request = current_request(user_id)
+        if request is not None and request.role_value is not None:
+            try:
+                role = UserRole(request.role_value)
+                request.serve()
+                return role
+            except ValueError:
+                pass
 
-                cursor.execute(
-                    "SELECT role FROM user_roles WHERE user_id = ?", 
-                    (user_id,)
-                )
+        role = self._role_cache.get(user_id)
+        if role is not None:
+            return role
 
-                result = cursor.fetchone()
-                
-                if result:
-                    try:
-                        role = UserRole(result['role'])
-                        return role
-                    except ValueError:
-                        self.logger.warning(f"Неизвестная роль в БД: {result['role']}")
-                        return UserRole.GUEST  # Дефолтная роль
+        try:
+            writes_before = self._role_writes
+            role_value = await self._select_user_role(user_id)
+
+            if role_value is not None:
+                try:
+                    role = UserRole(role_value)
+                    if writes_before == self._role_writes:
+                        self._role_cache.set(user_id, role)
+                    return role
+                except ValueError:
+                    self.logger.warning(f"Неизвестная роль в БД: {role_value}")
+                    return UserRole.GUEST  # Дефолтная роль
 
-                    # Если пользователя нет в БД, добавляем с дефолтной ролью
-                self.logger.info(f"Новый пользователь {user_id}, устанавливаем роль Гость")
-                #  conn.rollback()  # Откатываем текущую транзакцию
-                return await self.set_user_role(user_id, UserRole.GUEST)
+            # Если пользователя нет в БД, добавляем с дефолтной ролью
+            self.logger.info(f"Новый пользователь {user_id}, устанавливаем роль Гость")
+            return await self.set_user_role(user_id, UserRole.GUEST)
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения роли пользователя {user_id}: {e}")
             return UserRole.GUEST
+
+    @db_read
+    def _select_user_role(self, user_id: int) -> Optional[str]:
+        """Читает роль пользователя из БД (None - пользователя нет)"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT role FROM user_roles WHERE user_id = ?", 
+                (user_id,)
+            )
+            result = cursor.fetchone()
+            return result['role'] if result else None
        
-    async def set_user_role(self, user_id: int, role: UserRole) -> UserRole:
+    @db_write
+    def set_user_role(self, user_id: int, role: UserRole) -> UserRole:
         """Устанавливает роль пользователю"""
         try:
             with sqlite_connection() as conn:
@@ -195,23 +236,39 @@ class RoleManager:
                 
                 conn.commit()
                 self.logger.info(f"Установлена роль {role.value} для пользователя {user_id}")
-                return role
+
+            self._role_writes += 1
+            self._role_cache.set(user_id, role)
+            request = current_request(user_id)
+            if request is not None:
+                request.set_role(role.value)
+            return role
                 
         except Exception as e:
             self.logger.error(f"Ошибка установки роли для пользователя {user_id}: {e}")
+            self.invalidate_user_role(user_id)
             return UserRole.GUEST
     
+    def invalidate_user_role(self, user_id: int) -> None:
+        """Сбрасывает роль пользователя в кэше (после изменения user_roles в обход set_user_role)"""
+        self._role_writes += 1
+        self._role_cache.invalidate(user_id)
+        request = current_request(user_id)
+        if request is not None:
+            request.set_role(None)
+
+    def get_cache_stats(self) -> Dict:
+        """Статистика кэша ролей"""
+        return self._role_cache.stats()
+
     async def has_permission(self, user_id: int, permission: Permission) -> bool:
         """Проверяет, есть ли у пользователя разрешение"""
         try:
             # Получаем роль пользователя
             role = await self.get_user_role(user_id)
            
-            # Получаем список разрешений для этой роли
-            role_permissions = self.ROLE_PERMISSIONS.get(role, [])
-            # Проверяем наличие нужного разрешения
-            
-            has_perm = permission in role_permissions
+            # Проверяем бит разрешения в маске роли
+            has_perm = self.role_has_permission(role, permission)
             
             # Логируем для отладки
             if not has_perm:
@@ -237,6 +294,10 @@ class RoleManager:
             self.logger.error(f"Ошибка изменения роли: {e}")
             return False
     
+    def role_has_permission(self, role: UserRole, permission: Permission) -> bool:
+        """Проверяет разрешение роли по битовой маске (без обращения к БД)"""
+        return bool(self.ROLE_PERMISSION_MASKS.get(role, 0) & PERMISSION_BITS[permission])
+
     def get_role_permissions(self, role: UserRole) -> List[Permission]:
         """Получает список разрешений для роли"""
         return self.ROLE_PERMISSIONS.get(role, [])
@@ -1,8 +1,9 @@
 # handlers/users_class.py
 import logging
 from typing import Dict, List
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
 from .admin_roles_class import role_manager, Permission, UserRole
+from rep_customer.customer_purchase_class import customer_purchase
 
 
 
@@ -14,7 +15,8 @@ class UserManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    async def add_user(self, user_id: int, role: UserRole = UserRole.BARISTA) -> bool:
+    @db_write
+    def add_user(self, user_id: int, role: UserRole = UserRole.BARISTA) -> bool:
         """Добавляет нового пользователя в систему"""
         try:
             with sqlite_connection() as conn:
@@ -38,7 +40,9 @@ class UserManager:
                 
                 conn.commit()
                 self.logger.info(f"Пользователь {user_id} добавлен с ролью {role.value}")
-                return True
+
+            role_manager.invalidate_user_role(user_id)
+            return True
             
         except Exception as e:
             self.logger.error(f"Ошибка добавления пользователя {user_id}: {e}")
@@ -54,50 +58,59 @@ class UserManager:
         # Нельзя удалить себя
             if admin_id == target_user_id:
                 return False
+
+            return await self._delete_user_db(target_user_id)
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка удаления пользователя {target_user_id}: {e}")
+            return False
+
+    @db_write
+    def _delete_user_db(self, target_user_id: int) -> bool:
+        """Удаляет пользователя из БД (выполняется в потоке БД)"""
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
         
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
+            # Получаем роль пользователя
+            cursor.execute(
+                "SELECT role FROM user_roles WHERE user_id = ?",
+                (target_user_id,)
+            )
+            result = cursor.fetchone()
             
-                # Получаем роль пользователя
-                cursor.execute(
-                    "SELECT role FROM user_roles WHERE user_id = ?",
-                    (target_user_id,)
-                )
-                result = cursor.fetchone()
-                
-                if not result:
-                    return False
-                
-                # Нельзя удалять администраторов, кроме самого администратора
-                if result['role'] == UserRole.ADMIN.value:
-                    # Проверяем, сколько осталось админов
-                    cursor.execute(
-                        "SELECT COUNT(*) as admin_count FROM user_roles WHERE role = ?",
-                        (UserRole.ADMIN.value,)
-                    )
-                    admin_count = cursor.fetchone(['admin_count'])
-                    
-                    if admin_count <= 1:
-                        return False  # Нельзя удалить последнего администратора
-                
-                # Удаляем пользователя
+            if not result:
+                return False
+            
+            # Нельзя удалять администраторов, кроме самого администратора
+            if result['role'] == UserRole.ADMIN.value:
+                # Проверяем, сколько осталось админов
                 cursor.execute(
-                    "DELETE FROM user_roles WHERE user_id = ?",
-                    (target_user_id,)
+                    "SELECT COUNT(*) as admin_count FROM user_roles WHERE role = ?",
+                    (UserRole.ADMIN.value,)
                 )
-                cursor.execute(
-                    "DELETE FROM users WHERE user_id = ?", 
-                    (target_user_id,))
+                admin_count = cursor.fetchone()['admin_count']
                 
-                conn.commit()
-                self.logger.info(f"Пользователь {target_user_id} удален из системы")
-                return True
+                if admin_count <= 1:
+                    return False  # Нельзя удалить последнего администратора
             
-        except Exception as e:
-            self.logger.error(f"Ошибка удаления пользователя {target_user_id}: {e}")
-            return False
+            # Удаляем пользователя
+            cursor.execute(
+                "DELETE FROM user_roles WHERE user_id = ?",
+                (target_user_id,)
+            )
+            cursor.execute(
+                "DELETE FROM users WHERE user_id = ?", 
+                (target_user_id,))
+            
+            conn.commit()
+            self.logger.info(f"Пользователь {target_user_id} удален из системы")
 
-    async def update_user_info(self, user_id: int, **kwargs) -> bool:
+        role_manager.invalidate_user_role(target_user_id)
+        customer_purchase.invalidate_operator(target_user_id)
+        return True
+
+    @db_write
+    def update_user_info(self, user_id: int, **kwargs) -> bool:
         """Обновляет информацию о пользователе в таблице users"""
         try:
             allowed_fields = ['username', 'first_name', 'last_name', 'phone_numb']
@@ -177,10 +190,11 @@ class UserManager:
                 self.logger.error(f"Ошибка БД при редактировании пользователя: {db_error}")
                 return False
 
-    async def get_users_without_visitors(self) -> List[Dict]:
+    @db_read
+    def get_users_without_visitors(self) -> List[Dict]:
         """Получает список пользователей без посетителей"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute('''
@@ -218,10 +232,11 @@ class UserManager:
             self.logger.error(f"Ошибка получения списка пользователей без посетителей: {e}")
             return []
         
-    async def get_all_users(self) -> List[Dict]:
+    @db_read
+    def get_all_users(self) -> List[Dict]:
         """Получает список всех пользователей с их ролями"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT user_id, role, created_at, updated_at 
@@ -251,10 +266,11 @@ class UserManager:
             self.logger.error(f"Ошибка получения списка пользователей: {e}")
             return []
     
-    async def check_user_in_users_table(self, user_id: int) -> bool:
+    @db_read
+    def check_user_in_users_table(self, user_id: int) -> bool:
         """Проверяет, существует ли пользователь в таблице users"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT 1 FROM users WHERE user_id = ?",
@@ -265,7 +281,8 @@ class UserManager:
             self.logger.error(f"Ошибка проверки пользователя в таблице users: {e}")
         return False
 
-    async def add_user_to_users_table(self, user_id: int, telegram_user=None) -> bool:
+    @db_write
+    def add_user_to_users_table(self, user_id: int, telegram_user=None) -> bool:
         """Добавляет пользователя в таблицу users"""
         try:
             with sqlite_connection() as conn:
@@ -3,6 +3,8 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKe
 from telegram.ext import CallbackContext
 from database import sqlite_connection
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 from handlers.admin_roles_class import role_manager, Permission, UserRole
 from keyboards.global_keyb import get_cancel_keyboard, get_main_keyboard
 from keyboards.invent_keyb import get_catalog_keyboard, get_categories_keyboard, get_inventory_keyboard
@@ -60,9 +62,10 @@ async def add_to_catalog(update: Update, context: CallbackContext) -> None:
         'step': 'category',
         'data': {}
     }
+    flow_engine.start(context, Flows.CATALOG_ADD, FlowStates.INPUT)
     
     # Получаем существующие категории для подсказки
-    categories = CatalogRepository.get_active_categories()
+    categories = await CatalogRepository.get_active_categories()
     
     categories_text = ""
     if categories:
@@ -89,7 +92,7 @@ async def del_item_catalog(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем существующие категории для отображения
-    categories = CatalogRepository.get_active_categories()
+    categories = await CatalogRepository.get_active_categories()
     
     if not categories:
         await send_or_edit_message(
@@ -126,7 +129,7 @@ async def delete_single_product(update: Update, context: CallbackContext, data:
     user_id = update.effective_user.id
     product = data['selected_product']
     
-    success = CatalogRepository.soft_delete_product(product['product_id'])
+    success = await CatalogRepository.soft_delete_product(product['product_id'])
     
     if success:
         del context.user_data['deleting_from_catalog']
@@ -151,7 +154,7 @@ async def delete_all_category_products(update: Update, context: CallbackContext,
     user_id = update.effective_user.id
     category = data['category']
     
-    deleted_count = CatalogRepository.soft_delete_category_products(category)
+    deleted_count = await CatalogRepository.soft_delete_category_products(category)
     
     if deleted_count > 0:
         del context.user_data['deleting_from_catalog']
@@ -174,7 +177,7 @@ async def save_to_catalog(update: Update, context: CallbackContext, product_data
     """Сохранение товара в справочник"""
     user_id = update.effective_user.id
     
-    product_id = CatalogRepository.add_product(
+    product_id = await CatalogRepository.add_product(
         category=product_data['category'],
         name=product_data['name'],
         unit=product_data['unit'],
@@ -216,7 +219,7 @@ async def browse_catalog(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем список категорий
-    categories = CatalogRepository.get_all_categories_with_counts()
+    categories = await CatalogRepository.get_all_categories_with_counts()
     
     if not categories:
         # Обработка для callback
@@ -284,7 +287,7 @@ async def show_products_by_category(update: Update, context: CallbackContext, ca
     
     logger.info(f"show_products_by_category: category='{category}'")
     
-    products = CatalogRepository.get_category_products(category)
+    products = await CatalogRepository.get_category_products(category)
     
     if not products:
         # Создаем inline-клавиатуру для пустой категории
@@ -360,7 +363,7 @@ async def browse_catalog_for_selection(update: Update, context: CallbackContext)
     user_id = update.effective_user.id
     
     # Получаем список категорий
-    categories = CatalogRepository.get_active_categories()
+    categories = await CatalogRepository.get_active_categories()
     
     logger.info(f"Найдено категорий: {len(categories)}")
     
@@ -421,6 +424,7 @@ async def edit_catalog_item(update: Update, context: CallbackContext) -> None:
         'step': 'search',
         'data': {}
     }
+    flow_engine.start(context, Flows.CATALOG_EDIT, FlowStates.INPUT)
     
     await send_or_edit_message(
         update=update,
@@ -442,7 +446,7 @@ async def edit_catalog_category(update: Update, context: CallbackContext) -> Non
         )
         return
     
-    categories = CatalogRepository.get_active_categories()
+    categories = await CatalogRepository.get_active_categories()
     
     if not categories:
         await send_or_edit_message(
@@ -456,6 +460,7 @@ async def edit_catalog_category(update: Update, context: CallbackContext) -> Non
         'step': 'select_old',
         'data': {}
     }
+    flow_engine.start(context, Flows.CATALOG_CATEGORY, FlowStates.INPUT)
     
     # Создаем inline-клавиатуру с категориями
     keyboard = []
@@ -518,9 +523,10 @@ async def handle_category_deletion(update: Update, context: CallbackContext, cat
         'step': 'select_product',
         'data': {
             'category': category,
-            'products': CatalogRepository.get_category_products(category)
+            'products': await CatalogRepository.get_category_products(category)
         }
     }
+    flow_engine.start(context, Flows.CATALOG_DELETE, FlowStates.INPUT)
     
     products = context.user_data['deleting_from_catalog']['data']['products']
     
@@ -673,7 +679,7 @@ async def confirm_delete_product(update: Update, context: CallbackContext, produ
     product_data = context.user_data['deleting_from_catalog']['data']
     selected_product = product_data['selected_product']
     
-    success = CatalogRepository.soft_delete_product(product_id)
+    success = await CatalogRepository.soft_delete_product(product_id)
     
     if success:
         del context.user_data['deleting_from_catalog']
@@ -698,7 +704,7 @@ async def confirm_delete_all_products(update: Update, context: CallbackContext,
     """Подтверждение удаления всех товаров категории"""
     query = update.callback_query
     
-    deleted_count = CatalogRepository.soft_delete_category_products(category)
+    deleted_count = await CatalogRepository.soft_delete_category_products(category)
     
     if deleted_count > 0:
         if 'deleting_from_catalog' in context.user_data:
@@ -723,7 +729,7 @@ async def show_product_details(update: Update, context: CallbackContext, product
     """Показать детальную информацию о товаре"""
     query = update.callback_query
     
-    product = CatalogRepository.get_product_by_id(product_id)
+    product = await CatalogRepository.get_product_by_id(product_id)
     
     if not product:
         await query.edit_message_text(
@@ -768,6 +774,7 @@ async def handle_category_edit_selection(update: Update, context: CallbackContex
         'step': 'enter_new',
         'data': {'old_category': category}
     }
+    flow_engine.start(context, Flows.CATALOG_CATEGORY, FlowStates.INPUT)
     
     await query.edit_message_text(
         f"✏️ *Изменение категории*\n\n"
@@ -780,7 +787,7 @@ async def handle_product_edit_selection(update: Update, context: CallbackContext
     """Обработка выбора товара для редактирования"""
     query = update.callback_query
     
-    product = CatalogRepository.get_product_by_id(product_id)
+    product = await CatalogRepository.get_product_by_id(product_id)
     
     if not product:
         await query.edit_message_text(
@@ -796,6 +803,7 @@ async def handle_product_edit_selection(update: Update, context: CallbackContext
         'step': 'select_field',
         'data': {'product': product}
     }
+    flow_engine.start(context, Flows.CATALOG_EDIT, FlowStates.INPUT)
     
     # Создаем inline-клавиатуру для выбора поля
     keyboard = [
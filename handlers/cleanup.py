@@ -2,10 +2,12 @@
 import logging
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import CallbackContext
-import asyncio
 from keyboards.global_keyb import get_main_keyboard, get_confirmation_keyboard, get_cancel_keyboard
 from keyboards.admin_keyb import get_chat_management_keyboard
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+from utils.outbound import outbound
 from handlers.menus import cleanup_menu
 
 logger = logging.getLogger(__name__)
@@ -24,9 +26,8 @@ async def cleanup_own_messages(update: Update, context: CallbackContext) -> None
         deleted_count = 0
         for i in range(1, 31):  # Последние 30 сообщений
             try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=update.message.message_id - i)
+                await outbound.delete_message(context.bot, chat_id, update.message.message_id - i)
                 deleted_count += 1
-                await asyncio.sleep(0.3)
             except:
                 break
         
@@ -48,19 +49,28 @@ async def request_message_count(update: Update, context: CallbackContext) -> Non
         reply_markup= get_cancel_keyboard()
     )
     context.user_data['awaiting_message_count'] = True
+    flow_engine.start(context, Flows.CLEANUP, FlowStates.MESSAGE_COUNT)
 
 async def handle_message_count_input(update: Update, context: CallbackContext) -> None:
     """Обработка ввода количества сообщений"""
+    if update.message.text == Buttons.CANCEL:
+        flow_engine.finish(context, Flows.CLEANUP)
+        await update.message.reply_text(
+            "Удаление отменено.",
+            reply_markup=await get_chat_management_keyboard(update.effective_user.id)
+        )
+        return
+
     try:
         count = int(update.message.text)
         if 1 <= count <= 500:
+            # Ввод принят - дальше сообщения идут в обычную маршрутизацию
+            flow_engine.finish(context, Flows.CLEANUP)
             await delete_specific_count(update, context, count)
         else:
             await update.message.reply_text("Введите число от 1 до 500:")
     except ValueError:
         await update.message.reply_text("Введите корректное число:")
-    finally:
-        context.user_data['awaiting_message_count'] = False
 
 async def show_cleanup_options(update: Update, context: CallbackContext) -> None:
     """Показывает опции очистки"""
@@ -80,9 +90,8 @@ async def delete_specific_count(update: Update, context: CallbackContext, count:
         
         for i in range(1, count + 1):
             try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=update.message.message_id - i)
+                await outbound.delete_message(context.bot, chat_id, update.message.message_id - i)
                 deleted_count += 1
-                await asyncio.sleep(0.3)
             except:
                 break
         
@@ -106,6 +115,7 @@ async def cleanup_all_messages(update: Update, context: CallbackContext) -> None
         )
         
         context.user_data['awaiting_cleanup_confirmation'] = True
+        flow_engine.start(context, Flows.CLEANUP, FlowStates.CLEANUP_CONFIRM)
         
     except Exception as e:
         logger.error(f"Ошибка при подготовке очистки: {e}")
@@ -121,7 +131,7 @@ async def handle_cleanup_confirmation(update: Update, context: CallbackContext)
         else:
             await update.message.reply_text("Очистка отменена.", reply_markup=get_main_keyboard())
         
-        context.user_data['awaiting_cleanup_confirmation'] = False
+        flow_engine.finish(context, Flows.CLEANUP)
 
 async def perform_cleanup(update: Update, context: CallbackContext) -> None:
   #"""Упрощенная безопасная очистка - только несколько последних сообщений"""
@@ -161,9 +171,8 @@ async def perform_cleanup(update: Update, context: CallbackContext) -> None:
                     if msg_id == info_msg.message_id:
                         continue
                         
-                    await bot.delete_message(chat_id=chat_id, message_id=msg_id)
+                    await outbound.delete_message(bot, chat_id, msg_id)
                     deleted_count += 1
-                    await asyncio.sleep(0.8)  # Большая задержка для безопасности
                     
                 except Exception as e:
                     # Игнорируем все ошибки удаления
@@ -184,18 +193,16 @@ async def perform_cleanup(update: Update, context: CallbackContext) -> None:
             result_text = "❌ Не найдено сообщений бота для удаления.\n" \
                          "(только свои сообщения, младше 48 часов)"
         
-        await bot.send_message(
-            chat_id=chat_id,
-            text=result_text,
+        await outbound.send_message(
+            bot, chat_id, result_text,
             reply_markup=await get_chat_management_keyboard(bot_user_id)
         )
         
     except Exception as e:
         logger.error(f"Ошибка в perform_cleanup: {e}")
         try:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="⚠️ Ошибка очистки. Попробуйте позже.",
+            await outbound.send_message(
+                context.bot, chat_id, "⚠️ Ошибка очистки. Попробуйте позже.",
                 reply_markup=await get_chat_management_keyboard(bot_user)
             )
         except:
@@ -5,6 +5,8 @@ from keyboards.customeers_keyb import get_customers_main_keyboard
 from keyboards.global_keyb import get_main_keyboard
 from rep_customer.customer_self_register_service import CustomerSelfRegisterService
 from .privacy_policy import privacy_manager
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,7 @@ class CustomerSelfRegisterHandler:
                 'username': update.effective_user.username or update.effective_user.first_name
             }
         }
+        flow_engine.start(context, Flows.SELF_REGISTER, FlowStates.PHONE)
         
         await update.message.reply_text(
             "📱 *Регистрация в бонусной системе*\n\n"
@@ -77,6 +80,7 @@ class CustomerSelfRegisterHandler:
         formatted_phone = result
         context.user_data['self_registering']['data']['phone'] = formatted_phone
         context.user_data['self_registering']['step'] = 'birthday'
+        flow_engine.set_state(context, FlowStates.BIRTHDAY)
         
         await update.message.reply_text(
             "✅ Номер телефона принят!\n\n"
@@ -5,6 +5,8 @@ from telegram.ext import CallbackContext, filters, ConversationHandler, MessageH
 from keyboards.bonus_keyb import *
 
 from rep_bonus.bonus_levels_class import bonus_levels_manager
+from rep_bonus.bonus_level_stats_class import level_statistics
+from utils.money import Money
 from handlers.admin_roles_class import role_manager, Permission, UserRole
 from rep_bonus.bonus_levels_delete import delete_level_inline_handler
 
@@ -32,7 +34,7 @@ async def create_level_handler(update: Update, context: CallbackContext) -> int:
         return ConversationHandler.END
     
     # Получаем активные программы
-    programs = bonus_levels_manager.get_active_bonus_programs()
+    programs = await bonus_levels_manager.get_active_bonus_programs()
     
     if not programs:
         await update.message.reply_text(
@@ -134,9 +136,9 @@ async def min_purchases_handler(update: Update, context: CallbackContext) -> int
     Обрабатывает ввод минимальной суммы покупок для уровня.
     """
     try:
-        min_purchases = float(update.message.text.strip().replace(',', '.'))
+        min_purchases = Money.parse(update.message.text)
         
-        if min_purchases <= 0:
+        if min_purchases.kopecks <= 0:
             await update.message.reply_text(
                 "❌ Сумма должна быть больше 0.\n"
                 "Пожалуйста, введите минимальную сумму покупок:"
@@ -245,7 +247,7 @@ async def confirm_create_level_handler(update: Update, context: CallbackContext)
     if user_choice == Buttons.CONFIRM_YES:
         # Создаем уровень
         program = context.user_data['selected_program']
-        level_id = bonus_levels_manager.create_bonus_level(
+        level_id = await bonus_levels_manager.create_bonus_level(
             program_id=program['id'],
             level_name=context.user_data['level_name'],
             min_total_purchases=context.user_data['min_purchases'],
@@ -305,7 +307,7 @@ async def list_levels_handler(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем все уровни
-    levels = bonus_levels_manager.get_bonus_levels()
+    levels = await bonus_levels_manager.get_bonus_levels()
     
     if not levels:
         await update.message.reply_text(
@@ -331,7 +333,7 @@ async def list_levels_handler(update: Update, context: CallbackContext) -> None:
         for level in levels_list:
             level_id = level[0]
             level_name = level[2]
-            min_purchases = level[3]
+            min_purchases = Money.from_db(level[3])
             bonus_percent = level[4]
             description = level[5] if level[5] else "нет описания"
             
@@ -381,7 +383,7 @@ async def edit_level_handler(update: Update, context: CallbackContext) -> None:
         level_id = int(context.args[0])
         
         # Получаем текущий уровень
-        level = bonus_levels_manager.get_bonus_level(level_id)
+        level = await bonus_levels_manager.get_bonus_level(level_id)
         
         if not level:
             await update.message.reply_text(
@@ -401,7 +403,7 @@ async def edit_level_handler(update: Update, context: CallbackContext) -> None:
                 i += 2
             elif args[i] == '-min' and i + 1 < len(args):
                 try:
-                    update_data['min_total_purchases'] = float(args[i + 1])
+                    update_data['min_total_purchases'] = Money.parse(args[i + 1])
                     i += 2
                 except ValueError:
                     await update.message.reply_text(
@@ -433,7 +435,7 @@ async def edit_level_handler(update: Update, context: CallbackContext) -> None:
             return
         
         # Обновляем уровень
-        if bonus_levels_manager.update_bonus_level(level_id, **update_data):
+        if await bonus_levels_manager.update_bonus_level(level_id, **update_data):
             await update.message.reply_text(
                 f"✅ Уровень *{level[2]}* успешно обновлен!\n\n"
                 f"Измененные параметры:\n" +
@@ -463,7 +465,8 @@ async def level_statistics_handler(update: Update, context: CallbackContext) ->
     """
     СТАТИСТИКА УРОВНЕЙ
     Привязывается к кнопке "Статистика уровней".
-    Показывает статистику по уровням (в разработке).
+    Показывает по каждой активной программе распределение клиентов по уровням
+    и переходы между уровнями за последние дни.
     """
     user_id = update.effective_user.id
     
@@ -474,20 +477,59 @@ async def level_statistics_handler(update: Update, context: CallbackContext) ->
         )
         return
     
-    # Здесь можно добавить логику для сбора статистики
-    # Например, количество пользователей на каждом уровне
+    programs = await bonus_levels_manager.get_active_bonus_programs()
+    if not programs:
+        await update.message.reply_text(
+            "📭 Нет активных бонусных программ.",
+            reply_markup=await get_levels_management_keyboard()
+        )
+        return
     
-    await update.message.reply_text(
-        "📊 *Статистика уровней*\n\n"
-        "📈 *Функция в разработке*\n\n"
-        "В будущем здесь будет отображаться:\n"
-        "• Количество пользователей на каждом уровне\n"
-        "• Средняя сумма покупок\n"
-        "• Распределение по уровням\n"
-        "• Динамика переходов между уровнями",
-        parse_mode='Markdown',
-        reply_markup=await get_levels_management_keyboard()
+    for program in programs:
+        stats = await level_statistics.get_program_statistics(program['program_id'])
+        if stats is None:
+            await update.message.reply_text(
+                f"❌ Ошибка расчета статистики программы {program['program_name']}.",
+                reply_markup=await get_levels_management_keyboard()
+            )
+            continue
+        
+        await update.message.reply_text(
+            format_level_statistics(program['program_name'], stats),
+            parse_mode='Markdown',
+            reply_markup=await get_levels_management_keyboard()
+        )
+
+
+def format_level_statistics(program_name: str, stats: dict) -> str:
+    """Текст статистики уровней программы"""
+    text = (
+        f"📊 *Статистика уровней: {program_name}*\n"
+        f"👥 Клиентов: {stats['customers']}\n\n"
     )
+    
+    if not stats['customers']:
+        return text + "В программе пока нет клиентов."
+    
+    for level in stats['levels']:
+        text += (
+            f"🏆 *{level['level_name']}* ({level['bonus_percent']}%, от {level['min_total_purchases']} руб.)\n"
+            f"   Клиентов: {level['customers']} ({level['share']:.1f}%)\n"
+        )
+        if level['customers']:
+            text += (
+                f"   Средняя сумма покупок: {level['average']:.2f} руб.\n"
+                f"   Медиана: {level['median']:.2f} руб.\n"
+            )
+    
+    text += f"\n🔀 *Переходы за {stats['transitions_days']} дн.:*\n"
+    if stats['transitions']:
+        for transition in stats['transitions']:
+            text += f"   {transition['from_level']} → {transition['to_level']}: {transition['customers']}\n"
+    else:
+        text += "   Переходов не было\n"
+    
+    return text
 
 async def delete_level_handler(update: Update, context: CallbackContext) -> None:
     """
@@ -515,10 +557,10 @@ async def confirm_delete_level_handler(update: Update, context: CallbackContext)
     
     if user_choice == Buttons.CONFIRM_DEL_YES:
         # Получаем информацию об уровне перед удалением
-        level = bonus_levels_manager.get_bonus_level(level_id)
+        level = await bonus_levels_manager.get_bonus_level(level_id)
         level_name = level[2] if level else "неизвестный уровень"
         
-        if bonus_levels_manager.delete_bonus_level(level_id):
+        if await bonus_levels_manager.delete_bonus_level(level_id):
             await update.message.reply_text(
                 f"✅ Уровень '{level_name}' успешно удален!",
                 reply_markup=await get_levels_management_keyboard()
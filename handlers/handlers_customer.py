@@ -10,8 +10,11 @@ from rep_customer.customer_search import search_manager
 from rep_customer.customers_inline import (
     show_customer_details_inline, CLOSE_CUSTOMER_LIST,
     BACK_TO_LIST, CLOSE_DETAILS, handle_close_customer_list,
-    handle_close_details, VIEW_CUSTOMER_PREFIX
+    handle_close_details, VIEW_CUSTOMER_PREFIX, VIEW_HISTORY_PREFIX,
+    show_customer_page, CUSTOMER_LIST_KEY, CUSTOMER_PAGE_NEXT,
+    CUSTOMER_PAGE_PREV, CUSTOMER_PAGE_SORT_PREFIX
 )
+from rep_customer.customer_history import handle_history_callback, HISTORY_CALLBACK_PREFIX
 from rep_customer.customer_manager_class import customer_manager
 from utils.telegram_utils import send_or_edit_message
 
@@ -39,7 +42,6 @@ class HandCustManager:
             
             # 1. ЗАКРЫТЬ СПИСОК КЛИЕНТОВ
             if callback_data == CLOSE_CUSTOMER_LIST:
-                #context.user_data.pop('all_customers_list', None)
                 await handle_close_customer_list(update, context)
                 # await query.edit_message_text("❌ Список закрыт")
                 #return
@@ -52,11 +54,12 @@ class HandCustManager:
             
             # 3. НАЗАД К СПИСКУ
             elif callback_data == BACK_TO_LIST:
-                # Получаем сохраненный список клиентов
-                customers = (context.user_data.get('all_customers_list') or 
-                            context.user_data.get('search_results'))
+                # Постраничный список перечитываем по курсору, результаты поиска берем из user_data
+                customers = context.user_data.get('search_results')
                 
-                if customers:
+                if CUSTOMER_LIST_KEY in context.user_data:
+                    await show_customer_page(update, context, 'current')
+                elif customers:
                     await show_customer_list_inline(update, context, customers)
                 else:
                     #await query.edit_message_text("❌ Список клиентов не найден")
@@ -75,7 +78,25 @@ class HandCustManager:
                             )
                 return
             
-            # 4. ПРОСМОТР КЛИЕНТА
+            # 4. СТРАНИЦЫ СПИСКА КЛИЕНТОВ
+            elif callback_data in (CUSTOMER_PAGE_NEXT, CUSTOMER_PAGE_PREV):
+                direction = 'next' if callback_data == CUSTOMER_PAGE_NEXT else 'prev'
+                if not await show_customer_page(update, context, direction):
+                    await query.edit_message_text("📭 Нет зарегистрированных клиентов.")
+                return
+
+            elif callback_data.startswith(CUSTOMER_PAGE_SORT_PREFIX):
+                sort = callback_data.replace(CUSTOMER_PAGE_SORT_PREFIX, "")
+                if not await show_customer_page(update, context, sort=sort):
+                    await query.edit_message_text("📭 Нет зарегистрированных клиентов.")
+                return
+
+            # 5. ИСТОРИЯ ПОКУПОК
+            elif callback_data.startswith((VIEW_HISTORY_PREFIX, HISTORY_CALLBACK_PREFIX)):
+                await handle_history_callback(update, context)
+                return
+
+            # 6. ПРОСМОТР КЛИЕНТА
             elif callback_data.startswith(VIEW_CUSTOMER_PREFIX):
                 customer_id = int(callback_data.replace(VIEW_CUSTOMER_PREFIX, ""))
                 customer = await customer_manager.find_customer_by_id(customer_id)
@@ -105,7 +126,7 @@ class HandCustManager:
         if text == Buttons.BACK_TO_MAIN:
         # Очищаем контекст клиентов
             keys_to_remove = [
-            'all_customers_list', 
+            CUSTOMER_LIST_KEY, 
             'search_results', 
             'searching_customer', 
             'registering_customer',
@@ -133,7 +154,7 @@ class HandCustManager:
                 )
             return
         # Если нет контекста клиентов - выходим, пусть другие хендлеры обрабатывают
-        has_customer_context = any(key in context.user_data for key in ['all_customers_list', 'search_results', 'searching_customer'])
+        has_customer_context = any(key in context.user_data for key in [CUSTOMER_LIST_KEY, 'search_results', 'searching_customer'])
         
         if not has_customer_context:
             # Нет активного контекста клиентов - выходим
@@ -154,7 +175,7 @@ class HandCustManager:
             return
         elif text == Buttons.BACK_TO_SEARCH_RESULT or text == Buttons.BACK_TO_CUSTOMERS_LIST:
             # Восстанавливаем предыдущий список
-            if 'search_results' in context.user_data or 'all_customers_list' in context.user_data:
+            if 'search_results' in context.user_data or CUSTOMER_LIST_KEY in context.user_data:
                 await list_all_customers(update, context)
             else:
                 await manage_customers(update, context)
@@ -168,8 +189,9 @@ class HandCustManager:
         customers = None
         if 'search_results' in context.user_data:
             customers = context.user_data['search_results']
-        elif 'all_customers_list' in context.user_data:
-            customers = context.user_data['all_customers_list']
+        elif CUSTOMER_LIST_KEY in context.user_data:
+            # Постраничный список не хранит клиентов - ищем по ID в БД
+            customers = []
         else:
             await send_or_edit_message(
                 update,
@@ -178,7 +200,7 @@ class HandCustManager:
             )
             return
         
-        if not customers:
+        if not customers and CUSTOMER_LIST_KEY not in context.user_data:
             await send_or_edit_message(
                 update,
                 "Список клиентов пуст. Начните поиск заново.",
@@ -21,6 +21,7 @@ from keyboards.bonus_keyb import (
     get_promocodes_keyboard
 )
 from keyboards.customeers_keyb import get_customer_search_keyboard
+from rep_customer.customers_inline import CUSTOMER_LIST_KEY
 from rep_report.report_watch import report_manager
 from rep_invent.inventory import (
     create_inventory_list, add_item,
@@ -92,7 +93,7 @@ async def reminders_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def customers_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Меню клиентов"""
     # Очищаем контексты списков
-    context.user_data.pop('all_customers_list', None)
+    context.user_data.pop(CUSTOMER_LIST_KEY, None)
     context.user_data.pop('search_results', None)
     context.user_data.pop('searching_customer', None)
     
@@ -357,23 +358,6 @@ async def program_settings_handler(update: Update, context: ContextTypes.DEFAULT
     await update.message.reply_text("⚙️ *Настройки программы*\n\nФункция в разработке", parse_mode='Markdown')
 
 
-async def list_promocodes_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Список промокодов"""
-    await promocodes_menu(update, context)
-
-async def create_promocode_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Создание промокода"""
-    await update.message.reply_text("➕ *Создание промокода*\n\nФункция в разработке", parse_mode='Markdown')
-
-async def activate_promocode_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Активация промокода"""
-    await update.message.reply_text("🎯 *Активация промокода*\n\nФункция в разработке", parse_mode='Markdown')
-
-async def promocode_statistics_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Статистика промокодов"""
-    await update.message.reply_text("📊 *Статистика промокодов*\n\nФункция в разработке", parse_mode='Markdown')
-
-
 # ========== КЛИЕНТЫ - РЕАЛЬНЫЕ ОБРАБОТЧИКИ ==========
 
 async def register_customer_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -414,6 +398,10 @@ async def search_by_phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Поиск по телефону"""
     await search_manager.search_cust_by_phone(update, context)
 
+async def search_by_phone_suffix(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Поиск по последним цифрам телефона"""
+    await search_manager.search_cust_by_phone_suffix(update, context)
+
 async def search_by_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Поиск по имени"""
     await search_manager.search_cust_by_name(update, context)
@@ -422,17 +410,12 @@ async def search_by_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Поиск по ID"""
     await search_manager.search_cust_by_id(update, context)
 
-async def purchase_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """История покупок"""
-    await update.message.reply_text("Функция истории покупок в разработке")
-
-
 # Кнопки возврата
 async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Вернуться в главное меню"""
     user_id = update.effective_user.id
     # Очищаем контексты
-    context.user_data.pop('all_customers_list', None)
+    context.user_data.pop(CUSTOMER_LIST_KEY, None)
     context.user_data.pop('search_results', None)
     context.user_data.pop('searching_customer', None)
     await update.message.reply_text(
@@ -10,16 +10,10 @@ from keyboards.global_keyb import get_main_keyboard
 from handlers.cleanup import handle_cleanup_confirmation, handle_message_count_input
 from handlers.reminders import (
     handle_schedule_day_selection, handle_time_input,
-    handle_custom_reminder_input, handle_reminder_type_selection, check_jobs
-)
-from handlers.admin import (
-    manage_users_menu
-)
-from handlers.admin_roles import (
-    manage_roles_menu
+    handle_custom_reminder_input, handle_reminder_type_selection
 )
 from handlers.admin_edit_user_flow import (
-    start_edit_user_flow, edit_user_conversation_handler, cancel_edit
+    select_user_for_edit, enter_new_value, cancel_edit
 )
 from handlers.handlers_customer import (
     hand_cust_manager
@@ -27,43 +21,151 @@ from handlers.handlers_customer import (
 from .customer_self_register import(
     customer_self_register
 )
-from rep_customer.customers import (
-    show_my_bonuses, check_customer_status
-)
 from rep_customer.customer_purchase import (
     process_purchase
 )
+from rep_customer.customer_redeem import (
+    process_redeem
+)
 from rep_customer.customer_register import (
     process_customer_registration
 )
-from rep_customer.customer_register_class import customer_register
 from rep_customer.customer_search import (
     search_manager
 )
 
-from rep_invent.inventory import process_item_input, _process_unit
+from rep_invent.inventory import process_item_input
 
 from rep_bonus.bonus_master import ( 
-    process_program_creation, manage_bonus_programs, 
+    process_program_creation
 )
+from rep_bonus.bonus_simulator import process_simulation
+from rep_bonus.bonus_assign import process_program_assign
+from rep_bonus.bonus_promo import process_promo_creation, process_promo_toggle
 
-from handlers.handlers_bonus_levels import (
-    list_levels_handler, select_program_handler,
-    edit_level_handler, level_statistics_handler, delete_level_handler,
-    confirm_delete_level_handler
-)
 from rep_catalog.catalog_process import (
     CatalogProcessManager
 )
 from rep_report.report_watch import report_manager
 
-from handlers.callback_handler import handle_callback_query
-from handlers.phone_sharing import request_phone_number
-
+from rep_customer.customers_inline import CUSTOMER_LIST_KEY
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
+
+async def _process_self_register_phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ввод телефона при самостоятельной регистрации (с отменой)"""
+    if update.message.text.strip() == "❌ Отмена":
+        context.user_data.clear()
+        await update.message.reply_text("Регистрация отменена.")
+        return
+    await customer_self_register.process_phone_input(update, context)
+
+
+def _edit_user_step(step_handler):
+    """Шаг редактирования пользователя: при ошибке процесс отменяется"""
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            await step_handler(update, context)
+        except Exception as e:
+            logger.error(f"Ошибка обработки процесса редактирования пользователя: {e}")
+            await cancel_edit(update, context)
+            context.user_data.clear()
+    return handler
+
+
+def register_flows():
+    """Регистрация пошаговых процессов и обработчиков их состояний"""
+    # Процессы работы с клиентами
+    flow_engine.register(Flows.SELF_REGISTER, {
+        FlowStates.PHONE: _process_self_register_phone,
+        FlowStates.BIRTHDAY: customer_self_register.process_birthday_input,
+    }, data_keys=('self_registering', 'awaiting_phone', 'step'))
+    flow_engine.register(Flows.CUSTOMER_REGISTER, {
+        FlowStates.INPUT: process_customer_registration,
+    }, data_keys=('registering_customer',))
+    flow_engine.register(Flows.CUSTOMER_PURCHASE, {
+        FlowStates.INPUT: process_purchase,
+    }, data_keys=('adding_purchase',))
+    flow_engine.register(Flows.CUSTOMER_REDEEM, {
+        FlowStates.INPUT: process_redeem,
+    }, data_keys=('redeeming_bonuses',))
+    flow_engine.register(Flows.CUSTOMER_SEARCH, {
+        FlowStates.INPUT: search_manager.process_customer_search,
+    }, data_keys=('searching_customer',))
+
+    # Процессы работы с бонусной системой
+    flow_engine.register(Flows.BONUS_PROGRAM, {
+        FlowStates.INPUT: process_program_creation,
+    }, data_keys=('creating_program',))
+    flow_engine.register(Flows.BONUS_SIMULATOR, {
+        FlowStates.INPUT: process_simulation,
+    }, data_keys=('simulating_program',))
+    flow_engine.register(Flows.BONUS_ASSIGN, {
+        FlowStates.INPUT: process_program_assign,
+    }, data_keys=('assigning_program',))
+    flow_engine.register(Flows.PROMO_CODE, {
+        FlowStates.INPUT: process_promo_creation,
+    }, data_keys=('creating_promo',))
+    flow_engine.register(Flows.PROMO_TOGGLE, {
+        FlowStates.INPUT: process_promo_toggle,
+    }, data_keys=('toggling_promo',))
+
+    # Процессы работы с напоминаниями
+    flow_engine.register(Flows.REMINDERS, {
+        FlowStates.REMINDER_TYPE: handle_reminder_type_selection,
+        FlowStates.CUSTOM_REMINDER: handle_custom_reminder_input,
+        FlowStates.SCHEDULE_DAY: handle_schedule_day_selection,
+        FlowStates.SCHEDULE_TIME: handle_time_input,
+    }, data_keys=(
+        'awaiting_reminder_type', 'awaiting_custom_reminder', 'return_to_schedule',
+        'awaiting_schedule_day', 'awaiting_schedule_time', 'selected_day',
+    ))
+
+    # Процессы работы с инвентаризацией и справочником
+    flow_engine.register(Flows.INVENTORY_ITEM, {
+        FlowStates.ITEM_METHOD: process_item_input,
+        FlowStates.INPUT: process_item_input,
+    }, data_keys=('adding_item_method', 'item_process'))
+    flow_engine.register(Flows.CATALOG_ADD, {
+        FlowStates.INPUT: CatalogProcessManager.process_catalog_addition,
+    }, data_keys=('adding_to_catalog',))
+    flow_engine.register(Flows.CATALOG_EDIT, {
+        FlowStates.INPUT: CatalogProcessManager.process_edit_catalog,
+    }, data_keys=('editing_catalog',))
+    flow_engine.register(Flows.CATALOG_CATEGORY, {
+        FlowStates.INPUT: CatalogProcessManager.process_edit_category,
+    }, data_keys=('editing_category',))
+    flow_engine.register(Flows.CATALOG_DELETE, {
+        FlowStates.INPUT: CatalogProcessManager.process_catalog_deletion,
+    }, data_keys=('deleting_from_catalog',))
+
+    # Процессы администрирования
+    flow_engine.register(Flows.CLEANUP, {
+        FlowStates.MESSAGE_COUNT: handle_message_count_input,
+        FlowStates.CLEANUP_CONFIRM: handle_cleanup_confirmation,
+    }, data_keys=('awaiting_message_count', 'awaiting_cleanup_confirmation'))
+    flow_engine.register(Flows.EDIT_USER, {
+        FlowStates.SELECT_USER: _edit_user_step(select_user_for_edit),
+        FlowStates.SELECT_FIELD: None,
+        FlowStates.ENTER_VALUE: _edit_user_step(enter_new_value),
+    }, data_keys=('edit_user_state', 'edit_target_id', 'edit_field'))
+
+    # Отчет о смене
+    flow_engine.register(Flows.REPORT, {
+        FlowStates.CASH_MORNING: report_manager.process_cash_morning,
+        FlowStates.EXPENSE: report_manager.process_expense,
+        FlowStates.CASH_IN: report_manager.process_cash_in,
+        FlowStates.CASH_ONLINE: report_manager.process_online_cash,
+    }, data_keys=(
+        'creating_report', 'report_user_info', 'adding_expense', 'expense_report_id',
+        'adding_cash_in', 'cash_in_report_id', 'adding_online', 'online_report_id',
+    ))
+
+
 class MessageHandler:
     """Обработчик сообщений с маршрутизацией"""
     
@@ -105,139 +207,16 @@ class MessageHandler:
     
     async def _check_active_processes(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
                                      text: str) -> bool:
-        """Проверить активные процессы"""
-        user_data = context.user_data
-        
-        # Проверяем состояние ожидания телефона
-        if user_data.get('awaiting_phone') or user_data.get('step') == 'phone':
-            # Проверяем, отправлен ли контакт
-            if update.message and update.message.contact:
-                # Обрабатываем контакт
-                return await customer_self_register.process_phone_input(update, context)
-            # Проверяем, отправлен ли текст с номером
-            elif update.message and update.message.text:
-                # Проверяем, не является ли текст командой отмены
-                if text == "❌ Отмена":
-                    context.user_data.clear()
-                    await update.message.reply_text("Регистрация отменена.")
-                    return True
-                # Обрабатываем текстовый номер
-                return await customer_self_register.process_phone_input(update, context)
+        """Передать сообщение активному пошаговому процессу"""
+        return await flow_engine.dispatch(update, context)
 
-        if 'edit_user_state' in user_data:
-        # Если у нас активен процесс редактирования пользователя
-            return await self._handle_edit_user_process(update, context, text)
-        # Список активных процессов и их обработчиков
-        processes = [
-            # Процессы работы с клиентами
-            ('self_registering', customer_self_register.start_self_registration),
-            ('send_phone_number', request_phone_number),
-            ('awaiting_phone', customer_self_register.process_phone_input),
-            ('registering_customer', process_customer_registration),
-            ('awaiting_generate_card', customer_register.generate_card_number),
-            ('check_customer_status', check_customer_status),
-            ('adding_purchase', process_purchase),
-            ('searching_customer', search_manager.process_customer_search),
-            ('show_my_bonuses', show_my_bonuses),
-
-            # Процессы работы с бонусной системой
-            ('creating_program', process_program_creation),
-            ('awaiting_manage_program', manage_bonus_programs),
-            #('create_level_conversation', create_level_conversation),
-            ('selected_program', select_program_handler),
-            ('awaiting_list_levels_handler', list_levels_handler),
-            ('awaiting_edit_level_handler', edit_level_handler),
-            ('awaiting_level_statistics_handler', level_statistics_handler),
-            ('awaiting_delete_id', delete_level_handler),
-            ('level_to_delete', confirm_delete_level_handler),
-
-            # процессы с работой с напоминаниями
-            
-            ('awaiting_custom_reminder', handle_custom_reminder_input),
-            ('awaiting_schedule_day', handle_schedule_day_selection),
-            ('awaiting_reminder_type', handle_reminder_type_selection),
-            ('awaiting_schedule_time', handle_time_input),
-            ('selected_day', handle_time_input),
-            ('return_to_schedule', handle_reminder_type_selection),
-            ('check_jobs', check_jobs),
-            
-            # Процессы с работой инвентарицзации
-            ('item_process', process_item_input), # обработка ввода даннных товара
-            ('adding_item_method', process_item_input),  # обработка ввода даннных
-            ('selected_product', _process_unit),  # обработка единицы измерения
-            ('editing_catalog', handle_callback_query), # процесс редактирования товара (использует process_edit_catalog)
-            ('editing_category', CatalogProcessManager.process_edit_catalog), # процесс изменения категории (использует process_edit_category)
-            ('selected_category', CatalogProcessManager.process_edit_category), # процесс выбора товара из каталога (использует browse_catalog_for_selection)
-            ('catalog_products', CatalogProcessManager.process_catalog_addition),
-            ('adding_to_catalog', CatalogProcessManager.process_catalog_addition), # процесс добавления товара (использует process_catalog_addition)
-            ('deleting_from_catalog', CatalogProcessManager.process_catalog_deletion), # процесс удаления товара (использует process_catalog_deletion)
-            ('cancel_edit_it', handle_callback_query),
-            
-            # Процессы по работе с администрированием
-
-            ('awaiting_message_count', handle_message_count_input),
-            ('awaiting_cleanup_confirmation', handle_cleanup_confirmation),
-            ('manage_users_menu', manage_users_menu), #
-            ('manage_roles_menu', manage_roles_menu),
-            ('edit_user_flow', start_edit_user_flow),
-            ('edit_flow', edit_user_conversation_handler),
-            ('edit_cancel', cancel_edit),#
-
-            # Работа с отчетом
-            #('report_menu', report_menu),
-            ('creating_report', report_manager.process_cash_morning),
-            ('adding_expense', report_manager.process_expense),
-            ('adding_cash_in', report_manager.process_cash_in),
-            ('adding_online', report_manager.process_online_cash),
-        ]
-        
-        for key, handler in processes:
-            if key in user_data:
-                await handler(update, context)
-                return True
-        
-        return False
-
-    async def _handle_edit_user_process(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
-                                   text: str) -> bool:
-        """Обработать процесс редактирования пользователя"""
-        from handlers.admin_edit_user_flow import (
-            select_user_for_edit, 
-            enter_new_value,
-            cancel_edit,
-            EDIT_SELECT_USER, 
-            EDIT_ENTER_VALUE
-        )
-        
-        user_data = context.user_data
-        state = user_data.get('edit_user_state')
-        
-        try:
-            if state == EDIT_SELECT_USER:
-                # Обрабатываем ввод ID пользователя
-                await select_user_for_edit(update, context)
-                return True
-                
-            elif state == EDIT_ENTER_VALUE:
-                # Обрабатываем ввод нового значения
-                await enter_new_value(update, context)
-                return True
-                
-        except Exception as e:
-            logger.error(f"Ошибка обработки процесса редактирования пользователя: {e}")
-            # Если ошибка - отменяем процесс
-            await cancel_edit(update, context)
-            user_data.clear()
-        
-        return False
-    
     async def _handle_list_navigation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
                                      text: str) -> bool:
         """Обработать навигацию в списках"""
         user_data = context.user_data
         
         # Навигационные кнопки для общего списка клиентов
-        if 'all_customers_list' in user_data:
+        if CUSTOMER_LIST_KEY in user_data:
             navigation_buttons = [
                 Buttons.GET_MY_BONUS,
                 Buttons.GET_MY_STAT,
@@ -279,7 +258,7 @@ class MessageHandler:
     @staticmethod
     def cleanup_context(context):
         """Статический метод для очистки контекста"""
-        keys_to_remove = ['all_customers_list', 'search_results', 'searching_customer']
+        keys_to_remove = [CUSTOMER_LIST_KEY, 'search_results', 'searching_customer']
         for key in keys_to_remove:
             context.user_data.pop(key, None)
 
@@ -294,5 +273,6 @@ class MessageHandler:
 # Фабрика для создания обработчика
 def create_message_handler(handlers_registry: dict):
     """Создать экземпляр обработчика сообщений"""
+    register_flows()
     handler = MessageHandler(handlers_registry)
     return handler.handle_message
\ No newline at end of file
@@ -5,6 +5,8 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext, CallbackQueryHandler
 from telegram.constants import ParseMode
 from utils.telegram_utils import send_or_edit_message
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -150,6 +152,7 @@ class PrivacyPolicyManager:
             # Устанавливаем состояние ожидания номера телефона
             context.user_data['awaiting_phone'] = True
             context.user_data['step'] = 'phone'
+            flow_engine.start(context, Flows.SELF_REGISTER, FlowStates.PHONE)
 
 # Создаем экземпляр менеджера
 privacy_manager = PrivacyPolicyManager()
\ No newline at end of file
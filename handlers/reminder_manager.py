@@ -5,8 +5,9 @@ from typing import Optional, Dict, Any
 import pytz
 from telegram.ext import CallbackContext
 
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
 from keyboards.global_keyb import get_main_keyboard
+from utils.outbound import outbound
 
 logger = logging.getLogger(__name__)
 
@@ -166,9 +167,9 @@ class ReminderManager:
         try:
             message_text = await self._generate_reminder_text(user_id)
             
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=message_text,
+            # Напоминания уходят пачкой в одно время - лимиты соблюдает outbound
+            await outbound.send_message(
+                context.bot, chat_id, message_text,
                 reply_markup=await get_main_keyboard(user_id)
             )
             
@@ -232,7 +233,8 @@ class ReminderManager:
     
     # ========== DATABASE METHODS ==========
     
-    async def _save_reminder_settings_db(self, user_id: int, chat_id: int, enabled: bool) -> bool:
+    @db_write
+    def _save_reminder_settings_db(self, user_id: int, chat_id: int, enabled: bool) -> bool:
         """Сохраняет настройки в БД"""
         try:
             with sqlite_connection() as conn:
@@ -248,10 +250,11 @@ class ReminderManager:
             self.logger.error(f"Ошибка сохранения в БД: {e}")
             return False
     
-    async def _get_reminders_status_db(self, user_id: int) -> bool:
+    @db_read
+    def _get_reminders_status_db(self, user_id: int) -> bool:
         """Получает статус из БД"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT is_active FROM reminders WHERE user_id = ?",
@@ -263,10 +266,11 @@ class ReminderManager:
             self.logger.error(f"Ошибка получения статуса из БД: {e}")
             return False
     
-    async def _get_reminder_type_db(self, user_id: int) -> str:
+    @db_read
+    def _get_reminder_type_db(self, user_id: int) -> str:
         """Получает тип напоминания из БД"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT reminder_type FROM reminders WHERE user_id = ?",
@@ -278,10 +282,11 @@ class ReminderManager:
             self.logger.error(f"Ошибка получения типа из БД: {e}")
             return 'check_stock'
     
-    async def _get_reminder_settings(self, user_id: int) -> Optional[Dict]:
+    @db_read
+    def _get_reminder_settings(self, user_id: int) -> Optional[Dict]:
         """Получает все настройки"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT days_of_week, reminder_time FROM reminders WHERE user_id = ?",
@@ -320,10 +325,11 @@ class ReminderManager:
             self.logger.error(f"Ошибка получения настроек: {e}")
             return None
         
-    async def get_user_inventory(self, user_id: int) -> str:
+    @db_read
+    def get_user_inventory(self, user_id: int) -> str:
             """Получает список товаров пользователя для напоминания"""
             try:
-                with sqlite_connection() as conn:
+                with sqlite_read_connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute('''
                         SELECT i.name, i.expected_quantity, i.unit
@@ -348,7 +354,8 @@ class ReminderManager:
                 self.logger.error(f"Ошибка получения списка товаров: {e}")
                 return ""
         
-    async def save_reminder_days(self, user_id: int, days: list) -> bool:
+    @db_write
+    def save_reminder_days(self, user_id: int, days: list) -> bool:
             """Сохраняет дни напоминаний в БД"""
             try:
                 days_str = ','.join(map(str, days))
@@ -366,7 +373,8 @@ class ReminderManager:
                 self.logger.error(f"Ошибка сохранения дней напоминаний: {e}")
                 return False
         
-    async def save_reminder_time(self, user_id: int, reminder_time: time) -> bool:
+    @db_write
+    def save_reminder_time(self, user_id: int, reminder_time: time) -> bool:
             """Сохраняет время напоминания в БД"""
             try:
                 time_str = reminder_time.strftime("%H:%M:%S")
@@ -413,7 +421,8 @@ class ReminderManager:
                 self.logger.error(f"Ошибка сохранения времени напоминания: {e}", exc_info=True)
                 return False
         
-    async def save_reminder_type(self, user_id: int, reminder_type: str) -> bool:
+    @db_write
+    def save_reminder_type(self, user_id: int, reminder_type: str) -> bool:
             """Сохраняет тип напоминания в БД"""
             try:
                 with sqlite_connection() as conn:
@@ -429,7 +438,8 @@ class ReminderManager:
                 self.logger.error(f"Ошибка сохранения типа напоминания: {e}")
                 return False
         
-    async def save_custom_reminder(self, user_id: int, custom_text: str) -> bool:
+    @db_write
+    def save_custom_reminder(self, user_id: int, custom_text: str) -> bool:
             """Сохраняет custom текст напоминания в БД"""
             try:
                 with sqlite_connection() as conn:
@@ -445,10 +455,11 @@ class ReminderManager:
                 self.logger.error(f"Ошибка сохранения custom напоминания: {e}")
                 return False
         
-    async def get_custom_reminder_text(self, user_id: int) -> str:
+    @db_read
+    def get_custom_reminder_text(self, user_id: int) -> str:
             """Получает custom текст напоминания из БД"""
             try:
-                with sqlite_connection() as conn:
+                with sqlite_read_connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute(
                         "SELECT reminder_custom_text FROM reminders WHERE user_id = ?",
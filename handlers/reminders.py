@@ -5,6 +5,8 @@ from telegram.ext import CallbackContext
 from datetime import time, datetime
 import pytz
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 from keyboards.global_keyb import get_main_keyboard, get_back_keyboard 
 from keyboards.remind_keyb import get_reminders_keyboard, get_reminder_type_keyboard, get_schedule_day_keyboard
 
@@ -86,6 +88,7 @@ async def setup_schedule(update: Update, context: CallbackContext) -> None:
             reply_markup=get_schedule_day_keyboard()
         )
         context.user_data['awaiting_schedule_day'] = True
+        flow_engine.start(context, Flows.REMINDERS, FlowStates.SCHEDULE_DAY)
     except Exception as e:
         logger.error(f"Ошибка настройки расписания: {e}")
         await update.message.reply_text("Ошибка настройки расписания.")
@@ -204,6 +207,7 @@ async def setup_reminder_type(update: Update, context: CallbackContext) -> None:
             reply_markup=await get_reminder_type_keyboard()
         )
         context.user_data['awaiting_reminder_type'] = True
+        flow_engine.start(context, Flows.REMINDERS, FlowStates.REMINDER_TYPE)
         
     except Exception as e:
         logger.error(f"Ошибка настройки типа напоминания: {e}")
@@ -273,6 +277,7 @@ async def handle_reminder_type_selection(update: Update, context: CallbackContex
                 reply_markup=get_back_keyboard()
             )
             context.user_data['awaiting_custom_reminder'] = True
+            flow_engine.set_state(context, FlowStates.CUSTOM_REMINDER)
             return
             
         else:
@@ -283,8 +288,7 @@ async def handle_reminder_type_selection(update: Update, context: CallbackContex
             return
             
         # ✅ ИСПРАВЛЕНО: Всегда сбрасываем флаги
-        context.user_data.pop('awaiting_reminder_type', None)
-        context.user_data.pop('return_to_schedule', None)
+        flow_engine.finish(context, Flows.REMINDERS)
         
     except Exception as e:
         logger.error(f"Ошибка обработки типа напоминания: {e}")
@@ -320,9 +324,7 @@ async def handle_custom_reminder_input(update: Update, context: CallbackContext)
             return
             
         # ✅ ИСПРАВЛЕНО: Сбрасываем все флаги
-        context.user_data.pop('awaiting_custom_reminder', None)
-        context.user_data.pop('awaiting_reminder_type', None)
-        context.user_data.pop('return_to_schedule', None)
+        flow_engine.finish(context, Flows.REMINDERS)
         
     except Exception as e:
         logger.error(f"Ошибка обработки custom напоминания: {e}")
@@ -343,7 +345,7 @@ async def handle_schedule_day_selection(update: Update, context: CallbackContext
         if text == Buttons.BACK:
             await manage_reminders(update, context)
             # Сбрасываем флаг
-            context.user_data.pop('awaiting_schedule_day', None)
+            flow_engine.finish(context, Flows.REMINDERS)
             return
            
         # Парсим выбранный день
@@ -380,9 +382,7 @@ async def handle_schedule_day_selection(update: Update, context: CallbackContext
                         )
                         
                         # Сбрасываем флаги
-                        context.user_data.pop('awaiting_schedule_day', None)
-                        context.user_data.pop('awaiting_schedule_time', None)
-                        context.user_data.pop('selected_day', None)
+                        flow_engine.finish(context, Flows.REMINDERS)
                         return
                     
             except ValueError:
@@ -396,6 +396,7 @@ async def handle_schedule_day_selection(update: Update, context: CallbackContext
             context.user_data['selected_day'] = selected_day
             context.user_data['awaiting_schedule_time'] = True
             context.user_data.pop('awaiting_schedule_day', None)
+            flow_engine.set_state(context, FlowStates.SCHEDULE_TIME)
             
             day_names_full = {0: "Понедельник", 1: "Вторник", 2: "Среда", 
                               3: "Четверг", 4: "Пятница", 5: "Суббота", 6: "Воскресенье"}
@@ -431,8 +432,7 @@ async def handle_schedule_day_selection(update: Update, context: CallbackContext
             "Ошибка сохранения расписания.",
             reply_markup=await get_reminders_keyboard(user_id)
         )
-        context.user_data.pop('awaiting_schedule_day', None)
-        context.user_data.pop('awaiting_schedule_time', None)
+        flow_engine.finish(context, Flows.REMINDERS)
 
 async def handle_time_input(update: Update, context: CallbackContext) -> None:
     """Обработка ввода времени"""
@@ -465,6 +465,7 @@ async def handle_time_input(update: Update, context: CallbackContext) -> None:
             context.user_data['awaiting_schedule_day'] = True
             context.user_data.pop('awaiting_schedule_time', None)
             context.user_data.pop('selected_day', None)
+            flow_engine.set_state(context, FlowStates.SCHEDULE_DAY)
             return
         
         # Проверяем формат времени
@@ -500,6 +501,7 @@ async def handle_time_input(update: Update, context: CallbackContext) -> None:
                         reply_markup=await get_reminder_type_keyboard()
                     )
                     context.user_data['awaiting_reminder_type'] = True
+                    flow_engine.set_state(context, FlowStates.REMINDER_TYPE)
                 else:
                     # Если тип уже установлен - просто подтверждаем сохранение расписания
                     await update.message.reply_text(
@@ -0,0 +1,35 @@
+"""
+Обработчики начала и конца обработки обновления: контекст пользователя
+"""
+
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from utils.request_context import load_request_context, start_request, finish_request
+
+logger = logging.getLogger(__name__)
+
+# Группы обработчиков: контекст открывается раньше всех и закрывается после всех
+REQUEST_CONTEXT_OPEN_GROUP = -1
+REQUEST_CONTEXT_CLOSE_GROUP = 100
+
+
+async def open_request_context(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Загружает пользователя, роль и клиента одним запросом"""
+    user = update.effective_user
+    if user is None:
+        start_request(None)
+        return
+
+    start_request(await load_request_context(user.id))
+
+
+async def close_request_context(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Завершает контекст и учитывает сэкономленные запросы"""
+    request = finish_request()
+    if request is not None:
+        logger.debug(
+            f"Обновление {update.update_id}: запросов к БД из контекста {request.served}, "
+            f"сэкономлено {request.served - request.queries}"
+        )
@@ -19,6 +19,9 @@ async def get_bonus_system_keyboard(user_id: int):
         keyboard.append([Buttons.SEARCH_CUSTOMER, Buttons.CUSTOMER_STATISTICS])
         keyboard.append([Buttons.ADD_CUSTOMER_BONUS, Buttons.DEL_CUSTOMER_BONUS])
 
+    elif role == UserRole.BARISTA:
+        keyboard.append([Buttons.DEL_CUSTOMER_BONUS])
+
     elif role == UserRole.VISITOR:
         keyboard.append([Buttons.GET_MY_BONUS, Buttons.GET_MY_STAT])
         keyboard.append([Buttons.GET_MY_LEVEL])
@@ -38,6 +41,7 @@ async def get_loyalty_program_keyboard():
         [
             [Buttons.ADD_PROGRAM, Buttons.LIST_PROGRAM],
             [Buttons.ANALITIC_PROGRAM, Buttons.SEARCH_PROGRAM],
+            [Buttons.SIMULATE_PROGRAM, Buttons.ASSIGN_PROGRAM],
             [Buttons.BACK_TO_BONUS]
         ],
         resize_keyboard=True
@@ -91,6 +95,9 @@ async def get_bonus_keyboard(user_id: int):
     # Управление бонусами
     if await role_manager.has_permission(user_id, Permission.MANAGE_BONUSES):
         keyboard.append([Buttons.ADD_CUSTOMER_BONUS, Buttons.DEL_CUSTOMER_BONUS])
+    elif role_manager.can_manage_customers(role):
+        # Списание бонусов доступно всем, кто начисляет покупки
+        keyboard.append([Buttons.DEL_CUSTOMER_BONUS])
 
     if role == UserRole.ADMIN:
         keyboard.append([Buttons.LOYALTY_PROGRAM])
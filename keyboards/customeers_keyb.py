@@ -28,6 +28,7 @@ async def get_customer_search_keyboard():
     return ReplyKeyboardMarkup(
         [
             [Buttons.SEARCH_BY_CARD, Buttons.SEARCH_BY_PHONE],
+            [Buttons.SEARCH_BY_PHONE_SUFFIX],
             [Buttons.SEARCH_BY_NAME,Buttons.SEARCH_BY_ID],
             [Buttons.BACK_TO_CUSTOMERS]
         ],
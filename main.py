@@ -1,16 +1,25 @@
 import logging
 from handlers.admin_edit_user_flow import edit_user_conversation_handler, start_edit_user_flow
 from handlers.callback_handler import handle_callback_query
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, CallbackQueryHandler
-from telegram import ReplyKeyboardRemove, BotCommandScopeChat
+from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, CallbackQueryHandler, TypeHandler
+from telegram import Update, ReplyKeyboardRemove, BotCommandScopeChat
 # Импортируем настройку команд
 from bot_comands import set_default_commands, set_user_commands  # Добавьте эту строку
 
 from bot_config import TELEGRAM_BOT_TOKEN as TOKEN
-from database import init_db
+from database import init_db, db_executor
+from utils.update_processor import update_processor
+from migrations import run_online_migrations
+from rep_bonus.bonus_ledger_class import bonus_ledger_reconciler, LEDGER_RECONCILE_TIME
+from rep_bonus.bonus_expiry_class import bonus_expiry, BONUS_EXPIRY_DAYS, EXPIRY_TIME
+from rep_bonus.bonus_assign_class import bulk_program_assigner
 from handlers.start import start, check_and_show_logo
 
 from handlers.admin_roles_class import role_manager
+from handlers.request_context import (
+    open_request_context, close_request_context,
+    REQUEST_CONTEXT_OPEN_GROUP, REQUEST_CONTEXT_CLOSE_GROUP
+)
 
 # Импорт обработчиков
 from handlers.admin import (
@@ -32,11 +41,11 @@ from rep_customer.customers import (
     show_customer_details, show_my_bonuses
 )
 from rep_customer.customers_inline import(
-    show_customer_list_inline
+    show_customer_list_inline, CUSTOMER_PAGE_PREFIX
 )
 from handlers.handlers_customer import (
     hand_cust_manager, VIEW_CUSTOMER_PREFIX, 
-    CLOSE_CUSTOMER_LIST, BACK_TO_LIST,CLOSE_DETAILS
+    CLOSE_CUSTOMER_LIST, BACK_TO_LIST,CLOSE_DETAILS, VIEW_HISTORY_PREFIX
 )
 from rep_customer.customer_register import (
     register_customer
@@ -47,10 +56,19 @@ from rep_customer.customer_search import (
 from rep_customer.customer_purchase import (
     add_purchase
 )
+from rep_customer.customer_history import purchase_history, HISTORY_CALLBACK_PREFIX
+from rep_customer.customer_redeem import (
+    redeem_bonuses
+)
 from rep_bonus.bonus_master import (
     manage_bonus_programs, create_bonus_program, list_bonus_programs,
     bonus_system
 )
+from rep_bonus.bonus_simulator import start_simulation
+from rep_bonus.bonus_assign import assign_bonus_program
+from rep_bonus.bonus_promo import (
+    list_promocodes, create_promocode, activate_promocode, promocode_statistics
+)
 from handlers.handlers_bonus_levels import (
     create_level_conversation, create_level_handler, list_levels_handler, level_statistics_handler, edit_level_handler, delete_level_handler
 )
@@ -71,6 +89,7 @@ from handlers.catalog import (
 from rep_catalog.catalog_process import(
     CatalogProcessManager
 )
+from rep_catalog.catalog_cache_class import catalog_cache
 
 from handlers.reminders import (
     manage_reminders, start_reminders, stop_reminders,
@@ -94,8 +113,8 @@ from handlers.menus import (
     profile_info, activate_customer, deactivate_customer, create_program_handler, list_programs_handler,
     register_customer_handler, show_all_customers,
     add_purchase_handler, tools_menu,
-    search_by_card, search_by_phone, search_by_name, search_by_id,
-    purchase_history, bot_settings_menu, notifications_menu, report_menu
+    search_by_card, search_by_phone, search_by_phone_suffix, search_by_name, search_by_id,
+    bot_settings_menu, notifications_menu, report_menu
 )
 from rep_report.report_watch import report_manager
 
@@ -124,11 +143,33 @@ async def error_handler(update, context):
         except:
             await update.message.reply_text("Произошла ошибка. Попробуйте позже.")
 
+async def apply_online_migrations():
+    """Применяет онлайн-миграции в потоке записи БД, не задерживая запуск бота"""
+    try:
+        applied = await db_executor.run(run_online_migrations)
+        if applied:
+            logger.info(f"✅ Онлайн-миграции применены: {applied}")
+    except Exception as e:
+        logger.error(f"Ошибка онлайн-миграций: {e}")
+
 async def post_init(application):
     """Функция, выполняемая после инициализации бота"""
     await set_default_commands(application)
     logger.info("✅ Меню команд бота установлено")
 
+    application.create_task(apply_online_migrations())
+
+    # Задания массового назначения программ, прерванные остановкой бота
+    application.create_task(bulk_program_assigner.resume_jobs(application))
+
+    # Справочник товаров читается на каждом экране каталога - загружаем заранее
+    await db_executor.run(catalog_cache.warm_up, readonly=True)
+
+async def post_shutdown(application):
+    """Функция, выполняемая при остановке бота"""
+    logger.info(f"Метрики очередей БД: {db_executor.get_metrics()}")
+    db_executor.shutdown()
+
 def main():
     """Основная функция"""
     
@@ -137,16 +178,33 @@ def main():
     # Инициализация БД
     init_db()
     
-    # Создание приложения
-    application = ApplicationBuilder().token(TOKEN).build()
+    # Создание приложения: обновления разных пользователей обрабатываются параллельно,
+    # обновления одного пользователя - по очереди
+    application = ApplicationBuilder().token(TOKEN).concurrent_updates(update_processor).build()
     
     if not application.job_queue:
         logger.error("JobQueue не доступен!")
         return
     
     logger.info("JobQueue успешно инициализирован")
+
+    # Ночное сгорание бонусов (до сверки, чтобы сверка видела итог)
+    if BONUS_EXPIRY_DAYS > 0:
+        application.job_queue.run_daily(
+            bonus_expiry.expire_job,
+            time=EXPIRY_TIME,
+            name='bonus_expiry'
+        )
+
+    # Ночная сверка бонусных балансов с журналом
+    application.job_queue.run_daily(
+        bonus_ledger_reconciler.reconcile_job,
+        time=LEDGER_RECONCILE_TIME,
+        name='bonus_ledger_reconcile'
+    )
     
     application.post_init = post_init
+    application.post_shutdown = post_shutdown
 
     # Реестр всех обработчиков
     handlers_registry = {
@@ -208,6 +266,8 @@ def main():
         'manage_bonus_programs': manage_bonus_programs,
         'create_bonus_program': create_bonus_program,
         'list_bonus_programs': list_bonus_programs,
+        'simulate_program': start_simulation,
+        'assign_bonus_program': assign_bonus_program,
 
         # ========== УРОВНИ БОНУСНОЙ ПРОГРАММЫ ==========
         'create_level_handler': create_level_handler,
@@ -220,6 +280,12 @@ def main():
         'list_programs_handler': list_programs_handler,    # ✅
         'delete_level_handler': delete_level_handler,
 
+        # ========== ПРОМОКОДЫ ==========
+        'list_promocodes': list_promocodes,
+        'create_promocode': create_promocode,
+        'activate_promocode': activate_promocode,
+        'promocode_statistics': promocode_statistics,
+
          # ========== КЛИЕНТЫ ==========
         'start_self_registration': customer_self_register.start_self_registration,
         'register_customer_handler': register_customer_handler,
@@ -227,6 +293,7 @@ def main():
         'add_purchase_handler': add_purchase_handler,
         'register_customer': register_customer,
         'add_purchase': add_purchase,
+        'redeem_bonuses': redeem_bonuses,
         'list_all_customers': show_all_customers,
         'show_my_stat': show_my_stat,
         'search_customer': search_manager.search_customer,
@@ -273,6 +340,7 @@ def main():
         # Поиск клиентов
         'search_by_card': search_by_card,
         'search_by_phone': search_by_phone,
+        'search_by_phone_suffix': search_by_phone_suffix,
         'search_by_name': search_by_name,
         'search_by_id': search_by_id,
         'purchase_history': purchase_history,
@@ -289,10 +357,14 @@ def main():
 
     message_handler = create_message_handler(handlers_registry)
     
+    # Контекст пользователя: загружается до всех обработчиков и закрывается после них
+    application.add_handler(TypeHandler(Update, open_request_context), group=REQUEST_CONTEXT_OPEN_GROUP)
+    application.add_handler(TypeHandler(Update, close_request_context), group=REQUEST_CONTEXT_CLOSE_GROUP)
+
     application.add_handler(edit_user_conversation_handler)
     application.add_handler(CallbackQueryHandler(privacy_manager.handle_privacy_callback, pattern="^(show_privacy_policy|agree_privacy_policy|decline_privacy_policy|send_phone_number|phone)$"))
     application.add_handler(CallbackQueryHandler(report_manager.handle_callback, pattern=f"^(report_|main_menu)"))
-    application.add_handler(CallbackQueryHandler(hand_cust_manager.handle_customer_callback, pattern=f"^({VIEW_CUSTOMER_PREFIX}|{CLOSE_CUSTOMER_LIST}|{BACK_TO_LIST}|{CLOSE_DETAILS})"))
+    application.add_handler(CallbackQueryHandler(hand_cust_manager.handle_customer_callback, pattern=f"^({VIEW_CUSTOMER_PREFIX}|{CLOSE_CUSTOMER_LIST}|{BACK_TO_LIST}|{CLOSE_DETAILS}|{CUSTOMER_PAGE_PREFIX}|{VIEW_HISTORY_PREFIX}|{HISTORY_CALLBACK_PREFIX})"))
     application.add_handler(CallbackQueryHandler(handle_delete_level_callback, pattern=f"^({DELETE_LEVEL_CALLBACK_PREFIX}|{CONFIRM_DELETE_CALLBACK_PREFIX}|{CANCEL_DELETE_CALLBACK})"))
     application.add_handler(CallbackQueryHandler(handle_callback_query))
     application.add_handler(create_level_conversation)
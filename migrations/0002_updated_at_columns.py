@@ -0,0 +1,20 @@
+"""
+Колонки, которые код уже использует, но которых не было в схеме:
+users.updated_at, customers.updated_at, product_catalog.deleted_at
+"""
+
+from migrations.helpers import add_column
+
+DESCRIPTION = "Колонки updated_at / deleted_at"
+
+
+def upgrade(conn):
+    # ALTER TABLE не допускает DEFAULT CURRENT_TIMESTAMP, поэтому заполняем вручную
+    if add_column(conn, 'users', 'updated_at', 'TIMESTAMP'):
+        conn.execute("UPDATE users SET updated_at = created_at")
+
+    if add_column(conn, 'customers', 'updated_at', 'TIMESTAMP'):
+        conn.execute("UPDATE customers SET updated_at = registration_date")
+
+    if add_column(conn, 'product_catalog', 'deleted_at', 'TIMESTAMP'):
+        conn.execute("UPDATE product_catalog SET deleted_at = updated_at WHERE is_active = 0")
@@ -0,0 +1,36 @@
+"""
+Индексы под горячие запросы репозиториев (проверяются tools/query_plans.py)
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Покрывающие индексы для горячих запросов"
+
+# Таблицы растут вместе с бизнесом - строим индексы после запуска бота
+ONLINE = True
+
+INDEXES = (
+    # История покупок клиента и агрегаты по клиенту
+    ('idx_customer_purchases_customer_date', 'customer_purchases', ('customer_id', 'purchase_date', 'amount', 'bonus_earned')),
+    # Баланс и списания бонусов клиента
+    ('idx_bonus_transactions_customer_type', 'bonus_transactions', ('customer_id', 'transaction_type', 'bonus_amount')),
+    # Определение уровня клиента по сумме покупок
+    ('idx_bonus_levels_program_min', 'bonus_levels', ('program_id', 'min_total_purchases', 'bonus_percent')),
+    # Активный список и списки пользователя по дате
+    # (inventory_items уже покрыт уникальным индексом (list_id, name))
+    ('idx_inventory_lists_user_created', 'inventory_lists', ('user_id', 'created_at', 'is_active', 'list_name')),
+    # Категории и товары каталога
+    ('idx_product_catalog_active_category', 'product_catalog', ('is_active', 'category', 'name')),
+    # Отчеты пользователя и дневной отчет по диапазону дат
+    ('idx_report_watchend_user_created', 'report_watchend', ('user_id', 'created_at')),
+    ('idx_report_watchend_created', 'report_watchend', ('created_at', 'is_active')),
+    # Расходы отчета
+    ('idx_report_expenses_report', 'report_expenses', ('report_id', 'created_at')),
+    # Проверка количества администраторов
+    ('idx_user_roles_role', 'user_roles', ('role',)),
+)
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
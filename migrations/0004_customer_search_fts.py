@@ -0,0 +1,78 @@
+"""
+Полнотекстовый индекс для поиска клиентов (FTS5, токенизатор trigram).
+
+customers_fts хранит только активных клиентов, rowid = customer_id.
+Синхронизируется триггерами; обновления сумм покупок и бонусов
+индекс не трогают (триггер только на поисковые колонки).
+"""
+
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = "FTS5-индекс поиска клиентов"
+
+# Заполнение индекса проходит по всем клиентам - выполняем после запуска бота
+ONLINE = True
+
+# Телефон в индексе - только цифры: "+7 (913) 123-45-67" -> "79131234567"
+PHONE_DIGITS = (
+    "replace(replace(replace(replace(replace(coalesce({col}, ''), "
+    "'+', ''), ' ', ''), '-', ''), '(', ''), ')', '')"
+)
+
+
+def _values(prefix: str) -> str:
+    return (
+        f"{prefix}.customer_id, {prefix}.username, {prefix}.first_name, {prefix}.last_name, "
+        f"{PHONE_DIGITS.format(col=prefix + '.phone_number')}, {prefix}.card_number"
+    )
+
+
+def upgrade(conn):
+    # trigram появился в SQLite 3.34; без него поиск остается на LIKE
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        logger.warning(f"SQLite {sqlite3.sqlite_version} не поддерживает trigram - "
+                       f"индекс поиска клиентов не создан")
+        return
+
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+            username, first_name, last_name, phone, card_number,
+            tokenize = 'trigram'
+        )
+    ''')
+
+    columns = "rowid, username, first_name, last_name, phone, card_number"
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers
+        WHEN new.is_active = 1
+        BEGIN
+            INSERT INTO customers_fts ({columns}) VALUES ({_values('new')});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_update
+        AFTER UPDATE OF username, first_name, last_name, phone_number, card_number, is_active
+        ON customers
+        BEGIN
+            DELETE FROM customers_fts WHERE rowid = old.customer_id;
+            INSERT INTO customers_fts ({columns})
+            SELECT {_values('new')} WHERE new.is_active = 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers
+        BEGIN
+            DELETE FROM customers_fts WHERE rowid = old.customer_id;
+        END
+    ''')
+
+    conn.execute("DELETE FROM customers_fts")
+    conn.execute(f'''
+        INSERT INTO customers_fts ({columns})
+        SELECT {_values('c')} FROM customers c WHERE c.is_active = 1
+    ''')
+    conn.execute("INSERT INTO customers_fts (customers_fts) VALUES ('optimize')")
@@ -0,0 +1,13 @@
+"""
+Колонки нормализованного телефона клиента: phone_normalized и phone_reversed.
+Значения заполняет 0006 (онлайн), новые записи - репозитории при вставке.
+"""
+
+from migrations.helpers import add_column
+
+DESCRIPTION = "Колонки phone_normalized / phone_reversed"
+
+
+def upgrade(conn):
+    add_column(conn, 'customers', 'phone_normalized', 'TEXT')
+    add_column(conn, 'customers', 'phone_reversed', 'TEXT')
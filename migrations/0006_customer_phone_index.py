@@ -0,0 +1,36 @@
+"""
+Заполнение phone_normalized / phone_reversed для существующих клиентов
+и индексы для поиска по номеру и по последним цифрам.
+"""
+
+from migrations.helpers import create_index
+from utils.phone import phone_columns
+
+DESCRIPTION = "Нормализация телефонов клиентов и индексы по ним"
+
+# Проход по всем клиентам и построение индексов - после запуска бота
+ONLINE = True
+
+BATCH_SIZE = 1000
+
+
+def upgrade(conn):
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT customer_id, phone_number FROM customers
+            WHERE customer_id > ?
+            ORDER BY customer_id
+            LIMIT ?
+        ''', (last_id, BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+
+        conn.executemany(
+            "UPDATE customers SET phone_normalized = ?, phone_reversed = ? WHERE customer_id = ?",
+            [(*phone_columns(row[1]), row[0]) for row in rows]
+        )
+        last_id = rows[-1][0]
+
+    create_index(conn, 'idx_customers_phone_normalized', 'customers', ('phone_normalized',))
+    create_index(conn, 'idx_customers_phone_reversed', 'customers', ('phone_reversed',))
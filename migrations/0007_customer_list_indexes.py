@@ -0,0 +1,21 @@
+"""
+Индексы под keyset-пагинацию списка клиентов (CustomerManager.get_customers_page)
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Индексы страниц списка клиентов"
+
+ONLINE = True
+
+INDEXES = (
+    # Сортировки CUSTOMER_SORTS: новые, по сумме покупок, по имени
+    ('idx_customers_active_id', 'customers', ('is_active', 'customer_id')),
+    ('idx_customers_active_purchases', 'customers', ('is_active', 'total_purchases', 'customer_id')),
+    ('idx_customers_active_username', 'customers', ('is_active', 'username', 'customer_id')),
+)
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
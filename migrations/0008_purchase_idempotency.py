@@ -0,0 +1,16 @@
+"""
+Ключ идемпотентности покупки: повторное подтверждение той же покупки
+(двойное нажатие, повторно доставленное обновление) отклоняется
+уникальным индексом, а не проверкой в коде.
+"""
+
+from migrations.helpers import add_column, create_index
+
+DESCRIPTION = "Ключ идемпотентности customer_purchases"
+
+
+def upgrade(conn):
+    add_column(conn, 'customer_purchases', 'idempotency_key', 'TEXT')
+    # Частичный индекс: старые покупки без ключа в него не попадают
+    create_index(conn, 'idx_customer_purchases_idempotency', 'customer_purchases',
+                 ('idempotency_key',), unique=True, where='idempotency_key IS NOT NULL')
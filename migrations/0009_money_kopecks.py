@@ -0,0 +1,30 @@
+"""
+Денежные суммы - целые копейки (см. utils/money.py).
+
+Колонки DECIMAL(10, 2) в SQLite имеют NUMERIC-аффинность и хранили рубли
+как REAL; после миграции в них лежат INTEGER-копейки (тип колонки SQLite
+поменять без пересоздания таблицы не дает, но хранимые значения целые).
+Отчеты смены хранили целые рубли - тоже переводятся в копейки.
+
+Миграция блокирующая: код после обновления читает суммы только в копейках.
+"""
+
+DESCRIPTION = "Суммы в копейках"
+
+MONEY_COLUMNS = (
+    ('customers', ('total_purchases', 'total_bonuses', 'available_bonuses')),
+    ('customer_purchases', ('amount', 'bonus_earned')),
+    ('bonus_transactions', ('bonus_amount',)),
+    ('bonus_programs', ('min_purchase_amount', 'max_purchase_amount')),
+    ('bonus_levels', ('min_total_purchases',)),
+    ('report_watchend', ('cash_morning', 'cash_wasted', 'cash_online', 'cash_in', 'cash_rest')),
+    ('report_expenses', ('cash_rested',)),
+)
+
+
+def upgrade(conn):
+    for table, columns in MONEY_COLUMNS:
+        assignments = ', '.join(
+            f"{column} = CAST(ROUND({column} * 100) AS INTEGER)" for column in columns
+        )
+        conn.execute(f"UPDATE {table} SET {assignments}")
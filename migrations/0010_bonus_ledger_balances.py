@@ -0,0 +1,27 @@
+"""
+Состояние сверки бонусов с журналом bonus_transactions.
+
+bonus_ledger_balances - суммы журнала по клиенту (копейки), накопленные
+до отметки job_checkpoints['bonus_ledger']; каждая сверка добавляет только
+новые записи журнала. job_checkpoints хранит отметки фоновых задач.
+"""
+
+DESCRIPTION = "Балансы журнала бонусов и отметки фоновых задач"
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_checkpoints (
+            job_name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bonus_ledger_balances (
+            customer_id INTEGER PRIMARY KEY,
+            earned INTEGER NOT NULL DEFAULT 0,
+            spent INTEGER NOT NULL DEFAULT 0,
+            expired INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
@@ -0,0 +1,15 @@
+"""
+Ключ идемпотентности транзакции бонусов: повторное подтверждение списания
+(двойное нажатие, повторно доставленное обновление) отклоняется уникальным
+индексом, как и у покупок (0008).
+"""
+
+from migrations.helpers import add_column, create_index
+
+DESCRIPTION = "Ключ идемпотентности bonus_transactions"
+
+
+def upgrade(conn):
+    add_column(conn, 'bonus_transactions', 'idempotency_key', 'TEXT')
+    create_index(conn, 'idx_bonus_transactions_idempotency', 'bonus_transactions',
+                 ('idempotency_key',), unique=True, where='idempotency_key IS NOT NULL')
@@ -0,0 +1,20 @@
+"""
+Индексы под статистику уровней (LevelStatistics): клиенты программы
+по диапазонам сумм покупок и покупки за период для переходов между уровнями.
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Индексы статистики уровней"
+
+ONLINE = True
+
+INDEXES = (
+    ('idx_customers_program_purchases', 'customers', ('bonus_program_id', 'is_active', 'total_purchases')),
+    ('idx_customer_purchases_date', 'customer_purchases', ('purchase_date', 'customer_id', 'amount')),
+)
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
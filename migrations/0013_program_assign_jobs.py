@@ -0,0 +1,34 @@
+"""
+Задания массового назначения бонусной программы (BulkProgramAssigner).
+
+Задание хранит правило выбора клиентов (JSON), целевую программу и отметку
+last_customer_id: клиенты обновляются порциями по диапазону customer_id
+до max_customer_id, зафиксированного при создании, и после перезапуска
+бота задание продолжается с отметки. chat_id/message_id - сообщение
+о ходе выполнения в чате администратора.
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Задания массового назначения бонусной программы"
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS program_assign_jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            program_id INTEGER NOT NULL,
+            selector TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            last_customer_id INTEGER NOT NULL DEFAULT 0,
+            max_customer_id INTEGER NOT NULL DEFAULT 0,
+            assigned INTEGER NOT NULL DEFAULT 0,
+            chat_id INTEGER,
+            message_id INTEGER,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (program_id) REFERENCES bonus_programs(program_id)
+        )
+    ''')
+    create_index(conn, 'idx_program_assign_jobs_status', 'program_assign_jobs', ('status',))
@@ -0,0 +1,59 @@
+"""
+Промокоды (PromoCodeManager).
+
+promo_codes.code хранится нормализованным (верхний регистр, без пробелов
+и дефисов) под уникальным индексом: поиск кода - один проход по индексу,
+а дубликаты при пакетной генерации отсекает сама БД. used_count
+увеличивается условным UPDATE, поэтому max_uses не превышается при
+одновременных покупках.
+
+promo_redemptions - применения кодов; индекс (promo_id, customer_id)
+отвечает на вопрос "сколько раз клиент применил код" одним поиском.
+promo_codes.created_by - telegram_id администратора.
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Промокоды и их применения"
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS promo_codes (
+            promo_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT NOT NULL,
+            promo_type TEXT NOT NULL,
+            bonus_multiplier DECIMAL(5, 2),
+            fixed_bonus INTEGER,
+            max_uses INTEGER,
+            used_count INTEGER NOT NULL DEFAULT 0,
+            per_customer_limit INTEGER NOT NULL DEFAULT 1,
+            valid_until TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1,
+            batch_id TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    create_index(conn, 'idx_promo_codes_code', 'promo_codes', ('code',), unique=True)
+    create_index(conn, 'idx_promo_codes_batch', 'promo_codes', ('batch_id',),
+                 where='batch_id IS NOT NULL')
+    # Есть ли включенные коды - проверяется в каждой покупке
+    create_index(conn, 'idx_promo_codes_active', 'promo_codes', ('promo_id',),
+                 where='is_active = 1')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS promo_redemptions (
+            redemption_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            promo_id INTEGER NOT NULL,
+            customer_id INTEGER NOT NULL,
+            purchase_id INTEGER,
+            bonus_amount INTEGER NOT NULL DEFAULT 0,
+            redeemed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (promo_id) REFERENCES promo_codes(promo_id),
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+            FOREIGN KEY (purchase_id) REFERENCES customer_purchases(purchase_id)
+        )
+    ''')
+    create_index(conn, 'idx_promo_redemptions_promo_customer', 'promo_redemptions',
+                 ('promo_id', 'customer_id'))
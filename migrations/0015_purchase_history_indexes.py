@@ -0,0 +1,25 @@
+"""
+Индексы под историю покупок клиента (PurchaseHistory).
+
+Страница истории - keyset по (purchase_date, purchase_id) в обратном
+порядке внутри клиента: индекс отдает покупки уже отсортированными и
+покрывает все показываемые колонки, поэтому страница читается одним
+проходом по индексу без обращения к таблице и без сортировки.
+Начисления по покупкам подтягиваются из bonus_transactions по purchase_id.
+"""
+
+from migrations.helpers import create_index
+
+DESCRIPTION = "Индексы истории покупок"
+
+ONLINE = True
+
+
+def upgrade(conn):
+    create_index(conn, 'idx_customer_purchases_history', 'customer_purchases',
+                 ('customer_id', 'purchase_date DESC', 'purchase_id DESC',
+                  'amount', 'bonus_earned', 'description'))
+    # Списания и сгорания не привязаны к покупке - в индекс не попадают
+    create_index(conn, 'idx_bonus_transactions_purchase', 'bonus_transactions',
+                 ('purchase_id', 'transaction_type', 'bonus_amount', 'description'),
+                 where='purchase_id IS NOT NULL')
@@ -0,0 +1,21 @@
+"""
+Версия справочника товаров (CatalogCache).
+
+catalog_version - одна строка со счетчиком, который увеличивают методы
+записи CatalogRepository в той же транзакции, что и изменение товаров.
+Кэш справочника в памяти сравнивает свою версию с ней после того, как
+PRAGMA data_version сообщил о чужом коммите, и перечитывает товары только
+при изменении справочника - в том числе другим процессом бота.
+"""
+
+DESCRIPTION = "Версия справочника товаров"
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
@@ -0,0 +1,8 @@
+"""
+Версионные миграции схемы БД.
+
+Каждая миграция - файл NNNN_описание.py в этом пакете с функцией upgrade(conn).
+Примененные миграции и их контрольные суммы хранятся в таблице schema_version.
+"""
+
+from migrations.engine import MigrationEngine, migration_engine, run_migrations, run_online_migrations
@@ -0,0 +1,31 @@
+"""
+Консольное управление миграциями:
+
+    python -m migrations           # применить все миграции (включая онлайн)
+    python -m migrations status    # показать состояние
+"""
+
+import sys
+import logging
+
+from migrations import migration_engine, run_migrations, run_online_migrations
+
+
+def main():
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'status':
+        for item in migration_engine.status():
+            state = "применена" if item['applied'] else "ожидает"
+            if item['applied'] and not item['checksum_ok']:
+                state += ", изменена после применения"
+            kind = " [online]" if item['online'] else ""
+            print(f"{item['version']:04d}_{item['name']}{kind}: {state}")
+        return
+
+    applied = run_migrations() + run_online_migrations()
+    print(f"Применено миграций: {applied}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Движок версионных миграций схемы БД
+"""
+
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import importlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database import sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+class Migration:
+    """Описание одной миграции"""
+
+    def __init__(self, version: int, name: str, path: Path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            self._module = importlib.import_module(f"{__package__}.{self.path.stem}")
+        return self._module
+
+    @property
+    def online(self) -> bool:
+        """Онлайн-миграции выполняются после запуска бота"""
+        return getattr(self.module, 'ONLINE', False)
+
+    @property
+    def description(self) -> str:
+        return getattr(self.module, 'DESCRIPTION', self.name)
+
+    def upgrade(self, conn: sqlite3.Connection) -> None:
+        self.module.upgrade(conn)
+
+
+class MigrationEngine:
+    """Применяет миграции из пакета migrations и ведет таблицу schema_version"""
+
+    def __init__(self, directory: Path = None):
+        self.directory = directory or Path(__file__).parent
+        self.logger = logging.getLogger(__name__)
+        self._migrations = None
+
+    def discover(self) -> List[Migration]:
+        """Находит файлы миграций, отсортированные по номеру"""
+        if self._migrations is None:
+            migrations = []
+            for path in self.directory.iterdir():
+                match = MIGRATION_FILE_RE.match(path.name)
+                if match:
+                    migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+            migrations.sort(key=lambda m: m.version)
+            versions = [m.version for m in migrations]
+            if len(versions) != len(set(versions)):
+                raise RuntimeError(f"Повторяющиеся номера миграций: {versions}")
+
+            self._migrations = migrations
+        return self._migrations
+
+    def _applied(self, conn: sqlite3.Connection) -> Optional[Dict[int, str]]:
+        """Версии и контрольные суммы примененных миграций (None - таблицы еще нет)"""
+        try:
+            rows = conn.execute("SELECT version, checksum FROM schema_version").fetchall()
+        except sqlite3.OperationalError:
+            return None
+        return {row['version']: row['checksum'] for row in rows}
+
+    def _create_version_table(self, conn: sqlite3.Connection) -> None:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER
+            )
+        ''')
+        conn.commit()
+
+    def pending(self, conn: sqlite3.Connection, online: bool = False) -> List[Migration]:
+        """Список непримененных миграций нужного типа"""
+        applied = self._applied(conn)
+        if applied is None:
+            self._create_version_table(conn)
+            applied = {}
+
+        pending = []
+        for migration in self.discover():
+            checksum = applied.get(migration.version)
+            if checksum is None:
+                if migration.online == online:
+                    pending.append(migration)
+            elif checksum != migration.checksum:
+                self.logger.warning(
+                    f"Миграция {migration.version:04d}_{migration.name} изменена после применения "
+                    f"(контрольная сумма не совпадает)"
+                )
+        return pending
+
+    def _apply(self, conn: sqlite3.Connection, migration: Migration) -> bool:
+        """
+        Применяет одну миграцию в отдельной транзакции.
+        Возвращает False, если ее уже применил другой процесс.
+        """
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Список ожидающих читался без блокировки - пока мы ждали
+            # BEGIN IMMEDIATE, миграцию мог применить другой процесс
+            applied = conn.execute(
+                "SELECT 1 FROM schema_version WHERE version = ?", (migration.version,)
+            ).fetchone()
+            if applied:
+                conn.rollback()
+                self.logger.info(
+                    f"Миграция {migration.version:04d}_{migration.name} уже применена другим процессом"
+                )
+                return False
+
+            self.logger.info(f"Применяем миграцию {migration.version:04d}_{migration.name}: {migration.description}")
+            started = time.perf_counter()
+            migration.upgrade(conn)
+            conn.execute('''
+                INSERT INTO schema_version (version, name, checksum, duration_ms)
+                VALUES (?, ?, ?, ?)
+            ''', (
+                migration.version,
+                migration.name,
+                migration.checksum,
+                int((time.perf_counter() - started) * 1000)
+            ))
+            conn.commit()
+            return True
+        except Exception:
+            conn.rollback()
+            self.logger.error(f"Миграция {migration.version:04d}_{migration.name} не применена", exc_info=True)
+            raise
+
+    def migrate(self, online: bool = False, db_path: str = None) -> int:
+        """
+        Применяет все ожидающие миграции.
+
+        Если схема актуальна, выполняется только один SELECT из schema_version
+        без какого-либо DDL. Возвращает количество примененных миграций.
+        """
+        with sqlite_connection(db_path) as conn:
+            pending = self.pending(conn, online=online)
+            if not pending:
+                return 0
+
+            applied = 0
+            for migration in pending:
+                if self._apply(conn, migration):
+                    applied += 1
+
+        self.logger.info(f"Применено миграций: {applied}")
+        return applied
+
+    def status(self, db_path: str = None) -> List[Dict]:
+        """Состояние всех миграций (для вывода в консоль)"""
+        with sqlite_connection(db_path) as conn:
+            applied = self._applied(conn) or {}
+
+        return [
+            {
+                'version': m.version,
+                'name': m.name,
+                'online': m.online,
+                'applied': m.version in applied,
+                'checksum_ok': applied.get(m.version, m.checksum) == m.checksum,
+            }
+            for m in self.discover()
+        ]
+
+
+migration_engine = MigrationEngine()
+
+
+def run_migrations(db_path: str = None) -> int:
+    """Применяет обычные (блокирующие) миграции - вызывается при старте"""
+    return migration_engine.migrate(online=False, db_path=db_path)
+
+
+def run_online_migrations(db_path: str = None) -> int:
+    """Применяет онлайн-миграции (тяжелые индексы) - вызывается после запуска бота"""
+    return migration_engine.migrate(online=True, db_path=db_path)
@@ -0,0 +1,70 @@
+"""
+Вспомогательные функции для миграций
+"""
+
+import time
+import logging
+import sqlite3
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """Проверяет наличие таблицы"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,)
+    ).fetchone()
+    return row is not None
+
+
+def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    """Проверяет наличие колонки в таблице"""
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def index_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Проверяет наличие индекса"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+        (name,)
+    ).fetchone()
+    return row is not None
+
+
+def add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+    """
+    Добавляет колонку, если ее еще нет (в SQLite нет ADD COLUMN IF NOT EXISTS).
+    Возвращает True, если колонка была добавлена.
+    """
+    if column_exists(conn, table, column):
+        return False
+
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    logger.info(f"Добавлена колонка {table}.{column}")
+    return True
+
+
+def create_index(conn: sqlite3.Connection, name: str, table: str, columns: Iterable[str],
+                 unique: bool = False, where: str = None) -> bool:
+    """
+    Создает индекс, если его еще нет, и обновляет по нему статистику планировщика.
+
+    Для больших таблиц такие миграции помечаются ONLINE = True: они выполняются
+    уже после запуска бота в потоке записи БД, а чтение в режиме WAL
+    во время построения индекса не блокируется.
+    Возвращает True, если индекс был создан.
+    """
+    if index_exists(conn, name):
+        return False
+
+    started = time.perf_counter()
+    conn.execute(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+        f"ON {table}({', '.join(columns)})"
+        + (f" WHERE {where}" if where else "")
+    )
+    conn.execute(f"ANALYZE {name}")
+    logger.info(f"Создан индекс {name} на {table} за {time.perf_counter() - started:.2f} сек")
+    return True
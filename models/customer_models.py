@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional
 from datetime import datetime
+from utils.money import Money
 
 @dataclass
 class CustomerRegistrationDTO:
@@ -37,9 +38,9 @@ class CustomerDTO:
     card_number: str
     registration_date: datetime
     is_active: bool
-    total_purchases: float
-    total_bonuses: float
-    available_bonuses: float
+    total_purchases: Money
+    total_bonuses: Money
+    available_bonuses: Money
     bonus_program_id: Optional[int] = None
     
     @classmethod
@@ -0,0 +1,299 @@
+# rep_bonus/bonus_assign.py
+import logging
+from telegram import Update, ReplyKeyboardMarkup
+from telegram.ext import CallbackContext
+
+from database import db_executor
+from utils.money import Money
+from handlers.admin_roles_class import role_manager, UserRole
+from rep_bonus.bonus_levels_class import bonus_levels_manager
+from rep_bonus.bonus_master_class import bonus_data_manager
+from rep_bonus.bonus_assign_class import bulk_program_assigner
+from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
+from keyboards.bonus_keyb import get_confirm_bonus_keyboard, get_loyalty_program_keyboard
+from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+
+logger = logging.getLogger(__name__)
+
+# Правила выбора клиентов
+SELECTOR_BUTTONS = {
+    "🆕 Без программы": 'no_program',
+    "🔄 Из другой программы": 'from_program',
+    "📊 По уровню": 'level',
+    "📅 По дате регистрации": 'registered',
+}
+
+
+def _program_id(text: str, programs: dict):
+    """ID программы из кнопки "🎯 ID:1 - Название" или из введенного числа"""
+    if text.startswith("🎯 ID:"):
+        text = text[len("🎯 ID:"):].split(' - ', 1)[0]
+    try:
+        program_id = int(text.strip())
+    except ValueError:
+        return None
+    return program_id if program_id in programs else None
+
+
+def _programs_keyboard(programs: dict) -> ReplyKeyboardMarkup:
+    buttons = [[f"🎯 ID:{program_id} - {name}"] for program_id, name in programs.items()]
+    buttons.append([Buttons.CANCEL])
+    return ReplyKeyboardMarkup(buttons, resize_keyboard=True)
+
+
+async def assign_bonus_program(update: Update, context: CallbackContext) -> None:
+    """
+    МАССОВОЕ НАЗНАЧЕНИЕ ПРОГРАММЫ
+    Привязывается к кнопке "Назначить программу".
+    Спрашивает целевую программу и правило выбора клиентов,
+    затем запускает задание, которое выполняется порциями в фоне.
+    """
+    user_id = update.effective_user.id
+    role = await role_manager.get_user_role(user_id)
+
+    if role != UserRole.ADMIN:
+        await update.message.reply_text(
+            "⛔ Только администратор может назначать бонусные программы.",
+            reply_markup=await get_main_keyboard(user_id)
+        )
+        return
+
+    programs = {program['program_id']: program['program_name']
+                for program in await bonus_levels_manager.get_active_bonus_programs()}
+    if not programs:
+        await update.message.reply_text(
+            "❌ Нет активных бонусных программ.",
+            reply_markup=await get_loyalty_program_keyboard()
+        )
+        return
+
+    context.user_data['assigning_program'] = {
+        'step': 'program',
+        'data': {}
+    }
+    flow_engine.start(context, Flows.BONUS_ASSIGN, FlowStates.INPUT)
+
+    await update.message.reply_text(
+        "🎁 *Назначение бонусной программы*\n\n"
+        "Выберите программу, которую нужно назначить клиентам:",
+        reply_markup=_programs_keyboard(programs),
+        parse_mode='Markdown'
+    )
+
+
+async def process_program_assign(update: Update, context: CallbackContext) -> None:
+    """Обработка шагов назначения программы"""
+    if 'assigning_program' not in context.user_data:
+        return
+
+    text = update.message.text.strip()
+    process = context.user_data['assigning_program']
+
+    if text in (Buttons.CANCEL, Buttons.CONFIRM_NO):
+        del context.user_data['assigning_program']
+        await update.message.reply_text(
+            "❌ Назначение программы отменено.",
+            reply_markup=await get_loyalty_program_keyboard()
+        )
+        return
+
+    if process['step'] == 'program':
+        await handle_target_step(update, context, text, process)
+
+    elif process['step'] == 'selector':
+        await handle_selector_step(update, context, text, process)
+
+    elif process['step'] == 'source':
+        await handle_source_step(update, context, text, process)
+
+    elif process['step'] == 'level':
+        await handle_level_step(update, context, text, process)
+
+    elif process['step'] == 'dates':
+        await handle_dates_step(update, context, text, process)
+
+    elif process['step'] == 'confirm':
+        await handle_confirm_step(update, context, text, process)
+
+
+async def handle_target_step(update: Update, context: CallbackContext,
+                             text: str, process: dict) -> None:
+    """Выбор программы, которую назначаем"""
+    programs = {program['program_id']: program['program_name']
+                for program in await bonus_levels_manager.get_active_bonus_programs()}
+    program_id = _program_id(text, programs)
+    if program_id is None:
+        await update.message.reply_text(
+            "❌ Программа не найдена. Выберите программу из списка:",
+            reply_markup=_programs_keyboard(programs)
+        )
+        return
+
+    process['data']['program_id'] = program_id
+    process['data']['program_name'] = programs[program_id]
+    process['step'] = 'selector'
+
+    buttons = [[name] for name in SELECTOR_BUTTONS]
+    buttons.append([Buttons.CANCEL])
+    await update.message.reply_text(
+        f"Программа «{programs[program_id]}».\n\nКаким клиентам ее назначить?",
+        reply_markup=ReplyKeyboardMarkup(buttons, resize_keyboard=True)
+    )
+
+
+async def handle_selector_step(update: Update, context: CallbackContext,
+                               text: str, process: dict) -> None:
+    """Выбор правила отбора клиентов"""
+    kind = SELECTOR_BUTTONS.get(text)
+    if kind is None:
+        await update.message.reply_text("❌ Выберите правило кнопкой ниже.")
+        return
+
+    process['data']['selector'] = {'kind': kind}
+
+    if kind == 'no_program':
+        await show_preview(update, process)
+
+    elif kind in ('from_program', 'level'):
+        # Переводить можно и из отключенной программы
+        programs = {program['program_id']: program['program_name']
+                    for program in await bonus_data_manager.get_all_bonus_programs()
+                    if program['program_id'] != process['data']['program_id']}
+        process['step'] = 'source'
+        await update.message.reply_text(
+            "Из какой программы перевести клиентов?",
+            reply_markup=_programs_keyboard(programs)
+        )
+
+    else:
+        process['step'] = 'dates'
+        await update.message.reply_text(
+            "Введите интервал дат регистрации в формате ДД.ММ.ГГГГ-ДД.ММ.ГГГГ:",
+            reply_markup=get_cancel_keyboard()
+        )
+
+
+async def handle_source_step(update: Update, context: CallbackContext,
+                             text: str, process: dict) -> None:
+    """Программа, из которой переводятся клиенты"""
+    programs = {program['program_id']: program['program_name']
+                for program in await bonus_data_manager.get_all_bonus_programs()
+                if program['program_id'] != process['data']['program_id']}
+    source_id = _program_id(text, programs)
+    if source_id is None:
+        await update.message.reply_text(
+            "❌ Программа не найдена. Выберите программу из списка:",
+            reply_markup=_programs_keyboard(programs)
+        )
+        return
+
+    selector = process['data']['selector']
+    selector['program_id'] = source_id
+
+    if selector['kind'] == 'from_program':
+        await show_preview(update, process)
+        return
+
+    levels = await bonus_levels_manager.get_bonus_levels(source_id)
+    if not levels:
+        await update.message.reply_text(
+            f"📭 В программе «{programs[source_id]}» нет уровней. Выберите другую программу:",
+            reply_markup=_programs_keyboard(programs)
+        )
+        return
+
+    process['step'] = 'level'
+    levels_text = "\n".join(f"{level['level_id']} — {level['level_name']} "
+                            f"(от {Money.from_db(level['min_total_purchases'])} руб.)" for level in levels)
+    await update.message.reply_text(
+        f"Уровни программы «{programs[source_id]}»:\n\n{levels_text}\n\nВведите ID уровня:",
+        reply_markup=get_cancel_keyboard()
+    )
+
+
+async def handle_level_step(update: Update, context: CallbackContext,
+                            text: str, process: dict) -> None:
+    """Уровень, клиентов которого переводим"""
+    try:
+        process['data']['selector']['level_id'] = int(text)
+    except ValueError:
+        await update.message.reply_text("❌ Введите числовой ID уровня:")
+        return
+
+    await show_preview(update, process)
+
+
+async def handle_dates_step(update: Update, context: CallbackContext,
+                            text: str, process: dict) -> None:
+    """Интервал дат регистрации"""
+    try:
+        since, until = bulk_program_assigner.parse_dates(text)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}. Попробуйте снова:")
+        return
+
+    process['data']['selector'].update(since=since, until=until)
+    await show_preview(update, process)
+
+
+async def show_preview(update: Update, process: dict) -> None:
+    """Сколько клиентов попадет под правило; запрос подтверждения"""
+    data = process['data']
+    try:
+        preview = await db_executor.run(bulk_program_assigner.preview,
+                                        data['program_id'], data['selector'], readonly=True)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}. Попробуйте снова:")
+        return
+
+    data['selector'] = preview['selector']
+    process['step'] = 'confirm'
+
+    await update.message.reply_text(
+        f"🎁 Программа «{data['program_name']}»\n"
+        f"👥 {bulk_program_assigner.describe(preview['selector']).capitalize()}: "
+        f"{preview['customers']}\n\n"
+        "Назначить программу?",
+        reply_markup=get_confirm_bonus_keyboard()
+    )
+
+
+async def handle_confirm_step(update: Update, context: CallbackContext,
+                              text: str, process: dict) -> None:
+    """Запуск задания: ход выполнения правится в отдельном сообщении"""
+    if text != Buttons.CONFIRM_YES:
+        await update.message.reply_text("Подтвердите назначение кнопкой ниже.",
+                                        reply_markup=get_confirm_bonus_keyboard())
+        return
+
+    data = process['data']
+    del context.user_data['assigning_program']
+
+    await update.message.reply_text(
+        "✅ Задание запущено, клиенты переводятся порциями.",
+        reply_markup=await get_loyalty_program_keyboard()
+    )
+    progress = await update.message.reply_text("⏳ Подготовка назначения программы...")
+
+    try:
+        created = await db_executor.run(
+            bulk_program_assigner.create_job, data['program_id'], data['selector'],
+            progress.chat_id, progress.message_id, update.effective_user.id
+        )
+    except Exception as e:
+        logger.error(f"Ошибка создания задания назначения программы: {e}", exc_info=True)
+        await progress.edit_text("❌ Ошибка запуска назначения программы.")
+        return
+
+    if created['status'] == 'busy':
+        await progress.edit_text(
+            f"⏳ Уже выполняется задание назначения #{created['job_id']}. "
+            "Дождитесь его завершения."
+        )
+        return
+
+    context.application.create_task(
+        bulk_program_assigner.run_job(created['job_id'], context.bot)
+    )
@@ -0,0 +1,344 @@
+"""
+Массовое назначение бонусной программы клиентам.
+
+Клиенты выбираются правилом (selector):
+- no_program   - клиенты без программы;
+- from_program - клиенты программы X;
+- level        - клиенты программы X на уровне L (по сумме покупок);
+- registered   - клиенты, зарегистрированные в интервале дат.
+
+Правило, целевая программа и отметка last_customer_id хранятся в
+program_assign_jobs. Клиенты обновляются порциями по диапазону customer_id,
+каждая порция - своя короткая транзакция вместе с отметкой: бот между
+порциями отвечает, а после перезапуска задание продолжается с отметки.
+Ход выполнения показывается одним сообщением в чате администратора,
+которое правится на месте.
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from database import sqlite_connection, sqlite_read_connection, db_executor
+from utils.outbound import outbound
+from rep_bonus.bonus_level_stats_class import level_statistics
+
+# Диапазон customer_id в одной транзакции
+ASSIGN_BATCH_SIZE = int(os.getenv('ASSIGN_BATCH_SIZE', '1000'))
+# Как часто обновлять сообщение о ходе выполнения (сек)
+ASSIGN_PROGRESS_INTERVAL = 3.0
+
+SELECTOR_KINDS = ('no_program', 'from_program', 'level', 'registered')
+
+# Интервал дат регистрации: "01.01.2024-31.03.2024"
+DATE_FORMAT = '%d.%m.%Y'
+
+
+class BulkProgramAssigner:
+    """Назначение программы клиентам, выбранным по правилу"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # Задания, которые выполняются в этом процессе
+        self._active = set()
+
+    # ---------- Правила выбора клиентов ----------
+
+    def parse_dates(self, text: str) -> Tuple[str, str]:
+        """Интервал "ДД.ММ.ГГГГ-ДД.ММ.ГГГГ" -> (since, until) для правила registered"""
+        parts = [part.strip() for part in text.split('-')]
+        if len(parts) != 2:
+            raise ValueError("Укажите интервал в формате ДД.ММ.ГГГГ-ДД.ММ.ГГГГ")
+        try:
+            since, until = (datetime.strptime(part, DATE_FORMAT) for part in parts)
+        except ValueError:
+            raise ValueError("Некорректная дата, формат ДД.ММ.ГГГГ")
+        if since > until:
+            raise ValueError("Начало интервала позже конца")
+        return since.strftime('%Y-%m-%d'), until.strftime('%Y-%m-%d')
+
+    def _resolve(self, cursor, selector: Dict) -> Dict:
+        """
+        Правило с параметрами, зафиксированными на момент создания задания:
+        для уровня - границы суммы покупок (ValueError, если уровня нет)
+        """
+        kind = selector.get('kind')
+        if kind not in SELECTOR_KINDS:
+            raise ValueError(f"Неизвестное правило выбора клиентов: {kind}")
+
+        if kind != 'level' or 'low' in selector:
+            return dict(selector)
+
+        cursor.execute('''
+            SELECT level_name, min_total_purchases FROM bonus_levels
+            WHERE level_id = ? AND program_id = ?
+        ''', (selector['level_id'], selector['program_id']))
+        level = cursor.fetchone()
+        if not level:
+            raise ValueError("Уровень не найден в программе")
+
+        cursor.execute('''
+            SELECT MIN(min_total_purchases) FROM bonus_levels
+            WHERE program_id = ? AND min_total_purchases > ?
+        ''', (selector['program_id'], level['min_total_purchases']))
+        high = cursor.fetchone()[0]
+
+        return {**selector, 'level_name': level['level_name'],
+                'low': level['min_total_purchases'], 'high': high}
+
+    def _where(self, program_id: int, selector: Dict) -> Tuple[str, list]:
+        """Условие отбора клиентов правила (клиенты целевой программы не выбираются)"""
+        conditions = ["is_active = 1", "bonus_program_id IS NOT ?"]
+        params = [program_id]
+
+        kind = selector['kind']
+        if kind == 'no_program':
+            conditions.append("bonus_program_id IS NULL")
+        elif kind == 'from_program':
+            conditions.append("bonus_program_id = ?")
+            params.append(selector['program_id'])
+        elif kind == 'level':
+            conditions.append("bonus_program_id = ? AND total_purchases >= ?")
+            params += [selector['program_id'], selector['low']]
+            if selector['high'] is not None:
+                conditions.append("total_purchases < ?")
+                params.append(selector['high'])
+        elif kind == 'registered':
+            until = datetime.strptime(selector['until'], '%Y-%m-%d') + timedelta(days=1)
+            conditions.append("registration_date >= ? AND registration_date < ?")
+            params += [selector['since'], until.strftime('%Y-%m-%d')]
+
+        return " AND ".join(conditions), params
+
+    def describe(self, selector: Dict) -> str:
+        """Правило словами, для сообщений администратору"""
+        kind = selector['kind']
+        if kind == 'no_program':
+            return "клиенты без программы"
+        if kind == 'from_program':
+            return f"клиенты программы ID:{selector['program_id']}"
+        if kind == 'level':
+            level = selector.get('level_name') or f"ID:{selector['level_id']}"
+            return f"клиенты программы ID:{selector['program_id']} на уровне «{level}»"
+        since = datetime.strptime(selector['since'], '%Y-%m-%d').strftime(DATE_FORMAT)
+        until = datetime.strptime(selector['until'], '%Y-%m-%d').strftime(DATE_FORMAT)
+        return f"клиенты, зарегистрированные {since}-{until}"
+
+    def preview(self, program_id: int, selector: Dict) -> Dict:
+        """Сколько клиентов попадет под правило (ValueError при ошибке правила)"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            selector = self._resolve(cursor, selector)
+            where, params = self._where(program_id, selector)
+            cursor.execute(f"SELECT COUNT(*) FROM customers WHERE {where}", params)
+            return {'selector': selector, 'customers': cursor.fetchone()[0]}
+
+    # ---------- Задания ----------
+
+    def create_job(self, program_id: int, selector: Dict, chat_id: Optional[int] = None,
+                   message_id: Optional[int] = None, created_by: Optional[int] = None) -> Dict:
+        """
+        Создает задание. Одновременно выполняется одно задание: если есть
+        незавершенное, возвращается {'status': 'busy', 'job_id': ...}
+        """
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute('''
+                    SELECT job_id FROM program_assign_jobs WHERE status = 'running' LIMIT 1
+                ''')
+                running = cursor.fetchone()
+                if running:
+                    conn.rollback()
+                    return {'status': 'busy', 'job_id': running['job_id']}
+
+                selector = self._resolve(cursor, selector)
+                cursor.execute("SELECT MAX(customer_id) FROM customers")
+                max_id = cursor.fetchone()[0] or 0
+
+                cursor.execute('''
+                    INSERT INTO program_assign_jobs
+                        (program_id, selector, max_customer_id, chat_id, message_id, created_by)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (program_id, json.dumps(selector, ensure_ascii=False), max_id,
+                      chat_id, message_id, created_by))
+                job_id = cursor.lastrowid
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        self.logger.info(f"Задание назначения программы {program_id} #{job_id}: "
+                         f"{self.describe(selector)}, клиенты до ID {max_id}")
+        return {'status': 'ok', 'job_id': job_id}
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM program_assign_jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            return self._job(row) if row else None
+
+    def get_running_jobs(self) -> List[Dict]:
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM program_assign_jobs WHERE status = 'running' ORDER BY job_id
+            ''')
+            return [self._job(row) for row in cursor.fetchall()]
+
+    def _job(self, row) -> Dict:
+        job = dict(row)
+        job['selector'] = json.loads(job['selector'])
+        return job
+
+    def assign_batch(self, job_id: int, batch_size: int = ASSIGN_BATCH_SIZE) -> Optional[Dict]:
+        """
+        Обрабатывает следующий диапазон клиентов задания после отметки.
+        Возвращает состояние задания или None, если задание уже завершено.
+        """
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            cursor.execute("SELECT * FROM program_assign_jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            if not row or row['status'] != 'running':
+                conn.rollback()
+                return None
+            job = self._job(row)
+
+            last_id = job['last_customer_id']
+            if last_id >= job['max_customer_id']:
+                cursor.execute('''
+                    UPDATE program_assign_jobs SET status = 'done', updated_at = CURRENT_TIMESTAMP
+                    WHERE job_id = ?
+                ''', (job_id,))
+                conn.commit()
+                job['status'] = 'done'
+                return job
+
+            upper = min(last_id + batch_size, job['max_customer_id'])
+            where, params = self._where(job['program_id'], job['selector'])
+            cursor.execute(f'''
+                UPDATE customers SET bonus_program_id = ?
+                WHERE customer_id > ? AND customer_id <= ? AND {where}
+            ''', [job['program_id'], last_id, upper] + params)
+            assigned = cursor.rowcount
+
+            cursor.execute('''
+                UPDATE program_assign_jobs
+                SET last_customer_id = ?, assigned = assigned + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = ?
+            ''', (upper, assigned, job_id))
+            conn.commit()
+
+        job['last_customer_id'] = upper
+        job['assigned'] += assigned
+        return job
+
+    def run(self, job_id: int, batch_size: int = ASSIGN_BATCH_SIZE) -> Optional[Dict]:
+        """Выполнение задания в текущем потоке (для консоли и фоновых скриптов)"""
+        started = time.perf_counter()
+        job = None
+        while True:
+            state = self.assign_batch(job_id, batch_size)
+            if state is None:
+                break
+            job = state
+            if job['status'] == 'done':
+                break
+
+        if job is not None:
+            self._finish(job, started)
+        return job
+
+    async def run_job(self, job_id: int, bot=None) -> Optional[Dict]:
+        """
+        Выполнение задания в боте: порции по одной через поток записи,
+        ход выполнения - правкой сообщения в чате администратора
+        """
+        if job_id in self._active:
+            return None
+        self._active.add(job_id)
+
+        started = time.perf_counter()
+        shown = started
+        job = None
+        try:
+            while True:
+                state = await db_executor.run(self.assign_batch, job_id)
+                if state is None:
+                    break
+                job = state
+                if job['status'] == 'done':
+                    break
+                if time.perf_counter() - shown >= ASSIGN_PROGRESS_INTERVAL:
+                    shown = time.perf_counter()
+                    await self._show(bot, job, self.format_progress(job))
+        except Exception as e:
+            self.logger.error(f"Ошибка задания назначения программы #{job_id}: {e}", exc_info=True)
+            if job is not None:
+                await self._show(bot, job, self.format_progress(job) +
+                                 "\n\n❌ Ошибка. Задание продолжится после перезапуска бота.")
+            return None
+        finally:
+            self._active.discard(job_id)
+
+        if job is not None:
+            self._finish(job, started)
+            await self._show(bot, job, self.format_progress(job))
+        return job
+
+    async def resume_jobs(self, application) -> None:
+        """Продолжить задания, прерванные остановкой бота"""
+        try:
+            jobs = await db_executor.run(self.get_running_jobs, readonly=True)
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения заданий назначения программ: {e}")
+            return
+
+        for job in jobs:
+            self.logger.info(f"Продолжение задания назначения программы #{job['job_id']} "
+                             f"с клиента ID {job['last_customer_id']}")
+            application.create_task(self.run_job(job['job_id'], application.bot))
+
+    async def _show(self, bot, job: Dict, text: str) -> None:
+        if bot is None or not job.get('chat_id') or not job.get('message_id'):
+            return
+        try:
+            await outbound.edit_message_text(bot, job['chat_id'], job['message_id'], text)
+        except Exception as e:
+            self.logger.warning(f"Не удалось обновить ход задания #{job['job_id']}: {e}")
+
+    def format_progress(self, job: Dict) -> str:
+        """Текст сообщения о ходе выполнения"""
+        total = job['max_customer_id']
+        percent = job['last_customer_id'] * 100 // total if total else 100
+        if job['status'] == 'done':
+            header = f"✅ Назначение программы ID:{job['program_id']} завершено"
+        else:
+            header = f"⏳ Назначение программы ID:{job['program_id']}: {percent}%"
+        return (
+            f"{header}\n"
+            f"Правило: {self.describe(job['selector'])}\n"
+            f"Просмотрено клиентов до ID {job['last_customer_id']} из {total}\n"
+            f"Переведено клиентов: {job['assigned']}"
+        )
+
+    def _finish(self, job: Dict, started: float) -> None:
+        # Распределение по уровням меняется у всех затронутых программ
+        level_statistics.invalidate()
+        self.logger.info(
+            f"Задание назначения программы {job['program_id']} #{job['job_id']}: "
+            f"переведено клиентов {job['assigned']} за {time.perf_counter() - started:.2f} сек"
+        )
+
+
+bulk_program_assigner = BulkProgramAssigner()
@@ -0,0 +1,160 @@
+"""
+Сгорание бонусов по сроку давности.
+
+Политика: бонусы, начисленные больше BONUS_EXPIRY_DAYS дней назад, сгорают,
+если не были потрачены. Списания и ранее сгоревшие бонусы погашают самые
+старые начисления (FIFO), поэтому у клиента сгорает
+    начислено до границы - (потрачено + сгорело ранее)
+но не больше доступного баланса. Повторный проход ничего не списывает.
+
+Клиенты обрабатываются порциями по диапазону customer_id, каждая порция -
+своя короткая транзакция: запись 'expired' в журнал и уменьшение баланса.
+Ночная задача отправляет порции в поток записи по одной, так что запросы
+бота выполняются между порциями. Отметка в job_checkpoints позволяет
+продолжить прерванный проход.
+"""
+
+import os
+import time
+import logging
+from datetime import datetime, timedelta, time as dt_time, timezone
+from typing import Dict, Optional
+
+from database import sqlite_connection, db_executor
+from utils.money import Money
+from utils.job_checkpoints import get_checkpoint, set_checkpoint
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_JOB_NAME = 'bonus_expiry'
+# Срок жизни бонусов в днях (0 - бонусы не сгорают)
+BONUS_EXPIRY_DAYS = int(os.getenv('BONUS_EXPIRY_DAYS', '0'))
+# Диапазон customer_id в одной транзакции
+EXPIRY_BATCH_SIZE = int(os.getenv('EXPIRY_BATCH_SIZE', '500'))
+# Время ночной задачи: 20:00 UTC = 03:00 по Новосибирску, до сверки журнала
+EXPIRY_TIME = dt_time(20, 0, tzinfo=timezone.utc)
+
+
+class BonusExpiryProcessor:
+    """Списание просроченных бонусов"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def cutoff(self, days: int, now: Optional[datetime] = None) -> str:
+        """Граница начислений в формате transaction_date (UTC, CURRENT_TIMESTAMP)"""
+        now = now or datetime.now(timezone.utc)
+        return (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def expire_batch(self, cutoff: str, days: int,
+                     batch_size: int = EXPIRY_BATCH_SIZE) -> Optional[Dict]:
+        """
+        Обрабатывает следующий диапазон клиентов после отметки.
+        Возвращает {'customers', 'amount'} или None, если проход завершен.
+        """
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            last_id = get_checkpoint(cursor, EXPIRY_JOB_NAME)
+            cursor.execute("SELECT MAX(customer_id) FROM customers")
+            max_id = cursor.fetchone()[0] or 0
+
+            if last_id >= max_id:
+                # Проход завершен - следующий начнется с начала
+                set_checkpoint(cursor, EXPIRY_JOB_NAME, 0)
+                conn.commit()
+                return None
+
+            upper = min(last_id + batch_size, max_id)
+
+            # Один проход по журналу диапазона клиентов с группировкой
+            cursor.execute('''
+                WITH ledger AS (
+                    SELECT customer_id,
+                           SUM(CASE WHEN transaction_type = 'earned' AND transaction_date < ?
+                                    THEN bonus_amount ELSE 0 END)
+                           - SUM(CASE WHEN transaction_type != 'earned'
+                                      THEN bonus_amount ELSE 0 END) AS expirable
+                    FROM bonus_transactions
+                    WHERE customer_id > ? AND customer_id <= ?
+                    GROUP BY customer_id
+                )
+                SELECT l.customer_id, MIN(l.expirable, c.available_bonuses) AS amount
+                FROM ledger l
+                JOIN customers c ON c.customer_id = l.customer_id
+                WHERE l.expirable > 0 AND c.available_bonuses > 0
+            ''', (cutoff, last_id, upper))
+            expired = cursor.fetchall()
+
+            description = f"Сгорание бонусов старше {days} дн."
+            cursor.executemany('''
+                INSERT INTO bonus_transactions (customer_id, bonus_amount, transaction_type, description)
+                VALUES (?, ?, 'expired', ?)
+            ''', [(row['customer_id'], row['amount'], description) for row in expired])
+            cursor.executemany('''
+                UPDATE customers
+                SET available_bonuses = available_bonuses - ?
+                WHERE customer_id = ? AND available_bonuses >= ?
+            ''', [(row['amount'], row['customer_id'], row['amount']) for row in expired])
+
+            set_checkpoint(cursor, EXPIRY_JOB_NAME, upper)
+            conn.commit()
+
+        return {
+            'customers': len(expired),
+            'amount': sum(row['amount'] for row in expired),
+        }
+
+    def expire(self, days: int = BONUS_EXPIRY_DAYS, batch_size: int = EXPIRY_BATCH_SIZE) -> Dict:
+        """Полный проход в текущем потоке (для консоли и фоновых скриптов)"""
+        started = time.perf_counter()
+        report = {'customers': 0, 'amount': 0, 'batches': 0}
+        cutoff = self.cutoff(days)
+
+        while True:
+            batch = self.expire_batch(cutoff, days, batch_size)
+            if batch is None:
+                break
+            self._add(report, batch)
+
+        return self._finish(report, started)
+
+    async def expire_job(self, context) -> None:
+        """Ежедневная задача JobQueue: порции по одной через поток записи"""
+        if BONUS_EXPIRY_DAYS <= 0:
+            return
+
+        started = time.perf_counter()
+        report = {'customers': 0, 'amount': 0, 'batches': 0}
+        cutoff = self.cutoff(BONUS_EXPIRY_DAYS)
+
+        try:
+            while True:
+                batch = await db_executor.run(self.expire_batch, cutoff, BONUS_EXPIRY_DAYS)
+                if batch is None:
+                    break
+                self._add(report, batch)
+        except Exception as e:
+            self.logger.error(f"Ошибка сгорания бонусов: {e}", exc_info=True)
+            return
+
+        self._finish(report, started)
+
+    def _add(self, report: Dict, batch: Dict) -> None:
+        report['customers'] += batch['customers']
+        report['amount'] += batch['amount']
+        report['batches'] += 1
+
+    def _finish(self, report: Dict, started: float) -> Dict:
+        report['amount'] = Money.from_db(report['amount'])
+        report['duration'] = time.perf_counter() - started
+        self.logger.info(
+            f"Сгорание бонусов: клиентов {report['customers']}, сумма {report['amount']} руб., "
+            f"порций {report['batches']} за {report['duration']:.2f} сек"
+        )
+        return report
+
+
+bonus_expiry = BonusExpiryProcessor()
@@ -0,0 +1,263 @@
+"""
+Сверка бонусных балансов клиентов с журналом bonus_transactions.
+
+customers.total_bonuses / available_bonuses меняются инкрементально
+в нескольких местах; журнал - источник истины:
+    total_bonuses     = сумма earned
+    available_bonuses = сумма earned - spent - expired
+(суммы в журнале положительные, в копейках).
+
+Суммы журнала по клиенту копятся в bonus_ledger_balances до отметки
+(последний учтенный transaction_id в job_checkpoints), поэтому ночная сверка
+читает только новые записи журнала - порциями по диапазону transaction_id,
+каждая порция в своей короткой транзакции.
+
+Запускается ежедневной задачей JobQueue (main.py) и из консоли:
+    python tools/reconcile_ledger.py [--repair] [--rebuild]
+"""
+
+import os
+import time
+import logging
+from datetime import time as dt_time, timezone
+from typing import Dict, List, Optional
+
+from database import sqlite_connection, sqlite_read_connection, db_executor
+from utils.money import Money
+from utils.job_checkpoints import get_checkpoint, set_checkpoint
+
+logger = logging.getLogger(__name__)
+
+LEDGER_JOB_NAME = 'bonus_ledger'
+# Записей журнала в одной транзакции
+LEDGER_CHUNK_SIZE = int(os.getenv('LEDGER_CHUNK_SIZE', '5000'))
+# Исправлять расхождения автоматически в ночной задаче
+LEDGER_AUTO_REPAIR = os.getenv('LEDGER_AUTO_REPAIR', '0') == '1'
+# Время ночной сверки: 20:30 UTC = 03:30 по Новосибирску (часовой пояс напоминаний)
+LEDGER_RECONCILE_TIME = dt_time(20, 30, tzinfo=timezone.utc)
+# Сколько расхождений выводить в отчете
+LEDGER_REPORT_LIMIT = 20
+
+
+class BonusLedgerReconciler:
+    """Сверка балансов клиентов с журналом бонусов"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    # ---------- Накопление журнала ----------
+
+    def advance_chunk(self, chunk_size: int = LEDGER_CHUNK_SIZE) -> Optional[int]:
+        """
+        Добавляет в bonus_ledger_balances одну порцию журнала после отметки
+        (диапазон transaction_id длиной chunk_size) в своей транзакции.
+        Возвращает количество обработанных записей, None - журнал учтен полностью.
+        """
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            last_id = get_checkpoint(cursor, LEDGER_JOB_NAME)
+            cursor.execute("SELECT MAX(transaction_id) FROM bonus_transactions")
+            max_id = cursor.fetchone()[0] or 0
+            if last_id >= max_id:
+                return None
+            upper = min(last_id + chunk_size, max_id)
+
+            # Один проход по диапазону rowid с группировкой по клиенту
+            cursor.execute('''
+                SELECT customer_id,
+                       SUM(CASE WHEN transaction_type = 'earned' THEN bonus_amount ELSE 0 END) AS earned,
+                       SUM(CASE WHEN transaction_type = 'spent' THEN bonus_amount ELSE 0 END) AS spent,
+                       SUM(CASE WHEN transaction_type = 'expired' THEN bonus_amount ELSE 0 END) AS expired,
+                       COUNT(*) AS records
+                FROM bonus_transactions
+                WHERE transaction_id > ? AND transaction_id <= ?
+                GROUP BY customer_id
+            ''', (last_id, upper))
+            groups = cursor.fetchall()
+
+            cursor.executemany('''
+                INSERT INTO bonus_ledger_balances (customer_id, earned, spent, expired)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(customer_id) DO UPDATE SET
+                    earned = earned + excluded.earned,
+                    spent = spent + excluded.spent,
+                    expired = expired + excluded.expired
+            ''', [(g['customer_id'], g['earned'], g['spent'], g['expired']) for g in groups])
+
+            set_checkpoint(cursor, LEDGER_JOB_NAME, upper)
+            conn.commit()
+
+        return sum(g['records'] for g in groups)
+
+    def advance(self, chunk_size: int = LEDGER_CHUNK_SIZE) -> int:
+        """
+        Добавляет в bonus_ledger_balances все записи журнала после отметки
+        порциями в текущем потоке (для консоли). Возвращает количество записей.
+        """
+        processed = 0
+        while True:
+            records = self.advance_chunk(chunk_size)
+            if records is None:
+                return processed
+            processed += records
+
+    def rebuild(self) -> None:
+        """Сбрасывает накопленные суммы - следующая сверка пройдет журнал целиком"""
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM bonus_ledger_balances")
+            set_checkpoint(cursor, LEDGER_JOB_NAME, 0)
+            conn.commit()
+
+    # ---------- Расхождения ----------
+
+    def _drift(self, cursor, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Клиенты, у которых балансы не совпадают с журналом.
+
+        Вызывать внутри транзакции (один снимок БД): к накопленным суммам
+        добавляется хвост журнала после отметки, поэтому покупки, записанные
+        после advance(), не дают ложных расхождений.
+        """
+        last_id = get_checkpoint(cursor, LEDGER_JOB_NAME)
+        cursor.execute('''
+            WITH tail AS (
+                SELECT customer_id,
+                       SUM(CASE WHEN transaction_type = 'earned' THEN bonus_amount ELSE 0 END) AS earned,
+                       SUM(CASE WHEN transaction_type = 'earned' THEN 0 ELSE bonus_amount END) AS used
+                FROM bonus_transactions
+                WHERE transaction_id > ?
+                GROUP BY customer_id
+            ),
+            ledger AS (
+                SELECT c.customer_id,
+                       COALESCE(c.total_bonuses, 0) AS total_bonuses,
+                       COALESCE(c.available_bonuses, 0) AS available_bonuses,
+                       COALESCE(b.earned, 0) + COALESCE(t.earned, 0) AS ledger_total,
+                       COALESCE(b.earned, 0) - COALESCE(b.spent, 0) - COALESCE(b.expired, 0)
+                           + COALESCE(t.earned, 0) - COALESCE(t.used, 0) AS ledger_available
+                FROM customers c
+                LEFT JOIN bonus_ledger_balances b ON b.customer_id = c.customer_id
+                LEFT JOIN tail t ON t.customer_id = c.customer_id
+            )
+            SELECT * FROM ledger
+            WHERE total_bonuses != ledger_total OR available_bonuses != ledger_available
+            ORDER BY customer_id
+            LIMIT ?
+        ''', (last_id, -1 if limit is None else limit))
+
+        return [
+            {
+                'customer_id': row['customer_id'],
+                'total_bonuses': Money.from_db(row['total_bonuses']),
+                'available_bonuses': Money.from_db(row['available_bonuses']),
+                'ledger_total': Money.from_db(row['ledger_total']),
+                'ledger_available': Money.from_db(row['ledger_available']),
+            }
+            for row in cursor.fetchall()
+        ]
+
+    def find_drift(self, limit: Optional[int] = None) -> List[Dict]:
+        """Расхождения балансов с журналом (только чтение)"""
+        with sqlite_read_connection() as conn:
+            # Отметка и суммы читаются из одного снимка
+            conn.execute("BEGIN")
+            try:
+                return self._drift(conn.cursor(), limit)
+            finally:
+                conn.rollback()
+
+    def repair(self) -> int:
+        """Приводит балансы клиентов к журналу. Возвращает число исправленных клиентов"""
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            # Под блокировкой записи балансы не изменятся между сверкой и исправлением
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            drift = self._drift(cursor)
+            cursor.executemany('''
+                UPDATE customers
+                SET total_bonuses = ?,
+                    available_bonuses = ?
+                WHERE customer_id = ?
+            ''', [(d['ledger_total'], d['ledger_available'], d['customer_id']) for d in drift])
+            conn.commit()
+
+        for d in drift:
+            self.logger.warning(
+                f"Баланс клиента {d['customer_id']} исправлен по журналу: "
+                f"всего {d['total_bonuses']} -> {d['ledger_total']}, "
+                f"доступно {d['available_bonuses']} -> {d['ledger_available']}"
+            )
+        return len(drift)
+
+    # ---------- Запуск ----------
+
+    def reconcile(self, repair: bool = False, rebuild: bool = False,
+                  chunk_size: int = LEDGER_CHUNK_SIZE) -> Dict:
+        """
+        Полный цикл сверки в текущем потоке (для консоли): накопить новые
+        записи журнала, найти расхождения, при repair=True - исправить.
+        """
+        started = time.perf_counter()
+
+        if rebuild:
+            self.rebuild()
+        processed = self.advance(chunk_size)
+
+        drift = self.find_drift()
+        repaired = self.repair() if repair and drift else 0
+
+        return self._finish(processed, drift, repaired, started)
+
+    def _finish(self, processed: int, drift: List[Dict], repaired: int, started: float) -> Dict:
+        report = {
+            'processed': processed,
+            'drift_count': len(drift),
+            'drift': drift[:LEDGER_REPORT_LIMIT],
+            'repaired': repaired,
+            'duration': time.perf_counter() - started,
+        }
+
+        message = (f"Сверка бонусов: новых записей журнала {processed}, "
+                   f"расхождений {len(drift)}, исправлено {repaired} "
+                   f"за {report['duration']:.2f} сек")
+        if drift and not repaired:
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+        return report
+
+    async def reconcile_job(self, context) -> None:
+        """
+        Ежедневная задача JobQueue: порции журнала по одной через поток
+        записи, поиск расхождений - в потоке чтения, исправление - отдельно
+        """
+        started = time.perf_counter()
+        processed = 0
+
+        try:
+            while True:
+                records = await db_executor.run(self.advance_chunk)
+                if records is None:
+                    break
+                processed += records
+
+            drift = await db_executor.run(self.find_drift, readonly=True)
+            repaired = 0
+            if LEDGER_AUTO_REPAIR and drift:
+                repaired = await db_executor.run(self.repair)
+        except Exception as e:
+            self.logger.error(f"Ошибка сверки бонусов: {e}", exc_info=True)
+            return
+
+        self._finish(processed, drift, repaired, started)
+
+
+bonus_ledger_reconciler = BonusLedgerReconciler()
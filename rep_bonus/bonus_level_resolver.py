@@ -0,0 +1,153 @@
+"""
+Определение процента бонусов по сумме покупок клиента.
+
+Пороги уровней каждой программы хранятся в памяти отсортированными,
+процент находится бинарным поиском. Кэш сбрасывается при изменении уровней
+и программ (BunusLevelsManager, BonusMaster.save_bonus_program).
+"""
+
+import logging
+import decimal
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+from database import sqlite_read_connection, db_executor
+from utils.ttl_cache import TTLCache
+from utils.money import Money
+
+# Процент, если у клиента нет программы или программа неактивна
+DEFAULT_BONUS_PERCENT = decimal.Decimal('3.0')
+
+
+class ProgramLevels:
+    """Уровни одной программы: пороги (копейки) по возрастанию и проценты к ним"""
+
+    __slots__ = ('thresholds', 'percents', 'base_percent')
+
+    def __init__(self, thresholds: List[int], percents: List[decimal.Decimal],
+                 base_percent: decimal.Decimal):
+        self.thresholds = thresholds
+        self.percents = percents
+        self.base_percent = base_percent
+
+    def percent_for(self, total_purchases) -> decimal.Decimal:
+        """Процент последнего уровня, порог которого не больше суммы покупок (Money или копейки)"""
+        index = bisect_right(self.thresholds, Money.from_db(total_purchases).kopecks) - 1
+        if index >= 0:
+            return self.percents[index]
+        return self.base_percent
+
+
+class BonusLevelResolver:
+    """Кэш уровней бонусных программ"""
+
+    LEVELS_CACHE_TTL = 600  # сек: страховка от изменений в обход менеджеров
+    LEVELS_CACHE_SIZE = 1000
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._cache = TTLCache(ttl=self.LEVELS_CACHE_TTL, maxsize=self.LEVELS_CACHE_SIZE,
+                               name="bonus_levels")
+        # Счетчики изменений уровней по программам и общий (сброс всех программ):
+        # не кладем в кэш уровни, прочитанные до изменения
+        self._program_writes: Dict[int, int] = {}
+        self._all_writes = 0
+
+    # ---------- Загрузка ----------
+
+    def _load(self, program_id: int) -> ProgramLevels:
+        """Читает уровни и базовый процент программы из БД"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                SELECT min_total_purchases, bonus_percent
+                FROM bonus_levels
+                WHERE program_id = ?
+                ORDER BY min_total_purchases ASC
+            ''', (program_id,))
+            levels = cursor.fetchall()
+
+            cursor.execute('''
+                SELECT base_percent FROM bonus_programs
+                WHERE program_id = ? AND is_active = 1
+            ''', (program_id,))
+            program = cursor.fetchone()
+
+        return ProgramLevels(
+            [Money.from_db(level['min_total_purchases']).kopecks for level in levels],
+            [decimal.Decimal(str(level['bonus_percent'])) for level in levels],
+            decimal.Decimal(str(program['base_percent'])) if program else DEFAULT_BONUS_PERCENT,
+        )
+
+    def _generation(self, program_id: int) -> tuple:
+        return self._all_writes, self._program_writes.get(program_id, 0)
+
+    def _levels(self, program_id: int) -> ProgramLevels:
+        levels = self._cache.get(program_id)
+        if levels is None:
+            generation_before = self._generation(program_id)
+            levels = self._load(program_id)
+            if generation_before == self._generation(program_id):
+                self._cache.set(program_id, levels)
+        return levels
+
+    # ---------- Расчет ----------
+
+    def resolve(self, total_purchases, program_id: Optional[int]) -> decimal.Decimal:
+        """Процент бонусов (при промахе кэша читает БД в текущем потоке)"""
+        if not program_id:
+            return DEFAULT_BONUS_PERCENT
+
+        try:
+            return self._levels(program_id).percent_for(total_purchases)
+        except Exception as e:
+            self.logger.error(f"Ошибка расчета процента бонусов: {e}")
+            return DEFAULT_BONUS_PERCENT
+
+    async def resolve_async(self, total_purchases, program_id: Optional[int]) -> decimal.Decimal:
+        """Процент бонусов для обработчиков: промах кэша читается в потоке БД"""
+        if not program_id:
+            return DEFAULT_BONUS_PERCENT
+
+        levels = self._cache.get(program_id)
+        if levels is None:
+            return await db_executor.run(self.resolve, total_purchases, program_id, readonly=True)
+        return levels.percent_for(total_purchases)
+
+    def resolve_many(self, totals: Iterable, program_ids: Iterable[Optional[int]]) -> List[decimal.Decimal]:
+        """
+        Проценты для пачки клиентов (для фоновых задач, вызывать в потоке БД).
+        Уровни каждой программы загружаются один раз.
+        """
+        tables: Dict[int, ProgramLevels] = {}
+        result = []
+
+        for total, program_id in zip(totals, program_ids):
+            if not program_id:
+                result.append(DEFAULT_BONUS_PERCENT)
+                continue
+
+            levels = tables.get(program_id)
+            if levels is None:
+                levels = tables[program_id] = self._levels(program_id)
+            result.append(levels.percent_for(total))
+
+        return result
+
+    # ---------- Инвалидация ----------
+
+    def invalidate(self, program_id: Optional[int] = None) -> None:
+        """Сбросить уровни программы (или всех программ)"""
+        if program_id is None:
+            self._all_writes += 1
+            self._cache.clear()
+        else:
+            self._program_writes[program_id] = self._program_writes.get(program_id, 0) + 1
+            self._cache.invalidate(program_id)
+
+    def get_cache_stats(self) -> dict:
+        return self._cache.stats()
+
+
+bonus_level_resolver = BonusLevelResolver()
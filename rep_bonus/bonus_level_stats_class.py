@@ -0,0 +1,190 @@
+"""
+Статистика уровней бонусных программ.
+
+Клиенты раскладываются по уровням одним запросом на программу: диапазоны
+уровней [порог; следующий порог) строятся оконной функцией по bonus_levels
+и соединяются с customers по total_purchases (индекс
+idx_customers_program_purchases). Переходы между уровнями считаются так же:
+уровень до периода - по сумме покупок за вычетом покупок периода.
+
+Результат кэшируется по программе и сбрасывается при покупках и изменении
+уровней, TTL - страховка от изменений в обход менеджеров.
+"""
+
+import logging
+import decimal
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from database import sqlite_read_connection, db_read
+from utils.ttl_cache import TTLCache
+from utils.money import Money
+from rep_bonus.bonus_level_resolver import DEFAULT_BONUS_PERCENT
+
+# Период, за который считаются переходы между уровнями
+TRANSITIONS_DAYS = 30
+
+# Диапазоны уровней программы; нижний диапазон "без уровня" - до первого порога
+_LEVEL_RANGES = '''
+    levels AS (
+        SELECT NULL AS level_id, 'Без уровня' AS level_name,
+               COALESCE((SELECT base_percent FROM bonus_programs WHERE program_id = :program_id), :default_percent)
+                   AS bonus_percent,
+               -9223372036854775808 AS low,
+               (SELECT MIN(min_total_purchases) FROM bonus_levels WHERE program_id = :program_id) AS high
+        UNION ALL
+        SELECT level_id, level_name, bonus_percent, min_total_purchases,
+               LEAD(min_total_purchases) OVER (ORDER BY min_total_purchases)
+        FROM bonus_levels
+        WHERE program_id = :program_id
+    ),
+    ranges AS (
+        -- Уровни с одинаковым порогом: действует последний
+        SELECT * FROM levels WHERE high IS NULL OR high > low
+    )
+'''
+
+
+class LevelStatistics:
+    """Распределение клиентов программы по уровням"""
+
+    STATS_CACHE_TTL = 600  # сек
+    STATS_CACHE_SIZE = 100
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._cache = TTLCache(ttl=self.STATS_CACHE_TTL, maxsize=self.STATS_CACHE_SIZE,
+                               name="level_stats")
+        # Счетчики сбросов по программам и общий: не кладем в кэш
+        # статистику, посчитанную до покупки или изменения уровней
+        self._program_writes: Dict[int, int] = {}
+        self._all_writes = 0
+
+    def _generation(self, program_id: int) -> tuple:
+        return self._all_writes, self._program_writes.get(program_id, 0)
+
+    def _levels(self, cursor, program_id: int) -> List[Dict]:
+        """Клиенты по уровням: количество, средняя и медианная сумма покупок"""
+        cursor.execute(f'''
+            WITH {_LEVEL_RANGES},
+            placed AS (
+                SELECT l.level_id, l.level_name, l.bonus_percent, l.low, c.total_purchases,
+                       ROW_NUMBER() OVER (PARTITION BY l.low ORDER BY c.total_purchases) AS position,
+                       COUNT(c.total_purchases) OVER (PARTITION BY l.low) AS members
+                FROM ranges l
+                LEFT JOIN customers c
+                    ON c.bonus_program_id = :program_id
+                    AND c.is_active = 1
+                    AND c.total_purchases >= l.low
+                    AND (l.high IS NULL OR c.total_purchases < l.high)
+            )
+            SELECT level_id, level_name, bonus_percent, low AS min_total_purchases,
+                   COUNT(total_purchases) AS customers,
+                   AVG(total_purchases) AS average,
+                   AVG(CASE WHEN position IN ((members + 1) / 2, (members + 2) / 2)
+                            THEN total_purchases END) AS median
+            FROM placed
+            GROUP BY low
+            ORDER BY low
+        ''', {'program_id': program_id, 'default_percent': float(DEFAULT_BONUS_PERCENT)})
+
+        levels = []
+        for row in cursor.fetchall():
+            # "Без уровня" показываем, только если в нем есть клиенты
+            if row['level_id'] is None and not row['customers']:
+                continue
+            levels.append({
+                'level_id': row['level_id'],
+                'level_name': row['level_name'],
+                'bonus_percent': decimal.Decimal(str(row['bonus_percent'])),
+                'min_total_purchases': Money.from_db(max(row['min_total_purchases'], 0)),
+                'customers': row['customers'],
+                'average': Money.from_db(row['average']),
+                'median': Money.from_db(row['median']),
+            })
+        return levels
+
+    def _transitions(self, cursor, program_id: int, since: str) -> List[Dict]:
+        """Переходы между уровнями по покупкам за период"""
+        cursor.execute(f'''
+            WITH {_LEVEL_RANGES},
+            recent AS (
+                SELECT customer_id, SUM(amount) AS gained
+                FROM customer_purchases
+                WHERE purchase_date >= :since
+                -- "+": покупки периода берутся по индексу даты, а не полным
+                -- проходом по индексу клиента ради порядка группировки
+                GROUP BY +customer_id
+            ),
+            -- MATERIALIZED: сначала покупатели периода, затем их уровни,
+            -- а не перебор всех клиентов каждого уровня
+            moved AS MATERIALIZED (
+                SELECT c.total_purchases AS total_after,
+                       c.total_purchases - r.gained AS total_before
+                FROM recent r
+                JOIN customers c ON c.customer_id = r.customer_id
+                WHERE c.bonus_program_id = :program_id AND c.is_active = 1
+            )
+            SELECT f.level_name AS from_level, t.level_name AS to_level, COUNT(*) AS customers
+            FROM moved m
+            JOIN ranges f ON m.total_before >= f.low AND (f.high IS NULL OR m.total_before < f.high)
+            JOIN ranges t ON m.total_after >= t.low AND (t.high IS NULL OR m.total_after < t.high)
+            WHERE f.low != t.low
+            GROUP BY f.low, t.low
+            ORDER BY f.low, t.low
+        ''', {'program_id': program_id, 'since': since,
+              'default_percent': float(DEFAULT_BONUS_PERCENT)})
+        return [dict(row) for row in cursor.fetchall()]
+
+    @db_read
+    def get_program_statistics(self, program_id: int) -> Optional[Dict]:
+        """Статистика уровней программы (из кэша или одним снимком БД)"""
+        stats = self._cache.get(program_id)
+        if stats is not None:
+            return stats
+
+        generation_before = self._generation(program_id)
+        since = (datetime.now(timezone.utc) - timedelta(days=TRANSITIONS_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with sqlite_read_connection() as conn:
+                # Уровни и переходы читаются из одного снимка
+                conn.execute("BEGIN")
+                try:
+                    cursor = conn.cursor()
+                    levels = self._levels(cursor, program_id)
+                    transitions = self._transitions(cursor, program_id, since)
+                finally:
+                    conn.rollback()
+        except Exception as e:
+            self.logger.error(f"Ошибка расчета статистики уровней программы {program_id}: {e}")
+            return None
+
+        total = sum(level['customers'] for level in levels)
+        for level in levels:
+            level['share'] = level['customers'] * 100 / total if total else 0
+
+        stats = {
+            'program_id': program_id,
+            'customers': total,
+            'levels': levels,
+            'transitions': transitions,
+            'transitions_days': TRANSITIONS_DAYS,
+        }
+        if generation_before == self._generation(program_id):
+            self._cache.set(program_id, stats)
+        return stats
+
+    def invalidate(self, program_id: Optional[int] = None) -> None:
+        """Сбросить статистику программы (или всех программ)"""
+        if program_id is None:
+            self._all_writes += 1
+            self._cache.clear()
+        else:
+            self._program_writes[program_id] = self._program_writes.get(program_id, 0) + 1
+            self._cache.invalidate(program_id)
+
+    def get_cache_stats(self) -> dict:
+        return self._cache.stats()
+
+
+level_statistics = LevelStatistics()
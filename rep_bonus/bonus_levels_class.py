@@ -1,6 +1,9 @@
 
 import logging
-from database import sqlite_connection 
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from rep_bonus.bonus_level_resolver import bonus_level_resolver
+from rep_bonus.bonus_level_stats_class import level_statistics
+from utils.money import Money, money_row
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +12,7 @@ class BunusLevelsManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
+    @db_write
     def create_bonus_level(self, program_id: int, level_name: str, min_total_purchases: float, 
                       bonus_percent: float, description: str = None):
         """Создание нового уровня в бонусной программе"""
@@ -22,15 +26,18 @@ class BunusLevelsManager:
                     VALUES (?, ?, ?, ?, ?)
                 ''', (program_id, level_name, min_total_purchases, bonus_percent, description))
                 conn.commit()
+                bonus_level_resolver.invalidate(program_id)
+                level_statistics.invalidate(program_id)
                 return cursor.lastrowid
         except Exception as e:
             self.logger.error(f"Ошибка создания уровня: {e}")
             return None
 
+    @db_read
     def get_bonus_levels(self, program_id: int = None):
         """Получение списка уровней"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 if program_id:
                     cursor.execute('''
@@ -52,10 +59,11 @@ class BunusLevelsManager:
             self.logger.error(f"Ошибка получения уровней: {e}")
             return []
 
+    @db_read
     def get_bonus_level(self, level_id: int):
         """Получение уровня по ID"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT bl.*, bp.program_name 
@@ -68,6 +76,7 @@ class BunusLevelsManager:
             self.logger.error(f"Ошибка получения уровня: {e}")
             return None
 
+    @db_write
     def update_bonus_level(self,level_id: int, **kwargs):
         """Обновление уровня"""
         try:
@@ -91,11 +100,15 @@ class BunusLevelsManager:
                 
                 cursor.execute(query, values)
                 conn.commit()
+                # Программа уровня здесь неизвестна - сбрасываем кэш целиком
+                bonus_level_resolver.invalidate()
+                level_statistics.invalidate()
                 return cursor.rowcount > 0
         except Exception as e:
             self.logger.error(f"Ошибка обновления уровня: {e}")
             return False
 
+    @db_write
     def delete_bonus_level(self, level_id: int):
         """Удаление уровня"""
         try:
@@ -103,15 +116,18 @@ class BunusLevelsManager:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM bonus_levels WHERE level_id = ?', (level_id,))
                 conn.commit()
+                bonus_level_resolver.invalidate()
+                level_statistics.invalidate()
                 return cursor.rowcount > 0
         except Exception as e:
             self.logger.error(f"Ошибка удаления уровня: {e}")
             return False
 
+    @db_read
     def get_active_bonus_programs(self):
         """Получение активных бонусных программ для выбора"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT program_id, program_name 
@@ -124,10 +140,11 @@ class BunusLevelsManager:
             self.logger.error(f"Ошибка получения программ: {e}")
             return []
 
-    async def get_current_level_info(self, total_purchases: float, program_id: int) -> str:
+    @db_read
+    def get_current_level_info(self, total_purchases: Money, program_id: int) -> str:
         """Получает информацию о текущем уровне клиента"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем уровни программы
@@ -141,14 +158,14 @@ class BunusLevelsManager:
                     LIMIT 1
                 ''', (program_id, total_purchases, program_id, total_purchases))
                 
-                current_level = cursor.fetchone()
+                current_level = money_row(cursor.fetchone())
                 
                 if current_level:
                     info = f"{current_level['level_name']} ({current_level['bonus_percent']}%)"
                     
                     # Показываем прогресс до следующего уровня
                     if current_level['next_level_min']:
-                        remaining = current_level['next_level_min'] - total_purchases
+                        remaining = current_level['next_level_min'] - Money.from_db(total_purchases)
                         info += f"\nДо следующего уровня: {remaining:.2f} руб."
                         
                     return info
@@ -5,6 +5,7 @@ from telegram.ext import CallbackContext, filters, ConversationHandler, MessageH
 from keyboards.bonus_keyb import *
 
 from rep_bonus.bonus_levels_class import bonus_levels_manager
+from utils.money import Money
 from handlers.admin_roles_class import role_manager, Permission, UserRole
 
 logger = logging.getLogger(__name__)
@@ -30,7 +31,7 @@ async def delete_level_inline_handler(update: Update, context: CallbackContext)
         return
     
     # Получаем все уровни
-    levels = bonus_levels_manager.get_bonus_levels()
+    levels = await bonus_levels_manager.get_bonus_levels()
     
     if not levels:
         await update.message.reply_text(
@@ -62,7 +63,7 @@ async def delete_level_inline_handler(update: Update, context: CallbackContext)
         for level in levels_list:
             level_id = level[0]
             level_name = level[2]
-            min_purchases = level[3]
+            min_purchases = Money.from_db(level[3])
             bonus_percent = level[4]
             
             # Добавляем в текстовое сообщение
@@ -117,7 +118,7 @@ async def handle_delete_level_callback(update: Update, context: CallbackContext)
         level_id = int(callback_data.replace(DELETE_LEVEL_CALLBACK_PREFIX, ""))
         
         # Получаем информацию об уровне
-        level = bonus_levels_manager.get_bonus_level(level_id)
+        level = await bonus_levels_manager.get_bonus_level(level_id)
         if not level:
             await query.edit_message_text(
                 "❌ Уровень не найден.",
@@ -133,7 +134,7 @@ async def handle_delete_level_callback(update: Update, context: CallbackContext)
             f"⚠️ *Подтвердите удаление уровня:*\n\n"
             f"🏷️ *Программа:* {level[6]}\n"
             f"📊 *Уровень:* {level[2]}\n"
-            f"💰 *Мин. сумма:* {level[3]} руб.\n"
+            f"💰 *Мин. сумма:* {Money.from_db(level[3])} руб.\n"
             f"📈 *Бонус:* {level[4]}%\n"
         )
         
@@ -167,11 +168,11 @@ async def handle_delete_level_callback(update: Update, context: CallbackContext)
         level_id = int(callback_data.replace(CONFIRM_DELETE_CALLBACK_PREFIX, ""))
         
         # Получаем информацию об уровне перед удалением
-        level = bonus_levels_manager.get_bonus_level(level_id)
+        level = await bonus_levels_manager.get_bonus_level(level_id)
         level_name = level[2] if level else "неизвестный уровень"
         
         # Удаляем уровень
-        if bonus_levels_manager.delete_bonus_level(level_id):
+        if await bonus_levels_manager.delete_bonus_level(level_id):
             await query.edit_message_text(
                 f"✅ Уровень '{level_name}' успешно удален!",
             )
@@ -3,6 +3,7 @@ import logging
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import CallbackContext
 import decimal
+from utils.money import Money
 
 from handlers.admin_roles_class import role_manager, Permission, UserRole
 from rep_bonus.bonus_master_class import bonus_data_manager
@@ -11,6 +12,8 @@ from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
 from keyboards.bonus_keyb import get_confirm_bonus_keyboard, get_bonus_system_keyboard, get_loyalty_program_keyboard
 from rep_bonus.bonus_levels_class import bonus_levels_manager
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -39,11 +42,11 @@ async def bonus_system(update: Update, context: CallbackContext) -> None:
         # Для посетителей (зарегистрированных клиентов)
         if role == UserRole.VISITOR:
             # Получаем данные клиента через менеджер данных
-            customer_data = bonus_data_manager.get_customer_bonus_data(user_id)
+            customer_data = await bonus_data_manager.get_customer_bonus_data(user_id)
             
             if customer_data:
                 # Рассчитываем текущий бонусный процент
-                current_bonus = customer_purchase.calculate_current_bonus_percent(
+                current_bonus = await customer_purchase.calculate_current_bonus_percent(
                     customer_data['total_purchases'],
                     customer_data['bonus_program_id']
                 )
@@ -170,6 +173,7 @@ async def create_bonus_program(update: Update, context: CallbackContext) -> None
         'step': 'name',
         'data': {}
     }
+    flow_engine.start(context, Flows.BONUS_PROGRAM, FlowStates.INPUT)
     
     await update.message.reply_text(
         f"{Buttons.ADD_PROGRAM} \nВведите название программы:",
@@ -205,7 +209,7 @@ async def process_program_creation(update: Update, context: CallbackContext) ->
             return
         
         # Проверяем, нет ли уже программы с таким названием
-        if bonus_data_manager.check_program_name_exists(text):
+        if await bonus_data_manager.check_program_name_exists(text):
             await update.message.reply_text(
                 "❌ Программа с таким названием уже существует.\n"
                 "Введите другое название:",
@@ -264,8 +268,8 @@ async def process_program_creation(update: Update, context: CallbackContext) ->
     
     elif step == 'min_amount':
         try:
-            amount = decimal.Decimal(text)
-            if amount < 0:
+            amount = Money.parse(text)
+            if amount.kopecks < 0:
                 await update.message.reply_text(
                     "Сумма не может быть отрицательной. Введите снова:",
                     reply_markup=get_cancel_keyboard()
@@ -312,7 +316,7 @@ async def save_bonus_program(update: Update, context: CallbackContext,
     Сохраняет данные программы в базу данных через менеджер.
     Не вызывается напрямую пользователем.
     """
-    program_id = bonus_data_manager.save_bonus_program(program_data, user_id)
+    program_id = await bonus_data_manager.save_bonus_program(program_data, user_id)
     
     if program_id:
         del context.user_data['creating_program']
@@ -341,7 +345,7 @@ async def list_bonus_programs(update: Update, context: CallbackContext) -> None:
     """
     user_id = update.effective_user.id
     
-    programs = bonus_data_manager.get_all_bonus_programs()
+    programs = await bonus_data_manager.get_all_bonus_programs()
     
     if not programs:
         await update.message.reply_text(
@@ -367,46 +371,3 @@ async def list_bonus_programs(update: Update, context: CallbackContext) -> None:
         reply_markup=await get_loyalty_program_keyboard(),
         parse_mode='Markdown'
     )
-
-async def assign_bonus_program(update: Update, context: CallbackContext) -> None:
-    """
-    НАЗНАЧЕНИЕ ПРОГРАММЫ ВСЕМ КЛИЕНТАМ
-    Привязывается к кнопке "Назначить программу".
-    Позволяет выбрать программу для назначения всем клиентам.
-    """
-    user_id = update.effective_user.id
-    role = await role_manager.get_user_role(user_id)
-    
-    if role != UserRole.ADMIN:
-        await update.message.reply_text(
-            "⛔ Только администратор может назначать бонусные программы.",
-            reply_markup=await get_main_keyboard(user_id)
-        )
-        return
-    
-    # Получаем список программ через менеджер данных
-    programs = bonus_data_manager.get_active_bonus_programs()
-    
-    if not programs:
-        await update.message.reply_text(
-            "❌ Нет активных бонусных программ.",
-            reply_markup=await get_loyalty_program_keyboard()
-        )
-        return
-    
-    # Формируем клавиатуру с программами
-    buttons = []
-    for program in programs:
-        buttons.append([f"🎯 ID:{program['program_id']} - {program['program_name']}"])
-    buttons.append([Buttons.CANCEL])
-    
-    keyboard = ReplyKeyboardMarkup(buttons, resize_keyboard=True)
-    
-    await update.message.reply_text(
-        "🎁 *Назначение бонусной программы*\n\n"
-        "Выберите программу для назначения всем клиентам:",
-        reply_markup=keyboard,
-        parse_mode='Markdown'
-    )
-    
-    context.user_data['assigning_program'] = True
\ No newline at end of file
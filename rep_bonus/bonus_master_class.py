@@ -6,7 +6,12 @@ import logging
 import decimal
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.request_context import current_request
+from utils.money import Money, money_row, MONEY_COLUMNS
+from rep_bonus.bonus_level_resolver import bonus_level_resolver
+from rep_bonus.bonus_level_stats_class import level_statistics
+from rep_bonus.bonus_assign_class import bulk_program_assigner
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +21,11 @@ class BonusDataManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__) 
 
+    @db_read
     def get_customer_bonus_data(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Получение данных клиента для бонусной системы"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -50,17 +56,17 @@ class BonusDataManager:
                     GROUP BY c.customer_id
                 ''', (user_id,))
                 
-                result = cursor.fetchone()
-                return dict(result) if result else None
+                return money_row(cursor.fetchone(), MONEY_COLUMNS | {'spent_bonuses'})
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения данных клиента: {e}")
             return None
     
+    @db_read
     def check_program_name_exists(self, program_name: str) -> bool:
         """Проверка существования программы с таким названием"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT program_id FROM bonus_programs WHERE program_name = ?",
@@ -71,6 +77,7 @@ class BonusDataManager:
             self.logger.error(f"Ошибка проверки названия программы: {e}")
             return False
     
+    @db_write
     def save_bonus_program(self, program_data: Dict[str, Any], created_by: int) -> Optional[int]:
         """Сохранение бонусной программы в БД"""
         try:
@@ -79,11 +86,16 @@ class BonusDataManager:
                 
                  
                 # Нужно получить внутренний user_id из таблицы users по telegram_id
-                cursor.execute('''
-                    SELECT user_id FROM users WHERE telegram_id = ?
-                ''', (created_by,))
-                
-                user_result = cursor.fetchone()
+                request = current_request(created_by)
+                if request is not None and request.has_snapshot:
+                    request.serve()
+                    user_result = request.user
+                else:
+                    cursor.execute('''
+                        SELECT user_id FROM users WHERE telegram_id = ?
+                    ''', (created_by,))
+                    
+                    user_result = cursor.fetchone()
                 if not user_result:
                     self.logger.error(f"Пользователь с telegram_id {created_by} не найден")
                     return None
@@ -99,7 +111,7 @@ class BonusDataManager:
                     program_data['name'],
                     program_data['description'],
                     program_data['base_percent'],
-                    program_data['min_amount'],
+                    Money.parse(program_data['min_amount']),
                     internal_user_id,
                     1  # Активна по умолчанию
                 ))
@@ -120,16 +132,19 @@ class BonusDataManager:
                 ))
                 
                 conn.commit()
+                bonus_level_resolver.invalidate(program_id)
+                level_statistics.invalidate(program_id)
                 return program_id
                 
         except Exception as e:
             self.logger.error(f"Ошибка сохранения бонусной программы: {e}")
             return None
     
+    @db_read
     def get_all_bonus_programs(self) -> List[Dict[str, Any]]:
         """Получение списка всех бонусных программ"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT program_id, program_name, description, 
@@ -145,10 +160,11 @@ class BonusDataManager:
             self.logger.error(f"Ошибка получения списка программ: {e}")
             return []
     
+    @db_read
     def get_active_bonus_programs(self) -> List[Dict[str, Any]]:
         """Получение списка активных бонусных программ"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT program_id, program_name 
@@ -164,25 +180,27 @@ class BonusDataManager:
             self.logger.error(f"Ошибка получения активных программ: {e}")
             return []
     
-    def assign_program_to_all_customers(self, program_id: int) -> bool:
-        """Назначение бонусной программы всем клиентам"""
+    @db_write
+    def assign_program_to_all_customers(self, program_id: int) -> int:
+        """
+        Назначение бонусной программы всем клиентам без программы.
+        Выполняется порциями (BulkProgramAssigner), возвращает число переведенных клиентов.
+        """
         try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Получаем клиентов без программы или с другой программой
-                cursor.execute('''
-                    UPDATE customers 
-                    SET bonus_program_id = ? 
-                    WHERE is_active = 1 AND bonus_program_id IS NULL
-                ''', (program_id,))
-                
-                conn.commit()
-                return cursor.rowcount > 0
-                
+            created = bulk_program_assigner.create_job(program_id, {'kind': 'no_program'})
+            if created['status'] != 'ok':
+                self.logger.warning(
+                    f"Назначение программы {program_id} отложено: "
+                    f"выполняется задание #{created['job_id']}"
+                )
+                return 0
+
+            job = bulk_program_assigner.run(created['job_id'])
+            return job['assigned'] if job else 0
+
         except Exception as e:
             self.logger.error(f"Ошибка назначения программы клиентам: {e}")
-            return False
+            return 0
 
 # Создаем экземпляр менеджера для использования
 bonus_data_manager = BonusDataManager()
\ No newline at end of file
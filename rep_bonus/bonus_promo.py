@@ -0,0 +1,335 @@
+# rep_bonus/bonus_promo.py
+import io
+import logging
+import decimal
+from telegram import Update, ReplyKeyboardMarkup
+from telegram.ext import CallbackContext
+
+from handlers.admin_roles_class import role_manager, Permission
+from rep_bonus.bonus_promo_class import (
+    promo_manager, PromoCodeError, PROMO_MULTIPLIER, PROMO_FIXED, PROMO_BATCH_MAX
+)
+from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
+from keyboards.bonus_keyb import get_promocodes_keyboard
+from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+from utils.money import Money
+
+logger = logging.getLogger(__name__)
+
+PROMO_TYPE_BUTTONS = {
+    "✖️ Множитель бонусов": PROMO_MULTIPLIER,
+    "💵 Фиксированный бонус": PROMO_FIXED,
+}
+GENERATE_BUTTON = "🎲 Сгенерировать пакет"
+
+# Сколько кодов пакета показывать в сообщении; полный список - файлом
+PROMO_SHOW_CODES = 20
+
+
+async def _check_access(update: Update) -> bool:
+    user_id = update.effective_user.id
+    if await role_manager.has_permission(user_id, Permission.MANAGE_BONUSES):
+        return True
+    await update.message.reply_text(
+        "⛔ У вас нет прав для управления промокодами.",
+        reply_markup=await get_main_keyboard(user_id)
+    )
+    return False
+
+
+def _parse_int(text: str, minimum: int = 0):
+    """Целое число не меньше minimum (ValueError иначе)"""
+    value = int(text.strip())
+    if value < minimum:
+        raise ValueError
+    return value
+
+
+# ========== СПИСОК И СТАТИСТИКА ==========
+
+async def list_promocodes(update: Update, context: CallbackContext) -> None:
+    """Последние промокоды и сгенерированные пакеты"""
+    if not await _check_access(update):
+        return
+
+    result = await promo_manager.list_codes()
+    if not result['codes'] and not result['batches']:
+        await update.message.reply_text(
+            "📭 Промокодов пока нет.",
+            reply_markup=await get_promocodes_keyboard()
+        )
+        return
+
+    text = "📋 *Промокоды*\n\n"
+    for promo in result['codes']:
+        status = "✅" if promo['is_active'] else "❌"
+        uses = f"{promo['used_count']}/{promo['max_uses']}" if promo['max_uses'] else f"{promo['used_count']}/∞"
+        until = f", до {promo['valid_until'][:10]}" if promo['valid_until'] else ""
+        text += f"{status} `{promo['code']}` - {promo_manager.describe(promo)}, применений {uses}{until}\n"
+
+    if result['batches']:
+        text += "\n*Пакеты:*\n"
+        for batch in result['batches']:
+            text += (f"• {batch['batch_id']}: {batch['codes']} кодов, "
+                     f"применено {batch['used']} - {promo_manager.describe(batch)}\n")
+
+    await update.message.reply_text(
+        text,
+        reply_markup=await get_promocodes_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+async def promocode_statistics(update: Update, context: CallbackContext) -> None:
+    """Сводка по промокодам"""
+    if not await _check_access(update):
+        return
+
+    stats = await promo_manager.get_statistics()
+    text = (
+        "📊 *Статистика промокодов*\n\n"
+        f"🎫 Кодов: {stats['codes']} (включено {stats['active']})\n"
+        f"🔁 Применений: {stats['used']}\n"
+        f"👥 Клиентов: {stats['customers']}\n"
+        f"🎁 Выдано бонусов: {stats['bonus_amount']} руб.\n"
+    )
+    if stats['top']:
+        text += "\n*Чаще всего применяют:*\n"
+        for promo in stats['top']:
+            text += f"• `{promo['code']}`: {promo['used_count']} раз, {promo['bonus_amount']} руб.\n"
+
+    await update.message.reply_text(
+        text,
+        reply_markup=await get_promocodes_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+# ========== ВКЛЮЧЕНИЕ / ОТКЛЮЧЕНИЕ ==========
+
+async def activate_promocode(update: Update, context: CallbackContext) -> None:
+    """Включение и отключение промокода по коду"""
+    if not await _check_access(update):
+        return
+
+    context.user_data['toggling_promo'] = True
+    flow_engine.start(context, Flows.PROMO_TOGGLE, FlowStates.INPUT)
+    await update.message.reply_text(
+        "🎯 Введите промокод, чтобы включить или отключить его:",
+        reply_markup=get_cancel_keyboard()
+    )
+
+
+async def process_promo_toggle(update: Update, context: CallbackContext) -> None:
+    """Ввод кода для включения/отключения"""
+    if 'toggling_promo' not in context.user_data:
+        return
+
+    text = update.message.text.strip()
+    del context.user_data['toggling_promo']
+
+    if text == Buttons.CANCEL:
+        await update.message.reply_text("❌ Отменено.", reply_markup=await get_promocodes_keyboard())
+        return
+
+    promo = await promo_manager.toggle(text)
+    if promo is None:
+        message = "❌ Промокод не найден."
+    elif promo['is_active']:
+        message = f"✅ Промокод {promo['code']} включен."
+    else:
+        message = f"❌ Промокод {promo['code']} отключен."
+
+    await update.message.reply_text(message, reply_markup=await get_promocodes_keyboard())
+
+
+# ========== СОЗДАНИЕ ==========
+
+async def create_promocode(update: Update, context: CallbackContext) -> None:
+    """
+    СОЗДАНИЕ ПРОМОКОДА
+    Привязывается к кнопке "Создать промокод".
+    Один код с заданным названием или пакет сгенерированных кодов.
+    """
+    if not await _check_access(update):
+        return
+
+    context.user_data['creating_promo'] = {
+        'step': 'type',
+        'data': {}
+    }
+    flow_engine.start(context, Flows.PROMO_CODE, FlowStates.INPUT)
+
+    buttons = [[name] for name in PROMO_TYPE_BUTTONS]
+    buttons.append([Buttons.CANCEL])
+    await update.message.reply_text(
+        "➕ *Создание промокода*\n\nВыберите тип промокода:",
+        reply_markup=ReplyKeyboardMarkup(buttons, resize_keyboard=True),
+        parse_mode='Markdown'
+    )
+
+
+async def process_promo_creation(update: Update, context: CallbackContext) -> None:
+    """Обработка шагов создания промокода"""
+    if 'creating_promo' not in context.user_data:
+        return
+
+    text = update.message.text.strip()
+    process = context.user_data['creating_promo']
+    data = process['data']
+    step = process['step']
+
+    if text == Buttons.CANCEL:
+        del context.user_data['creating_promo']
+        await update.message.reply_text(
+            "❌ Создание промокода отменено.",
+            reply_markup=await get_promocodes_keyboard()
+        )
+        return
+
+    if step == 'type':
+        promo_type = PROMO_TYPE_BUTTONS.get(text)
+        if promo_type is None:
+            await update.message.reply_text("❌ Выберите тип кнопкой ниже.")
+            return
+        data['promo_type'] = promo_type
+        process['step'] = 'value'
+        await update.message.reply_text(
+            "Во сколько раз увеличить бонус за покупку? Например: 2 или 1.5"
+            if promo_type == PROMO_MULTIPLIER else
+            "Сколько бонусов (руб.) начислить по промокоду?",
+            reply_markup=get_cancel_keyboard()
+        )
+
+    elif step == 'value':
+        try:
+            if data['promo_type'] == PROMO_MULTIPLIER:
+                data['value'] = str(decimal.Decimal(text.replace(',', '.')))
+            else:
+                data['value'] = str(Money.parse(text))
+        except (ValueError, decimal.InvalidOperation):
+            await update.message.reply_text("❌ Введите число:")
+            return
+        process['step'] = 'max_uses'
+        await update.message.reply_text(
+            "Сколько раз всего можно применить код? 0 - без ограничений",
+            reply_markup=get_cancel_keyboard()
+        )
+
+    elif step == 'max_uses':
+        try:
+            data['max_uses'] = _parse_int(text) or None
+        except ValueError:
+            await update.message.reply_text("❌ Введите целое число (0 - без ограничений):")
+            return
+        process['step'] = 'per_customer'
+        await update.message.reply_text(
+            "Сколько раз один клиент может применить код?",
+            reply_markup=get_cancel_keyboard()
+        )
+
+    elif step == 'per_customer':
+        try:
+            data['per_customer_limit'] = _parse_int(text, minimum=1)
+        except ValueError:
+            await update.message.reply_text("❌ Введите целое число от 1:")
+            return
+        process['step'] = 'days'
+        await update.message.reply_text(
+            "Срок действия в днях? 0 - бессрочно",
+            reply_markup=get_cancel_keyboard()
+        )
+
+    elif step == 'days':
+        try:
+            data['valid_days'] = _parse_int(text) or None
+        except ValueError:
+            await update.message.reply_text("❌ Введите целое число (0 - бессрочно):")
+            return
+        process['step'] = 'code'
+        await update.message.reply_text(
+            "Введите промокод (буквы и цифры) или сгенерируйте пакет уникальных кодов:",
+            reply_markup=ReplyKeyboardMarkup(
+                [[GENERATE_BUTTON], [Buttons.CANCEL]],
+                resize_keyboard=True
+            )
+        )
+
+    elif step == 'code':
+        if text == GENERATE_BUTTON:
+            process['step'] = 'count'
+            await update.message.reply_text(
+                f"Сколько кодов создать (до {PROMO_BATCH_MAX})? "
+                "Через пробел можно указать префикс: 500 SUMMER",
+                reply_markup=get_cancel_keyboard()
+            )
+            return
+        await save_promocode(update, context, data, code=text)
+
+    elif step == 'count':
+        parts = text.split(maxsplit=1)
+        try:
+            count = _parse_int(parts[0], minimum=1)
+        except (ValueError, IndexError):
+            await update.message.reply_text("❌ Введите количество кодов:")
+            return
+        await save_promocode(update, context, data, count=count,
+                             prefix=parts[1] if len(parts) > 1 else '')
+
+
+def _value(data: dict):
+    if data['promo_type'] == PROMO_MULTIPLIER:
+        return decimal.Decimal(data['value'])
+    return Money.parse(data['value'])
+
+
+async def save_promocode(update: Update, context: CallbackContext, data: dict,
+                         code: str = None, count: int = None, prefix: str = '') -> None:
+    """Создание кода или пакета кодов"""
+    params = dict(
+        max_uses=data['max_uses'],
+        per_customer_limit=data['per_customer_limit'],
+        valid_days=data['valid_days'],
+        created_by=update.effective_user.id,
+    )
+    try:
+        if code is not None:
+            result = await promo_manager.create_code(code, data['promo_type'], _value(data), **params)
+        else:
+            result = await promo_manager.generate_codes(count, data['promo_type'], _value(data),
+                                                        prefix=prefix, **params)
+    except PromoCodeError as e:
+        await update.message.reply_text(f"❌ {e}. Попробуйте снова:")
+        return
+    except Exception as e:
+        logger.error(f"Ошибка создания промокода: {e}", exc_info=True)
+        del context.user_data['creating_promo']
+        await update.message.reply_text(
+            "❌ Ошибка создания промокода.",
+            reply_markup=await get_promocodes_keyboard()
+        )
+        return
+
+    del context.user_data['creating_promo']
+
+    if code is not None:
+        await update.message.reply_text(
+            f"✅ Промокод {result['code']} создан.",
+            reply_markup=await get_promocodes_keyboard()
+        )
+        return
+
+    codes = result['codes']
+    await update.message.reply_text(
+        f"✅ Создано кодов: {len(codes)} (пакет {result['batch_id']})\n\n"
+        + "\n".join(codes[:PROMO_SHOW_CODES])
+        + ("\n..." if len(codes) > PROMO_SHOW_CODES else ""),
+        reply_markup=await get_promocodes_keyboard()
+    )
+    if len(codes) > PROMO_SHOW_CODES:
+        await update.message.reply_document(
+            document=io.BytesIO("\n".join(codes).encode('utf-8')),
+            filename=f"promo_{result['batch_id']}.txt"
+        )
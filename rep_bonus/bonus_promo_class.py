@@ -0,0 +1,316 @@
+"""
+Промокоды бонусной программы.
+
+Типы кодов:
+- multiplier - бонус за покупку умножается на bonus_multiplier;
+- fixed      - к бонусу за покупку добавляется fixed_bonus.
+
+Код ограничивается общим числом применений (max_uses), числом применений
+одним клиентом (per_customer_limit) и сроком действия (valid_until).
+
+Код применяется внутри транзакции покупки (CustomerPurchase.commit_purchase):
+поиск по уникальному индексу нормализованного кода, лимит клиента - один
+запрос по индексу (promo_id, customer_id), счетчик - условный
+UPDATE ... WHERE used_count < max_uses. Если код исчерпали параллельные
+покупки, UPDATE не изменит строку и покупка откатится с PromoCodeError.
+"""
+
+import os
+import re
+import secrets
+import sqlite3
+import logging
+import decimal
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.money import Money, money_row
+
+PROMO_MULTIPLIER = 'multiplier'
+PROMO_FIXED = 'fixed'
+PROMO_TYPES = (PROMO_MULTIPLIER, PROMO_FIXED)
+
+# Сгенерированные коды: без похожих символов (0/O, 1/I)
+PROMO_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+PROMO_CODE_LENGTH = 8
+# Больше кодов за раз не генерируем: одна транзакция записи должна быть короткой
+PROMO_BATCH_MAX = int(os.getenv('PROMO_BATCH_MAX', '10000'))
+PROMO_MAX_MULTIPLIER = decimal.Decimal('10')
+
+# После нормализации: латиница, кириллица и цифры, 3-32 символа
+PROMO_CODE_RE = re.compile(r'^[0-9A-ZА-ЯЁ]{3,32}$')
+
+
+class PromoCodeError(ValueError):
+    """Промокод не найден, недействителен или исчерпан"""
+
+
+class PromoCodeManager:
+    """Промокоды: создание, генерация пакетов и применение в покупке"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    # ---------- Коды ----------
+
+    def normalize(self, code: str) -> str:
+        """Код в форме хранения: верхний регистр, без пробелов и дефисов"""
+        return re.sub(r'[\s\-]+', '', code or '').upper()
+
+    def _valid_until(self, valid_days: Optional[int]) -> Optional[str]:
+        if not valid_days:
+            return None
+        until = datetime.now(timezone.utc) + timedelta(days=valid_days)
+        return until.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _check_params(self, promo_type: str, value) -> tuple:
+        """(bonus_multiplier, fixed_bonus) для записи в promo_codes"""
+        if promo_type == PROMO_MULTIPLIER:
+            multiplier = decimal.Decimal(str(value))
+            if not 1 < multiplier <= PROMO_MAX_MULTIPLIER:
+                raise PromoCodeError(f"Множитель должен быть больше 1 и не больше {PROMO_MAX_MULTIPLIER}")
+            return float(multiplier), None
+        if promo_type == PROMO_FIXED:
+            if not isinstance(value, Money) or value.kopecks <= 0:
+                raise PromoCodeError("Сумма бонуса должна быть больше 0")
+            return None, value
+        raise PromoCodeError(f"Неизвестный тип промокода: {promo_type}")
+
+    @db_write
+    def create_code(self, code: str, promo_type: str, value, max_uses: Optional[int] = None,
+                    per_customer_limit: int = 1, valid_days: Optional[int] = None,
+                    created_by: Optional[int] = None) -> Dict:
+        """Создает один код (PromoCodeError, если код занят или параметры неверны)"""
+        code = self.normalize(code)
+        if not PROMO_CODE_RE.match(code):
+            raise PromoCodeError("Код: от 3 до 32 букв и цифр")
+        multiplier, fixed_bonus = self._check_params(promo_type, value)
+
+        try:
+            with sqlite_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO promo_codes (
+                        code, promo_type, bonus_multiplier, fixed_bonus, max_uses,
+                        per_customer_limit, valid_until, created_by
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (code, promo_type, multiplier, fixed_bonus, max_uses,
+                      per_customer_limit, self._valid_until(valid_days), created_by))
+                conn.commit()
+                return {'promo_id': cursor.lastrowid, 'code': code}
+        except sqlite3.IntegrityError:
+            raise PromoCodeError(f"Промокод {code} уже существует")
+
+    @db_write
+    def generate_codes(self, count: int, promo_type: str, value, max_uses: Optional[int] = 1,
+                       per_customer_limit: int = 1, valid_days: Optional[int] = None,
+                       prefix: str = '', created_by: Optional[int] = None) -> Dict:
+        """
+        Генерирует count уникальных кодов одной транзакцией.
+        Совпадения с существующими кодами отсекает уникальный индекс
+        (INSERT OR IGNORE), недостающие коды догенерируются.
+        """
+        if not 0 < count <= PROMO_BATCH_MAX:
+            raise PromoCodeError(f"Количество кодов: от 1 до {PROMO_BATCH_MAX}")
+        prefix = self.normalize(prefix)
+        multiplier, fixed_bonus = self._check_params(promo_type, value)
+        valid_until = self._valid_until(valid_days)
+        batch_id = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{secrets.token_hex(3)}"
+
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            created = 0
+            while created < count:
+                codes = {
+                    prefix + ''.join(secrets.choice(PROMO_ALPHABET) for _ in range(PROMO_CODE_LENGTH))
+                    for _ in range(count - created)
+                }
+                before = conn.total_changes
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO promo_codes (
+                        code, promo_type, bonus_multiplier, fixed_bonus, max_uses,
+                        per_customer_limit, valid_until, batch_id, created_by
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(code, promo_type, multiplier, fixed_bonus, max_uses, per_customer_limit,
+                       valid_until, batch_id, created_by) for code in codes])
+                created += conn.total_changes - before
+
+            cursor.execute("SELECT code FROM promo_codes WHERE batch_id = ? ORDER BY promo_id", (batch_id,))
+            codes = [row['code'] for row in cursor.fetchall()]
+            conn.commit()
+
+        self.logger.info(f"Сгенерировано промокодов: {len(codes)}, пакет {batch_id}")
+        return {'batch_id': batch_id, 'codes': codes}
+
+    def _find(self, cursor, code: str) -> Optional[Dict]:
+        cursor.execute('''
+            SELECT promo_id, code, promo_type, bonus_multiplier, fixed_bonus, max_uses,
+                   used_count, per_customer_limit, valid_until, is_active, batch_id
+            FROM promo_codes
+            WHERE code = ?
+        ''', (self.normalize(code),))
+        return self._promo(cursor.fetchone())
+
+    def _promo(self, row) -> Optional[Dict]:
+        promo = money_row(row)
+        if promo and promo['bonus_multiplier'] is not None:
+            promo['bonus_multiplier'] = decimal.Decimal(str(promo['bonus_multiplier']))
+        return promo
+
+    def _validate(self, cursor, promo: Optional[Dict], customer_id: int) -> Dict:
+        """Проверки кода перед применением (PromoCodeError с причиной)"""
+        if not promo:
+            raise PromoCodeError("Промокод не найден")
+        if not promo['is_active']:
+            raise PromoCodeError("Промокод отключен")
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        if promo['valid_until'] and promo['valid_until'] <= now:
+            raise PromoCodeError("Срок действия промокода истек")
+        if promo['max_uses'] is not None and promo['used_count'] >= promo['max_uses']:
+            raise PromoCodeError("Промокод уже использован максимальное число раз")
+
+        cursor.execute('''
+            SELECT COUNT(*) FROM promo_redemptions
+            WHERE promo_id = ? AND customer_id = ?
+        ''', (promo['promo_id'], customer_id))
+        if cursor.fetchone()[0] >= promo['per_customer_limit']:
+            raise PromoCodeError("Клиент уже использовал этот промокод")
+        return promo
+
+    @db_read
+    def check(self, code: str, customer_id: int) -> Dict:
+        """Код, который клиент может применить (PromoCodeError, если нельзя)"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            return self._validate(cursor, self._find(cursor, code), customer_id)
+
+    def promo_bonus(self, promo: Dict, amount: Money, bonus_amount: Money,
+                    bonus_percent: decimal.Decimal) -> Money:
+        """Дополнительный бонус по коду сверх бонуса за покупку"""
+        if promo['promo_type'] == PROMO_MULTIPLIER:
+            return amount.percent(bonus_percent * promo['bonus_multiplier']) - bonus_amount
+        return promo['fixed_bonus']
+
+    def redeem(self, cursor, code: str, customer_id: int, purchase_id: int, amount: Money,
+               bonus_amount: Money, bonus_percent: decimal.Decimal) -> Dict:
+        """
+        Применение кода в транзакции вызывающего (BEGIN IMMEDIATE покупки).
+        Возвращает код с 'promo_bonus'; при отказе - PromoCodeError, вызывающий откатывает покупку.
+        """
+        promo = self._validate(cursor, self._find(cursor, code), customer_id)
+
+        # Счетчик - условным UPDATE: исчерпанный код не изменится
+        cursor.execute('''
+            UPDATE promo_codes SET used_count = used_count + 1
+            WHERE promo_id = ? AND is_active = 1
+                AND (max_uses IS NULL OR used_count < max_uses)
+                AND (valid_until IS NULL OR valid_until > CURRENT_TIMESTAMP)
+        ''', (promo['promo_id'],))
+        if cursor.rowcount == 0:
+            raise PromoCodeError("Промокод уже использован максимальное число раз")
+
+        promo['promo_bonus'] = self.promo_bonus(promo, amount, bonus_amount, bonus_percent)
+        cursor.execute('''
+            INSERT INTO promo_redemptions (promo_id, customer_id, purchase_id, bonus_amount)
+            VALUES (?, ?, ?, ?)
+        ''', (promo['promo_id'], customer_id, purchase_id, promo['promo_bonus']))
+        return promo
+
+    @db_write
+    def toggle(self, code: str) -> Optional[Dict]:
+        """Включить/отключить код; None, если кода нет"""
+        with sqlite_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE promo_codes SET is_active = 1 - is_active WHERE code = ?
+            ''', (self.normalize(code),))
+            if cursor.rowcount == 0:
+                return None
+            promo = self._find(cursor, code)
+            conn.commit()
+            return promo
+
+    @db_read
+    def has_active_codes(self) -> bool:
+        """Есть ли хоть один включенный код (иначе покупка не спрашивает промокод)"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM promo_codes WHERE is_active = 1 LIMIT 1")
+            return cursor.fetchone() is not None
+
+    # ---------- Списки и статистика ----------
+
+    @db_read
+    def list_codes(self, limit: int = 20) -> Dict:
+        """Последние одиночные коды и сводка по сгенерированным пакетам"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT promo_id, code, promo_type, bonus_multiplier, fixed_bonus, max_uses,
+                       used_count, per_customer_limit, valid_until, is_active, batch_id
+                FROM promo_codes
+                WHERE batch_id IS NULL
+                ORDER BY promo_id DESC
+                LIMIT ?
+            ''', (limit,))
+            codes = [self._promo(row) for row in cursor.fetchall()]
+
+            cursor.execute('''
+                SELECT batch_id, COUNT(*) AS codes, SUM(used_count) AS used,
+                       MIN(promo_type) AS promo_type, MIN(bonus_multiplier) AS bonus_multiplier,
+                       MIN(fixed_bonus) AS fixed_bonus
+                FROM promo_codes
+                WHERE batch_id IS NOT NULL
+                GROUP BY batch_id
+                ORDER BY batch_id DESC
+                LIMIT ?
+            ''', (limit,))
+            batches = [self._promo(row) for row in cursor.fetchall()]
+
+        return {'codes': codes, 'batches': batches}
+
+    @db_read
+    def get_statistics(self, top: int = 5) -> Dict:
+        """Сводка по промокодам: коды, применения, выданные бонусы"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) AS codes,
+                       COALESCE(SUM(is_active), 0) AS active,
+                       COALESCE(SUM(used_count), 0) AS used
+                FROM promo_codes
+            ''')
+            stats = dict(cursor.fetchone())
+
+            cursor.execute('''
+                SELECT COUNT(DISTINCT customer_id) AS customers,
+                       COALESCE(SUM(bonus_amount), 0) AS bonus_amount
+                FROM promo_redemptions
+            ''')
+            row = money_row(cursor.fetchone())
+            stats.update(customers=row['customers'], bonus_amount=row['bonus_amount'])
+
+            cursor.execute('''
+                SELECT p.code, p.used_count, COALESCE(SUM(r.bonus_amount), 0) AS bonus_amount
+                FROM promo_codes p
+                JOIN promo_redemptions r ON r.promo_id = p.promo_id
+                GROUP BY p.promo_id
+                ORDER BY p.used_count DESC
+                LIMIT ?
+            ''', (top,))
+            stats['top'] = [money_row(row) for row in cursor.fetchall()]
+
+        return stats
+
+    def describe(self, promo: Dict) -> str:
+        """Выгода по коду словами"""
+        if promo['promo_type'] == PROMO_MULTIPLIER:
+            return f"бонусы ×{promo['bonus_multiplier'].normalize():f}"
+        return f"+{promo['fixed_bonus']} руб. бонусов"
+
+
+promo_manager = PromoCodeManager()
@@ -0,0 +1,173 @@
+# rep_bonus/bonus_simulator.py
+import logging
+from telegram import Update
+from telegram.ext import CallbackContext
+
+from database import db_executor
+from handlers.admin_roles_class import role_manager, Permission
+from rep_bonus.bonus_levels_class import bonus_levels_manager
+from rep_bonus.bonus_simulator_class import bonus_simulator, SimulationLevels, SIMULATION_DAYS
+from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
+from keyboards.bonus_keyb import get_loyalty_program_keyboard
+from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+
+logger = logging.getLogger(__name__)
+
+
+async def start_simulation(update: Update, context: CallbackContext) -> None:
+    """
+    СИМУЛЯЦИЯ ИЗМЕНЕНИЯ УРОВНЕЙ
+    Привязывается к кнопке "Симуляция программы".
+    Спрашивает программу и предлагаемую таблицу уровней.
+    """
+    user_id = update.effective_user.id
+
+    if not await role_manager.has_permission(user_id, Permission.MANAGE_BONUSES):
+        await update.message.reply_text(
+            "⛔ У вас нет прав для симуляции бонусных программ.",
+            reply_markup=await get_main_keyboard(user_id)
+        )
+        return
+
+    programs = await bonus_levels_manager.get_active_bonus_programs()
+    if not programs:
+        await update.message.reply_text(
+            "📭 Нет активных бонусных программ.",
+            reply_markup=await get_loyalty_program_keyboard()
+        )
+        return
+
+    context.user_data['simulating_program'] = {
+        'step': 'program',
+        'data': {}
+    }
+    flow_engine.start(context, Flows.BONUS_SIMULATOR, FlowStates.INPUT)
+
+    programs_text = "\n".join(f"{program['program_id']} — {program['program_name']}" for program in programs)
+    await update.message.reply_text(
+        "🧪 *Симуляция программы*\n\n"
+        f"Покупки за {SIMULATION_DAYS} дн. будут пересчитаны по новой таблице уровней.\n\n"
+        f"{programs_text}\n\n"
+        "Введите ID программы:",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+async def process_simulation(update: Update, context: CallbackContext) -> None:
+    """Обработка шагов симуляции"""
+    if 'simulating_program' not in context.user_data:
+        return
+
+    text = update.message.text.strip()
+    process = context.user_data['simulating_program']
+
+    if text == Buttons.CANCEL:
+        del context.user_data['simulating_program']
+        await update.message.reply_text(
+            "❌ Симуляция отменена.",
+            reply_markup=await get_loyalty_program_keyboard()
+        )
+        return
+
+    if process['step'] == 'program':
+        await handle_program_step(update, context, text, process)
+
+    elif process['step'] == 'levels':
+        await handle_levels_step(update, context, text, process)
+
+
+async def handle_program_step(update: Update, context: CallbackContext,
+                              text: str, process: dict) -> None:
+    """Выбор программы: показываем ее таблицу уровней как образец для ввода"""
+    programs = {program['program_id']: program['program_name']
+                for program in await bonus_levels_manager.get_active_bonus_programs()}
+    try:
+        program_id = int(text)
+    except ValueError:
+        program_id = None
+
+    if program_id not in programs:
+        await update.message.reply_text(
+            "❌ Программа не найдена. Введите ID из списка:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    current = await db_executor.run(bonus_simulator.current_levels, program_id, readonly=True)
+
+    process['data']['program_id'] = program_id
+    process['data']['program_name'] = programs[program_id]
+    process['step'] = 'levels'
+
+    await update.message.reply_text(
+        f"📋 Текущие уровни программы «{programs[program_id]}»:\n\n"
+        + "\n".join(current.lines()) +
+        "\n\nОтправьте новую таблицу в том же формате, по строке на уровень:\n"
+        "название; порог, руб.; процент\n"
+        "Строка «база; процент» - процент до первого уровня.",
+        reply_markup=get_cancel_keyboard()
+    )
+
+
+async def handle_levels_step(update: Update, context: CallbackContext,
+                             text: str, process: dict) -> None:
+    """Ввод предлагаемой таблицы и запуск симуляции"""
+    try:
+        proposed = SimulationLevels.parse(text.splitlines())
+    except ValueError as e:
+        await update.message.reply_text(
+            f"❌ {e}\nИсправьте таблицу и отправьте снова:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    program_id = process['data']['program_id']
+    program_name = process['data']['program_name']
+    del context.user_data['simulating_program']
+
+    await update.message.reply_text("⏳ Пересчитываю историю покупок...")
+
+    try:
+        report = await db_executor.run(bonus_simulator.simulate, program_id, proposed, readonly=True)
+    except Exception as e:
+        logger.error(f"Ошибка симуляции программы {program_id}: {e}", exc_info=True)
+        await update.message.reply_text(
+            "❌ Ошибка симуляции.",
+            reply_markup=await get_loyalty_program_keyboard()
+        )
+        return
+
+    await update.message.reply_text(
+        format_simulation_report(program_name, report),
+        reply_markup=await get_loyalty_program_keyboard()
+    )
+
+
+def format_simulation_report(program_name: str, report: dict) -> str:
+    """Текст отчета симуляции"""
+    sign = '+' if report['delta'].kopecks > 0 else ''
+    text = (
+        f"🧪 Симуляция программы «{program_name}» за {report['days']} дн.\n"
+        f"👥 Клиентов: {report['customers']}, покупок: {report['purchases']}\n\n"
+        f"Бонусы сейчас: {report['current_bonus']} руб.\n"
+        f"Бонусы по новой таблице: {report['proposed_bonus']} руб.\n"
+        f"💰 Изменение обязательств: {sign}{report['delta']} руб.\n\n"
+        "Клиентов по уровням (сейчас → станет):\n"
+    )
+
+    current = dict(report['levels_current'])
+    proposed = dict(report['levels_proposed'])
+    for name in dict.fromkeys([name for name, _ in report['levels_current'] + report['levels_proposed']]):
+        text += f"• {name}: {current.get(name, 0)} → {proposed.get(name, 0)}\n"
+
+    if report['top']:
+        text += "\nСильнее всего изменится:\n"
+        for customer in report['top']:
+            sign = '+' if customer['delta'].kopecks > 0 else ''
+            text += (f"• {customer['username'] or customer['customer_id']} "
+                     f"(карта {customer['card_number']}): {sign}{customer['delta']} руб.\n")
+
+    return text
@@ -0,0 +1,274 @@
+"""
+Симуляция изменения уровней бонусной программы на истории покупок.
+
+Покупки клиентов программы за период проигрываются по порядку с накопительной
+суммой - так же, как их начисляет CustomerPurchase.commit_purchase (процент по
+сумме покупок до текущей) - дважды: по действующей таблице уровней и по
+предлагаемой. Сумма покупок до начала периода восстанавливается как
+total_purchases минус покупки периода.
+
+История читается одним упорядоченным проходом по индексу покупок клиента
+порциями fetchmany, расчет - целочисленный, в копейках, клиент за клиентом.
+
+Используется из меню программы лояльности и из консоли:
+    python tools/simulate_bonus_program.py --program 1 --level "Серебро;10000;5"
+"""
+
+import re
+import time
+import heapq
+import logging
+import decimal
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List
+
+from database import sqlite_read_connection
+from utils.money import Money
+from rep_bonus.bonus_level_resolver import DEFAULT_BONUS_PERCENT
+
+# Период истории по умолчанию
+SIMULATION_DAYS = 365
+# Сколько клиентов с наибольшим изменением показывать
+SIMULATION_TOP = 10
+# Строк истории за одно чтение
+SIMULATION_FETCH_SIZE = 10000
+
+BASE_LEVEL_NAME = "Без уровня"
+
+# Проценты хранятся целыми с точностью до 0.0001%
+_PERCENT_SCALE = 10000
+_ROUND_HALF = 100 * _PERCENT_SCALE // 2
+
+# "Серебро; 10000; 5" или "база; 3"
+LEVEL_LINE_RE = re.compile(r'^\s*([^;]+?)\s*;\s*([^;]+?)\s*(?:;\s*([^;]+?)\s*)?$')
+BASE_KEYWORDS = ('база', 'base')
+
+
+def _scaled(percent) -> int:
+    return int((decimal.Decimal(str(percent)) * _PERCENT_SCALE).to_integral_value(decimal.ROUND_HALF_UP))
+
+
+class SimulationLevels:
+    """Таблица уровней для симуляции: пороги (копейки), проценты, названия"""
+
+    __slots__ = ('names', 'thresholds', 'percents', 'base_percent', '_scaled', '_base_scaled')
+
+    def __init__(self, levels: Iterable[tuple], base_percent):
+        """levels - (название, порог Money, процент) в любом порядке"""
+        levels = sorted(levels, key=lambda level: level[1].kopecks)
+        self.names = [level[0] for level in levels]
+        self.thresholds = [level[1].kopecks for level in levels]
+        self.percents = [decimal.Decimal(str(level[2])) for level in levels]
+        self.base_percent = decimal.Decimal(str(base_percent))
+        self._scaled = [_scaled(percent) for percent in self.percents]
+        self._base_scaled = _scaled(self.base_percent)
+
+    @classmethod
+    def parse(cls, lines: Iterable[str], base_percent=DEFAULT_BONUS_PERCENT) -> 'SimulationLevels':
+        """
+        Таблица из строк "название; порог, руб.; процент" и необязательной
+        "база; процент" (ValueError при ошибке)
+        """
+        levels = []
+        for line in lines:
+            if not line.strip():
+                continue
+            match = LEVEL_LINE_RE.match(line)
+            if not match:
+                raise ValueError(f"Строка не в формате 'название; порог; процент': {line}")
+
+            name, first, second = match.groups()
+            try:
+                if second is None and name.lower() in BASE_KEYWORDS:
+                    base_percent = decimal.Decimal(first.replace(',', '.'))
+                    continue
+                if second is None:
+                    raise ValueError(f"Не указан процент: {line}")
+                percent = decimal.Decimal(second.replace(',', '.'))
+            except decimal.InvalidOperation:
+                raise ValueError(f"Некорректный процент: {line}")
+
+            if not 0 <= percent <= 100:
+                raise ValueError(f"Процент должен быть от 0 до 100: {line}")
+            levels.append((name, Money.parse(first), percent))
+
+        if not levels:
+            raise ValueError("Не задано ни одного уровня")
+        return cls(levels, base_percent)
+
+    @classmethod
+    def load(cls, cursor, program_id: int) -> 'SimulationLevels':
+        """Действующая таблица уровней программы"""
+        cursor.execute('''
+            SELECT level_name, min_total_purchases, bonus_percent
+            FROM bonus_levels
+            WHERE program_id = ?
+            ORDER BY min_total_purchases ASC
+        ''', (program_id,))
+        levels = [(row['level_name'], Money.from_db(row['min_total_purchases']), row['bonus_percent'])
+                  for row in cursor.fetchall()]
+
+        cursor.execute('''
+            SELECT base_percent FROM bonus_programs WHERE program_id = ?
+        ''', (program_id,))
+        program = cursor.fetchone()
+        return cls(levels, program['base_percent'] if program else DEFAULT_BONUS_PERCENT)
+
+    def level_name(self, total_kopecks: int) -> str:
+        index = bisect_right(self.thresholds, total_kopecks) - 1
+        return self.names[index] if index >= 0 else BASE_LEVEL_NAME
+
+    def replay(self, opening: int, amounts: List[int]) -> int:
+        """Бонусы (копейки) за покупки по порядку, начиная с суммы opening"""
+        thresholds, scaled, base = self.thresholds, self._scaled, self._base_scaled
+        total, bonus = opening, 0
+        for amount in amounts:
+            index = bisect_right(thresholds, total) - 1
+            percent = scaled[index] if index >= 0 else base
+            # Как Money.percent: половина копейки округляется вверх
+            bonus += (amount * percent + _ROUND_HALF) // (100 * _PERCENT_SCALE)
+            total += amount
+        return bonus
+
+    def lines(self) -> List[str]:
+        """Таблица в формате ввода parse()"""
+        result = [f"база; {self.base_percent}"]
+        result += [f"{name}; {Money(threshold)}; {percent}"
+                   for name, threshold, percent in zip(self.names, self.thresholds, self.percents)]
+        return result
+
+
+class BonusSimulator:
+    """Проигрывание истории покупок по предлагаемой таблице уровней"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def current_levels(self, program_id: int) -> SimulationLevels:
+        with sqlite_read_connection() as conn:
+            return SimulationLevels.load(conn.cursor(), program_id)
+
+    def simulate(self, program_id: int, proposed: SimulationLevels,
+                 days: int = SIMULATION_DAYS, top: int = SIMULATION_TOP) -> Dict:
+        """
+        Сравнивает начисления за days дней по действующей и предлагаемой таблице.
+        Вызывать в потоке БД (чтение истории занимает секунды).
+        """
+        started = time.perf_counter()
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+        customers = purchases = current_total = proposed_total = 0
+        levels_current: Dict[str, int] = {}
+        levels_proposed: Dict[str, int] = {}
+        affected = []
+
+        with sqlite_read_connection() as conn:
+            # Таблица уровней и история - из одного снимка
+            conn.execute("BEGIN")
+            try:
+                cursor = conn.cursor()
+                current = SimulationLevels.load(cursor, program_id)
+
+                # История - кортежами: sqlite3.Row на миллионах строк заметно дороже
+                history = conn.cursor()
+                history.row_factory = None
+                history.execute('''
+                    SELECT p.customer_id, c.total_purchases, p.amount
+                    FROM customer_purchases p
+                    JOIN customers c ON c.customer_id = p.customer_id
+                    WHERE p.purchase_date >= ?
+                        AND c.bonus_program_id = ? AND c.is_active = 1
+                    ORDER BY p.customer_id, p.purchase_date, p.purchase_id
+                ''', (since, program_id))
+
+                for customer_id, rows in groupby(self._stream(history), key=itemgetter(0)):
+                    rows = list(rows)
+                    final_total = rows[0][1] or 0
+                    amounts = [row[2] for row in rows]
+                    opening = max(final_total - sum(amounts), 0)
+
+                    current_bonus = current.replay(opening, amounts)
+                    proposed_bonus = proposed.replay(opening, amounts)
+
+                    customers += 1
+                    purchases += len(amounts)
+                    current_total += current_bonus
+                    proposed_total += proposed_bonus
+
+                    name = current.level_name(final_total)
+                    levels_current[name] = levels_current.get(name, 0) + 1
+                    name = proposed.level_name(final_total)
+                    levels_proposed[name] = levels_proposed.get(name, 0) + 1
+
+                    delta = proposed_bonus - current_bonus
+                    if delta:
+                        entry = (abs(delta), customer_id, current_bonus, proposed_bonus)
+                        if len(affected) < top:
+                            heapq.heappush(affected, entry)
+                        elif entry > affected[0]:
+                            heapq.heapreplace(affected, entry)
+
+                top_customers = self._top_customers(cursor, sorted(affected, reverse=True))
+            finally:
+                conn.rollback()
+
+        report = {
+            'program_id': program_id,
+            'days': days,
+            'customers': customers,
+            'purchases': purchases,
+            'current_bonus': Money(current_total),
+            'proposed_bonus': Money(proposed_total),
+            'delta': Money(proposed_total - current_total),
+            'levels_current': self._ordered(current, levels_current),
+            'levels_proposed': self._ordered(proposed, levels_proposed),
+            'top': top_customers,
+            'duration': time.perf_counter() - started,
+        }
+        self.logger.info(
+            f"Симуляция программы {program_id}: клиентов {customers}, покупок {purchases}, "
+            f"изменение бонусов {report['delta']} руб. за {report['duration']:.2f} сек"
+        )
+        return report
+
+    def _stream(self, cursor):
+        """Строки истории порциями, без загрузки всей выборки в память"""
+        while True:
+            rows = cursor.fetchmany(SIMULATION_FETCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+    def _top_customers(self, cursor, affected: List[tuple]) -> List[Dict]:
+        if not affected:
+            return []
+
+        ids = [entry[1] for entry in affected]
+        cursor.execute(f'''
+            SELECT customer_id, username, card_number FROM customers
+            WHERE customer_id IN ({', '.join('?' * len(ids))})
+        ''', ids)
+        names = {row['customer_id']: row for row in cursor.fetchall()}
+
+        return [
+            {
+                'customer_id': customer_id,
+                'username': names[customer_id]['username'] if customer_id in names else None,
+                'card_number': names[customer_id]['card_number'] if customer_id in names else None,
+                'current_bonus': Money(current_bonus),
+                'proposed_bonus': Money(proposed_bonus),
+                'delta': Money(proposed_bonus - current_bonus),
+            }
+            for _, customer_id, current_bonus, proposed_bonus in affected
+        ]
+
+    def _ordered(self, levels: SimulationLevels, counts: Dict[str, int]) -> List[tuple]:
+        """Количество клиентов по уровням в порядке порогов"""
+        names = [BASE_LEVEL_NAME] + levels.names
+        return [(name, counts[name]) for name in dict.fromkeys(names) if name in counts]
+
+
+bonus_simulator = BonusSimulator()
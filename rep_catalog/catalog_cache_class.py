@@ -0,0 +1,169 @@
+"""
+Кэш справочника товаров в памяти процесса.
+
+Справочник меняется редко, а читается на каждом экране каталога и при
+выборе товаров для инвентаризации. Все активные товары загружаются одним
+запросом по индексу idx_product_catalog_active_category и хранятся как
+категория -> товары; список категорий, их размеры и товар по ID отдаются
+из памяти.
+
+Актуальность:
+- методы записи CatalogRepository увеличивают catalog_version в своей
+  транзакции и сбрасывают кэш своего процесса;
+- коммиты других процессов видны по PRAGMA data_version: если с прошлой
+  проверки данные кто-то менял, читается catalog_version, и справочник
+  перечитывается, только если изменилась его версия. Проверка делается не
+  чаще CATALOG_CHECK_INTERVAL, между проверками чтение идет только из памяти.
+
+Методы чтения вызываются из потоков БД (CatalogRepository, @db_read).
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from database import sqlite_read_connection, get_pool
+
+# Как часто проверять изменения справочника другими процессами (сек)
+CATALOG_CHECK_INTERVAL = float(os.getenv('CATALOG_CHECK_INTERVAL', '2'))
+
+
+class CatalogCache:
+    """Активные товары справочника по категориям"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._data_version = None
+        self._checked_at = 0.0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.external_reloads = 0
+
+    # ========== ЗАГРУЗКА ==========
+
+    @staticmethod
+    def _read_version(cursor) -> int:
+        cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row['version'] if row else 0
+
+    def _load(self) -> None:
+        """Перечитать справочник"""
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            # Версию читаем до товаров: запись между запросами даст лишнюю
+            # перезагрузку при следующей проверке, но не устаревший кэш
+            version = self._read_version(cursor)
+            cursor.execute('''
+                SELECT product_id, category, name, unit, default_quantity, description
+                FROM product_catalog
+                WHERE is_active = 1
+                ORDER BY category, name
+            ''')
+            rows = [dict(row) for row in cursor.fetchall()]
+
+        products: Dict[str, List[Dict]] = {}
+        for row in rows:
+            products.setdefault(row['category'], []).append(row)
+
+        self._snapshot = {
+            'products': products,
+            'by_id': {row['product_id']: row for row in rows},
+        }
+        self.version = version
+
+    def _current(self) -> Optional[dict]:
+        """Актуальный снимок справочника (None, если БД недоступна)"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < CATALOG_CHECK_INTERVAL:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            try:
+                data_version = get_pool().data_version()
+                if self._snapshot is not None and data_version != self._data_version:
+                    # Данные кто-то менял - проверяем, не справочник ли
+                    with sqlite_read_connection() as conn:
+                        if self._read_version(conn.cursor()) != self.version:
+                            self._snapshot = None
+                            self.external_reloads += 1
+                self._data_version = data_version
+
+                if self._snapshot is None:
+                    self.misses += 1
+                    self._load()
+                else:
+                    self.hits += 1
+                self._checked_at = time.monotonic()
+                return self._snapshot
+
+            except Exception as e:
+                self.logger.error(f"Ошибка загрузки справочника товаров: {e}")
+                self._snapshot = None
+                return None
+
+    def invalidate(self) -> None:
+        """Сбросить кэш после изменения справочника этим процессом"""
+        with self._lock:
+            self._snapshot = None
+
+    def warm_up(self) -> int:
+        """Загрузить справочник при запуске бота; возвращает число товаров"""
+        snapshot = self._current()
+        count = len(snapshot['by_id']) if snapshot else 0
+        self.logger.info(f"Справочник товаров загружен в кэш: {count} товаров, версия {self.version}")
+        return count
+
+    # ========== ЧТЕНИЕ ==========
+
+    def get_categories(self) -> List[str]:
+        """Активные категории по алфавиту"""
+        snapshot = self._current()
+        return list(snapshot['products']) if snapshot else []
+
+    def get_category_products(self, category: str) -> List[Dict]:
+        """Товары категории по названию (копии - их можно менять)"""
+        snapshot = self._current()
+        if not snapshot:
+            return []
+        return [dict(product) for product in snapshot['products'].get(category, ())]
+
+    def get_categories_with_counts(self) -> List[Dict]:
+        """Категории с количеством товаров"""
+        snapshot = self._current()
+        if not snapshot:
+            return []
+        return [{'category': category, 'count': len(products)}
+                for category, products in snapshot['products'].items()]
+
+    def has_category(self, category: str) -> bool:
+        snapshot = self._current()
+        return bool(snapshot) and category in snapshot['products']
+
+    def get_product(self, product_id: int) -> Optional[Dict]:
+        """Активный товар по ID"""
+        snapshot = self._current()
+        product = snapshot['by_id'].get(product_id) if snapshot else None
+        return dict(product) if product else None
+
+    def get_cache_stats(self) -> dict:
+        requests = self.hits + self.misses
+        snapshot = self._snapshot
+        return {
+            'name': 'catalog',
+            'size': len(snapshot['by_id']) if snapshot else 0,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'external_reloads': self.external_reloads,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
+
+
+catalog_cache = CatalogCache()
@@ -1,69 +1,48 @@
 import logging
 from typing import List, Dict, Optional
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from .catalog_cache_class import catalog_cache
 
 logger = logging.getLogger(__name__)
 
 
 class CatalogRepository:
-    """Репозиторий для работы со справочником товаров"""
+    """
+    Репозиторий для работы со справочником товаров.
+
+    Активные товары читаются из catalog_cache; методы записи увеличивают
+    catalog_version в своей транзакции и сбрасывают кэш.
+    """
     
     @staticmethod
+    @db_read
     def get_active_categories() -> List[str]:
         """Получить список активных категорий"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT DISTINCT category 
-                    FROM product_catalog 
-                    WHERE is_active = 1 
-                    ORDER BY category
-                ''')
-                return [row['category'] for row in cursor.fetchall()]
-        except Exception as e:
-            logger.error(f"Ошибка получения категорий: {e}")
-            return []
+        return catalog_cache.get_categories()
     
     @staticmethod
+    @db_read
     def get_category_products(category: str) -> List[Dict]:
         """Получить товары категории"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT product_id, name, unit, default_quantity, description
-                    FROM product_catalog 
-                    WHERE category = ? AND is_active = 1
-                    ORDER BY name
-                ''', (category,))
-                return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
-            logger.error(f"Ошибка получения товаров категории: {e}")
-            return []
+        return catalog_cache.get_category_products(category)
     
     @staticmethod
+    @db_read
     def check_category_exists(category: str) -> bool:
         """Проверить существование категории с активными товарами"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT COUNT(*) as count 
-                    FROM product_catalog 
-                    WHERE category = ? AND is_active = 1
-                ''', (category,))
-                result = cursor.fetchone()
-                return result['count'] > 0
-        except Exception as e:
-            logger.error(f"Ошибка проверки категории: {e}")
-            return False
+        return catalog_cache.has_category(category)
+
+    @staticmethod
+    def _bump_version(cursor) -> None:
+        """Новая версия справочника - кэши всех процессов перечитают его"""
+        cursor.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
     
     @staticmethod
+    @db_read
     def check_product_name_exists(name: str) -> bool:
         """Проверить существование товара с таким названием"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT product_id FROM product_catalog WHERE name = ?",
@@ -75,6 +54,7 @@ class CatalogRepository:
             return False
     
     @staticmethod
+    @db_write
     def add_product(
         category: str,
         name: str,
@@ -92,13 +72,16 @@ class CatalogRepository:
                     ) VALUES (?, ?, ?, ?, ?)
                 ''', (category, name, unit, default_quantity, description))
                 product_id = cursor.lastrowid
+                CatalogRepository._bump_version(cursor)
                 conn.commit()
-                return product_id
+            catalog_cache.invalidate()
+            return product_id
         except Exception as e:
             logger.error(f"Ошибка добавления товара: {e}")
             return None
     
     @staticmethod
+    @db_write
     def soft_delete_product(product_id: int) -> bool:
         """Мягкое удаление товара (установка is_active = 0)"""
         try:
@@ -111,13 +94,18 @@ class CatalogRepository:
                     WHERE product_id = ?
                 ''', (product_id,))
                 success = cursor.rowcount > 0
+                if success:
+                    CatalogRepository._bump_version(cursor)
                 conn.commit()
-                return success
+            if success:
+                catalog_cache.invalidate()
+            return success
         except Exception as e:
             logger.error(f"Ошибка удаления товара: {e}")
             return False
     
     @staticmethod
+    @db_write
     def soft_delete_category_products(category: str) -> int:
         """Мягкое удаление всех товаров категории"""
         try:
@@ -130,48 +118,30 @@ class CatalogRepository:
                     WHERE category = ? AND is_active = 1
                 ''', (category,))
                 deleted_count = cursor.rowcount
+                if deleted_count:
+                    CatalogRepository._bump_version(cursor)
                 conn.commit()
-                return deleted_count
+            if deleted_count:
+                catalog_cache.invalidate()
+            return deleted_count
         except Exception as e:
             logger.error(f"Ошибка удаления товаров категории: {e}")
             return 0
     
     @staticmethod
+    @db_read
     def get_all_categories_with_counts() -> List[Dict]:
         """Получить все категории с количеством товаров"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT category, COUNT(*) as count 
-                    FROM product_catalog 
-                    WHERE is_active = 1 
-                    GROUP BY category 
-                    ORDER BY category
-                ''')
-                return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
-            logger.error(f"Ошибка получения категорий с количеством: {e}")
-            return []
+        return catalog_cache.get_categories_with_counts()
     
     @staticmethod
+    @db_read
     def get_product_by_id(product_id: int) -> Optional[Dict]:
         """Получить товар по ID"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT product_id, name, unit, default_quantity, description, category
-                    FROM product_catalog 
-                    WHERE product_id = ? AND is_active = 1
-                ''', (product_id,))
-                row = cursor.fetchone()
-                return dict(row) if row else None
-        except Exception as e:
-            logger.error(f"Ошибка получения товара по ID: {e}")
-            return None
+        return catalog_cache.get_product(product_id)
     
     @staticmethod
+    @db_write
     def update_product(
         product_id: int,
         category: Optional[str] = None,
@@ -223,14 +193,19 @@ class CatalogRepository:
                 
                 cursor.execute(query, tuple(params))
                 success = cursor.rowcount > 0
+                if success:
+                    CatalogRepository._bump_version(cursor)
                 conn.commit()
-                return success
+            if success:
+                catalog_cache.invalidate()
+            return success
                 
         except Exception as e:
             logger.error(f"Ошибка обновления товара: {e}")
             return False
     
     @staticmethod
+    @db_write
     def update_category(old_category: str, new_category: str) -> int:
         """Обновить название категории во всех товарах"""
         try:
@@ -243,20 +218,25 @@ class CatalogRepository:
                     WHERE category = ? AND is_active = 1
                 ''', (new_category, old_category))
                 updated_count = cursor.rowcount
+                if updated_count:
+                    CatalogRepository._bump_version(cursor)
                 conn.commit()
-                return updated_count
+            if updated_count:
+                catalog_cache.invalidate()
+            return updated_count
         except Exception as e:
             logger.error(f"Ошибка обновления категории: {e}")
             return 0
     
     @staticmethod
+    @db_read
     def search_products(
         search_term: str,
         category: Optional[str] = None
     ) -> List[Dict]:
         """Поиск товаров по названию или описанию"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 if category:
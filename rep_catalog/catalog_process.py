@@ -52,7 +52,7 @@ class CatalogProcessManager:
                 await update.message.reply_text("Введите название товара:")
                 return
             
-            if CatalogRepository.check_product_name_exists(text):
+            if await CatalogRepository.check_product_name_exists(text):
                 await update.message.reply_text(
                     "❌ Товар с таким названием уже существует.\n"
                     "Введите другое название:",
@@ -166,7 +166,7 @@ class CatalogProcessManager:
         
         # Вся логика редактирования остается без изменений...
         if step == 'search':
-            products = CatalogRepository.search_products(text)
+            products = await CatalogRepository.search_products(text)
             
             if not products:
                 await update.message.reply_text(
@@ -225,7 +225,7 @@ class CatalogProcessManager:
         
         # Вся логика остается без изменений...
         if step == 'select_old':
-            if not CatalogRepository.check_category_exists(text):
+            if not await CatalogRepository.check_category_exists(text):
                 await update.message.reply_text(
                     f"❌ Категория '{text}' не найдена или не содержит активных товаров.\n"
                     f"Введите другую категорию:",
@@ -255,7 +255,7 @@ class CatalogProcessManager:
             process['data']['new_category'] = text
             process['step'] = 'confirm'
             
-            products = CatalogRepository.get_category_products(old_category)
+            products = await CatalogRepository.get_category_products(old_category)
             product_count = len(products)
             
             await update.message.reply_text(
@@ -278,7 +278,7 @@ class CatalogProcessManager:
                 old_category = process['data']['old_category']
                 new_category = process['data']['new_category']
                 
-                updated_count = CatalogRepository.update_category(old_category, new_category)
+                updated_count = await CatalogRepository.update_category(old_category, new_category)
                 
                 if updated_count > 0:
                     await update.message.reply_text(
@@ -328,7 +328,7 @@ class CatalogProcessManager:
                 await update.message.reply_text("Введите категорию товара:")
                 return
             
-            if not CatalogRepository.check_category_exists(text):
+            if not await CatalogRepository.check_category_exists(text):
                 await send_or_edit_message(
                     update=update,
                     text=f"❌ В категории '{text}' нет активных товаров.\nВведите другую категорию:",
@@ -339,7 +339,7 @@ class CatalogProcessManager:
             process['data']['category'] = text
             process['step'] = 'select_product'
             
-            products = CatalogRepository.get_category_products(text)
+            products = await CatalogRepository.get_category_products(text)
             
             if not products:
                 await send_or_edit_message(
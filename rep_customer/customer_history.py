@@ -0,0 +1,186 @@
+# rep_customer/customer_history.py
+import logging
+from datetime import datetime
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import CallbackContext
+
+from handlers.admin_roles_class import role_manager
+from keyboards.customeers_keyb import get_customers_main_keyboard
+from keyboards.global_keyb import get_main_keyboard
+from utils.telegram_utils import send_or_edit_message
+from .customer_manager_class import customer_manager
+from .customer_history_class import purchase_history_manager, HISTORY_PAGE_SIZE
+from .customers_inline import VIEW_CUSTOMER_PREFIX, VIEW_HISTORY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Префиксы callback_data истории (карточка клиента открывает историю через VIEW_HISTORY_PREFIX)
+HISTORY_CALLBACK_PREFIX = "hist_"
+HISTORY_PAGE_NEXT = "hist_page_next"
+HISTORY_PAGE_PREV = "hist_page_prev"
+HISTORY_CLOSE = "hist_close"
+
+# Состояние истории в user_data: клиент, номер страницы и курсоры пройденных страниц
+HISTORY_KEY = 'purchase_history_page'
+
+
+def _format_date(value: str) -> str:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
+    except (TypeError, ValueError):
+        return value or ""
+
+
+async def _customer_for_user(user_id: int, customer_id: int = None):
+    """
+    Клиент, историю которого может смотреть пользователь, и признак сотрудника.
+    Сотрудник видит историю любого клиента, клиент - только свою.
+    """
+    role = await role_manager.get_user_role(user_id)
+    if customer_id is not None and role_manager.can_manage_customers(role):
+        return await customer_manager.find_customer_by_id(customer_id), True
+
+    customer = await customer_manager.find_customer_by_telegram_id(user_id)
+    if customer and customer_id is not None and customer['customer_id'] != customer_id:
+        return None, False
+    return customer, False
+
+
+async def show_history_page(update: Update, context: CallbackContext,
+                            direction: str = 'first', customer: dict = None,
+                            staff: bool = False) -> None:
+    """
+    Показать страницу истории покупок.
+
+    direction: first - первая страница клиента customer, next/prev - соседняя.
+    В user_data хранится только HISTORY_KEY: клиент, номер страницы и
+    курсоры последних покупок пройденных страниц (по курсору страницы
+    N-1 читается страница N).
+    """
+    state = context.user_data.get(HISTORY_KEY)
+    if direction == 'first' or state is None:
+        state = {
+            'customer_id': customer['customer_id'],
+            'username': customer['username'],
+            'staff': staff,
+            'page': 1,
+            'cursors': [],
+        }
+
+    page_number = state['page']
+    if direction == 'next':
+        page_number += 1
+    elif direction == 'prev':
+        page_number = max(1, page_number - 1)
+    else:
+        page_number = 1
+
+    cursor = state['cursors'][page_number - 2] if page_number > 1 else None
+    page = await purchase_history_manager.get_history_page(state['customer_id'], cursor)
+
+    if not page['purchases'] and page_number > 1:
+        # Покупки за курсором исчезли - начинаем с первой страницы
+        page_number = 1
+        page = await purchase_history_manager.get_history_page(state['customer_id'])
+
+    state['cursors'] = state['cursors'][:page_number - 1] + [page['last']]
+    state['page'] = page_number
+    context.user_data[HISTORY_KEY] = state
+
+    text = f"📋 История покупок: {state['username']}\n"
+    if not page['purchases']:
+        text += "\n📭 Покупок пока нет."
+    else:
+        text += f"Страница {page_number}\n"
+        for number, purchase in enumerate(page['purchases'], (page_number - 1) * HISTORY_PAGE_SIZE + 1):
+            text += (f"\n{number}. 🛒 {_format_date(purchase['purchase_date'])} — "
+                     f"{purchase['amount']} руб.\n")
+            if purchase['description']:
+                text += f"   📝 {purchase['description']}\n"
+            for bonus in purchase['bonuses']:
+                sign = "+" if bonus['transaction_type'] == 'earned' else "−"
+                text += f"   🎁 {sign}{bonus['bonus_amount']} руб. {bonus['description'] or ''}\n"
+
+    keyboard = []
+    navigation = []
+    if page_number > 1:
+        navigation.append(InlineKeyboardButton("⬅️ Новее", callback_data=HISTORY_PAGE_PREV))
+    if page['has_next']:
+        navigation.append(InlineKeyboardButton("Старее ➡️", callback_data=HISTORY_PAGE_NEXT))
+    if navigation:
+        keyboard.append(navigation)
+
+    if state['staff']:
+        keyboard.append([InlineKeyboardButton(
+            "⬅️ К клиенту", callback_data=f"{VIEW_CUSTOMER_PREFIX}{state['customer_id']}"
+        )])
+    else:
+        keyboard.append([InlineKeyboardButton("❌ Закрыть", callback_data=HISTORY_CLOSE)])
+
+    await send_or_edit_message(update, text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+
+async def purchase_history(update: Update, context: CallbackContext) -> None:
+    """
+    ИСТОРИЯ ПОКУПОК
+    Привязывается к кнопке "История покупок".
+    Сотрудник видит историю последнего открытого клиента, клиент - свою.
+    """
+    user_id = update.effective_user.id
+    role = await role_manager.get_user_role(user_id)
+
+    try:
+        if role_manager.can_manage_customers(role):
+            customer = context.user_data.get('last_searched_customer')
+            if not customer:
+                await update.message.reply_text(
+                    "🔍 Найдите клиента или выберите его в списке, "
+                    "затем нажмите «📋 История» в карточке.",
+                    reply_markup=await get_customers_main_keyboard()
+                )
+                return
+            await show_history_page(update, context, customer=customer, staff=True)
+            return
+
+        customer = await customer_manager.find_customer_by_telegram_id(user_id)
+        if not customer:
+            await update.message.reply_text(
+                "📝 Вы не зарегистрированы как клиент.",
+                reply_markup=await get_main_keyboard(user_id)
+            )
+            return
+        await show_history_page(update, context, customer=customer)
+
+    except Exception as e:
+        logger.error(f"Ошибка показа истории покупок: {e}")
+        await update.message.reply_text("❌ Ошибка при загрузке истории покупок. Попробуйте позже.")
+
+
+async def handle_history_callback(update: Update, context: CallbackContext) -> None:
+    """Inline-кнопки истории: открытие из карточки клиента, страницы, закрытие"""
+    query = update.callback_query
+    callback_data = query.data
+
+    if callback_data == HISTORY_CLOSE:
+        context.user_data.pop(HISTORY_KEY, None)
+        try:
+            await query.delete_message()
+        except Exception as e:
+            logger.warning(f"Не удалось удалить историю покупок: {e}")
+        return
+
+    if callback_data in (HISTORY_PAGE_NEXT, HISTORY_PAGE_PREV):
+        if HISTORY_KEY not in context.user_data:
+            await query.edit_message_text("⌛ История устарела. Откройте ее заново.")
+            return
+        direction = 'next' if callback_data == HISTORY_PAGE_NEXT else 'prev'
+        await show_history_page(update, context, direction)
+        return
+
+    if callback_data.startswith(VIEW_HISTORY_PREFIX):
+        customer_id = int(callback_data.replace(VIEW_HISTORY_PREFIX, ""))
+        customer, staff = await _customer_for_user(update.effective_user.id, customer_id)
+        if not customer:
+            await query.edit_message_text(f"❌ Клиент с ID {customer_id} не найден")
+            return
+        await show_history_page(update, context, customer=customer, staff=staff)
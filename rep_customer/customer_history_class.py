@@ -0,0 +1,156 @@
+"""
+История покупок клиента.
+
+Страницы читаются keyset-пагинацией по (purchase_date, purchase_id) в
+обратном порядке: индекс idx_customer_purchases_history отдает покупки
+клиента отсортированными и покрывает показываемые колонки, поэтому
+дальние страницы стоят столько же, сколько первая. К покупкам страницы
+присоединяются их начисления из bonus_transactions.
+
+Первая страница - самая частая (последние покупки в "Моей статистике" и
+в карточке клиента) - кэшируется по клиенту и сбрасывается при новой
+покупке, TTL - страховка от изменений в обход менеджеров.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+from database import sqlite_read_connection, db_read
+from utils.ttl_cache import TTLCache
+from utils.money import money_row
+
+# Покупок на странице истории
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '5'))
+
+
+class PurchaseHistory:
+    """Постраничная история покупок клиента с начислениями"""
+
+    HISTORY_CACHE_TTL = 300  # сек
+    HISTORY_CACHE_SIZE = 1000
+    HISTORY_WRITE_STRIPES = 1024
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._cache = TTLCache(ttl=self.HISTORY_CACHE_TTL, maxsize=self.HISTORY_CACHE_SIZE,
+                               name="purchase_history")
+        # Счетчики сбросов (клиенты разложены по HISTORY_WRITE_STRIPES
+        # счетчикам, чтобы не расти с числом клиентов) и общий: не кладем
+        # в кэш страницу, прочитанную до новой покупки
+        self._customer_writes = [0] * self.HISTORY_WRITE_STRIPES
+        self._all_writes = 0
+
+    def _generation(self, customer_id: int) -> tuple:
+        return self._all_writes, self._customer_writes[customer_id % self.HISTORY_WRITE_STRIPES]
+
+    @db_read
+    def get_history_page(self, customer_id: int, cursor: Optional[list] = None,
+                         limit: int = HISTORY_PAGE_SIZE) -> Dict:
+        """
+        Страница истории покупок клиента, от новых к старым.
+
+        Args:
+            customer_id: ID клиента
+            cursor: [purchase_date, purchase_id] последней покупки предыдущей
+                    страницы (None - первая страница)
+            limit: Покупок на странице
+
+        Returns:
+            {'purchases', 'has_next', 'last'}; у покупки - список bonuses
+            с начислениями по ней, last - курсор последней покупки страницы
+        """
+        first_page = cursor is None and limit == HISTORY_PAGE_SIZE
+        if first_page:
+            cached = self._cache.get(customer_id)
+            if cached is not None:
+                return cached
+            generation_before = self._generation(customer_id)
+
+        condition = ""
+        params: list = [customer_id]
+        if cursor:
+            condition = "AND (purchase_date, purchase_id) < (?, ?)"
+            params.extend(cursor)
+
+        try:
+            with sqlite_read_connection() as conn:
+                cursor_db = conn.cursor()
+
+                # LIMIT - по покупкам, у одной покупки может быть несколько начислений
+                cursor_db.execute(f'''
+                    WITH page AS (
+                        SELECT purchase_id, purchase_date, amount, bonus_earned, description
+                        FROM customer_purchases
+                        WHERE customer_id = ? {condition}
+                        ORDER BY purchase_date DESC, purchase_id DESC
+                        LIMIT ?
+                    )
+                    SELECT
+                        p.purchase_id,
+                        p.purchase_date,
+                        p.amount,
+                        p.bonus_earned,
+                        p.description,
+                        bt.transaction_type,
+                        bt.bonus_amount,
+                        bt.description AS bonus_description
+                    FROM page p
+                    LEFT JOIN bonus_transactions bt ON bt.purchase_id = p.purchase_id
+                    ORDER BY p.purchase_date DESC, p.purchase_id DESC, bt.transaction_id
+                ''', (*params, limit + 1))
+
+                purchases = self._group(cursor_db.fetchall())
+
+        except Exception as e:
+            self.logger.error(f"Ошибка получения истории покупок клиента {customer_id}: {e}")
+            raise
+
+        has_next = len(purchases) > limit
+        purchases = purchases[:limit]
+        page = {
+            'purchases': purchases,
+            'has_next': has_next,
+            'last': [purchases[-1]['purchase_date'], purchases[-1]['purchase_id']] if purchases else None,
+        }
+        if first_page and generation_before == self._generation(customer_id):
+            self._cache.set(customer_id, page)
+        return page
+
+    @staticmethod
+    def _group(rows) -> List[Dict]:
+        """Строки покупка x начисление -> покупки со списком начислений"""
+        purchases: List[Dict] = []
+        for row in rows:
+            row = money_row(row)
+            if not purchases or purchases[-1]['purchase_id'] != row['purchase_id']:
+                purchases.append({
+                    'purchase_id': row['purchase_id'],
+                    'purchase_date': row['purchase_date'],
+                    'amount': row['amount'],
+                    'bonus_earned': row['bonus_earned'],
+                    'description': row['description'],
+                    'bonuses': [],
+                })
+            if row['transaction_type'] is not None:
+                purchases[-1]['bonuses'].append({
+                    'transaction_type': row['transaction_type'],
+                    'bonus_amount': row['bonus_amount'],
+                    'description': row['bonus_description'],
+                })
+        return purchases
+
+    def invalidate(self, customer_id: Optional[int] = None) -> None:
+        """Сбросить первую страницу истории клиента (или всех клиентов)"""
+        if customer_id is None:
+            self._all_writes += 1
+            self._cache.clear()
+        else:
+            self._customer_writes[customer_id % self.HISTORY_WRITE_STRIPES] += 1
+            self._cache.invalidate(customer_id)
+
+    def get_cache_stats(self) -> dict:
+        return self._cache.stats()
+
+
+purchase_history_manager = PurchaseHistory()
@@ -1,25 +1,170 @@
 # handlers/customer_manager_class.py
+import os
+import re
+import json
 import logging
+import sqlite3
 from typing import Dict, List, Optional
 from datetime import datetime
 import decimal
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.request_context import current_request
+from utils.phone import format_phone, normalize_phone, phone_digits, suffix_range
+from utils.money import Money, money_row
 
 logger = logging.getLogger(__name__)
 
+# Сколько клиентов возвращает поиск
+SEARCH_LIMIT = 10
+
+# Сколько самых новых совпадений из индекса участвует в ранжировании
+SEARCH_CANDIDATES = 200
+
+# Размер страницы списка клиентов
+CUSTOMER_PAGE_SIZE = int(os.getenv('CUSTOMER_PAGE_SIZE', '10'))
+
+# Порядки списка клиентов: ключ -> (колонки ключа keyset-пагинации, направление).
+# Последняя колонка - customer_id, чтобы ключ был уникальным
+CUSTOMER_SORTS = {
+    'recent': (('customer_id',), 'DESC'),
+    'purchases': (('total_purchases', 'customer_id'), 'DESC'),
+    'name': (('username', 'customer_id'), 'ASC'),
+}
+DEFAULT_CUSTOMER_SORT = 'recent'
+
+# Денежные итоги get_customer_statistics
+STATISTICS_MONEY_FIELDS = ('total_purchases', 'total_available_bonuses', 'total_issued_bonuses')
+
+# Запрос из цифр и символов телефона ищется по цифрам телефона и карты
+PHONE_QUERY_RE = re.compile(r'[\d\s()+\-]+')
+
 
 class CustomerManager:
     """Класс для управления клиентами (бизнес-логика и запросы к БД)"""
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._search_index_missing = False
 
     # ============ ПОИСК КЛИЕНТОВ ============
     
-    async def find_customers_by_search_query(self, search_query: str) -> List[Dict]:
-        """Найти клиентов по поисковому запросу"""
+    @db_read
+    def find_customers_by_search_query(self, search_query: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """
+        Найти клиентов по поисковому запросу.
+
+        Подстрока ищется по индексу customers_fts (username, имя, фамилия,
+        цифры телефона, номер карты). Из SEARCH_CANDIDATES самых новых
+        совпадений выбираются лучшие: точное совпадение поля, затем начало
+        поля, затем подстрока. Данные клиентов подтягиваются только для них.
+        """
+        search_query = search_query.strip()
+        match = self._search_match_expression(search_query)
+        if match is None:
+            # Trigram не ищет подстроки короче 3 символов
+            return self._find_customers_by_like(search_query, limit)
+
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
+                cursor = conn.cursor()
+
+                # Проход по индексу в порядке rowid останавливается на LIMIT,
+                # поэтому частые подстроки ("Иван") не разбирают весь индекс
+                cursor.execute('''
+                    SELECT rowid AS customer_id, username, first_name, last_name, phone, card_number
+                    FROM customers_fts
+                    WHERE customers_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ''', (match, SEARCH_CANDIDATES))
+                candidates = cursor.fetchall()
+                if not candidates:
+                    return []
+
+                ids = self._rank_search_candidates(candidates, search_query, limit)
+
+                cursor.execute('''
+                    SELECT 
+                        c.customer_id,
+                        c.user_id,
+                        c.username,
+                        c.phone_number,
+                        c.card_number,
+                        c.birthday,
+                        c.registration_date,
+                        c.is_active,
+                        c.total_purchases,
+                        c.total_bonuses,
+                        c.available_bonuses,
+                        c.bonus_program_id,
+                        bp.program_name,
+                        bp.base_percent,
+                        ur.role,
+                        u.created_at as user_created_at
+                    FROM json_each(?) AS hits
+                    JOIN customers c ON c.customer_id = hits.value
+                    LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
+                    LEFT JOIN users u ON c.user_id = u.user_id
+                    LEFT JOIN user_roles ur ON c.user_id = ur.user_id
+                    ORDER BY hits.key
+                ''', (json.dumps(ids),))
+
+                results = cursor.fetchall()
+                return [money_row(row) for row in results]
+
+        except sqlite3.OperationalError as e:
+            # Индекс строит онлайн-миграция 0004 - до ее применения ищем через LIKE
+            if not self._search_index_missing:
+                self.logger.warning(f"Индекс поиска клиентов недоступен ({e}), поиск через LIKE")
+                self._search_index_missing = True
+            return self._find_customers_by_like(search_query, limit)
+        except Exception as e:
+            self.logger.error(f"Ошибка поиска клиентов: {e}")
+            raise
+
+    @staticmethod
+    def _search_match_expression(search_query: str) -> Optional[str]:
+        """Выражение MATCH для customers_fts; None - запрос слишком короткий"""
+        if PHONE_QUERY_RE.fullmatch(search_query):
+            # Телефон в индексе хранится только цифрами
+            digits = re.sub(r'\D', '', search_query)
+            if len(digits) < 3:
+                return None
+            return f'{{phone card_number}} : "{digits}"'
+
+        if len(search_query) < 3:
+            return None
+        return '"' + search_query.replace('"', '""') + '"'
+
+    @staticmethod
+    def _rank_search_candidates(candidates, search_query: str, limit: int) -> List[int]:
+        """ID лучших кандидатов: точное совпадение, начало (для телефона и конец) поля, подстрока"""
+        is_phone = bool(PHONE_QUERY_RE.fullmatch(search_query))
+        if is_phone:
+            needle = re.sub(r'\D', '', search_query)
+            fields = ('phone', 'card_number')
+        else:
+            needle = search_query.lower()
+            fields = ('username', 'first_name', 'last_name', 'phone', 'card_number')
+
+        def score(row) -> int:
+            best = 2
+            for field in fields:
+                value = (row[field] or '').lower()
+                if value == needle:
+                    return 0
+                # Телефон чаще ищут по последним цифрам
+                if value.startswith(needle) or (is_phone and value.endswith(needle)):
+                    best = 1
+            return best
+
+        ranked = sorted(candidates, key=lambda row: (score(row), -row['customer_id']))
+        return [row['customer_id'] for row in ranked[:limit]]
+
+    def _find_customers_by_like(self, search_query: str, limit: int) -> List[Dict]:
+        """Поиск полным проходом по клиентам (короткие запросы и БД без индекса)"""
+        try:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 query_pattern = f"%{search_query}%"
@@ -54,21 +199,22 @@ class CustomerManager:
                          c.phone_number = ?)
                         AND c.is_active = 1
                     ORDER BY c.customer_id DESC
-                    LIMIT 10
+                    LIMIT ?
                 ''', (query_pattern, query_pattern, query_pattern, 
-                      search_query, search_query))
+                      search_query, search_query, limit))
                 
                 results = cursor.fetchall()
-                return [dict(row) for row in results]
+                return [money_row(row) for row in results]
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиентов: {e}")
             raise
  
-    async def find_customer_by_id(self, customer_id: int) -> Optional[Dict]:
+    @db_read
+    def find_customer_by_id(self, customer_id: int) -> Optional[Dict]:
         """Найти клиента по ID"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -97,16 +243,17 @@ class CustomerManager:
                 ''', (customer_id,))
                 
                 result = cursor.fetchone()
-                return dict(result) if result else None
+                return money_row(result)
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиента по ID {customer_id}: {e}")
             raise
 
-    async def find_customer_by_card(self, card_number: str) -> Optional[Dict]:
+    @db_read
+    def find_customer_by_card(self, card_number: str) -> Optional[Dict]:
         """Найти клиента по номеру карты"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -128,7 +275,7 @@ class CustomerManager:
                 ''', (card_number,))
                 
                 result = cursor.fetchone()
-                return dict(result) if result else None
+                return money_row(result)
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиента по карте {card_number}: {e}")
@@ -136,8 +283,19 @@ class CustomerManager:
 
     async def find_customer_by_telegram_id(self, telegram_id: int) -> Optional[Dict]:
         """Найти клиента по Telegram ID"""
+        # Клиент текущего пользователя уже загружен в контексте обновления
+        request = current_request(telegram_id)
+        if request is not None and request.has_snapshot:
+            request.serve()
+            return dict(request.customer) if request.customer else None
+
+        return await self._select_customer_by_telegram_id(telegram_id)
+
+    @db_read
+    def _select_customer_by_telegram_id(self, telegram_id: int) -> Optional[Dict]:
+        """Запрос клиента по Telegram ID к БД"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -168,17 +326,18 @@ class CustomerManager:
                 result = cursor.fetchone()
                 if result:
                     columns = [description[0] for description in cursor.description]
-                    return dict(zip(columns, result))
-                #return dict(result) if result else None
+                    return money_row(zip(columns, result))
+                #return money_row(result)
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиента по Telegram ID {telegram_id}: {e}")
             return None
 
-    async def find_customer_by_username_or_phone(self, username: str = None, phone: str = None) -> Optional[Dict]:
+    @db_read
+    def find_customer_by_username_or_phone(self, username: str = None, phone: str = None) -> Optional[Dict]:
         """Найти клиента по имени или телефону"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -203,70 +362,216 @@ class CustomerManager:
                     LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
                     LEFT JOIN users u ON c.user_id = u.user_id
                     LEFT JOIN user_roles ur ON c.user_id = ur.user_id
-                    WHERE (c.phone_number = ? OR c.username LIKE ?)
+                    WHERE (c.phone_normalized = ? OR c.phone_number = ? OR c.username LIKE ?)
                         AND c.is_active = 1
                     LIMIT 1
-                ''', (phone, f"%{username}%" if username else ""))
+                ''', (normalize_phone(phone) if phone else None, phone, f"%{username}%" if username else ""))
                 
                 result = cursor.fetchone()
-                return dict(result) if result else None
+                return money_row(result)
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиента по имени/телефону: {e}")
             return None
 
-    # ============ СПИСКИ КЛИЕНТОВ ============
-    
-    async def get_all_customers(self, limit: int = 50) -> List[Dict]:
-        """Получить всех активных клиентов"""
+    @db_read
+    def find_customers_by_phone(self, phone: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """
+        Найти клиентов по телефону.
+
+        Полный номер ищется по phone_normalized, неполный (или нераспознанный) -
+        по последним цифрам через индекс phone_reversed.
+        """
+        formatted = format_phone(phone)
+        if formatted is None:
+            return self._find_customers_by_phone_suffix(phone_digits(phone), limit)
+
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
-                
+
                 cursor.execute('''
-                      SELECT 
-                            c.customer_id,
-                            c.user_id,
-                            c.username,
-                            c.phone_number,
-                            c.card_number,
-                            c.birthday,
-                            c.registration_date,
-                            c.is_active,
-                            c.total_purchases,
-                            c.total_bonuses,
-                            c.available_bonuses,
-                            c.bonus_program_id,
-                            bp.program_name,
-                            bp.base_percent,
-                            ur.role,
-                            u.created_at as user_created_at
-                        FROM customers c
-                        LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
-                        LEFT JOIN users u ON c.user_id = u.user_id
-                        LEFT JOIN user_roles ur ON c.user_id = ur.user_id
-                        WHERE c.is_active = 1
-                        ORDER BY c.customer_id DESC
-                        LIMIT ?
-                    ''', (limit,))
-                
+                    SELECT 
+                        c.customer_id,
+                        c.user_id,
+                        c.username,
+                        c.phone_number,
+                        c.card_number,
+                        c.birthday,
+                        c.registration_date,
+                        c.is_active,
+                        c.total_purchases,
+                        c.total_bonuses,
+                        c.available_bonuses,
+                        c.bonus_program_id,
+                        bp.program_name,
+                        bp.base_percent,
+                        ur.role,
+                        u.created_at as user_created_at
+                    FROM customers c
+                    LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
+                    LEFT JOIN users u ON c.user_id = u.user_id
+                    LEFT JOIN user_roles ur ON c.user_id = ur.user_id
+                    WHERE c.phone_normalized = ? AND c.is_active = 1
+                    LIMIT ?
+                ''', (formatted, limit))
+
                 results = cursor.fetchall()
-                return [dict(row) for row in results]
-                
+                return [money_row(row) for row in results]
+
         except Exception as e:
-            self.logger.error(f"Ошибка получения списка клиентов: {e}")
+            self.logger.error(f"Ошибка поиска клиента по телефону: {e}")
             raise
 
+    @db_read
+    def find_customers_by_phone_suffix(self, digits: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """Найти клиентов по последним цифрам телефона"""
+        return self._find_customers_by_phone_suffix(phone_digits(digits), limit)
+
+    def _find_customers_by_phone_suffix(self, digits: str, limit: int) -> List[Dict]:
+        """Поиск по суффиксу номера: диапазон по индексу phone_reversed"""
+        if not digits:
+            return []
+
+        low, high = suffix_range(digits)
+        try:
+            with sqlite_read_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute('''
+                    SELECT 
+                        c.customer_id,
+                        c.user_id,
+                        c.username,
+                        c.phone_number,
+                        c.card_number,
+                        c.birthday,
+                        c.registration_date,
+                        c.is_active,
+                        c.total_purchases,
+                        c.total_bonuses,
+                        c.available_bonuses,
+                        c.bonus_program_id,
+                        bp.program_name,
+                        bp.base_percent,
+                        ur.role,
+                        u.created_at as user_created_at
+                    FROM customers c
+                    LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
+                    LEFT JOIN users u ON c.user_id = u.user_id
+                    LEFT JOIN user_roles ur ON c.user_id = ur.user_id
+                    WHERE c.phone_reversed >= ? AND c.phone_reversed < ?
+                        AND c.is_active = 1
+                    ORDER BY c.phone_reversed
+                    LIMIT ?
+                ''', (low, high, limit))
+
+                results = cursor.fetchall()
+                return [money_row(row) for row in results]
+
+        except Exception as e:
+            self.logger.error(f"Ошибка поиска клиента по последним цифрам телефона: {e}")
+            raise
+
+    # ============ СПИСКИ КЛИЕНТОВ ============
+    
+    @db_read
+    def get_customers_page(self, sort: str = DEFAULT_CUSTOMER_SORT, cursor: Optional[list] = None,
+                           direction: str = 'next', limit: int = CUSTOMER_PAGE_SIZE) -> Dict:
+        """
+        Страница списка активных клиентов (keyset-пагинация).
+
+        Args:
+            sort: Ключ CUSTOMER_SORTS
+            cursor: Значения ключа сортировки граничного клиента (None - первая страница)
+            direction: next - после курсора, prev - перед курсором,
+                       current - начиная с курсора (повторный показ страницы)
+            limit: Размер страницы
+
+        Returns:
+            {'customers', 'has_next', 'first', 'last'}; first/last - курсоры
+            первого и последнего клиента страницы
+        """
+        key, order = CUSTOMER_SORTS.get(sort, CUSTOMER_SORTS[DEFAULT_CUSTOMER_SORT])
+        forward = direction != 'prev'
+        descending = order == 'DESC'
+        order_dir = order if forward else ('ASC' if descending else 'DESC')
+
+        condition = ""
+        params: list = []
+        if cursor:
+            # Вперед по убыванию и назад по возрастанию - ключ меньше курсора
+            op = '<' if descending == forward else '>'
+            if direction == 'current':
+                op += '='
+            condition = (f"AND ({', '.join(f'c.{col}' for col in key)}) {op} "
+                         f"({', '.join('?' for _ in key)})")
+            params.extend(cursor)
+
+        try:
+            with sqlite_read_connection() as conn:
+                cursor_db = conn.cursor()
+
+                # Колонки сортировки берутся только из CUSTOMER_SORTS
+                cursor_db.execute(f'''
+                    SELECT 
+                        c.customer_id,
+                        c.user_id,
+                        c.username,
+                        c.phone_number,
+                        c.card_number,
+                        c.registration_date,
+                        c.is_active,
+                        c.total_purchases,
+                        c.available_bonuses
+                    FROM customers c
+                    WHERE c.is_active = 1 {condition}
+                    ORDER BY {', '.join(f'c.{col} {order_dir}' for col in key)}
+                    LIMIT ?
+                ''', (*params, limit + 1))
+
+                rows = [money_row(row) for row in cursor_db.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Ошибка получения страницы клиентов: {e}")
+            raise
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+
+        return {
+            'customers': rows,
+            # Назад уходим только со следующей страницы - она точно есть
+            'has_next': has_more if forward else True,
+            'first': [rows[0][col] for col in key] if rows else None,
+            'last': [rows[-1][col] for col in key] if rows else None,
+        }
+
+    @db_read
+    def count_active_customers(self) -> int:
+        """Количество активных клиентов"""
+        try:
+            with sqlite_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM customers WHERE is_active = 1")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Ошибка подсчета клиентов: {e}")
+            return 0
+
     # ============ ПРОВЕРКИ И ВАЛИДАЦИИ ============
     
-    async def is_phone_exists(self, phone: str) -> bool:
-        """Проверить, существует ли клиент с таким номером телефона"""
+    @db_read
+    def is_phone_exists(self, phone: str) -> bool:
+        """Проверить, существует ли клиент с таким номером телефона (в любом формате записи)"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT customer_id FROM customers WHERE phone_number = ?",
-                    (phone,)
+                    "SELECT customer_id FROM customers WHERE phone_normalized = ? OR phone_number = ?",
+                    (normalize_phone(phone), phone)
                 )
                 return cursor.fetchone() is not None
                 
@@ -274,10 +579,11 @@ class CustomerManager:
             self.logger.error(f"Ошибка проверки номера телефона: {e}")
             return False
     
-    async def is_card_exists(self, card_number: str) -> bool:
+    @db_read
+    def is_card_exists(self, card_number: str) -> bool:
         """Проверить, существует ли клиент с таким номером карты"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT customer_id FROM customers WHERE card_number = ?",
@@ -291,7 +597,8 @@ class CustomerManager:
 
     # ============ ОБНОВЛЕНИЕ ДАННЫХ КЛИЕНТА ============
     
-    async def update_customer_purchases(self, customer_id: int, amount: float, bonus_amount: float) -> bool:
+    @db_write
+    def update_customer_purchases(self, customer_id: int, amount: Money, bonus_amount: Money) -> bool:
         """Обновить сумму покупок и бонусов клиента"""
         try:
             with sqlite_connection() as conn:
@@ -313,7 +620,8 @@ class CustomerManager:
             self.logger.error(f"Ошибка обновления покупок клиента {customer_id}: {e}")
             return False
 
-    async def update_customer_bonus_program(self, customer_id: int, program_id: int) -> bool:
+    @db_write
+    def update_customer_bonus_program(self, customer_id: int, program_id: int) -> bool:
         """Обновить бонусную программу клиента"""
         try:
             with sqlite_connection() as conn:
@@ -333,7 +641,8 @@ class CustomerManager:
             self.logger.error(f"Ошибка обновления бонусной программы клиента {customer_id}: {e}")
             return False
 
-    async def toggle_customer_status(self, customer_id: int) -> Optional[bool]:
+    @db_write
+    def toggle_customer_status(self, customer_id: int) -> Optional[bool]:
         """Переключить статус активности клиента"""
         try:
             with sqlite_connection() as conn:
@@ -367,33 +676,35 @@ class CustomerManager:
 
     # ============ СТАТИСТИКА И АНАЛИТИКА ============
     
-    async def get_customer_statistics(self) -> Dict:
+    @db_read
+    def get_customer_statistics(self) -> Dict:
         """Получить общую статистику по клиентам"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
                     SELECT 
                         COUNT(*) as total_customers,
                         COUNT(CASE WHEN is_active = 1 THEN 1 END) as active_customers,
-                        SUM(total_purchases) as total_purchases,
-                        SUM(available_bonuses) as total_available_bonuses,
-                        SUM(total_bonuses) as total_issued_bonuses
+                        COALESCE(SUM(total_purchases), 0) as total_purchases,
+                        COALESCE(SUM(available_bonuses), 0) as total_available_bonuses,
+                        COALESCE(SUM(total_bonuses), 0) as total_issued_bonuses
                     FROM customers
                 ''')
                 
-                stats = cursor.fetchone()
-                return dict(stats) if stats else {}
+                # Суммы целых копеек - точные
+                return money_row(cursor.fetchone(), STATISTICS_MONEY_FIELDS) or {}
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения статистики клиентов: {e}")
             return {}
     
-    async def get_top_customers(self, limit: int = 10) -> List[Dict]:
+    @db_read
+    def get_top_customers(self, limit: int = 10) -> List[Dict]:
         """Получить топ клиентов по сумме покупок"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -411,7 +722,7 @@ class CustomerManager:
                 ''', (limit,))
                 
                 results = cursor.fetchall()
-                return [dict(row) for row in results]
+                return [money_row(row) for row in results]
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения топ клиентов: {e}")
@@ -1,15 +1,19 @@
 # handlers/customers_purchase.py
 import logging
+import decimal
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import CallbackContext
-import decimal
 from config.buttons import Buttons
 from keyboards.bonus_keyb import get_confirm_bonus_keyboard
 from keyboards.customeers_keyb import get_customers_main_keyboard
 from keyboards.global_keyb import get_cancel_keyboard, get_main_keyboard
 from handlers.admin_roles_class import role_manager
 from .customer_purchase_class import customer_purchase
+from rep_bonus.bonus_promo_class import promo_manager, PromoCodeError
 from utils.telegram_utils import send_or_edit_message
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+from utils.money import Money
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,7 @@ async def add_purchase(update: Update, context: CallbackContext) -> None:
         'step': 'card_number',
         'data': {}
     }
+    flow_engine.start(context, Flows.CUSTOMER_PURCHASE, FlowStates.INPUT)
     
     await send_or_edit_message(
         update,
@@ -67,6 +72,9 @@ async def process_purchase(update: Update, context: CallbackContext) -> None:
     elif step == 'description':
         await handle_description_step(update, context, text, process)
     
+    elif step == 'promo':
+        await handle_promo_step(update, context, text, process)
+    
     elif step == 'confirm':
         await handle_confirmation_step(update, context, text, process)
 
@@ -88,7 +96,7 @@ async def handle_card_number_step(update: Update, context: CallbackContext,
         process['data']['customer'] = customer
         process['step'] = 'amount'
         
-        current_bonus = customer_purchase.calculate_current_bonus_percent(
+        current_bonus = await customer_purchase.calculate_current_bonus_percent(
             customer['total_purchases'],
             customer['bonus_program_id']
         )
@@ -116,8 +124,8 @@ async def handle_amount_step(update: Update, context: CallbackContext,
                             text: str, process: dict) -> None:
     """Обработка шага ввода суммы"""
     try:
-        amount = decimal.Decimal(text)
-        if amount <= 0:
+        amount = Money.parse(text)
+        if amount.kopecks <= 0:
             await update.message.reply_text(
                 "Сумма должна быть больше 0. Введите снова:",
                 reply_markup=get_cancel_keyboard()
@@ -126,7 +134,7 @@ async def handle_amount_step(update: Update, context: CallbackContext,
         
         customer = process['data']['customer']
         
-        bonus_percent = customer_purchase.calculate_current_bonus_percent(
+        bonus_percent = await customer_purchase.calculate_current_bonus_percent(
             customer['total_purchases'],
             customer['bonus_program_id']
         )
@@ -151,7 +159,7 @@ async def handle_amount_step(update: Update, context: CallbackContext,
             parse_mode='Markdown'
         )
         
-    except (ValueError, decimal.InvalidOperation):
+    except ValueError:
         await update.message.reply_text(
             "Введите корректную сумму:",
             reply_markup=get_cancel_keyboard()
@@ -172,7 +180,60 @@ async def handle_description_step(update: Update, context: CallbackContext,
     else:
         process['data']['description'] = text
     
+    if await promo_manager.has_active_codes():
+        process['step'] = 'promo'
+        await update.message.reply_text(
+            "🎫 Введите промокод клиента или нажмите 'Пропустить':",
+            reply_markup=ReplyKeyboardMarkup(
+                [["Пропустить", "❌ Отмена"]],
+                resize_keyboard=True
+            )
+        )
+        return
+    
+    await show_purchase_confirmation(update, process)
+
+
+async def handle_promo_step(update: Update, context: CallbackContext, 
+                           text: str, process: dict) -> None:
+    """Обработка шага ввода промокода"""
+    data = process['data']
+    data.pop('promo_code', None)
+    data.pop('promo_bonus', None)
+    
+    if text != "Пропустить":
+        try:
+            promo = await promo_manager.check(text, data['customer']['customer_id'])
+        except PromoCodeError as e:
+            await update.message.reply_text(
+                f"❌ {e}. Введите другой промокод или нажмите 'Пропустить':"
+            )
+            return
+        
+        amount = Money.parse(data['amount'])
+        bonus_amount = Money.parse(data['bonus_amount'])
+        promo_bonus = promo_manager.promo_bonus(promo, amount, bonus_amount,
+                                                decimal.Decimal(data['bonus_percent']))
+        data['promo_code'] = promo['code']
+        data['promo_bonus'] = str(promo_bonus)
+        data['promo_description'] = promo_manager.describe(promo)
+    
+    await show_purchase_confirmation(update, process)
+
+
+async def show_purchase_confirmation(update: Update, process: dict) -> None:
+    """Итог покупки перед подтверждением"""
     process['step'] = 'confirm'
+    # Ключ от обновления, показавшего подтверждение: все нажатия "Да" на это
+    # подтверждение (и повторная доставка обновления) дают одну покупку
+    process['data']['idempotency_key'] = purchase_idempotency_key(update)
+    
+    promo_text = ""
+    if process['data'].get('promo_code'):
+        promo_text = (
+            f"🎫 *Промокод:* {process['data']['promo_code']} "
+            f"({process['data']['promo_description']}): +{process['data']['promo_bonus']} руб.\n"
+        )
     
     confirm_text = (
         "✅ *Подтверждение покупки:*\n\n"
@@ -181,6 +242,7 @@ async def handle_description_step(update: Update, context: CallbackContext,
         f"💰 *Сумма:* {process['data']['amount']} руб.\n"
         f"🎁 *Бонусы:* {process['data']['bonus_amount']} руб. "
         f"({process['data']['bonus_percent']}%)\n"
+        f"{promo_text}"
         f"📝 *Описание:* {process['data']['description'] or 'Не указано'}\n\n"
         "Начислить покупку?"
     )
@@ -205,49 +267,64 @@ async def handle_confirmation_step(update: Update, context: CallbackContext,
         )
 
 
+def purchase_idempotency_key(update: Update) -> str:
+    """Ключ идемпотентности покупки из ID пользователя и обновления"""
+    return f"purchase:{update.effective_user.id}:{update.update_id}"
+
+
 async def save_purchase(update: Update, context: CallbackContext, purchase_data: dict) -> None:
     """Сохранение покупки"""
     try:
         operator_telegram_id = update.effective_user.id
         
-        # Сохраняем покупку через класс
-        purchase_id = await customer_purchase.save_purchase_transaction(
+        # Поиск клиента, расчет процента и все записи - одна транзакция
+        result = await customer_purchase.commit_purchase(
             purchase_data,
-            operator_telegram_id
-        )
-        
-        # Получаем обновленную статистику
-        updated_stats = await customer_purchase.get_updated_customer_stats(
-            purchase_data['customer']['customer_id']
+            operator_telegram_id,
+            purchase_data.get('idempotency_key') or purchase_idempotency_key(update)
         )
         
         del context.user_data['adding_purchase']
         
+        if result['duplicate']:
+            title = "ℹ️ *Эта покупка уже была начислена*"
+        else:
+            title = "✅ *Покупка успешно начислена!*"
+        
         message = (
-            f"✅ *Покупка успешно начислена!*\n\n"
+            f"{title}\n\n"
             f"👤 *Клиент:* {purchase_data['customer']['username']}\n"
-            f"💰 *Сумма покупки:* {purchase_data['amount']} руб.\n"
-            f"🎁 *Начислено бонусов:* {purchase_data['bonus_amount']} руб.\n"
-            f"📊 *Процент начисления:* {purchase_data['bonus_percent']}%\n"
-            f"🆔 *Номер операции:* {purchase_id}\n\n"
+            f"💰 *Сумма покупки:* {result['amount']} руб.\n"
+            f"🎁 *Начислено бонусов:* {result['bonus_amount']:.2f} руб.\n"
+            f"📊 *Процент начисления:* {result['bonus_percent']:.1f}%\n"
+            + (f"🎫 *По промокоду {result['promo_code']}:* +{result['promo_bonus']} руб.\n"
+               if result.get('promo_code') else "") +
+            f"🆔 *Номер операции:* {result['purchase_id']}\n\n"
+            f"📈 *Итоговые показатели:*\n"
+            f"• Общая сумма покупок: {result['total_purchases']} руб.\n"
+            f"• Доступные бонусы: {result['available_bonuses']:.2f} руб.\n"
         )
         
-        if updated_stats:
-            message += (
-                f"📈 *Итоговые показатели:*\n"
-                f"• Общая сумма покупок: {updated_stats.get('total_purchases', 0)} руб.\n"
-                f"• Доступные бонусы: {updated_stats.get('available_bonuses', 0):.2f} руб.\n"
-            )
-        
         await update.message.reply_text(
             message,
             reply_markup=await get_customers_main_keyboard(),
             parse_mode='Markdown'
         )
         
+    except PromoCodeError as e:
+        # Код исчерпан или отключен после проверки: покупка не записана,
+        # предлагаем провести ее без промокода
+        purchase_data.pop('promo_code', None)
+        purchase_data.pop('promo_bonus', None)
+        await update.message.reply_text(
+            f"❌ Промокод не применен: {e}.\n"
+            "Начислить покупку без промокода?",
+            reply_markup=get_confirm_bonus_keyboard()
+        )
+        
     except Exception as e:
         logger.error(f"Ошибка сохранения покупки: {e}", exc_info=True)
         await update.message.reply_text(
             f"❌ Ошибка при сохранении покупки: {str(e)}",
             reply_markup=await get_customers_main_keyboard()
-        )
\ No newline at end of file
+        )
@@ -3,7 +3,15 @@ from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import CallbackContext
 from typing import Dict, Optional
 import decimal
-from database import sqlite_connection
+import sqlite3
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.request_context import current_request
+from utils.ttl_cache import TTLCache
+from utils.money import Money, money_row
+from rep_bonus.bonus_level_resolver import bonus_level_resolver
+from rep_bonus.bonus_level_stats_class import level_statistics
+from rep_bonus.bonus_promo_class import promo_manager, PromoCodeError
+from rep_customer.customer_history_class import purchase_history_manager
 from config.buttons import Buttons
 from keyboards.global_keyb import get_cancel_keyboard
 from keyboards.bonus_keyb import get_confirm_bonus_keyboard
@@ -15,13 +23,20 @@ logger = logging.getLogger(__name__)
 class CustomerPurchase:
     """Класс для управления покупками клиентов"""
 
+    # Кэш telegram_id оператора -> users.user_id: оператор проводит покупки подряд
+    OPERATOR_CACHE_TTL = 300  # сек
+    OPERATOR_CACHE_SIZE = 1000
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._operator_cache = TTLCache(ttl=self.OPERATOR_CACHE_TTL, maxsize=self.OPERATOR_CACHE_SIZE,
+                                        name="operators")
 
-    async def find_customer_by_cardprogram(self, card_number: str) -> Optional[Dict]:
+    @db_read
+    def find_customer_by_cardprogram(self, card_number: str) -> Optional[Dict]:
         """Найти клиента по номеру карты c программой"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT c.customer_id, c.username, c.card_number, 
@@ -33,148 +48,206 @@ class CustomerPurchase:
                     WHERE c.card_number = ? AND c.is_active = 1
                 ''', (card_number,))
                 
-                result = cursor.fetchone()
-                if result:
-                    return dict(result)
-                return None
+                return money_row(cursor.fetchone())
                 
         except Exception as e:
             self.logger.error(f"Ошибка поиска клиента по карте {card_number}: {e}")
             raise
 
-    def calculate_current_bonus_percent(self, total_purchases: decimal.Decimal, program_id: int = None) -> decimal.Decimal:
-        """Рассчитывает текущий процент бонусов"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                
-                if program_id:
-                    # Получаем уровни программы
-                    cursor.execute('''
-                        SELECT bonus_percent, min_total_purchases
-                        FROM bonus_levels
-                        WHERE program_id = ?
-                        ORDER BY min_total_purchases DESC
-                    ''', (program_id,))
-                    
-                    levels = cursor.fetchall()
-                    
-                    for level in levels:
-                        if total_purchases >= level['min_total_purchases']:
-                            return decimal.Decimal(str(level['bonus_percent']))
-                
-                # Если программа не найдена или нет уровней, берем базовый процент
-                cursor.execute('''
-                    SELECT base_percent FROM bonus_programs 
-                    WHERE program_id = ? AND is_active = 1
-                ''', (program_id,))
-                
-                program = cursor.fetchone()
-                if program:
-                    return decimal.Decimal(str(program['base_percent']))
-                
-                # Дефолтный процент если нет программы
-                return decimal.Decimal('3.0')
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка расчета процента бонусов: {e}")
-            return decimal.Decimal('3.0')
+    async def calculate_current_bonus_percent(self, total_purchases: Money, program_id: int = None) -> decimal.Decimal:
+        """Рассчитывает текущий процент бонусов (уровни программы берутся из кэша)"""
+        return await bonus_level_resolver.resolve_async(total_purchases, program_id)
+
+    def calculate_bonus_amount(self, purchase_amount: Money, bonus_percent: decimal.Decimal) -> Money:
+        """Рассчитать сумму бонусов (с округлением до копейки)"""
+        return purchase_amount.percent(bonus_percent)
+
+    def _operator_id(self, cursor, operator_telegram_id: int) -> int:
+        """Внутренний user_id оператора: контекст обновления, кэш или запрос к users"""
+        request = current_request(operator_telegram_id)
+        if request is not None and request.has_snapshot:
+            request.serve()
+            operator_user = request.user if request.user and request.user['is_active'] else None
+            if operator_user:
+                self._operator_cache.set(operator_telegram_id, operator_user['user_id'])
+                return operator_user['user_id']
+        else:
+            operator_id = self._operator_cache.get(operator_telegram_id)
+            if operator_id is not None:
+                return operator_id
+
+            cursor.execute('''
+                SELECT user_id FROM users 
+                WHERE telegram_id = ? AND is_active = 1
+            ''', (operator_telegram_id,))
+            operator_user = cursor.fetchone()
+            if operator_user:
+                self._operator_cache.set(operator_telegram_id, operator_user['user_id'])
+                return operator_user['user_id']
+
+        raise ValueError(f"Оператор с telegram_id {operator_telegram_id} не найден")
+
+    def invalidate_operator(self, operator_telegram_id: int) -> None:
+        """Сбросить кэшированный user_id оператора (после удаления пользователя)"""
+        self._operator_cache.invalidate(operator_telegram_id)
 
-    def calculate_bonus_amount(self, purchase_amount: decimal.Decimal, bonus_percent: decimal.Decimal) -> decimal.Decimal:
-        """Рассчитать сумму бонусов"""
-        return purchase_amount * bonus_percent / 100
+    @db_write
+    def commit_purchase(self, purchase_data: dict, operator_telegram_id: int,
+                        idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Начисление покупки одной короткой транзакцией BEGIN IMMEDIATE:
+        актуальные данные клиента, процент бонусов по уровням, покупка,
+        итоги клиента и транзакция бонусов.
+
+        Покупка с уже использованным idempotency_key не записывается повторно:
+        возвращается ранее сохраненная операция с duplicate=True.
+
+        Промокод (purchase_data['promo_code']) применяется в той же транзакции;
+        если он стал недействителен, покупка откатывается с PromoCodeError.
+        """
+        customer_id = purchase_data['customer']['customer_id']
+        amount = Money.parse(purchase_data['amount'])
 
-    async def save_purchase_transaction(self, purchase_data: dict, operator_telegram_id: int) -> int:
-        """Сохранение покупки в БД"""
         try:
             with sqlite_connection() as conn:
                 cursor = conn.cursor()
-                
-                # Получаем user_id оператора
-                cursor.execute('''
-                    SELECT user_id FROM users 
-                    WHERE telegram_id = ? AND is_active = 1
-                ''', (operator_telegram_id,))
-                
-                operator_user = cursor.fetchone()
-                
-                if not operator_user:
-                    raise ValueError(f"Оператор с telegram_id {operator_telegram_id} не найден")
-                
-                operator_id = operator_user['user_id']
-                
-                # Преобразуем decimal в float для SQLite
-                amount = float(decimal.Decimal(purchase_data['amount']))
-                bonus_amount = float(decimal.Decimal(purchase_data['bonus_amount']))
-                
-                # Сохраняем покупку
+                operator_id = self._operator_id(cursor, operator_telegram_id)
+
+                # Блокировку записи берем сразу: между чтением итогов клиента
+                # и их обновлением никто не вклинится
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+
                 cursor.execute('''
-                    INSERT INTO customer_purchases (
-                        customer_id, amount, bonus_earned, description, operator_id
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    purchase_data['customer']['customer_id'],
-                    amount,
-                    bonus_amount,
-                    purchase_data.get('description'),
-                    operator_id
-                ))
-                
+                    SELECT total_purchases, bonus_program_id
+                    FROM customers
+                    WHERE customer_id = ? AND is_active = 1
+                ''', (customer_id,))
+                customer = cursor.fetchone()
+                if not customer:
+                    raise ValueError(f"Клиент {customer_id} не найден")
+
+                bonus_percent = bonus_level_resolver.resolve(
+                    customer['total_purchases'], customer['bonus_program_id']
+                )
+                bonus_amount = self.calculate_bonus_amount(amount, bonus_percent)
+
+                try:
+                    cursor.execute('''
+                        INSERT INTO customer_purchases (
+                            customer_id, amount, bonus_earned, description, operator_id, idempotency_key
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (
+                        customer_id,
+                        amount,
+                        bonus_amount,
+                        purchase_data.get('description'),
+                        operator_id,
+                        idempotency_key
+                    ))
+                except sqlite3.IntegrityError:
+                    conn.rollback()
+                    duplicate = self._find_purchase_by_key(cursor, idempotency_key)
+                    if duplicate is None:
+                        raise
+                    self.logger.info(f"Повторное подтверждение покупки {duplicate['purchase_id']} отклонено")
+                    return duplicate
+
                 purchase_id = cursor.lastrowid
-                
-                # Обновляем статистику клиента
+
+                promo = None
+                promo_bonus = Money()
+                if purchase_data.get('promo_code'):
+                    # PromoCodeError откатывает всю покупку
+                    promo = promo_manager.redeem(cursor, purchase_data['promo_code'], customer_id,
+                                                 purchase_id, amount, bonus_amount, bonus_percent)
+                    promo_bonus = promo['promo_bonus']
+                    cursor.execute('''
+                        UPDATE customer_purchases SET bonus_earned = ? WHERE purchase_id = ?
+                    ''', (bonus_amount + promo_bonus, purchase_id))
+
+                total_bonus = bonus_amount + promo_bonus
                 cursor.execute('''
                     UPDATE customers 
                     SET total_purchases = total_purchases + ?,
                         total_bonuses = total_bonuses + ?,
                         available_bonuses = available_bonuses + ?
                     WHERE customer_id = ?
-                ''', (
-                    amount,
-                    bonus_amount,
-                    bonus_amount,
-                    purchase_data['customer']['customer_id']
-                ))
-                
-                # Сохраняем транзакцию бонусов
+                ''', (amount, total_bonus, total_bonus, customer_id))
+
                 cursor.execute('''
                     INSERT INTO bonus_transactions (
                         customer_id, purchase_id, bonus_amount, transaction_type, description
                     ) VALUES (?, ?, ?, ?, ?)
                 ''', (
-                    purchase_data['customer']['customer_id'],
+                    customer_id,
                     purchase_id,
                     bonus_amount,
                     'earned',
-                    f"Начисление за покупку {purchase_data['amount']} руб."
+                    f"Начисление за покупку {amount} руб."
                 ))
-                
+                if promo_bonus.kopecks > 0:
+                    cursor.execute('''
+                        INSERT INTO bonus_transactions (
+                            customer_id, purchase_id, bonus_amount, transaction_type, description
+                        ) VALUES (?, ?, ?, 'earned', ?)
+                    ''', (customer_id, purchase_id, promo_bonus, f"Бонус по промокоду {promo['code']}"))
+
+                cursor.execute('''
+                    SELECT total_purchases, available_bonuses FROM customers WHERE customer_id = ?
+                ''', (customer_id,))
+                totals = cursor.fetchone()
+
                 conn.commit()
-                return purchase_id
-                
+                level_statistics.invalidate(customer['bonus_program_id'])
+                purchase_history_manager.invalidate(customer_id)
+
+                return {
+                    'purchase_id': purchase_id,
+                    'duplicate': False,
+                    'amount': amount,
+                    'bonus_amount': bonus_amount,
+                    'bonus_percent': bonus_percent,
+                    'promo_code': promo['code'] if promo else None,
+                    'promo_bonus': promo_bonus,
+                    'total_purchases': Money.from_db(totals['total_purchases']),
+                    'available_bonuses': Money.from_db(totals['available_bonuses']),
+                }
+
+        except PromoCodeError:
+            # Отказ по промокоду - не ошибка: оператор проведет покупку без кода
+            raise
         except Exception as e:
             self.logger.error(f"Ошибка сохранения покупки: {e}")
             raise
 
-    async def get_updated_customer_stats(self, customer_id: int) -> Dict:
-        """Получить обновленную статистику клиента"""
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT total_purchases, available_bonuses 
-                    FROM customers 
-                    WHERE customer_id = ?
-                ''', (customer_id,))
-                
-                result = cursor.fetchone()
-                if result:
-                    return dict(result)
-                return {}
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка получения статистики клиента: {e}")
-            return {}
+    def _find_purchase_by_key(self, cursor, idempotency_key: Optional[str]) -> Optional[Dict]:
+        """Ранее сохраненная покупка с тем же ключом идемпотентности"""
+        if idempotency_key is None:
+            return None
+
+        cursor.execute('''
+            SELECT p.purchase_id, p.amount, p.bonus_earned,
+                   c.total_purchases, c.available_bonuses
+            FROM customer_purchases p
+            JOIN customers c ON c.customer_id = p.customer_id
+            WHERE p.idempotency_key = ?
+        ''', (idempotency_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        row = money_row(row)
+        amount, bonus_amount = row['amount'], row['bonus_earned']
+        return {
+            'purchase_id': row['purchase_id'],
+            'duplicate': True,
+            'amount': amount,
+            'bonus_amount': bonus_amount,
+            'bonus_percent': bonus_amount.percent_of(amount),
+            'total_purchases': row['total_purchases'],
+            'available_bonuses': row['available_bonuses'],
+        }
 
 
 customer_purchase = CustomerPurchase()
\ No newline at end of file
@@ -0,0 +1,255 @@
+# rep_customer/customer_redeem.py
+import logging
+from telegram import Update
+from telegram.ext import CallbackContext
+from config.buttons import Buttons
+from keyboards.bonus_keyb import get_confirm_bonus_keyboard, get_bonus_system_keyboard
+from keyboards.global_keyb import get_cancel_keyboard, get_main_keyboard
+from handlers.admin_roles_class import role_manager
+from .customer_purchase_class import customer_purchase
+from .customer_redeem_class import bonus_redemption
+from utils.telegram_utils import send_or_edit_message
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+from utils.money import Money
+
+logger = logging.getLogger(__name__)
+
+
+async def redeem_bonuses(update: Update, context: CallbackContext) -> None:
+    """Начало процесса списания бонусов"""
+    user_id = update.effective_user.id
+    role = await role_manager.get_user_role(user_id)
+
+    if not role_manager.can_manage_customers(role):
+        await send_or_edit_message(
+            update,
+            "⛔ У вас нет прав для списания бонусов.",
+            reply_markup=await get_main_keyboard(user_id)
+        )
+        return
+
+    context.user_data['redeeming_bonuses'] = {
+        'step': 'card_number',
+        'data': {}
+    }
+    flow_engine.start(context, Flows.CUSTOMER_REDEEM, FlowStates.INPUT)
+
+    await send_or_edit_message(
+        update,
+        "➖ *Списание бонусов*\n\n"
+        "Введите номер карты клиента:",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+async def process_redeem(update: Update, context: CallbackContext) -> None:
+    """Обработка списания бонусов"""
+    if 'redeeming_bonuses' not in context.user_data:
+        return
+
+    text = update.message.text.strip()
+    process = context.user_data['redeeming_bonuses']
+    step = process['step']
+
+    if text == Buttons.CANCEL:
+        await cancel_redeem(update, context)
+        return
+
+    if step == 'card_number':
+        await handle_redeem_card_step(update, context, text, process)
+
+    elif step == 'check_amount':
+        await handle_check_amount_step(update, context, text, process)
+
+    elif step == 'amount':
+        await handle_redeem_amount_step(update, context, text, process)
+
+    elif step == 'confirm':
+        if text == Buttons.CONFIRM_YES:
+            await save_redeem(update, context, process['data'])
+        else:
+            await cancel_redeem(update, context)
+
+
+async def cancel_redeem(update: Update, context: CallbackContext) -> None:
+    """Отмена списания"""
+    del context.user_data['redeeming_bonuses']
+    await update.message.reply_text(
+        "❌ Списание отменено.",
+        reply_markup=await get_bonus_system_keyboard(update.effective_user.id)
+    )
+
+
+async def handle_redeem_card_step(update: Update, context: CallbackContext,
+                                  text: str, process: dict) -> None:
+    """Обработка шага ввода номера карты"""
+    try:
+        customer = await customer_purchase.find_customer_by_cardprogram(text)
+
+        if not customer:
+            await update.message.reply_text(
+                "❌ Клиент не найден или карта неактивна.\n"
+                "Проверьте номер карты и попробуйте снова:",
+                reply_markup=get_cancel_keyboard()
+            )
+            return
+
+        available = customer.get('available_bonuses') or Money()
+        if available.kopecks <= 0:
+            del context.user_data['redeeming_bonuses']
+            await update.message.reply_text(
+                f"👤 *Клиент:* {customer['username']}\n"
+                "У клиента нет доступных бонусов.",
+                reply_markup=await get_bonus_system_keyboard(update.effective_user.id),
+                parse_mode='Markdown'
+            )
+            return
+
+        process['data']['customer'] = customer
+        process['step'] = 'check_amount'
+
+        await update.message.reply_text(
+            f"👤 *Клиент:* {customer['username']}\n"
+            f"💳 *Карта:* {customer['card_number']}\n"
+            f"🎁 *Доступные бонусы:* {available:.2f} руб.\n\n"
+            "Введите сумму чека:",
+            reply_markup=get_cancel_keyboard(),
+            parse_mode='Markdown'
+        )
+
+    except Exception as e:
+        logger.error(f"Ошибка поиска клиента: {e}")
+        await update.message.reply_text(
+            "❌ Ошибка поиска клиента. Попробуйте снова:",
+            reply_markup=get_cancel_keyboard()
+        )
+
+
+async def handle_check_amount_step(update: Update, context: CallbackContext,
+                                   text: str, process: dict) -> None:
+    """Обработка шага ввода суммы чека"""
+    try:
+        check_amount = Money.parse(text)
+    except ValueError:
+        await update.message.reply_text(
+            "Введите корректную сумму:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    if check_amount.kopecks <= 0:
+        await update.message.reply_text(
+            "Сумма должна быть больше 0. Введите снова:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    limit = bonus_redemption.redeem_limit(process['data']['customer']['available_bonuses'], check_amount)
+    process['data']['check_amount'] = str(check_amount)
+    process['data']['limit'] = str(limit)
+    process['step'] = 'amount'
+
+    await update.message.reply_text(
+        f"🧾 *Сумма чека:* {check_amount} руб.\n"
+        f"🎁 *Можно списать:* до {limit} руб.\n\n"
+        "Введите сумму списания:",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+async def handle_redeem_amount_step(update: Update, context: CallbackContext,
+                                    text: str, process: dict) -> None:
+    """Обработка шага ввода суммы списания"""
+    try:
+        amount = Money.parse(text)
+    except ValueError:
+        await update.message.reply_text(
+            "Введите корректную сумму:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    limit = Money.parse(process['data']['limit'])
+    if amount.kopecks <= 0 or amount > limit:
+        await update.message.reply_text(
+            f"Сумма должна быть от 0.01 до {limit} руб. Введите снова:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    check_amount = Money.parse(process['data']['check_amount'])
+    process['data']['amount'] = str(amount)
+    process['step'] = 'confirm'
+    # Ключ от обновления, показавшего подтверждение (как у покупки)
+    process['data']['idempotency_key'] = redeem_idempotency_key(update)
+
+    await update.message.reply_text(
+        "✅ *Подтверждение списания:*\n\n"
+        f"👤 *Клиент:* {process['data']['customer']['username']}\n"
+        f"💳 *Карта:* {process['data']['customer']['card_number']}\n"
+        f"🧾 *Сумма чека:* {check_amount} руб.\n"
+        f"🎁 *Списать бонусов:* {amount} руб.\n"
+        f"💵 *К оплате:* {check_amount - amount} руб.\n\n"
+        "Списать бонусы?",
+        reply_markup=get_confirm_bonus_keyboard(),
+        parse_mode='Markdown'
+    )
+
+
+def redeem_idempotency_key(update: Update) -> str:
+    """Ключ идемпотентности списания из ID пользователя и обновления"""
+    return f"redeem:{update.effective_user.id}:{update.update_id}"
+
+
+async def save_redeem(update: Update, context: CallbackContext, redeem_data: dict) -> None:
+    """Сохранение списания"""
+    user_id = update.effective_user.id
+    try:
+        amount = Money.parse(redeem_data['amount'])
+        check_amount = Money.parse(redeem_data['check_amount'])
+
+        result = await bonus_redemption.redeem(
+            redeem_data['customer']['customer_id'],
+            amount,
+            check_amount,
+            redeem_data.get('idempotency_key') or redeem_idempotency_key(update)
+        )
+
+        del context.user_data['redeeming_bonuses']
+
+        if result['status'] == 'insufficient':
+            await update.message.reply_text(
+                "❌ *Недостаточно бонусов*\n\n"
+                f"Баланс изменился, доступно: {result['available_bonuses']:.2f} руб.\n"
+                "Начните списание заново.",
+                reply_markup=await get_bonus_system_keyboard(user_id),
+                parse_mode='Markdown'
+            )
+            return
+
+        if result['status'] == 'duplicate':
+            title = "ℹ️ *Эти бонусы уже были списаны*"
+        else:
+            title = "✅ *Бонусы списаны!*"
+
+        await update.message.reply_text(
+            f"{title}\n\n"
+            f"👤 *Клиент:* {redeem_data['customer']['username']}\n"
+            f"🎁 *Списано:* {result['amount']} руб.\n"
+            f"💵 *К оплате:* {check_amount - result['amount']} руб.\n"
+            f"🆔 *Номер операции:* {result['transaction_id']}\n\n"
+            f"• Остаток бонусов: {result['available_bonuses']:.2f} руб.",
+            reply_markup=await get_bonus_system_keyboard(user_id),
+            parse_mode='Markdown'
+        )
+
+    except Exception as e:
+        logger.error(f"Ошибка списания бонусов: {e}", exc_info=True)
+        context.user_data.pop('redeeming_bonuses', None)
+        await update.message.reply_text(
+            f"❌ Ошибка при списании бонусов: {str(e)}",
+            reply_markup=await get_bonus_system_keyboard(user_id)
+        )
@@ -0,0 +1,120 @@
+import os
+import logging
+import decimal
+import sqlite3
+from typing import Dict, Optional
+from database import sqlite_connection, db_write
+from utils.money import Money
+
+logger = logging.getLogger(__name__)
+
+# Какую долю чека (%) можно оплатить бонусами
+REDEEM_MAX_CHECK_PERCENT = decimal.Decimal(os.getenv('REDEEM_MAX_CHECK_PERCENT', '100'))
+
+
+class BonusRedemption:
+    """Списание бонусов клиента в оплату части чека"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def redeem_limit(self, available_bonuses: Money, check_amount: Money) -> Money:
+        """Сколько бонусов можно списать: не больше баланса и доли чека"""
+        return min(available_bonuses, check_amount.percent(REDEEM_MAX_CHECK_PERCENT))
+
+    @db_write
+    def redeem(self, customer_id: int, amount: Money, check_amount: Money,
+               idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Списание бонусов одной транзакцией BEGIN IMMEDIATE: запись 'spent'
+        в журнал и условное уменьшение баланса
+        (UPDATE ... WHERE available_bonuses >= сумма).
+
+        Баланс не читается перед списанием, поэтому параллельные списания
+        по одной карте не могут увести его в минус. Результат:
+        status = 'ok' | 'duplicate' (ключ уже использован) | 'insufficient'.
+        """
+        if amount.kopecks <= 0:
+            raise ValueError("Сумма списания должна быть больше 0")
+
+        try:
+            with sqlite_connection() as conn:
+                cursor = conn.cursor()
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+
+                try:
+                    cursor.execute('''
+                        INSERT INTO bonus_transactions (
+                            customer_id, bonus_amount, transaction_type, description, idempotency_key
+                        ) VALUES (?, ?, 'spent', ?, ?)
+                    ''', (
+                        customer_id,
+                        amount,
+                        f"Оплата бонусами части чека {check_amount} руб.",
+                        idempotency_key
+                    ))
+                except sqlite3.IntegrityError:
+                    conn.rollback()
+                    duplicate = self._find_redemption_by_key(cursor, idempotency_key)
+                    if duplicate is None:
+                        raise
+                    self.logger.info(f"Повторное подтверждение списания {duplicate['transaction_id']} отклонено")
+                    return duplicate
+
+                transaction_id = cursor.lastrowid
+
+                cursor.execute('''
+                    UPDATE customers
+                    SET available_bonuses = available_bonuses - ?
+                    WHERE customer_id = ? AND is_active = 1 AND available_bonuses >= ?
+                ''', (amount, customer_id, amount))
+                redeemed = cursor.rowcount == 1
+
+                if not redeemed:
+                    conn.rollback()
+
+                cursor.execute('''
+                    SELECT available_bonuses FROM customers WHERE customer_id = ?
+                ''', (customer_id,))
+                customer = cursor.fetchone()
+                if not customer:
+                    raise ValueError(f"Клиент {customer_id} не найден")
+
+                conn.commit()
+
+                return {
+                    'status': 'ok' if redeemed else 'insufficient',
+                    'transaction_id': transaction_id if redeemed else None,
+                    'amount': amount,
+                    'available_bonuses': Money.from_db(customer['available_bonuses']),
+                }
+
+        except Exception as e:
+            self.logger.error(f"Ошибка списания бонусов клиента {customer_id}: {e}")
+            raise
+
+    def _find_redemption_by_key(self, cursor, idempotency_key: Optional[str]) -> Optional[Dict]:
+        """Ранее сохраненное списание с тем же ключом идемпотентности"""
+        if idempotency_key is None:
+            return None
+
+        cursor.execute('''
+            SELECT t.transaction_id, t.bonus_amount, c.available_bonuses
+            FROM bonus_transactions t
+            JOIN customers c ON c.customer_id = t.customer_id
+            WHERE t.idempotency_key = ?
+        ''', (idempotency_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        return {
+            'status': 'duplicate',
+            'transaction_id': row['transaction_id'],
+            'amount': Money.from_db(row['bonus_amount']),
+            'available_bonuses': Money.from_db(row['available_bonuses']),
+        }
+
+
+bonus_redemption = BonusRedemption()
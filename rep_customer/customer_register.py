@@ -3,13 +3,14 @@ import logging
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import CallbackContext
 from datetime import datetime
-from database import sqlite_connection
 from config.buttons import Buttons
 from keyboards.bonus_keyb import get_confirm_bonus_keyboard
 from keyboards.customeers_keyb import get_customers_main_keyboard
 from keyboards.global_keyb import get_cancel_keyboard, get_main_keyboard
 from handlers.admin_roles_class import role_manager, UserRole
 from .customer_register_class import customer_register
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ async def register_customer(update: Update, context: CallbackContext) -> None:
         'step': 'username',
         'data': {}
     }
+    flow_engine.start(context, Flows.CUSTOMER_REGISTER, FlowStates.INPUT)
     
     await update.message.reply_text(
         "👤 *Регистрация нового клиента*\n\n"
@@ -92,22 +94,13 @@ async def process_customer_registration(update: Update, context: CallbackContext
             phone = f"+{phone}"
         
         # Проверяем, есть ли уже такой номер
-        try:
-            with sqlite_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT customer_id FROM customers WHERE phone_number = ?",
-                    (phone,)
-                )
-                if cursor.fetchone():
-                    await update.message.reply_text(
-                        "❌ Клиент с таким номером уже зарегистрирован.\n"
-                        "Введите другой номер телефона:",
-                        reply_markup=get_cancel_keyboard()
-                    )
-                    return
-        except Exception as e:
-            logger.error(f"Ошибка проверки номера: {e}")
+        if await customer_register.is_phone_registered(phone):
+            await update.message.reply_text(
+                "❌ Клиент с таким номером уже зарегистрирован.\n"
+                "Введите другой номер телефона:",
+                reply_markup=get_cancel_keyboard()
+            )
+            return
         
         process['data']['phone'] = phone
         process['step'] = 'birthday'
@@ -139,7 +132,7 @@ async def process_customer_registration(update: Update, context: CallbackContext
         process['step'] = 'confirm'
         
         # Генерируем номер карты
-        card_number = customer_register.generate_card_number()
+        card_number = await customer_register.generate_card_number()
         process['data']['card_number'] = card_number
         
         # Формируем текст подтверждения
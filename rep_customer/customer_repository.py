@@ -2,6 +2,10 @@ import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from database import sqlite_connection
+from handlers.admin_roles_class import role_manager
+from utils.request_context import current_request
+from utils.phone import normalize_phone, phone_columns
+from utils.money import money_row
 from models.customer_models import CustomerDTO, CustomerRegistrationDTO
 
 logger = logging.getLogger(__name__)
@@ -11,13 +15,13 @@ class CustomerRepository:
     
     @staticmethod
     def is_phone_registered(phone: str) -> bool:
-        """Проверяет, зарегистрирован ли номер телефона"""
+        """Проверяет, зарегистрирован ли номер телефона (в любом формате записи)"""
         try:
             with sqlite_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT customer_id FROM customers WHERE phone_number = ?",
-                    (phone,)
+                    "SELECT customer_id FROM customers WHERE phone_normalized = ? OR phone_number = ?",
+                    (normalize_phone(phone), phone)
                 )
                 return cursor.fetchone() is not None
         except Exception as e:
@@ -27,6 +31,13 @@ class CustomerRepository:
     @staticmethod
     def get_user_by_telegram_id(telegram_id: int) -> Optional[Dict[str, Any]]:
         """Получает пользователя по Telegram ID"""
+        request = current_request(telegram_id)
+        if request is not None and request.has_snapshot:
+            request.serve()
+            if not request.user:
+                return None
+            return {key: request.user[key] for key in ('user_id', 'username', 'first_name', 'phone_numb')}
+
         try:
             with sqlite_connection() as conn:
                 cursor = conn.cursor()
@@ -82,7 +93,10 @@ class CustomerRepository:
                         updated_at = CURRENT_TIMESTAMP
                     WHERE user_id = ?
                 ''', (role, user_id))
-                return cursor.rowcount > 0
+                updated = cursor.rowcount > 0
+
+            role_manager.invalidate_user_role(user_id)
+            return updated
         except Exception as e:
             logger.error(f"Ошибка обновления роли пользователя: {e}")
             return False
@@ -100,6 +114,8 @@ class CustomerRepository:
                         user_id, 
                         username, 
                         phone_number, 
+                        phone_normalized,
+                        phone_reversed,
                         birthday, 
                         card_number, 
                         registration_date,
@@ -107,11 +123,12 @@ class CustomerRepository:
                         total_purchases,
                         total_bonuses,
                         available_bonuses
-                    ) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, 0, 0, 0)
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, 0, 0, 0)
                 ''', (
                     user_id,
                     username,
                     phone,
+                    *phone_columns(phone),
                     birthday,
                     card_number,
                     1  # Активен
@@ -197,6 +214,8 @@ class CustomerRepository:
                         user_id, 
                         username, 
                         phone_number, 
+                        phone_normalized,
+                        phone_reversed,
                         birthday, 
                         card_number, 
                         registration_date,
@@ -204,11 +223,12 @@ class CustomerRepository:
                         total_purchases,
                         total_bonuses,
                         available_bonuses
-                    ) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, 0, 0, 0)
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, 0, 0, 0)
                 ''', (
                     customer_data.user_id,
                     customer_data.username,
                     customer_data.phone,
+                    *phone_columns(customer_data.phone),
                     birthday_db,
                     customer_data.card_number,
                     1
@@ -222,7 +242,7 @@ class CustomerRepository:
                 row = cursor.fetchone()
                 
                 if row:
-                    return CustomerDTO.from_db_row(dict(row))
+                    return CustomerDTO.from_db_row(money_row(row))
                 return None
                 
         except Exception as e:
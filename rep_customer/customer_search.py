@@ -8,6 +8,8 @@ from keyboards.customeers_keyb import get_customer_search_keyboard, get_customer
 from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
 from config.buttons import Buttons
 from rep_customer.customers_inline import show_customer_list_inline
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +35,7 @@ class SearchManager:
             'step': 'search_input',
             'data': {}
         }
+        flow_engine.start(context, Flows.CUSTOMER_SEARCH, FlowStates.INPUT)
         
         await send_or_edit_message(
             update,
@@ -57,6 +60,10 @@ class SearchManager:
         """Начать поиск по телефону"""
         await self._start_specific_search(update, context, "phone", "📱 *Поиск клиента по телефону*\n\nВведите номер телефона:")
 
+    async def search_cust_by_phone_suffix(self, update: Update, context: CallbackContext) -> None:
+        """Начать поиск по последним цифрам телефона"""
+        await self._start_specific_search(update, context, "phone_suffix", "🔢 *Поиск клиента по телефону*\n\nВведите последние цифры номера (например, 4567):")
+
     async def search_cust_by_name(self, update: Update, context: CallbackContext) -> None:
         """Начать поиск по имени"""
         await self._start_specific_search(update, context, "name", "👤 *Поиск клиента по имени*\n\nВведите имя клиента:")
@@ -79,6 +86,7 @@ class SearchManager:
             'type': search_type,
             'data': {}
         }
+        flow_engine.start(context, Flows.CUSTOMER_SEARCH, FlowStates.INPUT)
         
         await send_or_edit_message(
             update,
@@ -128,7 +136,9 @@ class SearchManager:
                 if customers:
                     customers = [customers]  # Преобразуем в список для единообразия
             elif search_type == 'phone':
-                customers = await customer_manager.find_customers_by_search_query(text)
+                customers = await customer_manager.find_customers_by_phone(text)
+            elif search_type == 'phone_suffix':
+                customers = await customer_manager.find_customers_by_phone_suffix(text)
             elif search_type == 'name':
                 customers = await customer_manager.find_customers_by_search_query(text)
             else:
@@ -1,5 +1,4 @@
 import logging
-import re
 import random
 import string
 from typing import Optional, Dict, Any, Tuple
@@ -7,6 +6,7 @@ from datetime import datetime
 from .customer_repository import CustomerRepository
 from handlers.admin_roles_class import UserRole
 from models.customer_models import CustomerRegistrationDTO, CustomerDTO
+from utils.phone import format_phone
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +18,7 @@ class CustomerSelfRegisterService:
     
     def validate_and_format_phone(self, phone_input: str) -> Optional[str]:
         """Валидирует и форматирует номер телефона"""
-        # Удаляем все нецифровые символы
-        digits = re.sub(r'\D', '', phone_input)
-        
-        # Проверяем длину и формат
-        if len(digits) == 11 and digits.startswith(('8', '7')):
-            return f"+7{digits[1:]}"
-        elif len(digits) == 10:
-            return f"+7{digits}"
-        elif len(digits) == 12 and digits.startswith('7'):
-            return f"+{digits}"
-        
-        return None
+        return format_phone(phone_input)
     
     def validate_birthday(self, birthday_str: str) -> Optional[str]:
         """Валидирует дату рождения"""
@@ -9,7 +9,8 @@ from keyboards.customeers_keyb import get_customers_main_keyboard, get_customers
 from keyboards.global_keyb import get_cancel_keyboard, get_main_keyboard
 from .customer_manager_class import customer_manager
 from .customer_purchase_class import customer_purchase
-from .customers_inline import show_customer_list_inline, is_inline_mode_active
+from .customer_history import show_history_page
+from .customers_inline import show_customer_list_inline, show_customer_page, is_inline_mode_active, CUSTOMER_LIST_KEY
 from utils.telegram_utils import send_or_edit_message
 from handlers.admin_roles_class import role_manager
 
@@ -94,7 +95,7 @@ async def show_customer_details(update: Update, context: CallbackContext, custom
             return
     
     # Рассчитываем текущий бонусный процент
-    current_bonus = customer_purchase.calculate_current_bonus_percent(
+    current_bonus = await customer_purchase.calculate_current_bonus_percent(
         customer['total_purchases'],
         customer['bonus_program_id']
     )
@@ -172,7 +173,7 @@ async def show_customer_details(update: Update, context: CallbackContext, custom
         # Добавляем кнопки для возврата к списку
         if 'search_results' in context.user_data:
             buttons.append([Buttons.BACK_TO_SEARCH_RESULT])
-        elif 'all_customers_list' in context.user_data:
+        elif CUSTOMER_LIST_KEY in context.user_data:
             buttons.append([Buttons.BACK_TO_CUSTOMERS_LIST])
         
         keyboard = ReplyKeyboardMarkup(buttons, resize_keyboard=True) if buttons else None
@@ -205,10 +206,8 @@ async def list_all_customers(update: Update, context: CallbackContext) -> None:
         )
         return
     try:
-        # 1. Получаем клиентов с await
-        customers = await customer_manager.get_all_customers()
-        
-        if not customers:
+        # 1. Проверяем, что клиенты есть
+        if not await customer_manager.count_active_customers():
             await send_or_edit_message(
                 update,
                 "📭 Нет зарегистрированных клиентов.",
@@ -219,8 +218,9 @@ async def list_all_customers(update: Update, context: CallbackContext) -> None:
          # 2. Скрываем навигационную клавиатуру перед показом inline-списка
         from rep_customer.customers_inline import hide_navigation_keyboard_if_inline_active
         await hide_navigation_keyboard_if_inline_active(update, context)
-        # 2. Показываем inline-сообщение со списком клиентов
-        await show_customer_list_inline(update, context, customers)
+        # 3. Показываем первую страницу списка (в user_data остается только курсор)
+        context.user_data.pop(CUSTOMER_LIST_KEY, None)
+        await show_customer_page(update, context)
             
         
     except Exception as e:
@@ -262,7 +262,7 @@ async def show_my_bonuses(update: Update, context: CallbackContext) -> None:
         )
 
 async def show_my_stat(update: Update, context: CallbackContext) -> None:
-    """Показать статистику текущего пользователя"""
+    """Показать статистику текущего пользователя и историю его покупок"""
     telegram_id = update.effective_user.id
 
     try:
@@ -271,6 +271,8 @@ async def show_my_stat(update: Update, context: CallbackContext) -> None:
 
         if customer:
             await show_customer_details(update, context, customer)
+            # Последние покупки отдельным сообщением с листанием страниц
+            await show_history_page(update, context, customer=customer)
         else:
             await send_or_edit_message(
                 update,
@@ -8,6 +8,7 @@ from telegram.ext import CallbackContext
 from utils.telegram_utils import send_or_edit_message
 from config.buttons import Buttons
 from keyboards.customeers_keyb import get_customers_main_keyboard
+from .customer_manager_class import customer_manager, CUSTOMER_PAGE_SIZE, DEFAULT_CUSTOMER_SORT
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +21,22 @@ VIEW_BONUSES_PREFIX = "bonuses_"
 CLOSE_CUSTOMER_LIST = "close_customer_list"
 BACK_TO_LIST = "back_to_customer_list"
 CLOSE_DETAILS = "close_details"
+CUSTOMER_PAGE_PREFIX = "cust_page_"
+CUSTOMER_PAGE_NEXT = "cust_page_next"
+CUSTOMER_PAGE_PREV = "cust_page_prev"
+CUSTOMER_PAGE_SORT_PREFIX = "cust_page_sort_"
 INLINE_MODE_KEY = 'inline_mode_active'
 
+# Состояние постраничного списка в user_data: только курсоры, без самих клиентов
+CUSTOMER_LIST_KEY = 'customer_list_page'
+
+# Подписи кнопок сортировки (ключи - CUSTOMER_SORTS)
+SORT_TITLES = {
+    'recent': "🆕 Новые",
+    'purchases': "💰 По покупкам",
+    'name': "🔤 По имени",
+}
+
 def set_inline_mode_active(context: CallbackContext, is_active: bool = True):
     """Установить статус inline-режима"""
     context.user_data[INLINE_MODE_KEY] = is_active
@@ -96,32 +111,11 @@ async def show_customer_list_inline(update: Update, context: CallbackContext, cu
     else:
         message_text = "👥 *Список клиентов*\n\n"
         message_text += f"*Всего клиентов:* {len(customers)}\n\n"
-        list_key = 'all_customers_list'
+        list_key = 'search_results'
     
     # Создаем inline-клавиатуру
-    keyboard = []
-    
-    for i, customer in enumerate(customers, 1):
-        username = customer['username'][:20] + "..." if len(customer['username']) > 20 else customer['username']
-        
-        # Добавляем информацию в текст
-        message_text += (
-            f"{i}. *{username}*\n"
-            f"   📱 {customer.get('phone_number', 'Нет телефона')}\n"
-            f"   🆔 ID: {customer['customer_id']}\n"
-        )
-        message_text += "\n"
-        
-        if customer.get('total_purchases', 0) > 0:
-            message_text += f"   💰 {customer['total_purchases']} руб.\n"
-
-        # Создаем inline-кнопку
-        button_text = f"👤 {customer['customer_id']}: {username}"
-        callback_data = f"{VIEW_CUSTOMER_PREFIX}{customer['customer_id']}"
-        
-        keyboard.append([
-            InlineKeyboardButton(button_text, callback_data=callback_data)
-        ])
+    rows_text, keyboard = _render_customer_rows(customers)
+    message_text += rows_text
     
     # Добавляем кнопку закрытия
     keyboard.append([
@@ -153,6 +147,115 @@ async def show_customer_list_inline(update: Update, context: CallbackContext, cu
         )
 
 
+def _render_customer_rows(customers: list, start: int = 1):
+    """Текст и inline-кнопки для списка клиентов"""
+    message_text = ""
+    keyboard = []
+
+    for i, customer in enumerate(customers, start):
+        username = customer['username'][:20] + "..." if len(customer['username']) > 20 else customer['username']
+        
+        # Добавляем информацию в текст
+        message_text += (
+            f"{i}. *{username}*\n"
+            f"   📱 {customer.get('phone_number', 'Нет телефона')}\n"
+            f"   🆔 ID: {customer['customer_id']}\n"
+        )
+        message_text += "\n"
+        
+        if customer.get('total_purchases'):
+            message_text += f"   💰 {customer['total_purchases']} руб.\n"
+
+        # Создаем inline-кнопку
+        button_text = f"👤 {customer['customer_id']}: {username}"
+        callback_data = f"{VIEW_CUSTOMER_PREFIX}{customer['customer_id']}"
+        
+        keyboard.append([
+            InlineKeyboardButton(button_text, callback_data=callback_data)
+        ])
+
+    return message_text, keyboard
+
+async def show_customer_page(update: Update, context: CallbackContext,
+                             direction: str = 'first', sort: str = None) -> bool:
+    """
+    Показать страницу списка клиентов.
+
+    direction: first - первая страница, next/prev - соседняя,
+    current - повторно текущая (возврат из карточки клиента).
+    В user_data хранится только CUSTOMER_LIST_KEY: сортировка, номер
+    страницы и курсоры первого/последнего клиента.
+    Возвращает False, если клиентов нет.
+    """
+    state = context.user_data.get(CUSTOMER_LIST_KEY)
+    if state is None or sort is not None:
+        direction = 'first'
+        state = {
+            'sort': sort or DEFAULT_CUSTOMER_SORT,
+            'page': 1,
+            'total': await customer_manager.count_active_customers(),
+        }
+
+    page_number = state['page']
+    if direction == 'next':
+        page_number += 1
+    elif direction == 'prev':
+        page_number -= 1
+
+    if direction == 'first' or page_number <= 1:
+        # Первую страницу всегда берем без курсора - с учетом новых клиентов
+        page_number = 1
+        page = await customer_manager.get_customers_page(state['sort'])
+    else:
+        cursor = state['last'] if direction == 'next' else state['first']
+        page = await customer_manager.get_customers_page(state['sort'], cursor, direction)
+
+    if not page['customers']:
+        if page_number == 1:
+            context.user_data.pop(CUSTOMER_LIST_KEY, None)
+            return False
+        # Клиенты за курсором исчезли - начинаем с первой страницы
+        return await show_customer_page(update, context, sort=state['sort'])
+
+    state.update(page=page_number, first=page['first'], last=page['last'])
+    context.user_data[CUSTOMER_LIST_KEY] = state
+
+    pages_total = max(1, -(-state['total'] // CUSTOMER_PAGE_SIZE))
+    message_text = "👥 *Список клиентов*\n\n"
+    message_text += f"*Всего клиентов:* {state['total']}\n"
+    message_text += f"*Сортировка:* {SORT_TITLES.get(state['sort'], state['sort'])}\n"
+    message_text += f"*Страница:* {page_number} из {max(pages_total, page_number)}\n\n"
+
+    rows_text, keyboard = _render_customer_rows(
+        page['customers'], start=(page_number - 1) * CUSTOMER_PAGE_SIZE + 1
+    )
+    message_text += rows_text
+
+    navigation = []
+    if page_number > 1:
+        navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=CUSTOMER_PAGE_PREV))
+    if page['has_next']:
+        navigation.append(InlineKeyboardButton("Вперед ➡️", callback_data=CUSTOMER_PAGE_NEXT))
+    if navigation:
+        keyboard.append(navigation)
+
+    keyboard.append([
+        InlineKeyboardButton(title, callback_data=f"{CUSTOMER_PAGE_SORT_PREFIX}{key}")
+        for key, title in SORT_TITLES.items() if key != state['sort']
+    ])
+    keyboard.append([
+        InlineKeyboardButton(Buttons.CLOSE_CUSTOMER_LIST, callback_data=CLOSE_CUSTOMER_LIST)
+    ])
+
+    await send_or_edit_message(
+        update,
+        message_text,
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='Markdown'
+    )
+    return True
+
+
 async def show_customer_details_inline(query: Update, context: CallbackContext, customer: dict) -> None:
     """Показать детали клиента с inline-кнопками действий"""
     
@@ -221,8 +324,7 @@ async def handle_close_customer_list(update: Update, context: CallbackContext) -
         # Очищаем данные списка
         if 'search_results' in context.user_data:
             del context.user_data['search_results']
-        if 'all_customers_list' in context.user_data:
-            del context.user_data['all_customers_list']
+        context.user_data.pop(CUSTOMER_LIST_KEY, None)
         
         # Пытаемся удалить сообщение
         try:
@@ -4,6 +4,8 @@ import logging
 from datetime import datetime
 from handlers.admin_roles_class import role_manager, Permission
 from config.buttons import Buttons
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
 from rep_invent.inventory_services_class import inventory_service
 from keyboards.global_keyb import get_main_keyboard, get_cancel_keyboard
 from keyboards.invent_keyb import get_inventory_keyboard, get_units_keyboard
@@ -23,12 +25,12 @@ async def add_item(update: Update, context: CallbackContext) -> None:
         return
     
     # Проверяем наличие активного списка
-    active_list = inventory_service.get_active_user_list(user_id)
+    active_list = await inventory_service.get_active_user_list(user_id)
     
     if not active_list:
         # Создаем новый список инвентаризации
         list_name = f"Инвентаризация от {datetime.now().strftime('%d.%m.%Y')}"
-        active_list = inventory_service.create_inventory_list(user_id, list_name)
+        active_list = await inventory_service.create_inventory_list(user_id, list_name)
         
         if not active_list:
             await update.message.reply_text(
@@ -55,6 +57,7 @@ async def add_item(update: Update, context: CallbackContext) -> None:
     
     context.user_data['adding_item_method'] = True
     context.user_data['active_list_id'] = active_list['list_id']
+    flow_engine.start(context, Flows.INVENTORY_ITEM, FlowStates.ITEM_METHOD)
 
 async def process_item_input(update: Update, context: CallbackContext) -> None:
     """Обрабатывает ввод данных товара"""
@@ -75,6 +78,7 @@ async def process_item_input(update: Update, context: CallbackContext) -> None:
                     'step': 'name',
                     'data': {}
                 }
+                flow_engine.set_state(context, FlowStates.INPUT)
                 await update.message.reply_text(
                     "Введите название товара:",
                     reply_markup=get_cancel_keyboard()
@@ -182,7 +186,7 @@ async def _process_unit(update: Update, context: CallbackContext, unit: str) ->
             return
         
         # Используем сервис для сохранения
-        success = inventory_service.add_item_to_list(
+        success = await inventory_service.add_item_to_list(
             list_id=list_id,
             name=item_name,
             quantity=quantity,
@@ -212,7 +216,7 @@ async def show_inventory(update: Update, context: CallbackContext) -> None:
     user_id = update.effective_user.id
     
     try:
-        active_list = inventory_service.get_active_user_list(user_id)
+        active_list = await inventory_service.get_active_user_list(user_id)
         if not active_list:
             await update.message.reply_text(
                 "У вас нет активного списка инвентаризации.\n"
@@ -221,7 +225,7 @@ async def show_inventory(update: Update, context: CallbackContext) -> None:
             )
             return
         
-        items = inventory_service.get_list_items(active_list['list_id'])
+        items = await inventory_service.get_list_items(active_list['list_id'])
         
         if not items:
             await update.message.reply_text(
@@ -274,12 +278,12 @@ async def clear_inventory(update: Update, context: CallbackContext) -> None:
         return
     
     try:
-        active_list = inventory_service.get_active_user_list(user_id)
+        active_list = await inventory_service.get_active_user_list(user_id)
         if not active_list:
             await update.message.reply_text("Нет активного списка для очистки")
             return
         
-        success = inventory_service.clear_list(active_list['list_id'])
+        success = await inventory_service.clear_list(active_list['list_id'])
         
         if success:
             await update.message.reply_text("✅ Список очищен")
@@ -303,7 +307,7 @@ async def create_inventory_list(update: Update, context: CallbackContext) -> Non
     
     # Создаем новый список с датой
     list_name = f"Инвентаризация от {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-    new_list = inventory_service.create_inventory_list(user_id, list_name)
+    new_list = await inventory_service.create_inventory_list(user_id, list_name)
     
     if new_list:
         await update.message.reply_text(
@@ -332,12 +336,12 @@ async def deactivate_inventory_list(update: Update, context: CallbackContext) ->
         return
     
     try:
-        active_list = inventory_service.get_active_user_list(user_id)
+        active_list = await inventory_service.get_active_user_list(user_id)
         if not active_list:
             await update.message.reply_text("Нет активного списка для деактивации")
             return
         
-        success = inventory_service.deactivate_list(active_list['list_id'])
+        success = await inventory_service.deactivate_list(active_list['list_id'])
         
         if success:
             await update.message.reply_text(
@@ -3,7 +3,7 @@ import sqlite3
 import logging
 from datetime import datetime
 from typing import Optional, Dict, List
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +11,7 @@ class InventoryService:
     """Сервис для работы с инвентаризацией"""
     
     @staticmethod
+    @db_write
     def create_inventory_list(user_id: int, list_name: str = None) -> Optional[Dict]:
         """Создает новый список инвентаризации с датой проведения"""
         try:
@@ -99,10 +100,11 @@ class InventoryService:
             return None
     
     @staticmethod
+    @db_read
     def get_active_user_list(user_id: int) -> Optional[Dict]:
         """Получает активный список пользователя"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Сначала находим user_id в таблице users
@@ -141,6 +143,7 @@ class InventoryService:
             return None
     
     @staticmethod
+    @db_write
     def ensure_user_exists(telegram_id: int) -> Optional[int]:
         """Гарантирует, что пользователь существует в базе, возвращает user_id"""
         try:
@@ -178,6 +181,7 @@ class InventoryService:
             return None
 
     @staticmethod
+    @db_write
     def add_item_to_list(list_id: int, name: str, quantity: float, unit: str, description: str = "") -> bool:
         """Добавляет товар в список инвентаризации"""
         try:
@@ -227,10 +231,11 @@ class InventoryService:
             return False
     
     @staticmethod
+    @db_read
     def get_list_items(list_id: int) -> List[Dict]:
         """Получает все товары из списка"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT item_id, name, description, expected_quantity, unit, created_at
@@ -246,6 +251,7 @@ class InventoryService:
             return []
     
     @staticmethod
+    @db_write
     def clear_list(list_id: int) -> bool:
         """Очищает список товаров"""
         try:
@@ -263,6 +269,7 @@ class InventoryService:
             return False
     
     @staticmethod
+    @db_write
     def deactivate_list(list_id: int) -> bool:
         """Деактивирует список инвентаризации"""
         try:
@@ -280,10 +287,11 @@ class InventoryService:
             return False
     
     @staticmethod
+    @db_read
     def get_user_lists(user_id: int) -> List[Dict]:
         """Получает все списки пользователя"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT list_id, list_name, created_at, is_active
@@ -299,18 +307,21 @@ class InventoryService:
             return []
     
     @staticmethod
+    @db_read
     def get_list_by_date(user_id: int, date: str) -> Optional[Dict]:
         """Получает список инвентаризации по дате"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT list_id, list_name, created_at, is_active
                     FROM inventory_lists
-                    WHERE user_id = ? AND DATE(created_at) = DATE(?)
+                    WHERE user_id = ?
+                      AND created_at >= DATE(?)
+                      AND created_at < DATE(?, '+1 day')
                     ORDER BY created_at DESC
                     LIMIT 1
-                ''', (user_id, date))
+                ''', (user_id, date, date))
                 
                 result = cursor.fetchone()
                 return dict(result) if result else None
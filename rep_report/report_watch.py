@@ -3,6 +3,9 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from .report_watch_class import ReportWatchDB
 from utils.telegram_utils import send_or_edit_message
+from config.flows import Flows, FlowStates
+from utils.flow_engine import flow_engine
+from utils.money import Money
 
 
 
@@ -26,7 +29,7 @@ class ReportWatchManager:
             return
         
         # Проверяем активный отчет
-        active_report = self.db.get_active_report(user_id)
+        active_report = await self.db.get_active_report(user_id)
         if active_report:
             keyboard = [
                 [InlineKeyboardButton("🔄 Продолжить текущий", callback_data=f"report_continue_{active_report['report_id']}")],
@@ -46,6 +49,7 @@ class ReportWatchManager:
         
         # Запрашиваем начальную сумму
         context.user_data['creating_report'] = True
+        flow_engine.start(context, Flows.REPORT, FlowStates.CASH_MORNING)
         context.user_data['report_user_info'] = user_info
         
         await update.message.reply_text(
@@ -58,8 +62,8 @@ class ReportWatchManager:
     async def process_cash_morning(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработать ввод начальной суммы"""
         try:
-            cash_morning = int(update.message.text)
-            if cash_morning < 0:
+            cash_morning = Money.parse(update.message.text)
+            if cash_morning.kopecks < 0:
                 await update.message.reply_text("❌ Сумма не может быть отрицательной")
                 return
             
@@ -69,7 +73,7 @@ class ReportWatchManager:
                 return
             
             # Создаем отчет
-            report_id = self.db.create_report(
+            report_id = await self.db.create_report(
                 user_id=user_info['user_id'],
                 username=user_info['username'],
                 phone_number=user_info.get('phone_number', ''),
@@ -118,6 +122,7 @@ class ReportWatchManager:
         
         
         context.user_data['adding_expense'] = True
+        flow_engine.start(context, Flows.REPORT, FlowStates.EXPENSE)
         context.user_data['expense_report_id'] = report_id
         
         text = "📝 Добавление расхода\nВведите сумму и описание расхода через тире (-)\nНапример: 1500 - Закупка кофе"
@@ -139,10 +144,10 @@ class ReportWatchManager:
                 await update.message.reply_text("❌ Используйте формат: сумма - описание")
                 return
             
-            amount = int(amount_str.strip())
+            amount = Money.parse(amount_str)
             description = description.strip()
             
-            if amount <= 0:
+            if amount.kopecks <= 0:
                 await update.message.reply_text("❌ Сумма должна быть положительной")
                 return
             
@@ -152,7 +157,7 @@ class ReportWatchManager:
                 return
             
             # Добавляем расход
-            success = self.db.add_expense(report_id, amount, description)
+            success = await self.db.add_expense(report_id, amount, description)
             
             if success:
                 # Очищаем контекст
@@ -181,6 +186,7 @@ class ReportWatchManager:
             message = update.message
         
         context.user_data['adding_cash_in'] = True
+        flow_engine.start(context, Flows.REPORT, FlowStates.CASH_IN)
         context.user_data['cash_in_report_id'] = report_id
         
         text = "💰 Внесение наличных\nВведите сумму наличных, поступивших за смену:"
@@ -193,8 +199,8 @@ class ReportWatchManager:
     async def process_cash_in(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработать ввод прихода"""
         try:
-            cash_in = int(update.message.text)
-            if cash_in < 0:
+            cash_in = Money.parse(update.message.text)
+            if cash_in.kopecks < 0:
                 await update.message.reply_text("❌ Сумма не может быть отрицательной")
                 return
             
@@ -204,7 +210,7 @@ class ReportWatchManager:
                 return
             
             # Обновляем приход
-            success = self.db.update_cash_in(report_id, cash_in)
+            success = await self.db.update_cash_in(report_id, cash_in)
             
             if success:
                 # Очищаем контекст
@@ -233,6 +239,7 @@ class ReportWatchManager:
             message = update.message
         
         context.user_data['adding_online'] = True
+        flow_engine.start(context, Flows.REPORT, FlowStates.CASH_ONLINE)
         context.user_data['online_report_id'] = report_id
         
         text = "💳 Безналичные поступления\nВведите сумму безналичных платежей за смену:"
@@ -245,8 +252,8 @@ class ReportWatchManager:
     async def process_online_cash(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработать ввод безналичных"""
         try:
-            cash_online = int(update.message.text)
-            if cash_online < 0:
+            cash_online = Money.parse(update.message.text)
+            if cash_online.kopecks < 0:
                 await update.message.reply_text("❌ Сумма не может быть отрицательной")
                 return
             
@@ -256,7 +263,7 @@ class ReportWatchManager:
                 return
             
             # Обновляем безналичные
-            success = self.db.update_cash_online(report_id, cash_online)
+            success = await self.db.update_cash_online(report_id, cash_online)
             
             if success:
                 # Очищаем контекст
@@ -281,7 +288,7 @@ class ReportWatchManager:
             if not report_id:
                 # Пытаемся найти активный отчет пользователя
                 user_id = update.effective_user.id
-                active_report = self.db.get_active_report(user_id)
+                active_report = await self.db.get_active_report(user_id)
                 if active_report:
                     report_id = active_report['report_id']
                 else:
@@ -301,7 +308,7 @@ class ReportWatchManager:
         await query.answer()
         
         # Закрываем отчет
-        success = self.db.close_report(report_id, "Смена закрыта")
+        success = await self.db.close_report(report_id, "Смена закрыта")
         
         if success:
             # Очищаем активный отчет из контекста
@@ -328,7 +335,7 @@ class ReportWatchManager:
             message_obj = update.message
         
         # Получаем отчеты пользователя
-        reports = self.db.get_user_reports(user_id, limit=5)
+        reports = await self.db.get_user_reports(user_id, limit=5)
         
         if not reports:
             keyboard = [
@@ -399,7 +406,7 @@ class ReportWatchManager:
         await query.answer()
         
         # Получаем сводный отчет
-        summary = self.db.get_daily_report()
+        summary = await self.db.get_daily_report()
         
         message = "📈 СВОДНЫЙ ОТЧЕТ ЗА ДЕНЬ\n\n"
         message += f"📊 Количество смен: {summary['report_count']}\n"
@@ -502,14 +509,14 @@ class ReportWatchManager:
     async def _show_report_message(self, update: Update, report_id: int, is_message: bool = False):
         """Вспомогательная функция для показа отчета (работает и с сообщениями и с callback)"""
         # Получаем данные отчета
-        report = self.db.get_report_by_id(report_id)
+        report = await self.db.get_report_by_id(report_id)
         if not report:
             if is_message:
                 await update.message.reply_text("❌ Отчет не найден")
             return
         
         # Получаем расходы
-        expenses = self.db.get_report_expenses(report_id)
+        expenses = await self.db.get_report_expenses(report_id)
         
         # Формируем сообщение
         message = "📊 ОТЧЕТ О СМЕНЕ\n\n"
@@ -2,16 +2,21 @@ import sqlite3
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from database import sqlite_connection
+from database import sqlite_connection, sqlite_read_connection, db_read, db_write
+from utils.money import Money, money_row
 
 logger = logging.getLogger(__name__)
 
+# Денежные итоги get_daily_report
+DAILY_MONEY_FIELDS = ('total_morning', 'total_wasted', 'total_in', 'total_online', 'total_rest')
+
 class ReportWatchDB:
     """Класс для работы с отчетами о закрытии смены"""
     
     @staticmethod
+    @db_write
     def create_report(user_id: int, username: str, phone_number: str, 
-                     cash_morning: int, description: str = None) -> Optional[int]:
+                     cash_morning: Money, description: str = None) -> Optional[int]:
         """
         Создать новый отчет о смене
         
@@ -53,7 +58,8 @@ class ReportWatchDB:
             return None
     
     @staticmethod
-    def add_expense(report_id: int, amount: int, description: str) -> bool:
+    @db_write
+    def add_expense(report_id: int, amount: Money, description: str) -> bool:
         """
         Добавить запись расхода
         
@@ -93,7 +99,8 @@ class ReportWatchDB:
             return False
     
     @staticmethod
-    def update_cash_in(report_id: int, cash_in: int) -> bool:
+    @db_write
+    def update_cash_in(report_id: int, cash_in: Money) -> bool:
         """
         Обновить приход наличных
         
@@ -125,7 +132,8 @@ class ReportWatchDB:
             return False
     
     @staticmethod
-    def update_cash_online(report_id: int, cash_online: int) -> bool:
+    @db_write
+    def update_cash_online(report_id: int, cash_online: Money) -> bool:
         """
         Обновить безналичный приход
         
@@ -156,6 +164,7 @@ class ReportWatchDB:
             return False
     
     @staticmethod
+    @db_write
     def close_report(report_id: int, description: str = None) -> bool:
         """
         Закрыть отчет (деактивировать)
@@ -188,6 +197,7 @@ class ReportWatchDB:
             return False
     
     @staticmethod
+    @db_read
     def get_active_report(user_id: int) -> Optional[Dict[str, Any]]:
         """
         Получить активный отчет пользователя
@@ -199,7 +209,7 @@ class ReportWatchDB:
             Словарь с данными отчета или None
         """
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -209,16 +219,14 @@ class ReportWatchDB:
                     LIMIT 1
                 ''', (user_id,))
                 
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
+                return money_row(cursor.fetchone())
                 
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения активного отчета: {e}")
             return None
     
     @staticmethod
+    @db_read
     def get_report_expenses(report_id: int) -> List[Dict[str, Any]]:
         """
         Получить все расходы отчета
@@ -230,7 +238,7 @@ class ReportWatchDB:
             Список расходов
         """
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -239,13 +247,14 @@ class ReportWatchDB:
                     ORDER BY created_at
                 ''', (report_id,))
                 
-                return [dict(row) for row in cursor.fetchall()]
+                return [money_row(row) for row in cursor.fetchall()]
                 
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения расходов: {e}")
             return []
     
     @staticmethod
+    @db_read
     def get_user_reports(user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Получить последние отчеты пользователя
@@ -258,7 +267,7 @@ class ReportWatchDB:
             Список отчетов
         """
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -270,13 +279,14 @@ class ReportWatchDB:
                     LIMIT ?
                 ''', (user_id, limit))
                 
-                return [dict(row) for row in cursor.fetchall()]
+                return [money_row(row) for row in cursor.fetchall()]
                 
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения отчетов пользователя: {e}")
             return []
     
     @staticmethod
+    @db_read
     def get_report_by_id(report_id: int) -> Optional[Dict[str, Any]]:
         """
         Получить отчет по ID
@@ -288,7 +298,7 @@ class ReportWatchDB:
             Словарь с данными отчета или None
         """
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -296,16 +306,14 @@ class ReportWatchDB:
                     WHERE report_id = ?
                 ''', (report_id,))
                 
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
+                return money_row(cursor.fetchone())
                 
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения отчета по ID: {e}")
             return None
     
     @staticmethod
+    @db_write
     def update_report_field(report_id: int, field: str, value: Any) -> bool:
         """
         Обновить поле отчета
@@ -363,10 +371,12 @@ class ReportWatchDB:
             logger.error(f"Ошибка обновления поля {field}: {e}")
             return False
     
-    async def get_user_info(user_id: int) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    @db_read
+    def get_user_info(user_id: int) -> Optional[Dict[str, Any]]:
         """Получить информацию о пользователе"""
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute('''
                         SELECT u.user_id, u.username, u.phone_numb as phone_number
@@ -385,6 +395,7 @@ class ReportWatchDB:
     
 
     @staticmethod
+    @db_read
     def get_daily_report(date: str = None) -> Dict[str, Any]:
         """
         Получить сводный отчет за день
@@ -396,45 +407,27 @@ class ReportWatchDB:
             Словарь с суммарными данными
         """
         try:
-            with sqlite_connection() as conn:
+            with sqlite_read_connection() as conn:
                 cursor = conn.cursor()
                 
-                if date:
-                    cursor.execute('''
-                        SELECT 
-                            COUNT(*) as report_count,
-                            SUM(cash_morning) as total_morning,
-                            SUM(cash_wasted) as total_wasted,
-                            SUM(cash_in) as total_in,
-                            SUM(cash_online) as total_online,
-                            SUM(cash_rest) as total_rest
-                        FROM report_watchend 
-                        WHERE DATE(created_at) = ? AND is_active = 0
-                    ''', (date,))
-                else:
-                    cursor.execute('''
-                        SELECT 
-                            COUNT(*) as report_count,
-                            SUM(cash_morning) as total_morning,
-                            SUM(cash_wasted) as total_wasted,
-                            SUM(cash_in) as total_in,
-                            SUM(cash_online) as total_online,
-                            SUM(cash_rest) as total_rest
-                        FROM report_watchend 
-                        WHERE DATE(created_at) = DATE('now') AND is_active = 0
-                    ''')
-                
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return {
-                    'report_count': 0,
-                    'total_morning': 0,
-                    'total_wasted': 0,
-                    'total_in': 0,
-                    'total_online': 0,
-                    'total_rest': 0
-                }
+                # Диапазон по created_at вместо DATE(created_at) = ?, чтобы работал индекс
+                day = date or 'now'
+                cursor.execute('''
+                    SELECT 
+                        COUNT(*) as report_count,
+                        COALESCE(SUM(cash_morning), 0) as total_morning,
+                        COALESCE(SUM(cash_wasted), 0) as total_wasted,
+                        COALESCE(SUM(cash_in), 0) as total_in,
+                        COALESCE(SUM(cash_online), 0) as total_online,
+                        COALESCE(SUM(cash_rest), 0) as total_rest
+                    FROM report_watchend 
+                    WHERE created_at >= DATE(?)
+                      AND created_at < DATE(?, '+1 day')
+                      AND is_active = 0
+                ''', (day, day))
+                
+                # Суммы целых копеек - точные
+                return money_row(cursor.fetchone(), DAILY_MONEY_FIELDS)
                 
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения дневного отчета: {e}")
@@ -7,9 +7,10 @@ from typing import Dict, Any, Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from handlers.admin_roles_class import role_manager, Permission, UserRole
+from handlers.admin_roles_class import role_manager, Permission, UserRole, ROLE_BITS, ALL_ROLES_MASK
 from config.buttons import Buttons
 from config.permission_menus import MenuConfig
+from utils.request_context import current_request
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,7 @@ class Router:
     
     def __init__(self):
         self.routes: Dict[str, Dict[str, Any]] = {}
+        self._menu_configs = self._merge_menu_configs()
         self._setup_routes()
     
     def _setup_routes(self):
@@ -72,18 +74,27 @@ class Router:
         self._add_route(Buttons.LEVELS_SETTINGS, "levels_settings_menu")
         self._add_route(Buttons.PROGRAMS_MANAGEMENT, "programs_management_menu")
         self._add_route(Buttons.PROMOCODES, "promocodes_menu")
+        self._add_route(Buttons.DEL_CUSTOMER_BONUS, "redeem_bonuses")
         
         # ========== ПРОГРАММА ЛОЯЛЬНОСТИ ==========
         self._add_route(Buttons.ADD_PROGRAM, "create_program_handler")
         self._add_route(Buttons.LIST_PROGRAM, "list_programs_handler")
         self._add_route(Buttons.ANALITIC_PROGRAM, "program_statistics_handler")
         self._add_route(Buttons.SEARCH_PROGRAM, "search_program_handler")
+        self._add_route(Buttons.SIMULATE_PROGRAM, "simulate_program")
+        self._add_route(Buttons.ASSIGN_PROGRAM, "assign_bonus_program")
         self._add_route(Buttons.ADD_LEVELS, "create_level_handler") 
         self._add_route(Buttons.LIST_LEVELS, "list_levels_handler")  
         self._add_route(Buttons.EDIT_LEVEL, "edit_level_handler") 
         self._add_route(Buttons.STATICS_LEVELS, "level_statistics_handler")
         self._add_route(Buttons.DELETE_LEVELS, "delete_level_handler")
 
+        # ========== ПРОМОКОДЫ ==========
+        self._add_route(Buttons.PROMO_LIST, "list_promocodes")
+        self._add_route(Buttons.PROMO_ADD, "create_promocode")
+        self._add_route(Buttons.PROMO_ACTIVATE, "activate_promocode")
+        self._add_route(Buttons.PROMO_STAT, "promocode_statistics")
+
         # Подменю администрирования
         self._add_route(Buttons.USER_MANAGEMENT, "manage_users_menu")
         self._add_route(Buttons.ROLE_MANAGEMENT, "manage_roles_menu")
@@ -122,6 +133,7 @@ class Router:
         # Поиск клиента
         self._add_route(Buttons.SEARCH_BY_CARD, "search_by_card")
         self._add_route(Buttons.SEARCH_BY_PHONE, "search_by_phone")
+        self._add_route(Buttons.SEARCH_BY_PHONE_SUFFIX, "search_by_phone_suffix")
         self._add_route(Buttons.SEARCH_BY_NAME, "search_by_name")
         self._add_route(Buttons.SEARCH_BY_ID, "search_by_id")
         self._add_route(Buttons.PURCHASE_HISTORY, "purchase_history")
@@ -148,14 +160,16 @@ class Router:
     
     def _add_route(self, button_text: str, handler_name: str):
         """Добавить маршрут для кнопки"""
+        config = self._get_menu_config(button_text)
         self.routes[button_text] = {
             'handler': handler_name,
-            'config': self._get_menu_config(button_text)
+            'config': config,
+            'roles_mask': self._compile_access(config)
         }
     
-    def _get_menu_config(self, button_text: str) -> Optional[Dict[str, Any]]:
-        """Получить конфигурацию для кнопки из MenuConfig"""
-        # Проверяем все категории меню
+    @staticmethod
+    def _merge_menu_configs() -> Dict[str, Any]:
+        """Собрать конфигурации всех меню в один словарь (первое вхождение кнопки главнее)"""
         menus = [
             MenuConfig.MAIN_MENU,
             MenuConfig.INVENTORY_SUBMENU,
@@ -167,48 +181,77 @@ class Router:
             MenuConfig.BACK_BUTTONS
         ]
         
+        merged = {}
         for menu in menus:
-            if button_text in menu:
-                return menu[button_text]
-        
-        return None
+            for button_text, config in menu.items():
+                merged.setdefault(button_text, config)
+        return merged
     
-    async def check_permission(self, user_id: int, button_text: str) -> bool:
-        """Проверить права доступа для кнопки"""
-        config = self.routes.get(button_text, {}).get('config')
-        
+    def _get_menu_config(self, button_text: str) -> Optional[Dict[str, Any]]:
+        """Получить конфигурацию для кнопки из MenuConfig"""
+        return self._menu_configs.get(button_text)
+    
+    @staticmethod
+    def _config_allows(config: Any, role: UserRole) -> bool:
+        """Разрешает ли конфигурация кнопки доступ указанной роли"""
         if config is None:
             return True  # Нет ограничений
         
         # Если конфиг - это Permission
         if isinstance(config, Permission):
-            return await role_manager.has_permission(user_id, config)
+            return role_manager.role_has_permission(role, config)
         
         # Если конфиг - это UserRole (только для определенной роли)
         if isinstance(config, UserRole):
-            user_role = await role_manager.get_user_role(user_id)
-            return user_role == config
+            return role == config
         
         # Если конфиг - это словарь
         if isinstance(config, dict):
             if 'role' in config:
-                user_role = await role_manager.get_user_role(user_id)
-                invert = config.get('invert', False)
-                
-                if invert:
-                    return user_role != config['role']
-                else:
-                    return user_role == config['role']
+                if config.get('invert', False):
+                    return role != config['role']
+                return role == config['role']
             
             if 'permission' in config:
-                has_permission = await role_manager.has_permission(user_id, config['permission'])
-                if 'role' in config:
-                    user_role = await role_manager.get_user_role(user_id)
-                    return has_permission and user_role == config['role']
-                return has_permission
+                return role_manager.role_has_permission(role, config['permission'])
         
         return False
     
+    def _compile_access(self, config: Any) -> int:
+        """Скомпилировать правило доступа в битовую маску допустимых ролей"""
+        mask = 0
+        for role in UserRole:
+            if self._config_allows(config, role):
+                mask |= ROLE_BITS[role]
+        return mask
+    
+    def is_allowed(self, role: UserRole, button_text: str) -> bool:
+        """Проверить доступ роли к кнопке (одна битовая операция)"""
+        route = self.routes.get(button_text)
+        if route is None:
+            return True
+        return bool(route['roles_mask'] & ROLE_BITS[role])
+    
+    async def check_permission(self, user_id: int, button_text: str) -> bool:
+        """Проверить права доступа для кнопки"""
+        route = self.routes.get(button_text)
+        if route is None:
+            return True  # Нет ограничений
+        
+        mask = route['roles_mask']
+        if mask == ALL_ROLES_MASK:
+            # Кнопка доступна всем - роль нужна, только если пользователь еще
+            # не известен: get_user_role зарегистрирует его Гостем
+            request = current_request(user_id)
+            if request is None or request.role_value is None:
+                await role_manager.get_user_role(user_id)
+            return True
+        if not mask:
+            return False
+        
+        user_role = await role_manager.get_user_role(user_id)
+        return bool(mask & ROLE_BITS[user_role])
+    
     async def route(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
                    button_text: str) -> Optional[str]:
         """Перенаправить на соответствующий обработчик"""
@@ -0,0 +1,64 @@
+"""
+Миграции схемы: перевод денежных сумм в копейки (0009) на БД, созданной до нее.
+"""
+
+import database
+from database import sqlite_connection
+from migrations.engine import MigrationEngine
+
+MONEY_MIGRATION = 9
+
+
+def _seed_legacy_db(path: str) -> None:
+    """БД со схемой до 0009 и суммами в рублях (REAL)"""
+    engine = MigrationEngine()
+    with sqlite_connection(path) as conn:
+        engine.pending(conn)  # создает schema_version
+        for migration in engine.discover():
+            if migration.version < MONEY_MIGRATION:
+                engine._apply(conn, migration)
+
+        conn.execute('''
+            INSERT INTO customers (customer_id, username, phone_number, card_number,
+                                   total_purchases, total_bonuses, available_bonuses)
+            VALUES (1, 'Анна', '+79990000001', '1000001', 123.45, 6.17, 3.5)
+        ''')
+        conn.execute('''
+            INSERT INTO customer_purchases (purchase_id, customer_id, amount, bonus_earned)
+            VALUES (1, 1, 123.45, 6.17)
+        ''')
+        conn.execute('''
+            INSERT INTO bonus_transactions (customer_id, purchase_id, bonus_amount, transaction_type)
+            VALUES (1, 1, 6.17, 'earned')
+        ''')
+        conn.commit()
+
+
+def test_money_migration_converts_amounts_once(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    _seed_legacy_db(path)
+
+    engine = MigrationEngine()
+    try:
+        applied = engine.migrate(db_path=path) + engine.migrate(online=True, db_path=path)
+        assert applied > 0
+        # Повторный запуск ничего не применяет и суммы не меняет
+        assert engine.migrate(db_path=path) == 0
+        assert engine.migrate(online=True, db_path=path) == 0
+
+        with sqlite_connection(path) as conn:
+            customer = conn.execute(
+                "SELECT total_purchases, total_bonuses, available_bonuses FROM customers WHERE customer_id = 1"
+            ).fetchone()
+            purchase = conn.execute(
+                "SELECT amount, bonus_earned FROM customer_purchases WHERE purchase_id = 1"
+            ).fetchone()
+            transaction = conn.execute(
+                "SELECT bonus_amount FROM bonus_transactions WHERE purchase_id = 1"
+            ).fetchone()
+    finally:
+        database.get_pool(path).close_all()
+
+    assert tuple(customer) == (12345, 617, 350)
+    assert tuple(purchase) == (12345, 617)
+    assert transaction['bonus_amount'] == 617
@@ -0,0 +1,29 @@
+"""
+Маршруты кнопок: списание бонусов доступно тем, кто начисляет покупки.
+"""
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from config.buttons import Buttons
+from handlers.admin_roles_class import UserRole, role_manager
+from router import router
+
+
+@pytest.mark.parametrize('role', [UserRole.ADMIN, UserRole.MANAGER, UserRole.BARISTA])
+def test_staff_can_open_redemption(role):
+    assert router.is_allowed(role, Buttons.DEL_CUSTOMER_BONUS)
+    # Проверка в обработчике redeem_bonuses совпадает с маршрутом
+    assert role_manager.can_manage_customers(role)
+
+
+@pytest.mark.parametrize('role', [UserRole.VISITOR, UserRole.GUEST])
+def test_customers_cannot_open_redemption(role):
+    assert not router.is_allowed(role, Buttons.DEL_CUSTOMER_BONUS)
+    assert not role_manager.can_manage_customers(role)
+
+
+def test_redemption_route_matches_handler_for_every_role():
+    for role in UserRole:
+        assert router.is_allowed(role, Buttons.DEL_CUSTOMER_BONUS) == role_manager.can_manage_customers(role)
@@ -0,0 +1,56 @@
+"""
+PerUserUpdateProcessor: очередь одного пользователя не задерживает других.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from utils.update_processor import PerUserUpdateProcessor
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    # Обновление в тесте - (пользователь, номер)
+    monkeypatch.setattr(PerUserUpdateProcessor, '_update_key',
+                        staticmethod(lambda update: ('user', update[0])))
+    return PerUserUpdateProcessor(max_concurrent_updates=2)
+
+
+def test_user_backlog_does_not_block_other_users(processor):
+    async def scenario():
+        release = asyncio.Event()
+        order = []
+
+        async def handler(update):
+            if update[0] == 'A':
+                await release.wait()
+            order.append(update)
+
+        # Пользователь A быстро нажимает кнопки: очередь больше лимита
+        backlog = [
+            asyncio.create_task(processor.process_update(('A', n), handler(('A', n))))
+            for n in range(8)
+        ]
+        await asyncio.sleep(0)
+
+        metrics = processor.get_metrics()
+        assert metrics['active'] == 1
+        assert metrics['waiting'] == 7
+        assert metrics['user_queue_now'] == 8
+
+        # Пользователь B обслуживается, пока A занят
+        await asyncio.wait_for(
+            processor.process_update(('B', 0), handler(('B', 0))), timeout=1
+        )
+        assert order == [('B', 0)]
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*backlog), timeout=1)
+        # Обновления одного пользователя - строго по порядку
+        assert order[1:] == [('A', n) for n in range(8)]
+        assert processor.get_metrics()['waiting'] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,332 @@
+"""
+Проверка планов запросов репозиториев.
+
+Собирает все SQL-запросы из классов репозиториев (строковые литералы в вызовах
+.execute()), создает синтетическую БД по миграциям и выполняет для каждого
+запроса EXPLAIN QUERY PLAN. Завершается с кодом 1, если запрос к "горячей"
+таблице делает полный SCAN и не внесен в ALLOWED_SCANS.
+
+f-строки, собранные только из констант модуля, подставляются и проверяются
+как обычные запросы. Запросы, собранные из переменных (условия keyset-
+пагинации, правила отбора), проверяются по представительным вариантам из
+DYNAMIC_VARIANTS; остальные динамические запросы перечисляются в отчете.
+
+Запуск из корня проекта:
+    python tools/query_plans.py [-v]
+"""
+
+import os
+import re
+import ast
+import sys
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Файлы, в которых живут запросы к БД
+SOURCE_GLOBS = (
+    'rep_*/*.py',
+    'handlers/*_class.py',
+    'handlers/reminder_manager.py',
+)
+
+# Таблицы, которые растут вместе с бизнесом: полный проход по ним недопустим
+HOT_TABLES = {
+    'users', 'user_roles', 'customers', 'customer_purchases', 'bonus_transactions',
+    'bonus_levels', 'inventory_lists', 'inventory_items', 'product_catalog',
+    'report_watchend', 'report_expenses', 'promo_codes', 'promo_redemptions',
+}
+
+# Осознанные полные проходы: (файл, функция) -> причина
+ALLOWED_SCANS = {
+    ('rep_customer/customer_manager_class.py', 'get_customer_statistics'):
+        "агрегаты по всем клиентам для админской статистики",
+    ('rep_bonus/bonus_ledger_class.py', '_drift'):
+        "ночная сверка балансов всех клиентов с журналом",
+    ('rep_bonus/bonus_promo_class.py', 'has_active_codes'):
+        "LIMIT 1 по частичному индексу включенных кодов - первая же запись",
+    ('rep_bonus/bonus_promo_class.py', 'list_codes'):
+        "последние одиночные коды: обратный проход по rowid до LIMIT",
+    ('rep_bonus/bonus_promo_class.py', 'get_statistics'):
+        "агрегаты по всем промокодам для админской статистики",
+    ('handlers/admin_users_class.py', 'get_all_users'):
+        "полный список пользователей для администратора",
+    ('handlers/admin_users_class.py', 'get_users_without_visitors'):
+        "полный список сотрудников для администратора",
+}
+
+# Страница списка клиентов: колонки и условие keyset-пагинации по CUSTOMER_SORTS
+_CUSTOMER_PAGE = '''
+    SELECT c.customer_id, c.user_id, c.username, c.phone_number, c.card_number,
+           c.registration_date, c.is_active, c.total_purchases, c.available_bonuses
+    FROM customers c
+    WHERE c.is_active = 1 {condition}
+    ORDER BY {order}
+    LIMIT ?
+'''
+
+# Страница истории покупок клиента
+_HISTORY_PAGE = '''
+    WITH page AS (
+        SELECT purchase_id, purchase_date, amount, bonus_earned, description
+        FROM customer_purchases
+        WHERE customer_id = ? {condition}
+        ORDER BY purchase_date DESC, purchase_id DESC
+        LIMIT ?
+    )
+    SELECT p.purchase_id, p.purchase_date, p.amount, p.bonus_earned, p.description,
+           bt.transaction_type, bt.bonus_amount, bt.description AS bonus_description
+    FROM page p
+    LEFT JOIN bonus_transactions bt ON bt.purchase_id = p.purchase_id
+    ORDER BY p.purchase_date DESC, p.purchase_id DESC, bt.transaction_id
+'''
+
+# Условия BulkProgramAssigner._where для каждого вида правила
+_ASSIGN_WHERE = (
+    "is_active = 1 AND bonus_program_id IS NOT ? AND bonus_program_id IS NULL",
+    "is_active = 1 AND bonus_program_id IS NOT ? AND bonus_program_id = ?",
+    "is_active = 1 AND bonus_program_id IS NOT ? AND bonus_program_id = ? AND total_purchases >= ?"
+    " AND total_purchases < ?",
+    "is_active = 1 AND bonus_program_id IS NOT ? AND registration_date >= ? AND registration_date < ?",
+)
+
+# Представительные варианты запросов, собранных из переменных: (файл, функция) -> запросы
+DYNAMIC_VARIANTS = {
+    ('rep_customer/customer_manager_class.py', 'get_customers_page'): tuple(
+        _CUSTOMER_PAGE.format(condition=condition, order=order)
+        for condition, order in (
+            ("", "c.customer_id DESC"),
+            ("AND (c.customer_id) < (?)", "c.customer_id DESC"),
+            ("AND (c.total_purchases, c.customer_id) < (?, ?)", "c.total_purchases DESC, c.customer_id DESC"),
+            ("AND (c.total_purchases, c.customer_id) > (?, ?)", "c.total_purchases ASC, c.customer_id ASC"),
+            ("AND (c.username, c.customer_id) > (?, ?)", "c.username ASC, c.customer_id ASC"),
+            ("AND (c.username, c.customer_id) >= (?, ?)", "c.username ASC, c.customer_id ASC"),
+        )
+    ),
+    ('rep_customer/customer_history_class.py', 'get_history_page'): (
+        _HISTORY_PAGE.format(condition=""),
+        _HISTORY_PAGE.format(condition="AND (purchase_date, purchase_id) < (?, ?)"),
+    ),
+    ('rep_bonus/bonus_assign_class.py', 'preview'): tuple(
+        f"SELECT COUNT(*) FROM customers WHERE {where}" for where in _ASSIGN_WHERE
+    ),
+    ('rep_bonus/bonus_assign_class.py', 'assign_batch'): tuple(
+        f"UPDATE customers SET bonus_program_id = ? WHERE customer_id > ? AND customer_id <= ? AND {where}"
+        for where in _ASSIGN_WHERE
+    ),
+    ('rep_bonus/bonus_simulator_class.py', '_top_customers'): (
+        "SELECT customer_id, username, card_number FROM customers WHERE customer_id IN (?, ?, ?)",
+    ),
+}
+
+SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+
+class Statement:
+    """SQL-запрос, найденный в исходниках"""
+
+    def __init__(self, path: str, function: str, lineno: int, sql: str, variant: int = None):
+        self.path = path
+        self.function = function
+        self.lineno = lineno
+        self.sql = sql
+        self.variant = variant
+
+    @property
+    def location(self) -> str:
+        if self.variant is not None:
+            return f"{self.path}:{self.lineno} ({self.function}, вариант {self.variant})"
+        return f"{self.path}:{self.lineno} ({self.function})"
+
+
+class _ExecuteCollector(ast.NodeVisitor):
+    def __init__(self, path: str, constants: dict):
+        self.path = path
+        self.constants = constants
+        self.functions = []
+        self.statements = []
+        self.skipped = []
+
+    def _render(self, node) -> str:
+        """f-строка из констант модуля -> текст запроса (None, если есть переменные)"""
+        if not isinstance(node, ast.JoinedStr):
+            return None
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            elif (isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name)
+                  and value.value.id in self.constants and value.conversion == -1
+                  and value.format_spec is None):
+                parts.append(self.constants[value.value.id])
+            else:
+                return None
+        return ''.join(parts)
+
+    def _visit_function(self, node):
+        self.functions.append(node.name)
+        self.generic_visit(node)
+        self.functions.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr in ('execute', 'executemany') and node.args:
+            function = self.functions[-1] if self.functions else '<module>'
+            arg = node.args[0]
+            rendered = self._render(arg)
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                self.statements.append(Statement(self.path, function, node.lineno, arg.value))
+            elif rendered is not None:
+                self.statements.append(Statement(self.path, function, node.lineno, rendered))
+            else:
+                # Динамически собранный SQL (f-строки, переменные) статически не проверить
+                self.skipped.append(Statement(self.path, function, node.lineno, ast.unparse(arg)))
+        self.generic_visit(node)
+
+
+def _module_constants(tree: ast.Module) -> dict:
+    """Строковые константы уровня модуля (NAME = '...')"""
+    constants = {}
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+            constants[node.targets[0].id] = node.value.value
+    return constants
+
+
+def expand_variants(skipped):
+    """Динамические запросы -> их варианты из DYNAMIC_VARIANTS и запросы без вариантов"""
+    variants, unchecked, seen = [], [], set()
+    for statement in skipped:
+        key = (statement.path, statement.function)
+        if key not in DYNAMIC_VARIANTS:
+            unchecked.append(statement)
+            continue
+        seen.add(key)
+        for number, sql in enumerate(DYNAMIC_VARIANTS[key], 1):
+            variants.append(Statement(statement.path, statement.function, statement.lineno, sql, number))
+    return variants, unchecked, sorted(set(DYNAMIC_VARIANTS) - seen)
+
+
+def collect_statements(root: Path = ROOT):
+    """Собирает SQL-запросы из исходников репозиториев"""
+    statements, skipped = [], []
+    paths = sorted({p for pattern in SOURCE_GLOBS for p in root.glob(pattern)})
+    for path in paths:
+        relative = path.relative_to(root).as_posix()
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        collector = _ExecuteCollector(relative, _module_constants(tree))
+        collector.visit(tree)
+        statements.extend(collector.statements)
+        skipped.extend(collector.skipped)
+    return statements, skipped
+
+
+def build_synthetic_db(db_path: str) -> None:
+    """Создает схему по миграциям (включая онлайн-индексы) и собирает статистику"""
+    from migrations import run_migrations, run_online_migrations
+
+    run_migrations(db_path)
+    run_online_migrations(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def explain(conn: sqlite3.Connection, sql: str):
+    """Возвращает строки плана запроса"""
+    names = re.findall(r'(?<![:\w]):(\w+)', sql)
+    params = dict.fromkeys(names) if names else (None,) * sql.count('?')
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check(verbose: bool = False) -> int:
+    statements, skipped = collect_statements()
+    variants, unchecked, stale_variants = expand_variants(skipped)
+    statements += variants
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'plans.db')
+        build_synthetic_db(db_path)
+
+        # Закрываем соединения пула до удаления временного каталога
+        from database import get_pool
+        get_pool(db_path).close_all()
+
+        conn = sqlite3.connect(db_path)
+        failures, allowed, errors = [], [], []
+
+        for statement in statements:
+            sql = statement.sql.strip()
+            if not re.match(r'(?is)^(SELECT|UPDATE|DELETE|INSERT|WITH)\b', sql):
+                continue  # DDL и служебные команды
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error as e:
+                errors.append((statement, str(e)))
+                continue
+
+            scans = []
+            for detail in plan:
+                match = SCAN_RE.match(detail)
+                if match and _alias_table(sql, match.group(1)) in HOT_TABLES:
+                    scans.append(detail)
+
+            if verbose:
+                print(f"{statement.location}\n    " + "\n    ".join(plan))
+
+            if scans:
+                reason = ALLOWED_SCANS.get((statement.path, statement.function))
+                (allowed if reason else failures).append((statement, scans, reason))
+
+        conn.close()
+
+    print(f"Проверено запросов: {len(statements)} (вариантов динамических: {len(variants)}), "
+          f"динамических без вариантов: {len(unchecked)}")
+    for statement in unchecked:
+        print(f"  [без проверки] {statement.location}")
+    for path, function in stale_variants:
+        print(f"  [лишнее]    {path} ({function}): нет динамического запроса, уберите из DYNAMIC_VARIANTS")
+    for statement, scans, reason in allowed:
+        print(f"  [разрешено] {statement.location}: {'; '.join(scans)} - {reason}")
+    used = {(statement.path, statement.function) for statement, _, _ in allowed}
+    for path, function in sorted(set(ALLOWED_SCANS) - used):
+        print(f"  [лишнее]    {path} ({function}): запрос больше не делает SCAN, уберите из ALLOWED_SCANS")
+    for statement, message in errors:
+        print(f"  [ошибка]    {statement.location}: {message}")
+    for statement, scans, _ in failures:
+        print(f"  [SCAN]      {statement.location}: {'; '.join(scans)}")
+
+    if failures:
+        print(f"\n❌ Полный проход по горячим таблицам: {len(failures)}")
+        return 1
+
+    print("\n✅ Все запросы к горячим таблицам используют индексы")
+    return 0
+
+
+def _alias_table(sql: str, alias: str) -> str:
+    """Находит имя таблицы по псевдониму (FROM customers c -> customers)"""
+    match = re.search(rf'\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?{re.escape(alias)}\b', sql, re.I)
+    return match.group(1) if match else alias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка планов SQL-запросов")
+    parser.add_argument('-v', '--verbose', action='store_true', help="печатать план каждого запроса")
+    args = parser.parse_args()
+    sys.exit(check(verbose=args.verbose))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Сверка бонусных балансов клиентов с журналом bonus_transactions без бота.
+
+Накапливает новые записи журнала (с отметки прошлой сверки), выводит
+клиентов с расхождениями и при --repair приводит их балансы к журналу.
+Завершается с кодом 1, если остались неисправленные расхождения.
+
+Запуск из корня проекта:
+    python tools/reconcile_ledger.py [--db labirint.db] [--repair] [--rebuild] [--chunk 5000]
+"""
+
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import database
+from database import close_all_connections
+from migrations import run_migrations
+from rep_bonus.bonus_ledger_class import bonus_ledger_reconciler, LEDGER_CHUNK_SIZE
+
+
+def print_report(report: dict) -> None:
+    print(f"Новых записей журнала: {report['processed']}")
+    print(f"Расхождений: {report['drift_count']}, исправлено: {report['repaired']}")
+    print(f"Время: {report['duration']:.2f} сек")
+
+    if report['drift']:
+        print(f"\n{'клиент':>10}{'всего':>14}{'по журналу':>14}{'доступно':>14}{'по журналу':>14}")
+        for d in report['drift']:
+            print(f"{d['customer_id']:>10}{d['total_bonuses']:>14}{d['ledger_total']:>14}"
+                  f"{d['available_bonuses']:>14}{d['ledger_available']:>14}")
+        if report['drift_count'] > len(report['drift']):
+            print(f"... и еще {report['drift_count'] - len(report['drift'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка бонусных балансов с журналом")
+    parser.add_argument('--db', help="путь к файлу БД (по умолчанию DB_PATH)")
+    parser.add_argument('--repair', action='store_true', help="исправить балансы по журналу")
+    parser.add_argument('--rebuild', action='store_true', help="пройти журнал заново с начала")
+    parser.add_argument('--chunk', type=int, default=LEDGER_CHUNK_SIZE, help="записей журнала в транзакции")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    if args.db:
+        database.DB_PATH = args.db
+
+    try:
+        run_migrations()
+        report = bonus_ledger_reconciler.reconcile(
+            repair=args.repair, rebuild=args.rebuild, chunk_size=args.chunk
+        )
+    finally:
+        close_all_connections()
+
+    print_report(report)
+    sys.exit(1 if report['drift_count'] > report['repaired'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Симуляция изменения уровней бонусной программы на истории покупок.
+
+Показывает, сколько бонусов было бы начислено за период по предлагаемой
+таблице уровней по сравнению с действующей, распределение клиентов
+по уровням и клиентов с наибольшим изменением.
+
+Запуск из корня проекта:
+    python tools/simulate_bonus_program.py --program 1 \\
+        --level "Бронза;5000;4" --level "Серебро;10000;5" [--base-percent 3] \\
+        [--days 365] [--top 10] [--db labirint.db]
+Без --level выводится действующая таблица уровней программы.
+"""
+
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import database
+from database import close_all_connections
+from migrations import run_migrations
+from rep_bonus.bonus_simulator_class import (
+    bonus_simulator, SimulationLevels, SIMULATION_DAYS, SIMULATION_TOP
+)
+
+
+def print_report(report: dict) -> None:
+    print(f"Период: {report['days']} дн., клиентов: {report['customers']}, покупок: {report['purchases']}")
+    print(f"Бонусы по действующей таблице:   {report['current_bonus']:>14} руб.")
+    print(f"Бонусы по предлагаемой таблице:  {report['proposed_bonus']:>14} руб.")
+    print(f"Изменение обязательств:          {report['delta']:>14} руб.")
+
+    print("\nКлиентов по уровням (действующая -> предлагаемая):")
+    current = dict(report['levels_current'])
+    proposed = dict(report['levels_proposed'])
+    for name in dict.fromkeys([name for name, _ in report['levels_current'] + report['levels_proposed']]):
+        print(f"  {name:<20}{current.get(name, 0):>10}{proposed.get(name, 0):>10}")
+
+    if report['top']:
+        print(f"\n{'клиент':>10}  {'карта':<12}{'сейчас':>12}{'станет':>12}{'разница':>12}")
+        for customer in report['top']:
+            print(f"{customer['customer_id']:>10}  {customer['card_number'] or '':<12}"
+                  f"{customer['current_bonus']:>12}{customer['proposed_bonus']:>12}{customer['delta']:>12}")
+
+    print(f"\nВремя: {report['duration']:.2f} сек")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Симуляция изменения уровней бонусной программы")
+    parser.add_argument('--program', type=int, required=True, help="ID бонусной программы")
+    parser.add_argument('--level', action='append', default=[],
+                        help="уровень 'название;порог, руб.;процент' (можно несколько)")
+    parser.add_argument('--base-percent', help="базовый процент (по умолчанию - текущий программы)")
+    parser.add_argument('--days', type=int, default=SIMULATION_DAYS, help="период истории, дней")
+    parser.add_argument('--top', type=int, default=SIMULATION_TOP, help="сколько клиентов показать")
+    parser.add_argument('--db', help="путь к файлу БД (по умолчанию DB_PATH)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    if args.db:
+        database.DB_PATH = args.db
+
+    try:
+        run_migrations()
+        current = bonus_simulator.current_levels(args.program)
+
+        if not args.level:
+            print("Действующая таблица уровней:")
+            print('\n'.join(current.lines()))
+            return
+
+        lines = args.level + [f"база; {args.base_percent or current.base_percent}"]
+        try:
+            proposed = SimulationLevels.parse(lines)
+        except ValueError as e:
+            sys.exit(f"Ошибка: {e}")
+
+        report = bonus_simulator.simulate(args.program, proposed, days=args.days, top=args.top)
+    finally:
+        close_all_connections()
+
+    print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# utils/flow_engine.py
+"""
+Диспетчер пошаговых процессов (flow).
+
+Каждый процесс регистрирует именованные состояния и их обработчики. В user_data
+хранится одна пара active_flow/flow_state, поэтому выбор обработчика для
+текстового сообщения - один поиск в словаре, а не перебор флагов.
+
+Процесс завершается:
+- явно через finish();
+- когда обработчик удалил все данные процесса из user_data (data_keys);
+- по таймауту бездействия.
+При завершении и при запуске другого процесса данные прежнего вытесняются.
+"""
+
+import time
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_FLOW_KEY = 'active_flow'
+FLOW_STATE_KEY = 'flow_state'
+FLOW_TOUCHED_KEY = 'flow_touched_at'
+
+# Время бездействия (сек), после которого процесс считается брошенным
+DEFAULT_FLOW_TIMEOUT = 30 * 60
+
+StateHandler = Callable[..., Awaitable]
+
+
+class Flow:
+    """Описание процесса: обработчики состояний и ключи данных в user_data"""
+
+    def __init__(self, name: str, states: Dict[str, Optional[StateHandler]],
+                 data_keys: Iterable[str] = (), timeout: float = DEFAULT_FLOW_TIMEOUT):
+        self.name = name
+        # None - состояние ждет callback-кнопку, текст уходит в обычную маршрутизацию
+        self.states = dict(states)
+        self.data_keys = tuple(data_keys)
+        self.timeout = timeout
+
+    def is_alive(self, user_data: dict) -> bool:
+        """Данные процесса еще есть в user_data"""
+        if not self.data_keys:
+            return True
+        return any(key in user_data for key in self.data_keys)
+
+
+class FlowEngine:
+    """Реестр процессов и диспетчеризация сообщений по активному состоянию"""
+
+    def __init__(self):
+        self._flows: Dict[str, Flow] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'dispatched': 0,
+            'started': 0,
+            'finished': 0,
+            'expired': 0,
+            'stale': 0,
+        }
+
+    def register(self, name: str, states: Dict[str, Optional[StateHandler]],
+                 data_keys: Iterable[str] = (), timeout: float = DEFAULT_FLOW_TIMEOUT) -> Flow:
+        """Зарегистрировать процесс"""
+        flow = Flow(name, states, data_keys, timeout)
+        self._flows[name] = flow
+        return flow
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    # ---------- Управление состоянием пользователя ----------
+
+    def start(self, context, flow_name: str, state: str) -> None:
+        """Запустить процесс; данные другого активного процесса вытесняются"""
+        user_data = context.user_data
+        current = user_data.get(ACTIVE_FLOW_KEY)
+
+        if current and current != flow_name:
+            self._evict(user_data, current)
+
+        user_data[ACTIVE_FLOW_KEY] = flow_name
+        user_data[FLOW_STATE_KEY] = state
+        user_data[FLOW_TOUCHED_KEY] = time.monotonic()
+        self._count('started')
+
+    def set_state(self, context, state: str) -> None:
+        """Перейти в другое состояние активного процесса"""
+        user_data = context.user_data
+        if ACTIVE_FLOW_KEY not in user_data:
+            logger.warning(f"Переход в состояние {state} без активного процесса")
+            return
+
+        user_data[FLOW_STATE_KEY] = state
+        user_data[FLOW_TOUCHED_KEY] = time.monotonic()
+
+    def finish(self, context, flow_name: Optional[str] = None) -> None:
+        """Завершить активный процесс (если указан flow_name - только его)"""
+        user_data = context.user_data
+        current = user_data.get(ACTIVE_FLOW_KEY)
+
+        if current is None or (flow_name is not None and current != flow_name):
+            return
+
+        self._evict(user_data, current)
+        self._count('finished')
+
+    def get_state(self, context) -> Tuple[Optional[str], Optional[str]]:
+        """Текущая пара (процесс, состояние)"""
+        user_data = context.user_data
+        return user_data.get(ACTIVE_FLOW_KEY), user_data.get(FLOW_STATE_KEY)
+
+    def is_active(self, context, flow_name: str) -> bool:
+        return context.user_data.get(ACTIVE_FLOW_KEY) == flow_name
+
+    def _evict(self, user_data: dict, flow_name: str) -> None:
+        """Удалить пару состояния и данные процесса из user_data"""
+        flow = self._flows.get(flow_name)
+        if flow:
+            for key in flow.data_keys:
+                user_data.pop(key, None)
+
+        user_data.pop(ACTIVE_FLOW_KEY, None)
+        user_data.pop(FLOW_STATE_KEY, None)
+        user_data.pop(FLOW_TOUCHED_KEY, None)
+
+    # ---------- Диспетчеризация ----------
+
+    async def dispatch(self, update, context) -> bool:
+        """Передать сообщение обработчику активного состояния. True - сообщение обработано"""
+        user_data = context.user_data
+        flow_name = user_data.get(ACTIVE_FLOW_KEY)
+        if flow_name is None:
+            return False
+
+        flow = self._flows.get(flow_name)
+        if flow is None:
+            logger.warning(f"Неизвестный процесс {flow_name} - состояние сброшено")
+            self._evict(user_data, flow_name)
+            return False
+
+        touched = user_data.get(FLOW_TOUCHED_KEY, 0)
+        if time.monotonic() - touched > flow.timeout:
+            logger.info(f"Процесс {flow_name} пользователя {update.effective_user.id} "
+                        f"завершен по таймауту")
+            self._evict(user_data, flow_name)
+            self._count('expired')
+            return False
+
+        if not flow.is_alive(user_data):
+            self._evict(user_data, flow_name)
+            self._count('stale')
+            return False
+
+        handler = flow.states.get(user_data.get(FLOW_STATE_KEY))
+        if handler is None:
+            return False
+
+        user_data[FLOW_TOUCHED_KEY] = time.monotonic()
+        self._count('dispatched')
+        await handler(update, context)
+
+        # Обработчик мог удалить данные процесса или очистить user_data
+        if user_data.get(ACTIVE_FLOW_KEY) == flow_name and not flow.is_alive(user_data):
+            self._evict(user_data, flow_name)
+            self._count('finished')
+
+        return True
+
+    def get_stats(self) -> dict:
+        """Счетчики процессов"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['flows'] = len(self._flows)
+        return stats
+
+
+flow_engine = FlowEngine()
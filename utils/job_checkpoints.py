@@ -0,0 +1,29 @@
+# utils/job_checkpoints.py
+"""
+Отметки фоновых задач (таблица job_checkpoints): последний обработанный id,
+с которого задача продолжит работу после перезапуска бота.
+
+Функции принимают курсор вызывающего, чтобы отметка менялась в той же
+транзакции, что и обработанная порция данных.
+"""
+
+
+def get_checkpoint(cursor, job_name: str) -> int:
+    """Последний обработанный id задачи (0 - с начала)"""
+    cursor.execute(
+        "SELECT last_id FROM job_checkpoints WHERE job_name = ?",
+        (job_name,)
+    )
+    row = cursor.fetchone()
+    return row['last_id'] if row else 0
+
+
+def set_checkpoint(cursor, job_name: str, last_id: int) -> None:
+    """Сохранить отметку задачи"""
+    cursor.execute('''
+        INSERT INTO job_checkpoints (job_name, last_id, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(job_name) DO UPDATE SET
+            last_id = excluded.last_id,
+            updated_at = excluded.updated_at
+    ''', (job_name, last_id))
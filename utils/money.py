@@ -0,0 +1,195 @@
+# utils/money.py
+"""
+Денежные суммы в копейках.
+
+В БД суммы хранятся целыми копейками (INTEGER): сложение в UPDATE и SUM()
+в отчетах точные, без накопления ошибки REAL. В коде сумма - неизменяемый
+Money с целым числом копеек; рубли (Decimal) нужны только на вводе и выводе.
+
+Money можно передавать параметром в sqlite3 напрямую (зарегистрирован
+адаптер), строки БД переводятся в Money через money_row().
+"""
+
+import re
+import sqlite3
+import decimal
+from typing import Iterable, Optional
+
+_CENT = decimal.Decimal('0.01')
+_ONE = decimal.Decimal(1)
+_HUNDRED = decimal.Decimal(100)
+
+# "1 234,56", "1234.5", "-100", "+7"
+MONEY_INPUT_RE = re.compile(r'^([+-])?(\d+)(?:[.,](\d{1,2}))?$')
+
+# Денежные колонки (и псевдонимы агрегатов), которые money_row() переводит в Money
+MONEY_COLUMNS = frozenset({
+    # customers
+    'total_purchases', 'total_bonuses', 'available_bonuses',
+    # customer_purchases / bonus_transactions / promo_redemptions
+    'amount', 'bonus_earned', 'bonus_amount',
+    # bonus_programs / bonus_levels
+    'min_purchase_amount', 'max_purchase_amount', 'min_total_purchases', 'next_level_min',
+    # promo_codes
+    'fixed_bonus',
+    # report_watchend / report_expenses
+    'cash_morning', 'cash_wasted', 'cash_online', 'cash_in', 'cash_rest', 'cash_rested',
+})
+
+
+class Money:
+    """Сумма в рублях, хранимая целым числом копеек"""
+
+    __slots__ = ('kopecks',)
+
+    def __init__(self, kopecks: int = 0):
+        object.__setattr__(self, 'kopecks', int(kopecks))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money неизменяем")
+
+    def __reduce__(self):
+        # Money лежит в context.user_data - должен переживать pickle
+        return (Money, (self.kopecks,))
+
+    # ---------- Создание ----------
+
+    @classmethod
+    def parse(cls, text: str) -> 'Money':
+        """Сумма из ввода пользователя: "1 234,56", "1234.5", "100" (ValueError при ошибке)"""
+        match = MONEY_INPUT_RE.match(str(text).strip().replace(' ', '').replace('\u00a0', ''))
+        if not match:
+            raise ValueError(f"Некорректная сумма: {text}")
+
+        sign, rubles, kopecks = match.groups()
+        value = int(rubles) * 100 + int((kopecks or '0').ljust(2, '0'))
+        return cls(-value if sign == '-' else value)
+
+    @classmethod
+    def from_rubles(cls, value) -> 'Money':
+        """Сумма из рублей (int, str, Decimal, float) с округлением до копейки"""
+        rubles = decimal.Decimal(str(value)).quantize(_CENT, rounding=decimal.ROUND_HALF_UP)
+        return cls(int(rubles * _HUNDRED))
+
+    @classmethod
+    def from_db(cls, value) -> 'Money':
+        """Сумма из значения колонки (копейки; None - ноль)"""
+        if value is None:
+            return ZERO
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return cls(value)
+        return cls(round(value))
+
+    # ---------- Значения ----------
+
+    @property
+    def rubles(self) -> decimal.Decimal:
+        return decimal.Decimal(self.kopecks).scaleb(-2)
+
+    def percent(self, percent) -> 'Money':
+        """percent процентов от суммы, с округлением до копейки"""
+        value = decimal.Decimal(self.kopecks) * decimal.Decimal(str(percent)) / _HUNDRED
+        return Money(int(value.quantize(_ONE, rounding=decimal.ROUND_HALF_UP)))
+
+    def percent_of(self, total: 'Money') -> decimal.Decimal:
+        """Доля суммы от total в процентах"""
+        if not total.kopecks:
+            return decimal.Decimal(0)
+        return decimal.Decimal(self.kopecks) * _HUNDRED / decimal.Decimal(total.kopecks)
+
+    # ---------- Арифметика ----------
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.kopecks + other.kopecks)
+        return NotImplemented
+
+    def __radd__(self, other):
+        # sum() начинает с 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.kopecks - other.kopecks)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return Money(self.kopecks * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.kopecks)
+
+    def __abs__(self):
+        return Money(abs(self.kopecks))
+
+    def __bool__(self):
+        return self.kopecks != 0
+
+    # ---------- Сравнение ----------
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.kopecks == other.kopecks
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.kopecks)
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.kopecks < other.kopecks
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, Money):
+            return self.kopecks <= other.kopecks
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, Money):
+            return self.kopecks > other.kopecks
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Money):
+            return self.kopecks >= other.kopecks
+        return NotImplemented
+
+    # ---------- Вывод ----------
+
+    def __str__(self):
+        sign = '-' if self.kopecks < 0 else ''
+        rubles, kopecks = divmod(abs(self.kopecks), 100)
+        return f"{sign}{rubles}.{kopecks:02d}"
+
+    def __format__(self, spec: str) -> str:
+        # f"{money:.2f}" и прочие числовые форматы - как у рублей
+        return format(self.rubles, spec) if spec else str(self)
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+ZERO = Money(0)
+
+sqlite3.register_adapter(Money, lambda money: money.kopecks)
+
+
+def money_row(row, fields: Iterable[str] = MONEY_COLUMNS) -> Optional[dict]:
+    """Строка БД в dict, денежные колонки - в Money"""
+    if row is None:
+        return None
+
+    result = dict(row)
+    for field in fields:
+        if result.get(field) is not None:
+            result[field] = Money.from_db(result[field])
+    return result
@@ -0,0 +1,277 @@
+# utils/outbound.py
+"""
+Исходящая доставка сообщений Telegram.
+
+Все отправки, правки и удаления проходят через общую очередь:
+- общий и поканальный (на чат) лимиты - token bucket, вместо asyncio.sleep в циклах;
+- вызовы в одном чате выполняются по порядку, медленный чат не задерживает другие;
+- несколько правок одного сообщения, ожидающих отправки, сливаются в последнюю;
+- RetryAfter и сетевые ошибки повторяются с задержкой.
+
+Очередь работает с любым объектом с методами send_message/edit_message_text/
+delete_message, поэтому ее можно проверить на поддельном Bot
+(см. benchmarks/bench_outbound.py).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: ~30 сообщений/с на бота и ~1 сообщение/с в чат
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '25'))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))
+OUTBOUND_BACKOFF = 1.0
+
+# Стоимость операции в токенах чата: удаления Telegram ограничивает мягче
+OPERATION_COST = {
+    'send': 1.0,
+    'edit': 1.0,
+    'delete': 1 / 3,
+}
+
+# Окно для расчета текущей пропускной способности (сек)
+THROUGHPUT_WINDOW = 60.0
+
+
+class TokenBucket:
+    """Token bucket с резервированием: токены можно взять в долг и подождать"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Забрать токены; вернуть, сколько секунд нужно подождать"""
+        self._refill(time.monotonic())
+        self.tokens -= cost
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class _Job:
+    """Вызов API, ожидающий отправки"""
+
+    __slots__ = ('func', 'args', 'kwargs', 'future', 'waiters')
+
+    def __init__(self, func: Callable[..., Awaitable], args: tuple, kwargs: dict):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Optional[asyncio.Future] = None
+        self.waiters = 0
+
+
+class _ChatLane:
+    """Очередь одного чата"""
+
+    __slots__ = ('lock', 'bucket', 'pending', 'edits')
+
+    def __init__(self, rate: float, burst: float):
+        self.lock = asyncio.Lock()
+        self.bucket = TokenBucket(rate, burst)
+        self.pending = 0
+        # Правки, ожидающие отправки: ключ сообщения -> задача
+        self.edits: Dict[Hashable, _Job] = {}
+
+
+class OutboundQueue:
+    """Очередь исходящих вызовов Telegram API"""
+
+    def __init__(self, global_rate: float = OUTBOUND_GLOBAL_RATE,
+                 chat_rate: float = OUTBOUND_CHAT_RATE,
+                 chat_burst: float = OUTBOUND_CHAT_BURST,
+                 max_retries: int = OUTBOUND_MAX_RETRIES,
+                 backoff: float = OUTBOUND_BACKOFF):
+        # Без запаса: за любую секунду уходит не больше global_rate вызовов
+        self.global_bucket = TokenBucket(global_rate, 1)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lanes: Dict[Hashable, _ChatLane] = {}
+        self._delivered_at = deque()
+        self._started = time.monotonic()
+        self.stats = {
+            'submitted': 0,
+            'delivered': 0,
+            'failed': 0,
+            'coalesced': 0,
+            'retries': 0,
+            'retry_after': 0,
+            'throttled': 0,
+            'throttle_wait': 0.0,
+            'backlog': 0,
+            'max_backlog': 0,
+        }
+
+    def _lane(self, chat_id: Hashable) -> _ChatLane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            if len(self._lanes) > 1000:
+                self._prune()
+            lane = self._lanes[chat_id] = _ChatLane(self.chat_rate, self.chat_burst)
+        return lane
+
+    def _prune(self) -> None:
+        """Убрать простаивающие чаты с полным запасом токенов"""
+        for chat_id in [chat_id for chat_id, lane in self._lanes.items()
+                        if lane.pending == 0 and lane.bucket.is_full()]:
+            del self._lanes[chat_id]
+
+    async def submit(self, chat_id: Hashable, kind: str, func: Callable[..., Awaitable], /,
+                     *args, coalesce_key: Optional[Hashable] = None, **kwargs) -> Any:
+        """
+        Выполнить вызов API в очереди чата.
+
+        Args:
+            chat_id: Чат, в очереди которого выполняется вызов
+            kind: Тип операции (send, edit, delete)
+            func: Метод Bot/Message/CallbackQuery
+            coalesce_key: Ключ сообщения для слияния правок
+        """
+        stats = self.stats
+        stats['submitted'] += 1
+        lane = self._lane(chat_id)
+
+        if coalesce_key is not None:
+            pending_edit = lane.edits.get(coalesce_key)
+            if pending_edit is not None:
+                # Предыдущая правка еще не отправлена - отправится только последняя
+                pending_edit.func, pending_edit.args, pending_edit.kwargs = func, args, kwargs
+                if pending_edit.future is None:
+                    pending_edit.future = asyncio.get_running_loop().create_future()
+                pending_edit.waiters += 1
+                stats['coalesced'] += 1
+                return await asyncio.shield(pending_edit.future)
+
+        job = _Job(func, args, kwargs)
+        if coalesce_key is not None:
+            lane.edits[coalesce_key] = job
+
+        lane.pending += 1
+        stats['backlog'] += 1
+        if stats['backlog'] > stats['max_backlog']:
+            stats['max_backlog'] = stats['backlog']
+
+        try:
+            async with lane.lock:
+                wait = max(lane.bucket.reserve(OPERATION_COST.get(kind, 1.0)),
+                           self.global_bucket.reserve())
+                if wait > 0:
+                    stats['throttled'] += 1
+                    stats['throttle_wait'] += wait
+                    await asyncio.sleep(wait)
+
+                # С этого момента новые правки сообщения ставятся отдельной задачей
+                if coalesce_key is not None and lane.edits.get(coalesce_key) is job:
+                    del lane.edits[coalesce_key]
+
+                try:
+                    result = await self._deliver(job)
+                except Exception:
+                    stats['failed'] += 1
+                    raise
+
+                stats['delivered'] += 1
+                self._delivered_at.append(time.monotonic())
+                if job.future is not None:
+                    job.future.set_result(result)
+                return result
+
+        except BaseException as e:
+            # Отмена или ошибка (в том числе до отправки) - ожидающие слитых
+            # правок не должны зависнуть
+            if job.future is not None and not job.future.done():
+                if isinstance(e, Exception):
+                    job.future.set_exception(e)
+                else:
+                    job.future.cancel()
+            raise
+        finally:
+            # Задача не дошла до отправки - иначе новые правки слились бы в нее навсегда
+            if coalesce_key is not None and lane.edits.get(coalesce_key) is job:
+                del lane.edits[coalesce_key]
+            lane.pending -= 1
+            stats['backlog'] -= 1
+
+    async def _deliver(self, job: _Job) -> Any:
+        """Вызов с повторами при RetryAfter и сетевых ошибках"""
+        attempt = 0
+        while True:
+            try:
+                return await job.func(*job.args, **job.kwargs)
+            except BadRequest:
+                # Ошибка запроса (в т.ч. подкласс NetworkError) - повтор не поможет
+                raise
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after
+                delay = delay.total_seconds() if hasattr(delay, 'total_seconds') else float(delay)
+                self.stats['retry_after'] += 1
+                logger.warning(f"Telegram просит подождать {delay} с")
+            except NetworkError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Сетевая ошибка при отправке: {e}, повтор через {delay} с")
+
+            attempt += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    # ---------- Операции ----------
+
+    async def send_message(self, bot, chat_id: int, text: str, **kwargs) -> Any:
+        """Отправить сообщение"""
+        return await self.submit(chat_id, 'send', bot.send_message,
+                                 chat_id=chat_id, text=text, **kwargs)
+
+    async def edit_message_text(self, bot, chat_id: int, message_id: int, text: str, **kwargs) -> Any:
+        """Изменить сообщение (правки одного сообщения сливаются)"""
+        return await self.submit(chat_id, 'edit', bot.edit_message_text,
+                                 coalesce_key=message_id,
+                                 chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+
+    async def delete_message(self, bot, chat_id: int, message_id: int) -> Any:
+        """Удалить сообщение"""
+        return await self.submit(chat_id, 'delete', bot.delete_message,
+                                 chat_id=chat_id, message_id=message_id)
+
+    # ---------- Статистика ----------
+
+    def get_stats(self) -> dict:
+        """Пропускная способность и очередь"""
+        now = time.monotonic()
+        while self._delivered_at and now - self._delivered_at[0] > THROUGHPUT_WINDOW:
+            self._delivered_at.popleft()
+
+        stats = dict(self.stats)
+        stats['chats'] = len(self._lanes)
+        stats['chats_waiting'] = sum(1 for lane in self._lanes.values() if lane.pending > 1)
+        stats['throughput'] = stats['delivered'] / max(now - self._started, 1e-9)
+        stats['throughput_recent'] = len(self._delivered_at) / THROUGHPUT_WINDOW
+        return stats
+
+
+outbound = OutboundQueue()
@@ -0,0 +1,60 @@
+# utils/phone.py
+"""
+Нормализация телефонных номеров.
+
+В customers хранятся три представления номера:
+- phone_number - как ввели (для показа);
+- phone_normalized - +7XXXXXXXXXX, если номер распознан, иначе только цифры;
+- phone_reversed - цифры phone_normalized в обратном порядке: поиск
+  по последним цифрам становится поиском по префиксу в индексе.
+"""
+
+import re
+from typing import Optional, Tuple
+
+
+def format_phone(phone_input: str) -> Optional[str]:
+    """Приводит российский номер к виду +7XXXXXXXXXX; None - номер не распознан"""
+    # Удаляем все нецифровые символы
+    digits = re.sub(r'\D', '', phone_input or '')
+
+    # Проверяем длину и формат
+    if len(digits) == 11 and digits.startswith(('8', '7')):
+        return f"+7{digits[1:]}"
+    elif len(digits) == 10:
+        return f"+7{digits}"
+    elif len(digits) == 12 and digits.startswith('7'):
+        return f"+{digits}"
+
+    return None
+
+
+def phone_digits(phone: str) -> str:
+    """Только цифры номера"""
+    return re.sub(r'\D', '', phone or '')
+
+
+def normalize_phone(phone: str) -> str:
+    """Значение для phone_normalized: формат +7..., а для нераспознанных - цифры"""
+    return format_phone(phone) or phone_digits(phone)
+
+
+def reverse_digits(digits: str) -> str:
+    """Цифры в обратном порядке (для phone_reversed)"""
+    return phone_digits(digits)[::-1]
+
+
+def phone_columns(phone: str) -> Tuple[str, str]:
+    """Значения (phone_normalized, phone_reversed) для записи клиента"""
+    normalized = normalize_phone(phone)
+    return normalized, reverse_digits(normalized)
+
+
+def suffix_range(suffix: str) -> Tuple[str, str]:
+    """
+    Границы [low, high) по phone_reversed для номеров, оканчивающихся на suffix.
+    Все значения колонки - цифры, поэтому верхняя граница - следующий символ после последней цифры.
+    """
+    low = reverse_digits(suffix)
+    high = low[:-1] + chr(ord(low[-1]) + 1)
+    return low, high
@@ -0,0 +1,169 @@
+# utils/request_context.py
+"""
+Контекст обработки одного обновления Telegram.
+
+В начале обработки одним запросом загружаются пользователь, его роль и
+связанный клиент. Репозитории и проверки прав берут эти данные из контекста
+вместо повторных запросов к БД. Контекст хранится в contextvars, поэтому
+доступен во всех обработчиках обновления и в потоках БД (см. DBExecutor.run).
+"""
+
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from database import sqlite_read_connection, db_read, add_write_listener
+from utils.money import money_row
+
+logger = logging.getLogger(__name__)
+
+_current_request: ContextVar[Optional["RequestContext"]] = ContextVar("request_context", default=None)
+
+# Поля, которые возвращает CustomerManager.find_customer_by_telegram_id
+CUSTOMER_FIELDS = (
+    'customer_id', 'user_id', 'username', 'phone_number', 'card_number', 'birthday',
+    'registration_date', 'is_active', 'total_purchases', 'total_bonuses',
+    'available_bonuses', 'bonus_program_id', 'program_name', 'base_percent',
+    'role', 'user_created_at',
+)
+
+USER_FIELDS = ('user_id', 'telegram_id', 'username', 'first_name', 'phone_numb', 'is_active')
+
+
+class RequestContext:
+    """Данные пользователя, загруженные один раз на обновление"""
+
+    def __init__(self, telegram_id: int, row: Optional[Dict] = None):
+        self.telegram_id = telegram_id
+        self.role_value: Optional[str] = None
+        self.user: Optional[Dict] = None
+        self.customer: Optional[Dict] = None
+        self.has_snapshot = row is not None
+        self.queries = 1 if row is not None else 0
+        self.served = 0
+
+        if row:
+            # Роль для проверки прав: user_roles по Telegram ID
+            self.role_value = row['user_role']
+            if row['u_user_id'] is not None:
+                self.user = {field: row[f"u_{field}"] for field in USER_FIELDS}
+                self.customer = {field: row[field] for field in CUSTOMER_FIELDS}
+
+    def serve(self) -> None:
+        """Отметить обращение, обслуженное без запроса к БД"""
+        self.served += 1
+
+    def drop_snapshot(self) -> None:
+        """Данные пользователя/клиента могли измениться - дальше читаем из БД"""
+        self.has_snapshot = False
+        self.user = None
+        self.customer = None
+
+    def set_role(self, role_value: Optional[str]) -> None:
+        self.role_value = role_value
+
+
+# Общая статистика экономии запросов
+_stats_lock = threading.Lock()
+REQUEST_STATS = {
+    'updates': 0,
+    'context_queries': 0,
+    'lookups_served': 0,
+}
+
+
+@db_read
+def load_request_context(telegram_id: int) -> RequestContext:
+    """Загружает пользователя, роль и клиента одним запросом"""
+    try:
+        with sqlite_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT
+                    ur.role AS user_role,
+                    u.user_id AS u_user_id,
+                    u.telegram_id AS u_telegram_id,
+                    u.username AS u_username,
+                    u.first_name AS u_first_name,
+                    u.phone_numb AS u_phone_numb,
+                    u.is_active AS u_is_active,
+                    c.customer_id,
+                    c.user_id,
+                    c.username,
+                    c.phone_number,
+                    c.card_number,
+                    c.birthday,
+                    c.registration_date,
+                    c.is_active,
+                    c.total_purchases,
+                    c.total_bonuses,
+                    c.available_bonuses,
+                    c.bonus_program_id,
+                    bp.program_name,
+                    bp.base_percent,
+                    cur.role,
+                    u.created_at AS user_created_at
+                FROM (SELECT ? AS telegram_id) t
+                LEFT JOIN user_roles ur ON ur.user_id = t.telegram_id
+                LEFT JOIN users u ON u.telegram_id = t.telegram_id
+                LEFT JOIN customers c ON c.user_id = u.user_id
+                LEFT JOIN bonus_programs bp ON c.bonus_program_id = bp.program_id
+                -- как в find_customer_by_telegram_id: роль по users.user_id
+                LEFT JOIN user_roles cur ON cur.user_id = u.user_id
+            ''', (telegram_id,))
+
+            return RequestContext(telegram_id, money_row(cursor.fetchone()))
+
+    except Exception as e:
+        logger.error(f"Ошибка загрузки контекста пользователя {telegram_id}: {e}")
+        return RequestContext(telegram_id)
+
+
+def start_request(context: Optional[RequestContext]) -> None:
+    """Сделать контекст текущим для обрабатываемого обновления"""
+    _current_request.set(context)
+
+
+def finish_request() -> Optional[RequestContext]:
+    """Завершить обработку обновления и учесть статистику"""
+    context = _current_request.get()
+    _current_request.set(None)
+
+    if context is not None:
+        with _stats_lock:
+            REQUEST_STATS['updates'] += 1
+            REQUEST_STATS['context_queries'] += context.queries
+            REQUEST_STATS['lookups_served'] += context.served
+    return context
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Текущий контекст (None вне обработки обновления)"""
+    return _current_request.get()
+
+
+def current_request(telegram_id: int) -> Optional[RequestContext]:
+    """Текущий контекст, если он относится к указанному пользователю"""
+    context = _current_request.get()
+    if context is not None and context.telegram_id == telegram_id:
+        return context
+    return None
+
+
+def get_request_stats() -> Dict:
+    """Статистика: сколько обращений к БД заменил контекст"""
+    with _stats_lock:
+        stats = dict(REQUEST_STATS)
+    stats['queries_saved'] = stats['lookups_served'] - stats['context_queries']
+    stats['saved_per_update'] = stats['queries_saved'] / stats['updates'] if stats['updates'] else 0.0
+    return stats
+
+
+def _on_write() -> None:
+    context = _current_request.get()
+    if context is not None:
+        context.drop_snapshot()
+
+
+add_write_listener(_on_write)
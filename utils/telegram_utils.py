@@ -1,6 +1,7 @@
 # utils/telegram_utils.py
 from telegram import Update, InlineKeyboardMarkup, ReplyKeyboardMarkup
 import logging
+from utils.outbound import outbound
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,10 @@ async def send_or_edit_message(
         reply_markup: Разметка клавиатуры
         parse_mode: Режим парсинга (Markdown, HTML)
         delete_previous: Удалить предыдущее сообщение (только для callback -> message)
+
+    Все вызовы идут через очередь outbound: лимиты, повторы, слияние правок.
     """
+    chat_id = update.effective_chat.id
     try:
         if update.callback_query:
             # Определяем тип клавиатуры
@@ -30,31 +34,36 @@ async def send_or_edit_message(
             
             if delete_previous or is_reply_keyboard:
                 # Для обычных клавиатур или при явном указании удаляем старое сообщение
-                await update.callback_query.delete_message()
+                await outbound.submit(chat_id, 'delete', update.callback_query.delete_message)
                 # Отправляем новое сообщение (БЕЗ reply_to_message_id)
-                await update.callback_query.message.chat.send_message(
+                await outbound.submit(
+                    chat_id, 'send', update.callback_query.message.chat.send_message,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
                 )
             elif is_inline_keyboard:
                 # Для inline-клавиатур редактируем существующее сообщение
-                await update.callback_query.edit_message_text(
+                await outbound.submit(
+                    chat_id, 'edit', update.callback_query.edit_message_text,
+                    coalesce_key=update.callback_query.message.message_id,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
                 )
             else:
                 # По умолчанию удаляем и отправляем новое
-                await update.callback_query.delete_message()
-                await update.callback_query.message.chat.send_message(
+                await outbound.submit(chat_id, 'delete', update.callback_query.delete_message)
+                await outbound.submit(
+                    chat_id, 'send', update.callback_query.message.chat.send_message,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
                 )
         else:
             # Отправляем новое сообщение
-            await update.message.reply_text(
+            await outbound.submit(
+                chat_id, 'send', update.message.reply_text,
                 text=text,
                 reply_markup=reply_markup,
                 parse_mode=parse_mode
@@ -65,13 +74,15 @@ async def send_or_edit_message(
         try:
             if update.callback_query:
                 # Пытаемся просто отправить сообщение без привязки к удаленному
-                await update.callback_query.message.chat.send_message(
+                await outbound.submit(
+                    chat_id, 'send', update.callback_query.message.chat.send_message,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
                 )
             else:
-                await update.effective_message.reply_text(
+                await outbound.submit(
+                    chat_id, 'send', update.effective_message.reply_text,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
@@ -0,0 +1,151 @@
+# utils/update_processor.py
+"""
+Параллельная обработка обновлений с сохранением порядка для каждого пользователя.
+
+Обновления разных пользователей обрабатываются одновременно (не больше
+UPDATE_CONCURRENCY за раз), обновления одного пользователя (или чата, если
+пользователя нет) - строго по очереди. Поэтому context.user_data, активный
+процесс flow_engine и состояния ConversationHandler одного пользователя
+никогда не изменяются двумя обработчиками сразу.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Сколько обновлений обрабатывается одновременно (для всех пользователей)
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '8'))
+
+# Лимит семафора базового process_update. Он занимается до очереди
+# пользователя, поэтому не ограничивает: лимит UPDATE_CONCURRENCY
+# применяется в do_process_update, когда очередь пользователя уже дошла
+_BASE_CONCURRENCY = 1 << 30
+
+
+class _UserLane:
+    """Очередь обновлений одного пользователя"""
+
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обработчик обновлений: параллельно для разных пользователей,
+    последовательно для одного.
+
+    Сначала обновление ждет своей очереди у пользователя и только потом
+    занимает общий слот (_slots), поэтому очередь одного пользователя не
+    отнимает слоты у остальных. Семафор базового process_update занимается
+    раньше очереди пользователя - его лимит поднят до _BASE_CONCURRENCY.
+    """
+
+    def __init__(self, max_concurrent_updates: int = UPDATE_CONCURRENCY):
+        super().__init__(_BASE_CONCURRENCY)
+        self.limit = max_concurrent_updates
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._lanes: Dict[Hashable, _UserLane] = {}
+        # Обновлений внутри do_process_update: ждут очереди или слота и выполняются
+        self._in_progress = 0
+        self._metrics = {
+            'processed': 0,
+            'failed': 0,
+            'active': 0,
+            'max_active': 0,
+            'max_user_queue': 0,
+            'exec_total': 0.0,
+        }
+
+    @staticmethod
+    def _update_key(update: object) -> Optional[Hashable]:
+        """Ключ очереди: пользователь, иначе чат. None - порядок не важен"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return ('user', update.effective_user.id)
+        if update.effective_chat:
+            return ('chat', update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Вызывается базовым process_update: обновление ждет своей очереди
+        у пользователя, затем общего слота.
+        """
+        self._in_progress += 1
+        try:
+            await self._process(update, coroutine)
+        finally:
+            self._in_progress -= 1
+
+    async def _process(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._update_key(update)
+        if key is None:
+            async with self._slots:
+                await self._run(coroutine)
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _UserLane()
+        lane.pending += 1
+        if lane.pending > self._metrics['max_user_queue']:
+            self._metrics['max_user_queue'] = lane.pending
+
+        try:
+            async with lane.lock:
+                async with self._slots:
+                    await self._run(coroutine)
+        finally:
+            lane.pending -= 1
+            if lane.pending == 0 and self._lanes.get(key) is lane:
+                del self._lanes[key]
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        metrics = self._metrics
+        metrics['active'] += 1
+        if metrics['active'] > metrics['max_active']:
+            metrics['max_active'] = metrics['active']
+
+        started = time.perf_counter()
+        try:
+            await coroutine
+            metrics['processed'] += 1
+        except Exception:
+            metrics['failed'] += 1
+            raise
+        finally:
+            metrics['active'] -= 1
+            metrics['exec_total'] += time.perf_counter() - started
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        logger.info(f"Метрики обработки обновлений: {self.get_metrics()}")
+
+    def get_metrics(self) -> dict:
+        """Метрики: параллельность и длина очередей пользователей"""
+        metrics = dict(self._metrics)
+        queues = [lane.pending for lane in self._lanes.values()]
+        done = metrics['processed'] + metrics['failed']
+
+        metrics['limit'] = self.limit
+        metrics['users_in_queue'] = len(queues)
+        metrics['user_queue_now'] = max(queues, default=0)
+        metrics['waiting'] = self._in_progress - metrics['active']
+        metrics['exec_avg'] = metrics['exec_total'] / done if done else 0.0
+        return metrics
+
+
+update_processor = PerUserUpdateProcessor()